@@ -7,6 +7,7 @@
 """
 
 import asyncio
+import json
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
@@ -26,6 +27,14 @@ class AutoSaveManager:
         self.last_save_time = datetime.now()
         self.auto_save_task = None
         self.is_running = False
+        
+        # Что уже записано в БД: версии игр, маппинг игроков, остальное состояние
+        self._saved_versions: Dict[int, int] = {}
+        self._saved_player_games: Dict[int, int] = {}
+        self._saved_authorized_chats: Optional[set] = None
+        self._saved_general_state: Optional[str] = None
+        self._synced = False
+        self.last_saved_games = 0
     
     def start_auto_save(self):
         """Запускает автоматическое сохранение"""
@@ -78,21 +87,79 @@ class AutoSaveManager:
         except Exception as e:
             self.logger.error(f"❌ AutoSaveManager: Ошибка сохранения состояния: {e}")
     
+    def _owns_chat(self, chat_id: int) -> bool:
+        """Принадлежит ли чат этому процессу (в режиме шардов - своему шарду)"""
+        shard = getattr(self.bot, 'shard', None)
+        if shard is None:
+            return True
+        from chat_sharding import shard_for
+        return shard_for(chat_id, shard[1]) == shard[0]
+    
+    async def _sync_saved_keys(self):
+        """
+        Первое сохранение: узнает, какие игры уже лежат в БД
+        
+        Игры своего процесса, которых больше нет в памяти, будут удалены,
+        игры других шардов не затрагиваются.
+        """
+        saved_chats, saved_players = await asyncio.to_thread(state_persistence.load_saved_keys)
+        # Версия -1 никогда не совпадает с версией игры: такие записи либо перезапишутся, либо удалятся
+        self._saved_versions = {chat_id: -1 for chat_id in saved_chats if self._owns_chat(chat_id)}
+        self._saved_player_games = {user_id: chat_id for user_id, chat_id in saved_players.items()
+                                    if self._owns_chat(chat_id)}
+        self._synced = True
+    
     async def _save_active_games(self):
-        """Сохраняет активные игры"""
+        """
+        Сохраняет изменившиеся активные игры
+        
+        Снимок измененных игр (Game.version отличается от записанной) делается
+        в цикле событий, запись одной транзакцией - в отдельном потоке.
+        """
         try:
-            if hasattr(self.bot, 'games') and hasattr(self.bot, 'player_games'):
-                success = state_persistence.save_active_games(
-                    self.bot.games,
-                    self.bot.player_games,
-                    getattr(self.bot, 'night_actions', {}),
-                    getattr(self.bot, 'night_interfaces', {})
-                )
-                
-                if success:
-                    self.logger.debug("✅ AutoSaveManager: Активные игры сохранены")
-                else:
-                    self.logger.warning("⚠️ AutoSaveManager: Не удалось сохранить активные игры")
+            if not (hasattr(self.bot, 'games') and hasattr(self.bot, 'player_games')):
+                return
+            if not state_persistence.db:
+                return
+            if not self._synced:
+                await self._sync_saved_keys()
+            
+            games = self.bot.games
+            night_actions = getattr(self.bot, 'night_actions', {})
+            night_interfaces = getattr(self.bot, 'night_interfaces', {})
+            
+            versions = {chat_id: game.version for chat_id, game in games.items()
+                        if self._saved_versions.get(chat_id) != game.version}
+            removed_chats = [chat_id for chat_id in self._saved_versions if chat_id not in games]
+            player_games = dict(self.bot.player_games)
+            changed_players = {user_id: chat_id for user_id, chat_id in player_games.items()
+                               if self._saved_player_games.get(user_id) != chat_id}
+            removed_users = [user_id for user_id in self._saved_player_games if user_id not in player_games]
+            
+            if not (versions or removed_chats or changed_players or removed_users):
+                self.last_saved_games = 0
+                return
+            
+            game_rows = [state_persistence.build_game_row(games[chat_id], night_actions, night_interfaces)
+                         for chat_id in versions]
+            player_rows = [state_persistence.build_player_game_row(user_id, chat_id, games)
+                           for user_id, chat_id in changed_players.items()]
+            
+            success = await asyncio.to_thread(
+                state_persistence.save_games_delta, game_rows, removed_chats, player_rows, removed_users
+            )
+            
+            if success:
+                self._saved_versions.update(versions)
+                for chat_id in removed_chats:
+                    self._saved_versions.pop(chat_id, None)
+                self._saved_player_games.update(changed_players)
+                for user_id in removed_users:
+                    self._saved_player_games.pop(user_id, None)
+                self.last_saved_games = len(game_rows)
+                self.logger.debug(f"✅ AutoSaveManager: Сохранено игр: {len(game_rows)}, удалено: {len(removed_chats)}")
+            else:
+                self.logger.warning("⚠️ AutoSaveManager: Не удалось сохранить активные игры")
                     
         except Exception as e:
             self.logger.error(f"❌ AutoSaveManager: Ошибка сохранения активных игр: {e}")
@@ -101,9 +168,13 @@ class AutoSaveManager:
         """Сохраняет авторизованные чаты"""
         try:
             if hasattr(self.bot, 'authorized_chats'):
-                success = state_persistence.save_authorized_chats(self.bot.authorized_chats)
+                authorized_chats = set(self.bot.authorized_chats)
+                if authorized_chats == self._saved_authorized_chats:
+                    return
+                success = await asyncio.to_thread(state_persistence.save_authorized_chats, authorized_chats)
                 
                 if success:
+                    self._saved_authorized_chats = authorized_chats
                     self.logger.debug("✅ AutoSaveManager: Авторизованные чаты сохранены")
                 else:
                     self.logger.warning("⚠️ AutoSaveManager: Не удалось сохранить авторизованные чаты")
@@ -115,16 +186,21 @@ class AutoSaveManager:
         """Сохраняет общее состояние бота"""
         try:
             general_state = {
-                'last_save_time': self.last_save_time.isoformat(),
                 'bot_token': getattr(self.bot, 'bot_token', None),
                 'global_settings': getattr(self.bot, 'global_settings', {}).__dict__ if hasattr(self.bot, 'global_settings') else {},
                 'no_exile_messages': getattr(self.bot, 'no_exile_messages', []),
                 'no_kill_messages': getattr(self.bot, 'no_kill_messages', [])
             }
             
-            success = state_persistence.save_bot_state('general', general_state)
+            # Время сохранения меняется всегда - сравниваем состояние без него
+            snapshot = json.dumps(general_state, ensure_ascii=False, sort_keys=True, default=str)
+            if snapshot == self._saved_general_state:
+                return
+            general_state['last_save_time'] = self.last_save_time.isoformat()
+            success = await asyncio.to_thread(state_persistence.save_bot_state, 'general', general_state)
             
             if success:
+                self._saved_general_state = snapshot
                 self.logger.debug("✅ AutoSaveManager: Общее состояние сохранено")
             else:
                 self.logger.warning("⚠️ AutoSaveManager: Не удалось сохранить общее состояние")
@@ -291,5 +367,7 @@ class AutoSaveManager:
             'is_running': self.is_running,
             'last_save_time': self.last_save_time.isoformat(),
             'save_interval': self.save_interval,
+            'tracked_games': len(self._saved_versions),
+            'last_saved_games': self.last_saved_games,
             'time_since_last_save': (datetime.now() - self.last_save_time).total_seconds()
         }
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк бинарного формата снимков игры против текущего пути через JSON
+
+Сравнивает для игр на 12 игроков в разгар партии (роли, смерти, голоса,
+ночные цели):
+    - JSON: json.dumps(Game.to_dict()) / Game.from_dict(json.loads(...)),
+      как в save_game_state и state_persistence;
+    - бинарный формат: game_codec.encode_game / decode_game
+      (дополнительно сохраняет ночные цели NightActions и все поля игроков).
+
+Отчет: средний размер снимка, время кодирования и декодирования одной игры.
+
+Запуск:
+    python benchmark_game_codec.py --games 200 --rounds 20
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from game_codec import decode_game, encode_game
+from game_logic import Game, GamePhase
+from night_actions import NightActions
+
+
+def make_games(count: int, players: int, seed: int):
+    """Игры в фазе голосования со случайными смертями, кражами, голосами и ночными целями"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    games = []
+    for n in range(count):
+        game = Game(chat_id=-1001000000000 - n, thread_id=rng.choice([None, rng.randrange(1, 10000)]),
+                    is_test_mode=False, creator_id=rng.randrange(10**8, 10**10))
+        for _ in range(players):
+            game.add_player(rng.randrange(10**8, 10**10), f"player_{rng.randrange(10**6)}")
+        game.assign_roles()
+        game.phase = GamePhase.VOTING
+        game.current_round = rng.randrange(1, 8)
+        game.game_start_time = datetime.now() - timedelta(minutes=rng.randrange(60))
+        game.phase_end_time = datetime.now() + timedelta(seconds=120)
+        game.pinned_message_id = rng.randrange(10**6)
+
+        ids = list(game.players)
+        for user_id in rng.sample(ids, 3):
+            game.players[user_id].die("wolf")
+        for user_id in rng.sample(ids, 4):
+            game.players[user_id].supplies = rng.randrange(3)
+            game.players[user_id].stolen_supplies = rng.randrange(3)
+        alive = [p.user_id for p in game.get_alive_players()]
+        game.votes = {voter: rng.choice(alive + [None]) for voter in rng.sample(alive, len(alive) // 2)}
+
+        night_actions = NightActions(game)
+        night_actions.wolf_targets = {alive[0]: alive[1]}
+        night_actions.fox_targets = {alive[2]: alive[3]}
+        games.append((game, night_actions))
+    return games
+
+
+def measure(func, items, rounds: int) -> float:
+    """Среднее время одного вызова в микросекундах"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - started) / (rounds * len(items)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бинарный формат снимков игры против JSON")
+    parser.add_argument("--games", type=int, default=200, help="Количество игр")
+    parser.add_argument("--players", type=int, default=12, help="Игроков в игре")
+    parser.add_argument("--rounds", type=int, default=20, help="Повторов замера")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    games = make_games(args.games, args.players, args.seed)
+
+    json_blobs = [json.dumps(game.to_dict()) for game, _ in games]
+    binary_blobs = [encode_game(game, night_actions) for game, night_actions in games]
+
+    json_size = sum(len(blob.encode('utf-8')) for blob in json_blobs) / len(games)
+    binary_size = sum(len(blob) for blob in binary_blobs) / len(games)
+
+    json_encode = measure(lambda item: json.dumps(item[0].to_dict()), games, args.rounds)
+    json_decode = measure(lambda blob: Game.from_dict(json.loads(blob)), json_blobs, args.rounds)
+    binary_encode = measure(lambda item: encode_game(*item), games, args.rounds)
+    binary_decode = measure(decode_game, binary_blobs, args.rounds)
+
+    print(f"🚀 Снимки {args.games} игр на {args.players} игроков ({args.rounds} повторов)\n")
+    print(f"{'Формат':<10} {'Размер, байт':>14} {'Кодирование, мкс':>18} {'Декодирование, мкс':>20}")
+    print(f"{'JSON':<10} {json_size:>14.0f} {json_encode:>18.1f} {json_decode:>20.1f}")
+    print(f"{'Бинарный':<10} {binary_size:>14.0f} {binary_encode:>18.1f} {binary_decode:>20.1f}")
+    print(f"\n📊 Размер меньше в {json_size / binary_size:.1f} раза, кодирование быстрее в "
+          f"{json_encode / binary_encode:.1f} раза, декодирование - в {json_decode / binary_decode:.1f} раза")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Микро-бенчмарк выборок живых игроков: индексы Game против перебора self.players
+
+Имитирует типичную нагрузку фазы: для каждого игрока строятся списки целей
+(get_alive_players, get_players_by_role) и проверяется конец игры.
+
+Запуск:
+    python benchmark_game_indexes.py --sizes 12 50 200 1000
+"""
+
+import argparse
+import random
+import sys
+import timeit
+
+from game_logic import Game, Player, Role, Team
+
+
+def make_game(size: int, seed: int) -> Game:
+    """Игра на size игроков с распределенными ролями и четвертью погибших"""
+    rng = random.Random(seed)
+    game = Game(chat_id=-100)
+    for user_id in range(1, size + 1):
+        game.players[user_id] = Player(user_id=user_id, username=f"user{user_id}")
+    game._assign_roles_to_players(list(game.players.values()),
+                                  [(Role.WOLF, Team.PREDATORS)] * (size // 4) +
+                                  [(Role.FOX, Team.PREDATORS)] +
+                                  [(Role.HARE, Team.HERBIVORES)] * size)
+    for player in rng.sample(list(game.players.values()), size // 4):
+        player.die()
+    return game
+
+
+def phase_scan(game: Game):
+    """Выборки перебором, как до индексов"""
+    players = game.players.values()
+    for _ in range(len(game.players)):
+        [p for p in players if p.is_alive]
+        [p for p in players if p.role == Role.WOLF and p.is_alive]
+        predators = len([p for p in players if p.team == Team.PREDATORS and p.is_alive])
+        herbivores = len([p for p in players if p.team == Team.HERBIVORES and p.is_alive])
+        predators >= herbivores
+
+
+def phase_indexed(game: Game):
+    """Те же выборки через индексы Game"""
+    for _ in range(len(game.players)):
+        game.get_alive_players()
+        game.get_players_by_role(Role.WOLF)
+        game.check_game_end()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк индексов игры")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 50, 200, 1000],
+                        help="Размеры игр (12 - обычная игра, больше - пользовательские)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("🚀 Бенчмарк индексов игры (выборки на одну фазу, лучший из прогонов)\n")
+    print(f"  {'Игроков':>8} {'Перебор, мкс':>14} {'Индексы, мкс':>14} {'Ускорение':>10}")
+    for size in args.sizes:
+        game = make_game(size, args.seed)
+        number = max(1, 20000 // size)
+        scan = min(timeit.repeat(lambda: phase_scan(game), number=number, repeat=args.repeat)) / number
+        indexed = min(timeit.repeat(lambda: phase_indexed(game), number=number, repeat=args.repeat)) / number
+        print(f"  {size:>8} {scan * 1e6:>14.1f} {indexed * 1e6:>14.1f} {scan / indexed:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк памяти: сколько байт занимает одна игра в ForestWolvesBot.games
+при 1k/10k одновременных игр
+
+Каждая игра - 12 игроков с распределенными ролями, как после /start_game.
+
+Запуск:
+    python benchmark_game_memory.py --games 1000 10000
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from game_logic import Game, GameStatistics, Player, Role, Team
+
+PLAYERS_PER_GAME = 12
+ROLES = ([(Role.WOLF, Team.PREDATORS)] * 3 + [(Role.FOX, Team.PREDATORS), (Role.MOLE, Team.HERBIVORES)] +
+         [(Role.BEAVER, Team.HERBIVORES)] * 2 + [(Role.HARE, Team.HERBIVORES)] * 5)
+
+
+def make_games(count: int) -> dict:
+    """Создает count игр по 12 игроков"""
+    games = {}
+    for index in range(count):
+        chat_id = -1_000_000_000_000 - index
+        game = Game(chat_id=chat_id, is_test_mode=False)
+        for offset, (role, team) in enumerate(ROLES):
+            user_id = index * PLAYERS_PER_GAME + offset + 1
+            game.players[user_id] = Player(user_id=user_id, username=f"user{user_id}", role=role, team=team)
+        games[chat_id] = game
+    return games
+
+
+def measure(count: int) -> float:
+    """Возвращает байт на игру по данным tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = make_games(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк памяти игр")
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    player = Player(user_id=1, username="user1")
+    print("🚀 Бенчмарк памяти игр\n")
+    print(f"  Player: __slots__={hasattr(Player, '__slots__')}, __dict__={hasattr(player, '__dict__')}, "
+          f"{sys.getsizeof(player)} байт на объект")
+    print(f"  GameStatistics: __slots__={hasattr(GameStatistics, '__slots__')}, "
+          f"{sys.getsizeof(GameStatistics())} байт на объект\n")
+
+    for count in args.games:
+        per_game = measure(count)
+        print(f"  {count:>6} игр: {per_game:>8.0f} байт/игра, "
+              f"{per_game / PLAYERS_PER_GAME:>6.0f} байт/игрок, всего {per_game * count / 2**20:.1f} МиБ")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк покупок в магазине: задержка и пропускная способность buy_item
+при параллельных покупателях
+
+Запуск (нужна тестовая PostgreSQL, данные бенчмарка удаляются после прогона):
+    DATABASE_URL=postgresql://... python benchmark_purchases.py --buyers 8 --purchases 50
+
+Режимы:
+    spread - каждый покупатель покупает со своего счета
+    hot    - все покупатели списывают с одного счета (проверка отсутствия ухода в минус)
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database_psycopg2
+from database_psycopg2 import init_db, close_db, execute_query, execute_many, fetch_one, buy_item
+
+BENCH_ITEM = "🧪 Бенчмарк-предмет"
+BENCH_USER_BASE = -7_000_000_000  # Отрицательные ID не пересекаются с реальными пользователями Telegram
+
+
+def setup(user_ids, balance: int, price: int):
+    """Создает тестовых пользователей и предмет магазина"""
+    execute_many(
+        "INSERT INTO users (user_id, username, balance) VALUES (%s, %s, %s) "
+        "ON CONFLICT (user_id) DO UPDATE SET balance = EXCLUDED.balance",
+        [(user_id, f"bench_{user_id}", balance) for user_id in user_ids]
+    )
+    execute_query("DELETE FROM shop WHERE item_name = %s", (BENCH_ITEM,))
+    execute_query("INSERT INTO shop (item_name, price, description) VALUES (%s, %s, %s)",
+                  (BENCH_ITEM, price, "Предмет для бенчмарка"))
+
+
+def cleanup(user_ids):
+    """Удаляет все данные бенчмарка"""
+    ids = list(user_ids)
+    execute_query("DELETE FROM purchases WHERE user_id = ANY(%s)", (ids,))
+    execute_query("DELETE FROM inventory WHERE user_id = ANY(%s)", (ids,))
+    execute_query("DELETE FROM users WHERE user_id = ANY(%s)", (ids,))
+    execute_query("DELETE FROM shop WHERE item_name = %s", (BENCH_ITEM,))
+
+
+def run(mode: str, buyers: int, purchases: int, price: int):
+    """Прогоняет бенчмарк и печатает отчет"""
+    if mode == "hot":
+        user_ids = [BENCH_USER_BASE]
+        # Денег хватает только на половину покупок: остальные должны быть отклонены
+        balance = price * buyers * purchases // 2
+    else:
+        user_ids = [BENCH_USER_BASE - i for i in range(buyers)]
+        balance = price * purchases
+
+    setup(user_ids, balance, price)
+    latencies = []
+    successes = 0
+
+    def buyer(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        local = []
+        ok = 0
+        for _ in range(purchases):
+            started = time.perf_counter()
+            result = buy_item(user_id, BENCH_ITEM, price)
+            local.append(time.perf_counter() - started)
+            ok += 1 if result['success'] else 0
+        return local, ok
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=buyers) as executor:
+            for local, ok in executor.map(buyer, range(buyers)):
+                latencies.extend(local)
+                successes += ok
+        elapsed = time.perf_counter() - started
+
+        totals = fetch_one(
+            "SELECT COALESCE(SUM(balance), 0) AS balance, MIN(balance) AS min_balance, "
+            "(SELECT COALESCE(SUM(count), 0) FROM inventory WHERE user_id = ANY(%s) AND item_name = %s) AS items "
+            "FROM users WHERE user_id = ANY(%s)",
+            (user_ids, BENCH_ITEM, user_ids)
+        )
+    finally:
+        cleanup(user_ids)
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"📊 Режим: {mode}, покупателей: {buyers}, покупок на покупателя: {purchases}")
+    print(f"   Всего попыток: {total}, успешных: {successes}")
+    print(f"   Пропускная способность: {total / elapsed:.1f} покупок/с")
+    print(f"   Задержка p50: {statistics.median(latencies) * 1000:.2f} мс, "
+          f"p95: {latencies[int(total * 0.95) - 1] * 1000:.2f} мс, "
+          f"max: {latencies[-1] * 1000:.2f} мс")
+
+    spent = len(user_ids) * balance - int(totals['balance'])
+    consistent = (
+        int(totals['min_balance']) >= 0
+        and int(totals['items']) == successes
+        and spent == successes * price
+    )
+    print(f"   Согласованность (баланс >= 0, списано = куплено): {'✅' if consistent else '❌'}")
+    return consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк атомарных покупок")
+    parser.add_argument("--buyers", type=int, default=8,
+                        help="Количество параллельных покупателей (не больше размера пула, 10)")
+    parser.add_argument("--purchases", type=int, default=50, help="Покупок на одного покупателя")
+    parser.add_argument("--price", type=int, default=10, help="Цена тестового предмета")
+    parser.add_argument("--mode", choices=["spread", "hot", "all"], default="all")
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        print("❌ Установите DATABASE_URL тестовой базы данных")
+        return 1
+
+    print("🚀 Бенчмарк покупок в магазине\n")
+    init_db()
+    database_psycopg2.create_tables()
+    try:
+        modes = ["spread", "hot"] if args.mode == "all" else [args.mode]
+        results = [run(mode, args.buyers, args.purchases, args.price) for mode in modes]
+    finally:
+        close_db()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
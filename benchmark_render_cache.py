@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк кэша клавиатур фазы: время подготовки личных сообщений в начале фазы
+
+Сравниваются два способа для N игр по P игроков:
+    - «По игроку» - как раньше: для каждого получателя заново собираются
+      кнопки целей, имя каждой цели запрашивается отдельно, callback_data
+      выбирается цепочкой if/elif по типу действия;
+    - «Кэш фазы» - GameRenderCache: строки целей строятся один раз на фазу,
+      клавиатура игрока получается выборкой из них.
+
+Имя на кнопке получается через функцию с задержкой --lookup-us (запрос
+профиля/ника в bot.get_display_name). Отчет: время на фазу одной игры и
+количество запросов имени.
+
+Запуск:
+    python benchmark_render_cache.py --games 200 --players 12
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from game_logic import Game, Role
+from night_actions import NightActions
+from render_cache import GameRenderCache, role_info, role_intro
+
+
+def make_games(count: int, players: int):
+    """Игры в начале ночи с ночными действиями"""
+    games = []
+    for n in range(count):
+        game = Game(chat_id=-(n + 1), creator_id=1)
+        for user_id in range(1, players + 1):
+            game.add_player(user_id, f"user{user_id}")
+        game.assign_roles()
+        game.start_night()
+        games.append((game, NightActions(game)))
+    return games
+
+
+def make_lookup(delay_us: float, counter: list):
+    """Имя игрока с имитацией запроса профиля"""
+    delay = delay_us / 1_000_000
+
+    def lookup(user_id, username=None, first_name=None):
+        counter[0] += 1
+        if delay:
+            deadline = time.perf_counter() + delay
+            while time.perf_counter() < deadline:
+                pass
+        return f"@{username}"
+    return lookup
+
+
+def legacy_phase(game: Game, night_actions: NightActions, lookup):
+    """Роли и меню голосования, собранные отдельно для каждого игрока (прежний код bot.py)"""
+    messages = []
+    for player in game.get_alive_players():
+        info = role_info(player.role)
+        team_name = "🦁 Хищники" if player.team.name == "PREDATORS" else "🌿 Травоядные"
+        text = (f"🎭 Ваша роль в игре 'Лес и Волки':\n\n👤 {info['name']}\n🏴 Команда: {team_name}\n\n"
+                f"📖 Описание:\n{info['description']}\n\n🌙 Выберите действие:")
+        keyboard = []
+        if player.role == Role.HARE:
+            keyboard = [[InlineKeyboardButton("😴 Спать", callback_data=f"hare_skip_{player.user_id}")]]
+        else:
+            actions = night_actions.get_player_actions(player.user_id)
+            if actions and actions.get("targets"):
+                for target in actions["targets"]:
+                    mark = "✅ " if actions.get("current_target") == target.user_id else ""
+                    name = lookup(target.user_id, target.username, target.first_name)
+                    if actions['type'] == 'wolf':
+                        callback_data = f"wolf_kill_{target.user_id}"
+                    elif actions['type'] == 'fox':
+                        callback_data = f"fox_steal_{target.user_id}"
+                    elif actions['type'] == 'beaver':
+                        callback_data = f"beaver_help_{target.user_id}"
+                    elif actions['type'] == 'mole':
+                        callback_data = f"mole_check_{target.user_id}"
+                    else:
+                        callback_data = f"night_{actions['type']}_{target.user_id}"
+                    keyboard.append([InlineKeyboardButton(f"{mark}{name}", callback_data=callback_data)])
+                keyboard.append([InlineKeyboardButton("⏭️ Пропустить ход", callback_data=f"{actions['type']}_skip")])
+        messages.append((text, InlineKeyboardMarkup(keyboard)))
+
+    alive = game.get_alive_players()
+    for voter in alive:
+        keyboard = [[InlineKeyboardButton(f"🗳️ {lookup(p.user_id, p.username, None)}", callback_data=f"vote_{p.user_id}")]
+                    for p in alive if p.user_id != voter.user_id]
+        keyboard.append([InlineKeyboardButton("⏭️ Пропустить голосование", callback_data="vote_skip")])
+        messages.append(InlineKeyboardMarkup(keyboard))
+    return messages
+
+
+def cached_phase(game: Game, night_actions: NightActions, lookup):
+    """Роли и меню голосования через кэш фазы (текущий код bot.py)"""
+    render = GameRenderCache(game, lambda player: lookup(player.user_id, player.username, player.first_name))
+    messages = [(role_intro(player.role, player.team),
+                 render.night_markup(player, night_actions.get_player_actions(player.user_id)))
+                for player in game.get_alive_players()]
+    messages.extend(render.voting_markup(voter.user_id) for voter in game.get_alive_players())
+    return messages
+
+
+def measure(phase, games, lookup, counter):
+    """Среднее время на игру (мс) и запросов имени на игру"""
+    counter[0] = 0
+    started = time.perf_counter()
+    for game, night_actions in games:
+        phase(game, night_actions, lookup)
+    elapsed = time.perf_counter() - started
+    return elapsed * 1000 / len(games), counter[0] / len(games)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время подготовки клавиатур в начале фазы")
+    parser.add_argument("--games", type=int, default=200, help="Количество игр")
+    parser.add_argument("--players", type=int, default=12, help="Игроков в игре")
+    parser.add_argument("--lookup-us", type=float, default=20.0, help="Задержка запроса имени, мкс")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    games = make_games(args.games, args.players)
+    counter = [0]
+    lookup = make_lookup(args.lookup_us, counter)
+    measure(cached_phase, games[:10], lookup, counter)  # прогрев
+
+    print(f"🚀 Начало фазы: роли и меню голосования ({args.games} игр × {args.players} игроков, "
+          f"запрос имени {args.lookup_us:.0f} мкс)\n")
+    print(f"{'Вариант':<14} {'мс на игру':>11} {'Запросов имени':>15}")
+    results = {}
+    for title, phase in (("По игроку", legacy_phase), ("Кэш фазы", cached_phase)):
+        results[title] = measure(phase, games, lookup, counter)
+        ms, lookups = results[title]
+        print(f"{title:<14} {ms:>11.3f} {lookups:>15.0f}")
+
+    speedup = results["По игроку"][0] / results["Кэш фазы"][0]
+    print(f"\n📊 Ускорение: {speedup:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
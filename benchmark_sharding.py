@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк масштабирования режима шардов по числу процессов-воркеров
+
+Фронт раздает обновления через ShardRouter и ShardPool, как в боевом режиме:
+входы в игру приходят из групп, голоса - из личных чатов игроков и
+направляются по player_games. Каждое обновление воркер обрабатывает
+игровым ядром: вход добавляет игрока, голос доигрывает партию чата
+безголовой симуляцией (без Telegram и БД). Отчет - обновлений в секунду
+для каждого числа воркеров.
+
+Запуск:
+    python benchmark_sharding.py --workers 1 2 4 --chats 64 --votes 40
+"""
+
+import argparse
+import logging
+import sys
+import time
+from types import SimpleNamespace
+
+from chat_sharding import PlayerGamesMap, ShardPool, ShardRouter
+
+PLAYERS_PER_CHAT = 8
+
+
+def make_update(chat_id: int, user_id: int, chat_type: str):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id, type=chat_type),
+                           effective_user=SimpleNamespace(id=user_id))
+
+
+def worker(shard: int, shards: int, inbox, events):
+    """Воркер: владеет играми своих чатов и сообщает фронту о входах игроков"""
+    logging.basicConfig(level=logging.ERROR)
+    from game_logic import Game
+    from game_simulation import GameSimulator, stub_external_lookups
+
+    games = {}
+    player_games = PlayerGamesMap(on_change=lambda user_id, chat_id: events.put((shard, user_id, chat_id)))
+    simulator = GameSimulator(players=PLAYERS_PER_CHAT, seed=shard)
+    events.put(("ready", shard))
+    with stub_external_lookups():
+        while True:
+            update = inbox.get()
+            if update is None:
+                break
+            kind, chat_id, user_id = update
+            if kind == "join":
+                game = games.setdefault(chat_id, Game(chat_id=chat_id))
+                game.add_player(user_id, f"user{user_id}")
+                player_games[user_id] = chat_id
+            else:
+                assert player_games[user_id] == chat_id, "голос попал не к владельцу игры"
+                simulator.run_game()
+    events.put(("done", shard))
+
+
+def wait_for(pool: ShardPool, router: ShardRouter, kind: str):
+    """Ждет событие kind от всех воркеров, попутно применяя события player_games"""
+    pending = set(range(pool.workers))
+    while pending:
+        event = pool.events.get()
+        if event[0] == kind:
+            pending.discard(event[1])
+        elif event[0] not in ("ready", "done"):
+            router.apply(event)
+
+
+def run(workers: int, chats: int, votes: int) -> float:
+    """Прогоняет трафик через пул воркеров и возвращает обновлений в секунду"""
+    pool = ShardPool(worker, workers)
+    router = ShardRouter(workers)
+    pool.start()
+    wait_for(pool, router, "ready")
+
+    started = time.perf_counter()
+    chat_ids = [-1000 - n for n in range(chats)]
+    for n in range(PLAYERS_PER_CHAT):
+        for chat_id in chat_ids:
+            user_id = -chat_id * 100 + n
+            pool.send(router.route(make_update(chat_id, user_id, "group")), ("join", chat_id, user_id))
+
+    # Голоса из личных чатов маршрутизируются по player_games от воркеров
+    while len(router.player_games) < chats * PLAYERS_PER_CHAT:
+        router.apply(pool.events.get())
+    sent = chats * PLAYERS_PER_CHAT
+    for n in range(votes):
+        for chat_id in chat_ids:
+            user_id = -chat_id * 100 + n % PLAYERS_PER_CHAT
+            pool.send(router.route(make_update(user_id, user_id, "private")), ("vote", chat_id, user_id))
+            sent += 1
+
+    for inbox in pool.inboxes:
+        inbox.put(None)
+    wait_for(pool, router, "done")
+    elapsed = time.perf_counter() - started
+    pool.stop()
+    print(f"  {workers:>7} {sent:>11} {elapsed:>9.2f} {sent / elapsed:>13,.0f}   {router.routed}")
+    return sent / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк режима шардов")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chats", type=int, default=64, help="Количество игр (групп)")
+    parser.add_argument("--votes", type=int, default=40, help="Голосов на игру")
+    args = parser.parse_args()
+
+    print("🚀 Бенчмарк режима шардов\n")
+    print(f"  {'воркеров':>7} {'обновлений':>11} {'время, с':>9} {'обновлений/с':>13}   по шардам")
+    results = {workers: run(workers, args.chats, args.votes) for workers in args.workers}
+    base = results[args.workers[0]]
+    print("\n📊 Ускорение: " + ", ".join(f"{w} - x{rate / base:.2f}" for w, rate in results.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
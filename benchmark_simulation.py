@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк игрового ядра на безголовой симуляции (без Telegram и БД)
+
+Отчет: игр в секунду, задержка переходов фаз (среднее, p50, p95),
+пиковая память и сборки мусора на игру. Одинаковое зерно дает одинаковые игры,
+поэтому прогоны сравнимы между коммитами.
+
+Запуск:
+    python benchmark_simulation.py --games 1000 --players 6 12 20
+"""
+
+import argparse
+import gc
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+
+from game_simulation import PHASES, GameSimulator, stub_external_lookups
+
+
+def percentile(values, q: int) -> float:
+    """Перцентиль q (1..99) списка значений"""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def run(players: int, games: int, alloc_games: int, seed: int) -> bool:
+    """Прогоняет бенчмарк для одного размера игры и печатает отчет"""
+    simulator = GameSimulator(players=players, seed=seed)
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    started = time.perf_counter()
+    results = simulator.run(games)
+    elapsed = time.perf_counter() - started
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+
+    finished = sum(1 for result in results if result.winner is not None)
+    rounds = statistics.mean(result.rounds for result in results)
+    print(f"🎮 {players} игроков: {games / elapsed:,.0f} игр/с "
+          f"({elapsed:.2f}с на {games}, в среднем {rounds:.1f} раунда, завершено {finished}/{games})")
+
+    print(f"  {'Фаза':<10} {'переходов':>10} {'среднее, мкс':>14} {'p50, мкс':>10} {'p95, мкс':>10}")
+    for phase in PHASES:
+        samples = [value * 1e6 for result in results for value in result.phase_times.get(phase, ())]
+        if samples:
+            print(f"  {phase:<10} {len(samples):>10} {statistics.mean(samples):>14.1f} "
+                  f"{percentile(samples, 50):>10.1f} {percentile(samples, 95):>10.1f}")
+
+    # Память меряем отдельным коротким прогоном: tracemalloc замедляет код в разы
+    gc.collect()
+    tracemalloc.start()
+    with stub_external_lookups():
+        peaks = []
+        for _ in range(alloc_games):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            simulator.run_game()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    print(f"  Память: пик {statistics.mean(peaks) / 1024:.1f} КиБ на игру, "
+          f"сборок мусора {collections / games:.2f} на игру\n")
+    return finished == games
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк безголовой симуляции игр")
+    parser.add_argument("--games", type=int, default=1000, help="Игр на каждый размер")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 12], help="Размеры игр")
+    parser.add_argument("--alloc-games", type=int, default=50, help="Игр для замера памяти")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Логи ядра в горячем пути не нужны
+    logging.basicConfig(level=logging.ERROR)
+
+    print("🚀 Бенчмарк симуляции игр\n")
+    results = [run(players, args.games, args.alloc_games, args.seed) for players in args.players]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк холодного запуска: восстановление активных игр из журнала
+
+Готовит журналы N игр в разгар партии (снимок + хвост событий: ходы,
+голоса, смены фаз), затем замеряет этапы запуска так же, как
+ForestWolvesBot.load_active_games:
+    - чтение журналов (одним запросом; здесь - из памяти);
+    - воспроизведение событий и сборка Game / NightActions;
+    - создание NightInterface для каждой игры.
+
+Цель - запуск быстрее 1 секунды при 1000 восстановленных игр.
+
+Запуск:
+    python benchmark_startup.py --games 1000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+
+from game_journal import GameJournal
+from journal_testing import MemoryJournalStore
+from game_logic import Game, Role
+from night_actions import NightActions
+from night_interface import NightInterface
+from startup_profile import StartupProfile
+
+TARGET_SECONDS = 1.0
+
+
+def make_journals(count: int, players: int, seed: int) -> MemoryJournalStore:
+    """Журналы игр: набор игроков, роли, ночь с ходами, день и голосование"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store)
+    for n in range(count):
+        chat_id = -1001000000000 - n
+        game = Game(chat_id=chat_id, creator_id=1)
+        games[chat_id] = game
+        night_actions = NightActions(game)
+        for _ in range(players):
+            game.add_player(rng.randrange(10**8, 10**10), f"player_{rng.randrange(10**6)}")
+        journal.checkpoint(game, night_actions)
+
+        game.assign_roles()
+        game.start_night()
+        journal.checkpoint(game, night_actions)
+        wolves = [uid for uid, player in game.players.items() if player.role == Role.WOLF]
+        others = [uid for uid, player in game.players.items() if player.role != Role.WOLF]
+        night_actions.set_wolf_target(wolves[0], others[0])
+        night_actions.skip_action(others[1])
+        game.players[others[0]].die("wolf")
+
+        game.start_day()
+        journal.checkpoint(game, night_actions)
+        game.start_voting()
+        journal.checkpoint(game, night_actions)
+        alive = [p.user_id for p in game.get_alive_players()]
+        for voter in rng.sample(alive, len(alive) // 2):
+            game.vote(voter, rng.choice(alive))
+    journal.flush()
+    return store
+
+
+class LoadedJournals:
+    """Журналы, уже прочитанные из хранилища (как строки результата запроса)"""
+
+    def __init__(self, journals):
+        self.journals = journals
+
+    def load_game_journals(self):
+        return self.journals
+
+
+def cold_start(rows: str) -> StartupProfile:
+    """Один холодный запуск: чтение журналов, восстановление игр и интерфейсов"""
+    profile = StartupProfile()
+    with profile.stage("Чтение журналов"):
+        # Разбор JSON - как у строк результата запроса load_game_journals
+        journals = LoadedJournals(json.loads(rows))
+    games, night_interfaces = {}, {}
+    with profile.stage("Восстановление игр"):
+        restored = GameJournal(games, store=journals).load()
+    with profile.stage("Ночные интерфейсы"):
+        for game, night_actions in restored:
+            games[game.chat_id] = game
+            night_interfaces[game.chat_id] = NightInterface(game, night_actions, lambda user_id: str(user_id))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодный запуск с восстановлением активных игр")
+    parser.add_argument("--games", type=int, default=1000, help="Количество активных игр")
+    parser.add_argument("--players", type=int, default=10, help="Игроков в игре")
+    parser.add_argument("--rounds", type=int, default=3, help="Количество запусков")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    store = make_journals(args.games, args.players, args.seed)
+    events = sum(len(tail) for tail in store.events.values())
+    rows = json.dumps(store.load_game_journals())
+    print(f"🚀 Холодный запуск: {args.games} игр на {args.players} игроков, "
+          f"{events} событий в хвостах журналов\n")
+
+    best = None
+    for _ in range(args.rounds):
+        profile = cold_start(rows)
+        if best is None or profile.total < best.total:
+            best = profile
+    print(best.report())
+
+    verdict = "✅ в пределах цели" if best.total < TARGET_SECONDS else "❌ медленнее цели"
+    print(f"\n📊 Лучший запуск из {args.rounds}: {best.total:.3f} с "
+          f"(цель < {TARGET_SECONDS:.0f} с) - {verdict}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
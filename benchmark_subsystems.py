@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк ленивой загрузки подсистем: время импорта bot.py и память процесса
+
+Каждый вариант запускается в отдельном процессе (чистый кэш модулей):
+    - «Лениво, без обращений» - import bot, подсистемы еще не загружены;
+    - «Все подсистемы загружены» - как было раньше, когда bot.py
+      импортировал леса и дуэли сразу;
+    - «Без <подсистемы>» - BOT_DISABLED_SUBSYSTEMS=<подсистема>, все
+      остальные подсистемы загружены (после первых команд). Леса и
+      аналитика используют общий модуль forest_handlers (SQLAlchemy),
+      поэтому память освобождается, только если отключены обе.
+
+Отчет: время до готовности модулей и пиковая память (RSS) для каждого
+варианта, экономия относительно загрузки всех подсистем.
+
+Запуск:
+    python benchmark_subsystems.py --rounds 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from subsystems import DEFAULT_SUBSYSTEMS
+
+PROBE = """
+import json, resource, time
+started = time.perf_counter()
+import bot
+from subsystems import SubsystemRegistry
+registry = SubsystemRegistry(bot.DISABLED_SUBSYSTEMS)
+if {load_all}:
+    for name in {names!r}:
+        if registry.is_enabled(name):
+            registry.load(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def probe(disabled: str, load_all: bool, rounds: int):
+    """Лучшее время и память из rounds запусков в отдельном процессе"""
+    env = dict(os.environ, BOT_DISABLED_SUBSYSTEMS=disabled)
+    env.setdefault('BOT_TOKEN', '123:abc')
+    code = PROBE.format(load_all=load_all, names=list(DEFAULT_SUBSYSTEMS))
+    results = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                                text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(r['seconds'] for r in results), min(r['rss_kb'] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта и память при ленивой загрузке подсистем")
+    parser.add_argument("--rounds", type=int, default=5, help="Запусков на вариант")
+    args = parser.parse_args()
+
+    variants = [
+        ("Все подсистемы загружены", "", True),
+        ("Лениво, без обращений", "", False),
+    ]
+    for name in DEFAULT_SUBSYSTEMS:
+        variants.append((f"Без {name}", name, True))
+    # Леса и аналитика работают через один модуль (forest_handlers + SQLAlchemy)
+    variants.append(("Без forests и analytics", "forests,analytics", True))
+    variants.append(("Без всех подсистем", ",".join(DEFAULT_SUBSYSTEMS), True))
+
+    print(f"🚀 Импорт bot.py и подсистем (запусков на вариант: {args.rounds}, лучший результат)\n")
+    print(f"{'Вариант':<28} {'Время, мс':>10} {'RSS, МБ':>9} {'Экономия, мс':>13} {'Экономия, МБ':>13}")
+    probe("", True, 1)  # прогрев файлового кэша: первый запуск всегда медленнее
+    baseline = None
+    for title, disabled, load_all in variants:
+        seconds, rss_kb = probe(disabled, load_all, args.rounds)
+        if baseline is None:
+            baseline = (seconds, rss_kb)
+        saved_ms = (baseline[0] - seconds) * 1000
+        saved_mb = (baseline[1] - rss_kb) / 1024
+        print(f"{title:<28} {seconds * 1000:>10.0f} {rss_kb / 1024:>9.1f} {saved_ms:>13.0f} {saved_mb:>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Стенд с поддельным Telegram для замера приема обновлений через webhook
+
+Поднимает локальный поддельный Bot API (getMe, setWebhook, sendMessage...),
+запускает приложение с настройками webhook_ingress (ограниченная очередь,
+предел обрабатываемых обновлений, секретный токен, ChatUpdateProcessor) и воспроизводит пачки обновлений
+POST-запросами, как это делает Telegram (до --connections соединений).
+
+Обновления берутся из файла JSONL (в строке - обновление или список обновлений,
+то есть пачка), иначе генерируются: команды в группах и нажатия кнопок голосования.
+
+Отчет: запросов в секунду, задержка ответа webhook (p50, p95, максимум),
+пик обновлений в обработке (не больше --max-in-flight), время до обработки
+последнего обновления. С медленным обработчиком видно, как прием тормозит:
+очередь заполняется, и ответы webhook ждут освобождения места.
+
+Запуск:
+    python benchmark_webhook.py --updates 5000 --handler-delay 2
+    python benchmark_webhook.py --updates 2000 --handler-delay 50 --queue-size 50 --max-in-flight 20
+    python benchmark_webhook.py --replay recorded_updates.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+from game_locks import ChatUpdateProcessor, game_chat_key
+from webhook_ingress import WEBHOOK, IngressConfig, configure_builder, limit_in_flight
+
+TOKEN = "123456:FAKE-TOKEN"
+SECRET = "replay-secret"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Forest", "username": "forest_test_bot"}
+
+
+class FakeTelegramAPI(BaseHTTPRequestHandler):
+    """Поддельный Bot API: на любой метод отвечает ok, считает вызовы"""
+
+    calls = {}
+
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        FakeTelegramAPI.calls[method] = FakeTelegramAPI.calls.get(method, 0) + 1
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getWebhookInfo":
+            result = {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        else:
+            result = True
+        body = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_api() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegramAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def generate_batches(updates: int, batch_size: int, chats: int, seed: int):
+    """Синтетические пачки: команды в группах и кнопки голосования из личных чатов"""
+    rng = random.Random(seed)
+    batches, batch = [], []
+    for update_id in range(1, updates + 1):
+        chat_id = -1000 - rng.randrange(chats)
+        user = {"id": chat_id * -100 + rng.randrange(12), "is_bot": False, "first_name": "Player"}
+        if rng.random() < 0.5:
+            chat = {"id": chat_id, "type": "group", "title": "Лес"}
+            update = {"update_id": update_id, "message": {
+                "message_id": update_id, "date": int(time.time()), "chat": chat, "from": user, "text": "/join"}}
+        else:
+            chat = {"id": user["id"], "type": "private", "first_name": "Player"}
+            update = {"update_id": update_id, "callback_query": {
+                "id": str(update_id), "from": user, "chat_instance": str(chat_id), "data": f"vote_{user['id']}",
+                "message": {"message_id": update_id, "date": int(time.time()), "chat": chat}}}
+        batch.append(update)
+        if len(batch) == batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def load_batches(path: str):
+    """Пачки из файла JSONL: в строке одно обновление или список обновлений"""
+    batches = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                batches.append(data if isinstance(data, list) else [data])
+    return batches
+
+
+def build_request(ingress: IngressConfig, update: dict, secret) -> bytes:
+    body = json.dumps(update).encode()
+    headers = [f"POST /{ingress.path} HTTP/1.1", f"Host: {ingress.listen}:{ingress.port}",
+               "Content-Type: application/json", f"Content-Length: {len(body)}"]
+    if secret:
+        headers.append(f"X-Telegram-Bot-Api-Secret-Token: {secret}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """Читает ответ HTTP/1.1 и возвращает код статуса"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return int(lines[0].split()[1])
+
+
+async def post_once(ingress: IngressConfig, update: dict, secret) -> int:
+    reader, writer = await asyncio.open_connection(ingress.listen, ingress.port)
+    writer.write(build_request(ingress, update, secret))
+    status = await read_response(reader)
+    writer.close()
+    return status
+
+
+async def sender(ingress: IngressConfig, queue: asyncio.Queue, latencies: list):
+    """Одно keep-alive соединение, как у Telegram: запросы по очереди"""
+    reader, writer = await asyncio.open_connection(ingress.listen, ingress.port)
+    try:
+        while True:
+            update = await queue.get()
+            started = time.perf_counter()
+            writer.write(build_request(ingress, update, SECRET))
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            queue.task_done()
+            if status != 200:
+                raise RuntimeError(f"webhook ответил {status}")
+    finally:
+        writer.close()
+
+
+async def replay(args, batches) -> int:
+    api = start_fake_api()
+    ingress = IngressConfig(mode=WEBHOOK, webhook_url=f"http://127.0.0.1:{args.port}", listen="127.0.0.1",
+                            port=args.port, path="webhook", secret_token=SECRET, queue_size=args.queue_size,
+                            max_in_flight=args.max_in_flight)
+    total = sum(len(batch) for batch in batches)
+    processed = 0
+    running = peak_running = 0
+    all_processed = asyncio.Event()
+    player_games = {}
+
+    async def handle(update: Update, context):
+        nonlocal processed, running, peak_running
+        running += 1
+        peak_running = max(peak_running, running)
+        if args.handler_delay:
+            await asyncio.sleep(args.handler_delay / 1000)
+        running -= 1
+        processed += 1
+        if processed == total:
+            all_processed.set()
+
+    builder = configure_builder(Application.builder().token(TOKEN), ingress)
+    builder = builder.base_url(f"http://127.0.0.1:{api.server_port}/bot")
+    processor = ChatUpdateProcessor(lambda update: game_chat_key(update, player_games))
+    application = builder.concurrent_updates(processor).build()
+    limit_in_flight(application, processor)
+    application.add_handler(TypeHandler(Update, handle))
+
+    latencies = []
+
+    async with application:
+        await application.updater.start_webhook(
+            listen=ingress.listen, port=ingress.port, url_path=ingress.path,
+            webhook_url=ingress.public_url, secret_token=ingress.secret_token)
+        await application.start()
+
+        # Запрос без секрета должен быть отклонен
+        status = await post_once(ingress, batches[0][0], secret=None)
+        if status != 403:
+            print(f"❌ Запрос без секрета получил {status}, ожидался 403")
+            return 1
+
+        queue = asyncio.Queue()
+        started = time.perf_counter()
+        connections = [asyncio.create_task(sender(ingress, queue, latencies)) for _ in range(args.connections)]
+        for batch in batches:
+            for update in batch:
+                queue.put_nowait(update)
+            await queue.join()
+        ingested = time.perf_counter() - started
+        for task in connections:
+            task.cancel()
+        await asyncio.wait_for(all_processed.wait(), timeout=300)
+        drained = time.perf_counter() - started
+
+        await application.updater.stop()
+        await application.stop()
+    api.shutdown()
+
+    latencies_ms = sorted(value * 1000 for value in latencies)
+    p95 = statistics.quantiles(latencies_ms, n=100)[94] if len(latencies_ms) > 1 else latencies_ms[0]
+    print(f"📥 Принято {total} обновлений в {len(batches)} пачках за {ingested:.2f}с "
+          f"({total / ingested:,.0f} обновлений/с, соединений {args.connections}, очередь {args.queue_size})")
+    print(f"⏱️ Ответ webhook: p50 {statistics.median(latencies_ms):.2f} мс, p95 {p95:.2f} мс, "
+          f"максимум {latencies_ms[-1]:.2f} мс")
+    in_flight = application.update_queue.peak_in_flight
+    print(f"🚦 Пик обновлений в обработке: {in_flight} (предел {args.max_in_flight}), "
+          f"одновременно в обработчиках: {peak_running}")
+    if in_flight > args.max_in_flight:
+        print("❌ Предел обновлений в обработке превышен")
+        return 1
+    print(f"✅ Все обновления обработаны через {drained:.2f}с (задержка обработчика {args.handler_delay} мс)")
+    print(f"📊 Вызовы поддельного Bot API: {dict(sorted(FakeTelegramAPI.calls.items()))}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер приема обновлений через webhook на поддельном Telegram")
+    parser.add_argument("--replay", help="Файл JSONL с записанными обновлениями")
+    parser.add_argument("--updates", type=int, default=2000, help="Синтетических обновлений")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--connections", type=int, default=40, help="Одновременных соединений (как max_connections)")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Обновлений в обработке одновременно")
+    parser.add_argument("--handler-delay", type=float, default=0.0, help="Время обработки обновления, мс")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    batches = load_batches(args.replay) if args.replay else generate_batches(
+        args.updates, args.batch_size, args.chats, args.seed)
+    if not batches:
+        print("❌ Нет обновлений для воспроизведения")
+        return 1
+
+    print("🚀 Воспроизведение обновлений через webhook\n")
+    return asyncio.run(replay(args, batches))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
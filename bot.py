@@ -1,9 +1,18 @@
 #!/usr/bin/env python36
 # -*- coding: utf-8 -*-
 
+import time
+
+# Начало запуска: время импорта модулей входит в отчет --profile-startup
+_BOOT_STARTED = time.perf_counter()
+
+import argparse
 import asyncio
+import functools
 import logging
 import random
+import sys
+import weakref
 from typing import Dict, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
@@ -14,36 +23,41 @@ from telegram.ext import (
     ChatMemberHandler,
     MessageHandler,
     filters,
-    ContextTypes
+    ContextTypes,
+    CallbackContext
 )
 
 from game_logic import Game, GamePhase, Role, Team, Player  # ваши реализации
-from duel_system import DuelSystem, DuelRole, DuelPhase, DuelAction
-from config import BOT_TOKEN  # ваши настройки
+from config import BOT_TOKEN, BOT_WORKERS, DISABLED_SUBSYSTEMS  # ваши настройки
 from night_actions import NightActions
 from night_interface import NightInterface
 from global_settings import GlobalSettings # Импортируем GlobalSettings
 from forest_mafia_settings import ForestWolvesSettings
-from database_adapter import DatabaseAdapter
 from database_psycopg2 import (
     init_db, close_db,
-    create_user, get_user_by_telegram_id, update_user_balance, get_user_balance,
-    execute_query, fetch_one, fetch_query,
-    get_chat_settings, update_chat_settings, reset_chat_settings,
+    update_user_balance, get_user_balance,
+    execute_query, fetch_query,
     create_tables,
-    save_player_action, save_vote, update_player_stats, update_user_stats,
+    save_player_action, save_vote, update_player_stats,
     get_bot_setting, set_bot_setting,
-    save_game_to_db, save_player_to_db, update_game_phase, finish_game_in_db,
     get_team_stats, get_top_players, get_best_predator, get_best_herbivore, get_player_detailed_stats,
     get_player_chat_stats, add_nuts_to_user, get_shop_items
 )
-
-# Импортируем обработчики команд лесов
-from forest_handlers import (
-    handle_create_forest, handle_join_forest, handle_leave_forest, handle_forests,
-    handle_my_forests_profile, handle_forest_profile, handle_forest_analytics,
-    handle_top_forests, handle_help_forests, handle_summon_forest
-)
+import database_async as adb
+from db_circuit_breaker import DatabaseUnavailableError, is_database_available
+from phase_scheduler import PhaseScheduler
+from game_locks import ChatUpdateProcessor, GameLocks, game_chat_key
+from game_journal import GameJournal
+from chat_sharding import PlayerGamesMap, run_sharded_bot, shard_for
+from webhook_ingress import IngressConfig, configure_builder, limit_in_flight, log_ingress_error, run_application
+from startup_profile import StartupProfile
+from outbound_dispatcher import OutboundDispatcher, GLOBAL_RATE, PRIORITY_CRITICAL, PRIORITY_LOW, send_priority
+from dm_fanout import fan_out
+from edit_coalescer import EditCoalescer
+from member_cache import ChatMemberCache
+from render_cache import GameRenderCache, role_info, role_intro, role_tip
+# Леса, аналитика и дуэли загружаются при первом обращении
+from subsystems import SubsystemRegistry
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -52,10 +66,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_IMPORTS_DONE = time.perf_counter()
+
+
 class ForestWolvesBot:
     _instance = None
     
     def __init__(self):
+        # Этапы запуска замеряются (отчет: python bot.py --profile-startup)
+        self.startup = StartupProfile(_BOOT_STARTED)
+        self.startup.add("Импорт модулей", _IMPORTS_DONE - _BOOT_STARTED)
         ForestWolvesBot._instance = self
         # Также устанавливаем глобальную переменную
         globals()['bot_instance'] = self
@@ -67,17 +87,25 @@ class ForestWolvesBot:
         self.night_actions: Dict[int, NightActions] = {}
         # chat_id -> NightInterface
         self.night_interfaces: Dict[int, NightInterface] = {}
+        # Кэш клавиатур фазы по играм (удаляется вместе с игрой)
+        self.render_caches: "weakref.WeakKeyDictionary[Game, GameRenderCache]" = weakref.WeakKeyDictionary()
+        # Правки сообщения о наборе: не больше одной за окно, последнее содержимое побеждает
+        self.join_edits = EditCoalescer()
+        # Статусы участников чатов для проверок прав (обновляются ChatMemberHandler)
+        self.member_cache = ChatMemberCache()
         # Global settings instance
         self.global_settings = GlobalSettings()
         
-        # Система дуэлей
-        self.duel_system = DuelSystem()
+        # Необязательные подсистемы (леса, аналитика, дуэли)
+        self.subsystems = SubsystemRegistry(DISABLED_SUBSYSTEMS)
+        self._duel_system = None
         
-        # Инициализация базы данных
+        # Инициализация базы данных: один пул и одна проверка схемы на процесс
         try:
-            self.db = init_db()
-            # Создаем таблицы если их нет
-            tables_created = create_tables()
+            with self.startup.stage("Пул соединений БД"):
+                self.db = init_db()
+            with self.startup.stage("Проверка схемы БД"):
+                tables_created = create_tables()
             if not tables_created:
                 logger.warning("⚠️ Проблема с созданием таблиц, но база данных доступна")
             logger.info("✅ База данных инициализирована успешно")
@@ -103,82 +131,138 @@ class ForestWolvesBot:
         self.authorized_chats: set = set()  # Хранит кортежи (chat_id, thread_id)
         # Bot token
         self.bot_token = BOT_TOKEN
-        # Инициализация базы данных
-        try:
-            self.db = init_db()
-            # Создаем таблицы если их нет
-            tables_created = create_tables()
-            if not tables_created:
-                logger.warning("⚠️ Проблема с созданием таблиц, но база данных доступна")
-            logger.info("✅ База данных инициализирована успешно")
-        except Exception as e:
-            logger.error(f"❌ Ошибка инициализации базы данных: {e}")
-            self.db = None
+        # (номер шарда, число шардов) в режиме нескольких воркеров
+        self.shard = None
+        # Очередь исходящих запросов к Telegram (создается в build_application)
+        self.outbound: Optional[OutboundDispatcher] = None
+        
+        # Единый планировщик дедлайнов фаз всех игр
+        self.phase_scheduler = PhaseScheduler()
+        # Блокировки игр: обновления и дедлайны одной игры выполняются по очереди
+        self.game_locks = GameLocks()
+        
+        # Журнал событий игр: снимок + хвост событий вместо перезаписи игры
+        self.game_journal = GameJournal(self.games)
         
         # Загружаем активные игры из базы данных
-        self.load_active_games()
+        with self.startup.stage("Загрузка активных игр"):
+            self.load_active_games()
         
         # Инициализируем автоматическое сохранение
         try:
-            from auto_save_manager import AutoSaveManager
-            self.auto_save_manager = AutoSaveManager(self)
+            with self.startup.stage("Автосохранение"):
+                from auto_save_manager import AutoSaveManager
+                self.auto_save_manager = AutoSaveManager(self)
             logger.info("✅ Автоматическое сохранение инициализировано")
         except Exception as e:
             logger.error(f"❌ Ошибка инициализации автоматического сохранения: {e}")
             self.auto_save_manager = None
 
     def load_active_games(self):
-        """Загружает активные игры из базы данных при старте бота"""
+        """
+        Загружает активные игры из базы данных при старте бота
+        
+        Игры восстанавливаются из журнала (последний снимок + события после него)
+        вместе с ночными целями и голосами. Игры, сохраненные до появления
+        журнала, читаются из таблиц games/players и переносятся в журнал.
+        """
         try:
             if not self.db:
                 logger.warning("⚠️ База данных недоступна, активные игры не загружены")
                 return
             
-            from database_psycopg2 import load_all_active_games, load_players_state
-            
-            # Загружаем все активные игры
-            active_games_data = load_all_active_games()
-            
-            for game_data in active_games_data:
-                try:
-                    # Восстанавливаем игру из данных
-                    game = Game.from_dict(game_data)
-                    
-                    # Загружаем игроков
-                    players_data = load_players_state(game_data['id'])
-                    for player_data in players_data:
-                        user_id = player_data['user_id']
-                        role = Role(player_data['role']) if player_data.get('role') else None
-                        team = Team(player_data['team']) if player_data.get('team') else None
-                        
-                        player = Player(
-                            user_id=user_id,
-                            username=player_data.get('username'),
-                            first_name=player_data.get('first_name'),
-                            role=role,
-                            team=team
-                        )
-                        player.is_alive = player_data.get('is_alive', True)
-                        game.players[user_id] = player
-                    
-                    # Добавляем игру в словарь
-                    self.games[game.chat_id] = game
-                    
-                    # Восстанавливаем ночные действия и интерфейсы
-                    self.night_actions[game.chat_id] = NightActions(game)
-                    self.night_interfaces[game.chat_id] = NightInterface(game, self.night_actions[game.chat_id], self.get_display_name)
-                    
-                    logger.info(f"✅ Восстановлена игра в чате {game.chat_id} (фаза: {game.phase.value})")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Ошибка восстановления игры {game_data.get('id', 'unknown')}: {e}")
-                    continue
+            for game, night_actions in self.game_journal.load():
+                self.games[game.chat_id] = game
+                self.night_actions[game.chat_id] = night_actions
+                self.night_interfaces[game.chat_id] = NightInterface(game, night_actions, self.get_display_name)
+                logger.debug(f"✅ Восстановлена игра в чате {game.chat_id} (фаза: {game.phase.value})")
             
-            logger.info(f"✅ Загружено {len(active_games_data)} активных игр из БД")
+            self._migrate_legacy_games()
+            logger.info(f"✅ Загружено {len(self.games)} активных игр")
                 
         except Exception as e:
             logger.error(f"❌ Ошибка при загрузке активных игр: {e}")
     
+    def _migrate_legacy_games(self):
+        """Переносит в журнал игры, сохраненные в таблицах games/players"""
+        from database_psycopg2 import load_legacy_games, delete_games_state
+        
+        migrated = []
+        # Игры вместе с игроками - одним запросом
+        for game_data in load_legacy_games():
+            try:
+                if int(game_data['chat_id']) in self.games:
+                    continue
+                
+                # Восстанавливаем игру из данных
+                game = Game.from_dict(game_data)
+                
+                # Восстанавливаем игроков
+                for player_data in game_data['players']:
+                    user_id = player_data['user_id']
+                    role = Role(player_data['role']) if player_data.get('role') else None
+                    team = Team(player_data['team']) if player_data.get('team') else None
+                    
+                    player = Player(
+                        user_id=user_id,
+                        username=player_data.get('username'),
+                        first_name=player_data.get('first_name'),
+                        role=role,
+                        team=team
+                    )
+                    player.is_alive = player_data.get('is_alive', True)
+                    game.players[user_id] = player
+                
+                # Добавляем игру в словарь
+                self.games[game.chat_id] = game
+                
+                # Восстанавливаем ночные действия и интерфейсы
+                self.night_actions[game.chat_id] = NightActions(game)
+                self.night_interfaces[game.chat_id] = NightInterface(game, self.night_actions[game.chat_id], self.get_display_name)
+                self.game_journal.attach(game, self.night_actions[game.chat_id])
+                migrated.append(game_data['id'])
+                
+                logger.debug(f"✅ Восстановлена игра в чате {game.chat_id} (фаза: {game.phase.value})")
+                
+            except Exception as e:
+                logger.error(f"❌ Ошибка восстановления игры {game_data.get('id', 'unknown')}: {e}")
+                continue
+        
+        # Старые строки удаляем только после записи снимков в журнал
+        if migrated and self.game_journal.flush():
+            delete_games_state(migrated)
+            logger.info(f"🔄 В журнал перенесено {len(migrated)} игр")
+    
+    def rearm_phase_deadlines(self, application: Application) -> int:
+        """
+        Ставит в планировщик дедлайны фаз игр, восстановленных из БД
+        
+        Просроченные за время простоя дедлайны срабатывают сразу.
+        
+        Args:
+            application: Приложение бота (для контекста обработчиков)
+            
+        Returns:
+            int: Количество восстановленных дедлайнов
+        """
+        context = CallbackContext(application)
+        rearmed = 0
+        for game in self.games.values():
+            if game.phase not in (GamePhase.NIGHT, GamePhase.DAY, GamePhase.VOTING):
+                continue
+            if game.phase == GamePhase.VOTING:
+                game.total_voters = len(game.get_alive_players())
+                game.voting_type = "exile"
+            handle = self.schedule_phase_deadline(context, game)
+            if game.phase == GamePhase.DAY:
+                game.set_day_timer_task(handle)
+            if game.phase == GamePhase.VOTING:
+                game.check_voting_completed()
+            rearmed += 1
+        
+        logger.info(f"🔄 Восстановлено {rearmed} дедлайнов фаз")
+        return rearmed
+    
     def start_auto_save(self):
         """Запускает автоматическое сохранение"""
         if hasattr(self, 'auto_save_manager') and self.auto_save_manager:
@@ -204,7 +288,7 @@ class ForestWolvesBot:
     
     def save_game_state(self, chat_id: int) -> bool:
         """
-        Сохраняет состояние игры в базу данных
+        Сохраняет состояние игры в журнал и записывает журнал в БД
         
         Args:
             chat_id: ID чата с игрой
@@ -216,50 +300,31 @@ class ForestWolvesBot:
             if chat_id not in self.games:
                 return False
             
-            game = self.games[chat_id]
-            from database_psycopg2 import save_game_state, save_players_state
-            
-            # Сериализуем игру
-            game_data = game.to_dict()
-            
-            # Сохраняем состояние игры
-            if not save_game_state(game_data):
-                logger.error(f"❌ Ошибка сохранения состояния игры в чате {chat_id}")
-                return False
-            
-            # Сохраняем игроков
-            players_data = []
-            for player in game.players.values():
-                # Получаем first_name из базы данных
-                try:
-                    from database_psycopg2 import get_user_by_telegram_id
-                    user_data = get_user_by_telegram_id(player.user_id)
-                    first_name = user_data.get('first_name') if user_data else None
-                except Exception as e:
-                    logger.warning(f"⚠️ Ошибка получения first_name для пользователя {player.user_id}: {e}")
-                    first_name = None
-                
-                players_data.append({
-                    'id': f"{chat_id}_{player.user_id}",
-                    'user_id': player.user_id,
-                    'username': player.username,
-                    'first_name': first_name,
-                    'role': player.role.value if player.role else None,
-                    'is_alive': player.is_alive,
-                    'team': player.team.value if player.team else None
-                })
-            
-            if not save_players_state(game_data['id'], players_data):
-                logger.error(f"❌ Ошибка сохранения игроков игры в чате {chat_id}")
-                return False
-            
-            logger.debug(f"✅ Состояние игры в чате {chat_id} сохранено в БД")
-            return True
+            self.game_journal.checkpoint(self.games[chat_id], self.night_actions.get(chat_id))
+            return self.game_journal.flush()
             
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения состояния игры в чате {chat_id}: {e}")
             return False
     
+    async def save_game_state_async(self, chat_id: int) -> bool:
+        """
+        Сохраняет состояние игры, не блокируя event loop
+        
+        Изменения с прошлого события (смена фазы, итоги ночи) добавляются
+        в журнал в event loop, запись в БД - в отдельном потоке.
+        
+        Args:
+            chat_id: ID чата с игрой
+            
+        Returns:
+            bool: True если сохранение успешно, False иначе
+        """
+        if chat_id not in self.games:
+            return False
+        self.game_journal.checkpoint(self.games[chat_id], self.night_actions.get(chat_id))
+        return await self.game_journal.flush_async()
+    
     def save_all_games_state(self) -> int:
         """
         Сохраняет состояние всех активных игр
@@ -282,7 +347,7 @@ class ForestWolvesBot:
             # Получаем информацию о боте в чате
             if not context.bot or not context.bot.id:
                 return False
-            bot_member = await context.bot.get_chat_member(chat_id, context.bot.id)
+            bot_member = await self.member_cache.get_member(context.bot, chat_id, context.bot.id)
             
             # Проверяем статус бота
             if bot_member.status in ['administrator', 'creator']:
@@ -380,26 +445,35 @@ class ForestWolvesBot:
         
         return True
 
+    @property
+    def duel_system(self):
+        """Система дуэлей: модуль duel_system загружается при первом обращении"""
+        if self._duel_system is None:
+            self._duel_system = self.subsystems.load('duels').DuelSystem()
+        return self._duel_system
+
+    def get_render_cache(self, game: Game) -> GameRenderCache:
+        """Кэш кнопок целей игры (строится один раз на фазу)"""
+        render = self.render_caches.get(game)
+        if render is None:
+            render = self.render_caches[game] = GameRenderCache(
+                game, lambda player: self.get_display_name(player.user_id, player.username, player.first_name)
+            )
+        return render
+
     # ---------------- helper functions for game logic ----------------
     def get_display_name(self, user_id: int, username: str = None, first_name: str = None) -> str:
         """Получает отображаемое имя пользователя (приоритет: никнейм > username > first_name)"""
+        # Никнейм и first_name берутся из общего кэша профилей (один запрос на промах)
         try:
-            from database_psycopg2 import get_user_nickname, get_user_by_telegram_id
-            nickname = get_user_nickname(user_id)
-            if nickname:
-                return nickname
+            from database_psycopg2 import get_user_profile
+            profile = get_user_profile(user_id)
+            if profile['nickname']:
+                return profile['nickname']
+            if not first_name:
+                first_name = profile['first_name']
         except Exception as e:
-            logger.warning(f"⚠️ Ошибка получения никнейма для пользователя {user_id}: {e}")
-        
-        # Если никнейма нет, пытаемся получить first_name из БД
-        if not first_name:
-            try:
-                from database_psycopg2 import get_user_by_telegram_id
-                user_data = get_user_by_telegram_id(user_id)
-                if user_data and user_data.get('first_name'):
-                    first_name = user_data['first_name']
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка получения first_name для пользователя {user_id}: {e}")
+            logger.warning(f"⚠️ Ошибка получения профиля пользователя {user_id}: {e}")
         
         # Если никнейма нет, используем username или first_name
         if username and not username.isdigit():
@@ -452,7 +526,7 @@ class ForestWolvesBot:
             # Пытаемся найти в базе данных
             try:
                 from database_psycopg2 import get_user_by_username
-                user_data = get_user_by_username(username)
+                user_data = await adb.run_sync(get_user_by_username, username)
                 if user_data:
                     logger.info(f"Найден пользователь {username} в БД: {user_data['user_id']}")
                     return user_data['user_id']
@@ -466,12 +540,23 @@ class ForestWolvesBot:
             logger.error(f"Ошибка поиска пользователя {username}: {e}")
             return None
 
+    async def prefetch_player_tags(self, user_ids):
+        """Загружает в кэш профилей никнеймы для format_player_tag (один запрос на всех без профиля)"""
+        from database_psycopg2 import user_profile_cache
+        missing = [user_id for user_id in user_ids if user_id and user_id not in user_profile_cache]
+        if not missing:
+            return
+        try:
+            await adb.prefetch_user_profiles(missing)
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка загрузки никнеймов пользователей {missing}: {e}")
+
     def format_player_tag(self, username: str, user_id: int, make_clickable: bool = True) -> str:
-        """Форматирует тег игрока для отображения с учетом никнейма"""
+        """Форматирует тег игрока для отображения с учетом никнейма (из кэша, см. prefetch_player_tags)"""
         try:
             # Сначала пытаемся получить никнейм
-            from database_psycopg2 import get_user_nickname
-            nickname = get_user_nickname(user_id)
+            from database_psycopg2 import get_cached_user_nickname
+            nickname = get_cached_user_nickname(user_id)
             
             if nickname:
                 # Если есть никнейм, используем его
@@ -549,7 +634,7 @@ class ForestWolvesBot:
             self.games[chat_id].db_game_id = db_game_id
             
             # Сохраняем игру в БД
-            save_game_to_db(
+            await adb.save_game_to_db(
                 game_id=db_game_id,
                 chat_id=chat_id,
                 thread_id=thread_id,
@@ -566,10 +651,10 @@ class ForestWolvesBot:
             self.player_games[user_id] = chat_id
             
             # Сохраняем игрока в базу данных
-            if hasattr(game, 'db_game_id') and game.db_game_id:
+            if game.db_game_id:
                 import uuid
                 player_id = str(uuid.uuid4())
-                save_player_to_db(
+                await adb.save_player_to_db(
                     player_id=player_id,
                     game_id=game.db_game_id,
                     user_id=user_id,
@@ -608,6 +693,7 @@ class ForestWolvesBot:
             
             # Форматируем список игроков с тегами
             players_list = ""
+            await self.prefetch_player_tags(game.players)
             for player in game.players.values():
                 player_tag = self.format_player_tag(player.username, player.user_id, make_clickable=True)
                 players_list += f"• {player_tag}\n"
@@ -626,7 +712,7 @@ class ForestWolvesBot:
                 message += f"\n⏳ {self.format_players_needed(needed)}"
             
             # Автосохранение состояния игры
-            self.save_game_state(chat_id)
+            await self.save_game_state_async(chat_id)
             
             return True, message, reply_markup
         else:
@@ -799,7 +885,7 @@ class ForestWolvesBot:
             # Получаем подробную информацию об инвентаре
             from database_psycopg2 import get_user_inventory_detailed
             
-            inventory_data = get_user_inventory_detailed(user_id)
+            inventory_data = await adb.run_sync(get_user_inventory_detailed, user_id)
             
             if not inventory_data['success']:
                 await update.message.reply_text(f"❌ {inventory_data['error']}")
@@ -950,7 +1036,7 @@ class ForestWolvesBot:
     async def show_player_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
         """Показывает статистику конкретного игрока"""
         try:
-            stats = get_player_detailed_stats(user_id)
+            stats = await adb.run_sync(get_player_detailed_stats, user_id)
             
             if not stats or stats['games_played'] == 0:
                 await update.message.reply_text("📊 У вас пока нет игр. Присоединяйтесь к игре командой /join!")
@@ -977,7 +1063,7 @@ class ForestWolvesBot:
     async def show_top_players(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показывает топ игроков"""
         try:
-            top_players = get_top_players(10, "games_won")
+            top_players = await adb.run_sync(get_top_players, 10, "games_won")
             
             if not top_players:
                 await update.message.reply_text("📊 Статистика пока пуста. Сыграйте несколько игр!")
@@ -1000,7 +1086,7 @@ class ForestWolvesBot:
     async def show_team_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показывает статистику команд"""
         try:
-            team_stats = get_team_stats()
+            team_stats = await adb.run_sync(get_team_stats)
             
             stats_text = "📊 <b>Статистика команд:</b>\n\n"
             stats_text += f"🎮 Всего игр: {team_stats['total_games']}\n\n"
@@ -1035,8 +1121,8 @@ class ForestWolvesBot:
     async def show_best_players(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показывает лучших игроков по ролям"""
         try:
-            best_predator = get_best_predator()
-            best_herbivore = get_best_herbivore()
+            best_predator = await adb.run_sync(get_best_predator)
+            best_herbivore = await adb.run_sync(get_best_herbivore)
             
             stats_text = "🌟 <b>Лучшие игроки:</b>\n\n"
             
@@ -1076,7 +1162,8 @@ class ForestWolvesBot:
         username = update.effective_user.username or update.effective_user.first_name or "Unknown"
         
         try:
-            if not self.db:
+            # Выключатель разомкнут - отвечаем сразу, не дожидаясь таймаутов БД
+            if not self.db or not is_database_available():
                 await update.message.reply_text("❌ База данных недоступна. Попробуйте позже.")
                 return
             
@@ -1086,10 +1173,10 @@ class ForestWolvesBot:
             from database_balance_manager import balance_manager
             
             # Создаем пользователя, если его нет
-            create_user(user_id, username)
+            await adb.create_user(user_id, username)
             
             # Получаем актуальный баланс
-            balance = balance_manager.get_user_balance(user_id)
+            balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             display_name = self.get_display_name(user_id, username, update.effective_user.first_name)
             logger.info(f"✅ Баланс пользователя {display_name}: {balance}")
@@ -1100,6 +1187,8 @@ class ForestWolvesBot:
                 parse_mode='HTML'
             )
                 
+        except DatabaseUnavailableError:
+            await update.message.reply_text("❌ База данных недоступна. Попробуйте позже.")
         except Exception as e:
             logger.error(f"❌ Ошибка получения баланса: {e}")
             import traceback
@@ -1126,11 +1215,11 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Получаем товары из магазина
             from database_psycopg2 import get_shop_items
-            shop_items = get_shop_items()
+            shop_items = await adb.run_sync(get_shop_items)
             
             if not shop_items:
                 await update.message.reply_text("🛍️ <b>Магазин пуст</b>\n\nТовары появятся позже!", parse_mode='HTML')
@@ -1156,6 +1245,7 @@ class ForestWolvesBot:
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             # Формируем сообщение с информацией о пользователе и товарах
@@ -1195,9 +1285,9 @@ class ForestWolvesBot:
                 return
             
             # Убеждаемся, что пользователь существует в БД
-            user = get_user_by_telegram_id(user_id)
+            user = await adb.get_user_by_telegram_id(user_id)
             if not user:
-                create_user(user_id, username)
+                await adb.create_user(user_id, username)
                 logger.info(f"✅ Пользователь {user_id} ({username}) создан в БД")
             
             # Создаем запись в таблице user_games
@@ -1207,7 +1297,7 @@ class ForestWolvesBot:
                 RETURNING id, created_at
             """
             
-            result = fetch_one(game_query, (user_id, 'forest_mafia', 'created'))
+            result = await adb.fetch_one(game_query, (user_id, 'forest_mafia', 'created'))
             
             if result:
                 game_id = result['id']
@@ -1242,165 +1332,56 @@ class ForestWolvesBot:
         else:
             await update.message.reply_text("ℹ️ Нет активных операций для отмены.")
 
-    async def update_player_stats_after_game(self, game: Game, winner: Optional[Team] = None):
-        """Обновляет статистику игроков после окончания игры"""
-        try:
-            if not self.db:
-                logger.warning("⚠️ База данных недоступна, статистика не обновлена")
-                return
+    async def settle_game(self, game: Game, winner: Optional[Team] = None) -> str:
+        """
+        Подводит итоги игры: статистика и орешки всех игроков
+        
+        Итоги считаются в памяти и применяются одной транзакцией. Повторный
+        вызов для той же игры (db_game_id) ничего не начисляет повторно.
+        
+        Args:
+            game: Завершенная игра
+            winner: Победившая команда
             
-            for player in game.players.values():
-                user_id = player.user_id
-                username = player.username or f"Player_{user_id}"
-                
-                # Создаем пользователя в БД, если его нет
-                create_user(user_id, username)
-                
-                # Получаем текущую статистику
-                stats = fetch_one("SELECT * FROM stats WHERE user_id = %s", (user_id,))
-                
-                if stats:
-                    # Обновляем существующую статистику
-                    new_games_played = stats['games_played'] + 1
-                    
-                    # Определяем, выиграл ли игрок
-                    player_won = False
-                    if winner:
-                        if winner == Team.HERBIVORES and player.team == Team.HERBIVORES:
-                            player_won = True
-                        elif winner == Team.PREDATORS and player.team == Team.PREDATORS:
-                            player_won = True
-                    
-                    if player_won:
-                        new_games_won = stats['games_won'] + 1
-                        new_games_lost = stats['games_lost']
-                    else:
-                        new_games_won = stats['games_won']
-                        new_games_lost = stats['games_lost'] + 1
-                    
-                    # Обновляем статистику используя функцию из database_psycopg2
-                    success = update_user_stats(user_id, new_games_played, new_games_won, new_games_lost)
-                    if not success:
-                        logger.error(f"❌ Не удалось обновить статистику для пользователя {user_id}")
-                    
-                else:
-                    # Создаем новую статистику
-                    player_won = False
-                    if winner:
-                        if winner == Team.HERBIVORES and player.team == Team.HERBIVORES:
-                            player_won = True
-                        elif winner == Team.PREDATORS and player.team == Team.PREDATORS:
-                            player_won = True
-                    
-                    # Создаем новую статистику используя функцию из database_psycopg2
-                    success = update_user_stats(user_id, 1, 1 if player_won else 0, 0 if player_won else 1)
-                    if not success:
-                        logger.error(f"❌ Не удалось создать статистику для пользователя {user_id}")
-                
-                # Логируем результат
-                if 'new_games_played' in locals():
-                    logger.info(f"✅ Статистика обновлена для игрока {user_id}: игры={new_games_played}, победы={new_games_won if 'new_games_won' in locals() else (1 if player_won else 0)}")
-                else:
-                    logger.info(f"✅ Статистика создана для игрока {user_id}: игры=1, победы={1 if player_won else 0}")
-                
-        except Exception as e:
-            logger.error(f"❌ Ошибка обновления статистики: {e}")
-
-    async def award_nuts_for_game(self, game: Game, winner: Optional[Team] = None):
-        """Начисляет орешки игрокам за участие в игре"""
-        nuts_info = ""
+        Returns:
+            str: Блок наград для сообщения о завершении игры
+        """
+        from game_settlement import PlayerSettlement, compute_settlement, format_nuts_info
+        
+        if not self.db:
+            logger.warning("⚠️ База данных недоступна, итоги игры не применены")
+            return ""
+        
         try:
-            if not self.db:
-                logger.warning("⚠️ База данных недоступна, орешки не начислены")
-                return nuts_info
-            
-            logger.info(f"🎮 Начинаем начисление орешков за игру. Игроков: {len(game.players)}, Победитель: {winner}")
-            
             # Получаем настройки чата для проверки начисления наград
-            chat_settings = get_chat_settings(game.chat_id)
+            chat_settings = await adb.get_chat_settings(game.chat_id)
             loser_rewards_enabled = chat_settings.get('loser_rewards_enabled', True)
             dead_rewards_enabled = chat_settings.get('dead_rewards_enabled', True)
             logger.info(f"🏆 Награды проигравшим: {'ВКЛ' if loser_rewards_enabled else 'ВЫКЛ'}")
             logger.info(f"💀 Награды умершим: {'ВКЛ' if dead_rewards_enabled else 'ВЫКЛ'}")
             
-            nuts_awards = []  # Список для хранения информации о наградах
+            outcomes = compute_settlement(game, winner, loser_rewards_enabled, dead_rewards_enabled)
             
-            for player in game.players.values():
-                user_id = player.user_id
-                display_name = self.get_display_name(user_id, player.username, player.first_name)
-                
-                logger.info(f"👤 Обрабатываем игрока: {display_name} (ID: {user_id}), Жив: {player.is_alive}, Команда: {player.team}, Роль: {player.role}")
-                
-                # Создаем пользователя в БД, если его нет
-                create_user(user_id, player.username)
-                
-                # Определяем количество орешков в зависимости от статуса игрока
-                nuts_amount = 0
-                
-                if player.is_alive:
-                    # Живой игрок
-                    if winner:
-                        # Определяем, выиграл ли игрок
-                        player_won = False
-                        if winner == Team.HERBIVORES and player.team == Team.HERBIVORES:
-                            player_won = True
-                        elif winner == Team.PREDATORS and player.team == Team.PREDATORS:
-                            player_won = True
-                        
-                        if player_won:
-                            nuts_amount = 100  # Победитель получает 100 орешков
-                            logger.info(f"🏆 Игрок {display_name} - победитель, получает 100 орешков")
-                        else:
-                            nuts_amount = 50   # Проигравший получает 50 орешков
-                            logger.info(f"😔 Игрок {display_name} - проигравший, получает 50 орешков")
-                    else:
-                        nuts_amount = 50  # Если нет победителя, все живые получают 50
-                        logger.info(f"🤷 Игрок {display_name} - живой, но нет победителя, получает 50 орешков")
-                else:
-                    # Мертвый игрок получает 25 орешков (если награды умершим включены)
-                    if dead_rewards_enabled:
-                        nuts_amount = 25
-                        logger.info(f"💀 Игрок {display_name} - мертвый, получает 25 орешков")
-                    else:
-                        nuts_amount = 0
-                        logger.info(f"💀 Игрок {display_name} - мертвый, но награды умершим отключены")
-                
-                # Если награды проигравшим отключены, не начисляем орешки проигравшим
-                if not loser_rewards_enabled and winner:
-                    # Проверяем, проиграл ли игрок
-                    player_lost = False
-                    if winner == Team.HERBIVORES and player.team == Team.PREDATORS:
-                        player_lost = True
-                    elif winner == Team.PREDATORS and player.team == Team.HERBIVORES:
-                        player_lost = True
-                    
-                    if player_lost:
-                        nuts_amount = 0  # Проигравшие не получают орешки
-                        logger.info(f"🏆 Игрок {display_name} проиграл, но награды проигравшим отключены")
-                
-                # Начисляем орешки через новую систему баланса
-                if nuts_amount > 0:
-                    logger.info(f"💰 Начисляем {nuts_amount} орешков игроку {display_name} (ID: {user_id})")
-                    from database_balance_manager import balance_manager
-                    success = balance_manager.add_to_balance(user_id, nuts_amount)
-                    if success:
-                        logger.info(f"✅ Начислено {nuts_amount} орешков игроку {display_name} (ID: {user_id})")
-                        nuts_awards.append(f"🌰 {display_name}: +{nuts_amount} орешков")
-                    else:
-                        logger.error(f"❌ Не удалось начислить орешки игроку {display_name} (ID: {user_id})")
-                else:
-                    logger.warning(f"⚠️ Игрок {display_name} не получил орешки (amount=0)")
+            # ID игры - ключ идемпотентности, фиксируем его на объекте игры для повторов
+            if not game.db_game_id:
+                import uuid
+                game.db_game_id = str(uuid.uuid4())
+            
+            result = await adb.apply_game_settlement(
+                game.db_game_id, game.chat_id, winner.value if winner else None,
+                [outcome.to_dict() for outcome in outcomes]
+            )
+            
+            applied = [PlayerSettlement.from_dict(data) for data in result['outcomes']]
+            logger.info(f"🎮 Итоги игры {game.db_game_id}: игроков {len(applied)}, "
+                        f"начислено {sum(o.nuts for o in applied)} орешков")
+            return format_nuts_info(applied, result['profiles'])
             
-            # Формируем информацию об орешках для сообщения
-            if nuts_awards:
-                nuts_info = f"🌰 <b>Награды за игру:</b>\n" + "\n".join(nuts_awards)
-                        
         except Exception as e:
-            logger.error(f"❌ Ошибка начисления орешков: {e}")
+            logger.error(f"❌ Ошибка применения итогов игры: {e}")
             import traceback
             logger.error(f"❌ Traceback: {traceback.format_exc()}")
-        
-        return nuts_info
+            return ""
 
     # ---------------- новые улучшенные методы ----------------
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1425,7 +1406,7 @@ class ForestWolvesBot:
         try:
             if self.db:
                 # Создаем пользователя в БД (если его нет)
-                create_user(user_id, username)
+                await adb.create_user(user_id, username)
                 logger.info(f"✅ Пользователь {user_id} ({username}) создан/обновлен в БД")
             else:
                 logger.warning("⚠️ База данных недоступна, пользователь не создан в БД")
@@ -1528,7 +1509,7 @@ class ForestWolvesBot:
 
             # Формируем сообщение о регистрации
             # Получаем настройки чата для правильного отображения минимума игроков
-            chat_settings = get_chat_settings(chat_id)
+            chat_settings = await adb.get_chat_settings(chat_id)
             min_players = self.global_settings.get_min_players()
             current_players = len(game.players)
             
@@ -1578,9 +1559,8 @@ class ForestWolvesBot:
             if chat_id == user_id:
                 return True
             
-            # Проверяем права в группе
-            member = await context.bot.get_chat_member(chat_id, user_id)
-            return member.status in ['creator', 'administrator']
+            # Проверяем права в группе (по кэшированному списку администраторов)
+            return await self.member_cache.is_admin(context.bot, chat_id, user_id)
         except Exception as e:
             logger.error(f"Error checking admin status: {e}")
             return False
@@ -1775,14 +1755,7 @@ class ForestWolvesBot:
 
     def _get_role_tip(self, role: Role) -> str:
         """Возвращает совет для конкретной роли"""
-        tips = {
-            Role.WOLF: "Скрывайте свою роль! Работайте с другими хищниками.",
-            Role.FOX: "Воруйте у разных игроков, чтобы не привлекать внимание.",
-            Role.HARE: "Будьте осторожны в общении, не раскрывайте важную информацию.",
-            Role.MOLE: "Делитесь информацией с командой, но осторожно.",
-            Role.BEAVER: "Защищайте тех, у кого украли запасы. Вы ключ к победе!"
-        }
-        return tips.get(role, "Играйте по роли и помогайте команде!")
+        return role_tip(role)
 
     # ---------------- permission checking functions ----------------
     async def check_user_permissions(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
@@ -1810,14 +1783,12 @@ class ForestWolvesBot:
             else:
                 return False, "❌ Не удалось определить чат!"
             
-            # Получаем информацию о пользователе в чате
-            member = await context.bot.get_chat_member(chat_id, user_id)
-            
-            # Проверяем статус пользователя
+            # Проверяем статус пользователя (статусы и список админов кэшируются)
             if required_permission == "admin":
-                if member.status not in ['administrator', 'creator']:
+                if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
                     return False, "❌ Эта команда доступна только администраторам чата!"
             elif required_permission == "member":
+                member = await self.member_cache.get_member(context.bot, chat_id, user_id)
                 if member.status in ['kicked', 'left']:
                     return False, "❌ Вы не являетесь участником этого чата!"
                 elif member.status == 'restricted':
@@ -1948,6 +1919,7 @@ class ForestWolvesBot:
         # Отменяем игру
         game.phase = GamePhase.GAME_OVER
         del self.games[chat_id]
+        self.join_edits.discard(chat_id)
         
         # Очищаем данные игроков
         for user_id in list(self.player_games.keys()):
@@ -1956,23 +1928,43 @@ class ForestWolvesBot:
         
         await update.message.reply_text("🛑 Игра отменена администратором!")
 
+    @send_priority(PRIORITY_LOW)
     async def _update_join_message(self, chat_id: int, context: ContextTypes.DEFAULT_TYPE):
         """Обновляет сообщение о присоединении в чате"""
         try:
             if chat_id in self.games:
                 game = self.games[chat_id]
                 if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
-                    # Обновляем закрепленное сообщение
-                    await context.bot.edit_message_text(
-                        self._get_join_message_text(game),
-                        chat_id=chat_id,
-                        message_id=game.pinned_message_id,
-                        reply_markup=self._get_join_keyboard(game, context),
-                        parse_mode='HTML'
+                    # Обновляем закрепленное сообщение (частые правки объединяются)
+                    await self.prefetch_player_tags(game.players)
+                    await self._edit_join_message(
+                        context, chat_id, game.pinned_message_id,
+                        self._get_join_message_text(game), self._get_join_keyboard(game, context)
                     )
         except Exception as e:
             logger.error(f"Error updating join message: {e}")
 
+    async def _edit_join_message(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int,
+                                 text: str, reply_markup: InlineKeyboardMarkup, edit=None) -> bool:
+        """
+        Правит сообщение о наборе через EditCoalescer
+
+        Первая правка уходит сразу, правки в течение окна схлопываются в одну
+        с последним содержимым, правки без изменений не отправляются.
+
+        Args:
+            edit: Функция правки (по умолчанию context.bot.edit_message_text)
+
+        Returns:
+            bool: True, если правка отправлена сейчас
+        """
+        if edit is None:
+            edit = functools.partial(context.bot.edit_message_text, chat_id=chat_id, message_id=message_id)
+        return await self.join_edits.submit(
+            (chat_id, message_id), (text, reply_markup),
+            lambda: edit(text=text, reply_markup=reply_markup, parse_mode='HTML')
+        )
+
     def _get_join_message_text(self, game) -> str:
         """Формирует текст сообщения о присоединении"""
         max_players = getattr(game, "MAX_PLAYERS", 12)
@@ -1981,8 +1973,6 @@ class ForestWolvesBot:
             player_tag = self.format_player_tag(player.username, player.user_id, make_clickable=True)
             players_list += f"• {player_tag}\n"
         
-        # Получаем настройки чата для правильного отображения минимума игроков
-        chat_settings = get_chat_settings(game.chat_id)
         min_players = self.global_settings.get_min_players()
         
         message = (
@@ -2044,7 +2034,7 @@ class ForestWolvesBot:
         # Создаем пользователя в БД
         try:
             if self.db:
-                create_user(user_id, username)
+                await adb.create_user(user_id, username)
                 logger.info(f"✅ Пользователь {user_id} ({username}) создан/обновлен в БД при join_from_callback")
         except Exception as e:
             logger.error(f"❌ Ошибка создания пользователя в БД: {e}")
@@ -2058,14 +2048,9 @@ class ForestWolvesBot:
                 # Если есть закрепленное сообщение, редактируем его
                 if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
                     try:
-                        await context.bot.edit_message_text(
-                            chat_id=chat_id,
-                            message_id=game.pinned_message_id,
-                            text=message,
-                            reply_markup=reply_markup,
-                            parse_mode='HTML'
-                        )
-                        logger.info(f"Отредактировано сообщение о присоединении: {game.pinned_message_id}")
+                        edited = await self._edit_join_message(context, chat_id, game.pinned_message_id, message, reply_markup)
+                        logger.info(f"Сообщение о присоединении {game.pinned_message_id}: "
+                                    f"{'отредактировано' if edited else 'правка отложена до конца окна'}")
                     except Exception as e:
                         logger.warning(f"Не удалось отредактировать сообщение: {e}")
                         # Если не удалось отредактировать, создаем новое
@@ -2113,6 +2098,7 @@ class ForestWolvesBot:
                 f"📋 Минимум: {min_players}\n\n"
                 "<b>Участники:</b>\n"
             )
+            await self.prefetch_player_tags(game.players)
             for player in game.players.values():
                 player_tag = self.format_player_tag(player.username, player.user_id, make_clickable=True)
                 status_text += f"• {player_tag}\n"
@@ -2134,6 +2120,7 @@ class ForestWolvesBot:
                 f"👥 Живых: {len(game.get_alive_players())}\n\n"
                 "<b>Живые игроки:</b>\n"
             )
+            await self.prefetch_player_tags(game.players)
             for p in game.get_alive_players():
                 player_tag = self.format_player_tag(p.username, p.user_id, make_clickable=True)
                 status_text += f"• {player_tag}\n"
@@ -2171,7 +2158,7 @@ class ForestWolvesBot:
         # Создаем пользователя в БД
         try:
             if self.db:
-                create_user(user_id, username)
+                await adb.create_user(user_id, username)
                 logger.info(f"✅ Пользователь {user_id} ({username}) создан/обновлен в БД при join")
         except Exception as e:
             logger.error(f"❌ Ошибка создания пользователя в БД: {e}")
@@ -2185,18 +2172,14 @@ class ForestWolvesBot:
                 game = self.games[chat_id]
                 
                 join_message = None  # чтобы всегда было определено
+                edited = False
 
                 # Если есть закрепленное сообщение, редактируем его
                 if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
                     try:
-                        await context.bot.edit_message_text(
-                            chat_id=chat_id,
-                            message_id=game.pinned_message_id,
-                            text=message,
-                            reply_markup=reply_markup,
-                            parse_mode='HTML'
-                        )
-                        logger.info(f"Отредактировано сообщение о присоединении: {game.pinned_message_id}")
+                        edited = await self._edit_join_message(context, chat_id, game.pinned_message_id, message, reply_markup)
+                        logger.info(f"Сообщение о присоединении {game.pinned_message_id}: "
+                                    f"{'отредактировано' if edited else 'правка отложена до конца окна'}")
                     except Exception as e:
                         logger.warning(f"Не удалось отредактировать сообщение: {e}")
                         # Если не удалось отредактировать, создаем новое
@@ -2204,8 +2187,10 @@ class ForestWolvesBot:
                         await context.bot.unpin_chat_message(chat_id, game.pinned_message_id)
 
                 if join_message is None:
-                    # Если редактирование прошло успешно — закрепляем старое сообщение
-                    await context.bot.pin_chat_message(chat_id, game.pinned_message_id)
+                    # Если редактирование прошло сразу — закрепляем старое сообщение
+                    # (отложенная правка означает, что сообщение только что закреплялось)
+                    if edited:
+                        await context.bot.pin_chat_message(chat_id, game.pinned_message_id)
                 else:
                     # Если создавали новое — закрепляем его
                     await context.bot.pin_chat_message(chat_id, join_message.message_id)
@@ -2259,6 +2244,7 @@ class ForestWolvesBot:
             if user_id in self.player_games:
                 del self.player_games[user_id]
             
+            await self.prefetch_player_tags([user_id, *game.players])
             player_tag = self.format_player_tag(username, user_id, make_clickable=True)
             # Показываем обновленный список игроков с тегами
             players_list = ""
@@ -2315,6 +2301,7 @@ class ForestWolvesBot:
                 f"📋 Минимум: {min_players}\n\n"
                 "<b>Участники:</b>\n"
             )
+            await self.prefetch_player_tags(game.players)
             for player in game.players.values():
                 player_tag = self.format_player_tag(player.username, player.user_id, make_clickable=True)
                 status_text += f"• {player_tag}\n"
@@ -2336,6 +2323,7 @@ class ForestWolvesBot:
                 f"👥 Живых: {len(game.get_alive_players())}\n\n"
                 "<b>Живые игроки:</b>\n"
             )
+            await self.prefetch_player_tags(game.players)
             for p in game.get_alive_players():
                 player_tag = self.format_player_tag(p.username, p.user_id, make_clickable=True)
                 status_text += f"• {player_tag}\n"
@@ -2371,7 +2359,7 @@ class ForestWolvesBot:
         # Создаем пользователя в БД
         try:
             if self.db:
-                create_user(user_id, username)
+                await adb.create_user(user_id, username)
                 logger.info(f"✅ Пользователь {user_id} ({username}) создан/обновлен в БД при start_game")
         except Exception as e:
             logger.error(f"❌ Ошибка создания пользователя в БД: {e}")
@@ -2403,7 +2391,7 @@ class ForestWolvesBot:
         db_game_id = str(uuid.uuid4())
         
         # Сохраняем игру в БД
-        save_game_to_db(
+        await adb.save_game_to_db(
             game_id=db_game_id,
             chat_id=chat_id,
             thread_id=thread_id,
@@ -2421,27 +2409,31 @@ class ForestWolvesBot:
         game.db_game_id = db_game_id
 
         if game.start_game():
+            # Игра вышла из набора: отложенная правка сообщения о наборе не должна вернуть кнопки
+            self.join_edits.discard(chat_id)
+            
             # Обновляем статус игры в БД
-            update_game_phase(db_game_id, 'night', 1)
+            await adb.update_game_phase(db_game_id, 'night', 1)
             
             # Обновляем player_games для всех игроков
             for player in game.players.values():
                 self.player_games[player.user_id] = chat_id
                 logger.info(f"✅ Игрок {player.user_id} добавлен в player_games для игры {chat_id}")
             
+            # Загружаем никнеймы и имена всех игроков одним запросом:
+            # дальше отображаемые имена берутся из кэша профилей
+            try:
+                profiles = await adb.prefetch_user_profiles(list(game.players.keys()))
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось загрузить профили игроков: {e}")
+                profiles = {}
+            
             # Добавляем всех игроков в БД
             for player in game.players.values():
                 player_id = str(uuid.uuid4())
-                # Получаем first_name из базы данных
-                try:
-                    from database_psycopg2 import get_user_by_telegram_id
-                    user_data = get_user_by_telegram_id(player.user_id)
-                    first_name = user_data.get('first_name') if user_data else None
-                except Exception as e:
-                    logger.warning(f"⚠️ Ошибка получения first_name для пользователя {player.user_id}: {e}")
-                    first_name = None
+                first_name = profiles.get(player.user_id, {}).get('first_name')
                 
-                save_player_to_db(
+                await adb.save_player_to_db(
                     player_id=player_id,
                     game_id=db_game_id,
                     user_id=player.user_id,
@@ -2510,8 +2502,7 @@ class ForestWolvesBot:
             await update.message.reply_text("❌ Игра доступна только в группах!")
             return
 
-        chat_member = await context.bot.get_chat_member(chat_id, user_id)
-        if chat_member.status not in ['creator', 'administrator']:
+        if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
             await update.message.reply_text("❌ Только администраторы могут принудительно завершать игру!")
             return
 
@@ -2598,17 +2589,41 @@ class ForestWolvesBot:
         try:
             if hasattr(self, 'auto_save_manager') and self.auto_save_manager:
                 status = self.auto_save_manager.get_save_status()
+                from database_psycopg2 import get_chat_settings_cache_stats
+                settings_cache = get_chat_settings_cache_stats()
                 
                 status_text = (
                     "💾 <b>Статус автоматического сохранения</b>\n\n"
                     f"🔄 Работает: {'✅ Да' if status['is_running'] else '❌ Нет'}\n"
                     f"⏱️ Интервал: {status['save_interval']} секунд\n"
                     f"🕐 Последнее сохранение: {status['last_save_time']}\n"
-                    f"⏰ Прошло времени: {status['time_since_last_save']:.1f} секунд\n\n"
+                    f"⏰ Прошло времени: {status['time_since_last_save']:.1f} секунд\n"
+                    f"📝 Записано игр в последний раз: {status['last_saved_games']} "
+                    f"(отслеживается {status['tracked_games']})\n\n"
                     f"📊 <b>Текущее состояние:</b>\n"
                     f"🎮 Активных игр: {len(self.games)}\n"
                     f"👥 Игроков в играх: {len(self.player_games)}\n"
-                    f"🔗 Авторизованных чатов: {len(self.authorized_chats)}"
+                    f"🔗 Авторизованных чатов: {len(self.authorized_chats)}\n"
+                    f"⚙️ Кэш настроек чатов: {settings_cache['size']}/{settings_cache['maxsize']}, "
+                    f"попаданий {settings_cache['hits']}, промахов {settings_cache['misses']}"
+                )
+                if self.outbound:
+                    outbound = self.outbound.get_stats()
+                    latency = ", ".join(f"{name} {value['avg_ms']:.0f}/{value['p95_ms']:.0f} мс"
+                                        for name, value in outbound['latency'].items())
+                    status_text += (
+                        f"\n📤 Исходящие: в очереди {outbound['queue_depth']} "
+                        f"(макс. {outbound['max_queue_depth']}), отправлено {outbound['sent']}, "
+                        f"повторов после 429: {outbound['retries']}\n"
+                        f"⏱️ Ожидание (среднее/p95): {latency or 'нет данных'}"
+                    )
+                join_edits = self.join_edits.get_stats()
+                members = self.member_cache.get_stats()
+                status_text += (
+                    f"\n✏️ Правки сообщения о наборе: запрошено {join_edits['requested']}, "
+                    f"отправлено {join_edits['edits']}, сэкономлено {join_edits['saved']}\n"
+                    f"👮 Кэш прав участников: попаданий {members['members']['hits']}, "
+                    f"запросов участника {members['member_requests']}, списков админов {members['admin_requests']}"
                 )
                 
                 await update.message.reply_text(status_text, parse_mode='HTML')
@@ -2651,8 +2666,7 @@ class ForestWolvesBot:
         
         # Проверяем права администратора
         try:
-            chat_member = await context.bot.get_chat_member(chat_id, user_id)
-            if chat_member.status not in ['creator', 'administrator']:
+            if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
                 await update.message.reply_text(
                     "❌ Только администраторы могут настраивать канал для игры!"
                 )
@@ -2781,8 +2795,7 @@ class ForestWolvesBot:
         
         # Проверяем права администратора
         try:
-            chat_member = await context.bot.get_chat_member(chat_id, user_id)
-            if chat_member.status not in ['creator', 'administrator']:
+            if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
                 await update.message.reply_text(
                     "❌ Только администраторы могут удалять канал из игры!"
                 )
@@ -2852,6 +2865,7 @@ class ForestWolvesBot:
         game.game_over_sent = True
 
         game.phase = GamePhase.GAME_OVER
+        self.phase_scheduler.cancel(game.chat_id)
 
         # Открепляем все закрепленные сообщения бота при завершении игры
         await self._unpin_all_bot_messages(context, game)
@@ -2936,15 +2950,16 @@ class ForestWolvesBot:
                 logger.error(f"❌ Ошибка сохранения состояния после завершения игры: {e}")
 
     # ---------------- night/day/vote flow ----------------
+    @send_priority(PRIORITY_CRITICAL)
     async def start_night_phase(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         game.start_night()
         
         # Сохраняем смену фазы в базу данных
-        if hasattr(game, 'db_game_id') and game.db_game_id:
-            update_game_phase(game.db_game_id, "night", game.current_round)
+        if game.db_game_id:
+            await adb.update_game_phase(game.db_game_id, "night", game.current_round)
         
         # Автосохранение состояния игры
-        self.save_game_state(game.chat_id)
+        await self.save_game_state_async(game.chat_id)
         
         # Открепляем сообщение о присоединении, так как игра началась
         if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
@@ -3008,40 +3023,78 @@ class ForestWolvesBot:
         # Отправляем роли всем игрокам с кнопками действий
         await self.send_roles_to_players(context, game)
 
-        # таймер ночи (запускаем как таск)
-        asyncio.create_task(self.night_phase_timer(context, game))
-
-    async def night_phase_timer(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
-        """Таймер для ночной фазы с проверкой досрочного завершения"""
+        # Дедлайн ночи - в общий планировщик
         logger.info(f"Ночная фаза начата. Игроков: {len(game.get_alive_players())}")
+        self.schedule_phase_deadline(context, game)
+
+        # Ночных ролей может не быть (или все уже походили) - проверяем сразу
+        self.night_actions[game.chat_id].notify_if_completed()
+
+    def schedule_phase_deadline(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
+        """
+        Ставит дедлайн текущей фазы игры (game.phase_end_time) в планировщик
         
-        for i in range(60):  # Проверяем каждую секунду в течение 60 секунд
-            await asyncio.sleep(1)
-            
-            # Проверяем, все ли игроки выполнили ночные действия
-            if game.phase == GamePhase.NIGHT and game.chat_id in self.night_actions:
-                night_actions = self.night_actions[game.chat_id]
-                if night_actions.are_all_actions_completed():
-                    logger.info("Все игроки выполнили ночные действия! Завершаем ночь досрочно.")
-                    await context.bot.send_message(
-                        chat_id=game.chat_id, 
-                        text="⚡ Все игроки выполнили ночные действия! Ночь завершена досрочно.",
-                        message_thread_id=game.thread_id
-                    )
-                    await self.process_night_phase(context, game)
-                    await self.start_day_phase(context, game)
-                    return
+        Сигнал досрочного завершения фазы переносит дедлайн на текущий момент.
+        
+        Args:
+            context: Контекст бота для обработчика дедлайна
+            game: Игра
             
+        Returns:
+            ScheduledPhase: Запись планировщика
+        """
+        phase = game.phase
+        deadline = game.phase_end_time or self.phase_scheduler.clock()
+        handle = self.phase_scheduler.schedule(
+            game.chat_id, deadline,
+            lambda: self.handle_phase_deadline(context, game, phase),
+            tag=phase
+        )
+        game.on_phase_completed = lambda: self.phase_scheduler.expedite(game.chat_id, tag=game.phase)
+        if game.phase_completed.is_set():
+            self.phase_scheduler.expedite(game.chat_id, tag=phase)
+        return handle
+
+    async def handle_phase_deadline(self, context: ContextTypes.DEFAULT_TYPE, game: Game, phase: GamePhase):
+        """
+        Завершает фазу по дедлайну или по сигналу досрочного завершения
+        
+        Выполняется под блокировкой игры, как и обработка ее обновлений.
+        
+        Args:
+            context: Контекст бота
+            game: Игра
+            phase: Фаза, для которой был поставлен дедлайн
+        """
+        async with self.game_locks.lock(game.chat_id):
             # Если игра завершилась или фаза изменилась - выходим
-            if game.phase != GamePhase.NIGHT:
-                logger.info(f"Ночная фаза прервана: фаза изменилась на {game.phase}")
+            if self.games.get(game.chat_id) is not game or game.phase != phase:
+                logger.info(f"Дедлайн фазы {phase.value} пропущен: текущая фаза {game.phase.value}")
                 return
+            
+            completed_early = game.phase_completed.is_set()
+            if phase == GamePhase.NIGHT:
+                await self.finish_night_phase(context, game, completed_early)
+            elif phase == GamePhase.DAY:
+                logger.info(f"Дневная фаза завершена по таймеру, переходим к голосованию для игры {game.chat_id}")
+                await self.start_voting_phase(context, game)
+            elif phase == GamePhase.VOTING:
+                await self.finish_voting_phase(context, game, completed_early)
+
+    async def finish_night_phase(self, context: ContextTypes.DEFAULT_TYPE, game: Game, completed_early: bool):
+        """Завершает ночь и начинает день"""
+        if completed_early:
+            logger.info("Все игроки выполнили ночные действия! Завершаем ночь досрочно.")
+            await context.bot.send_message(
+                chat_id=game.chat_id, 
+                text="⚡ Все игроки выполнили ночные действия! Ночь завершена досрочно.",
+                message_thread_id=game.thread_id
+            )
         
-        # Время вышло
-        if game.phase == GamePhase.NIGHT:
-            await self.process_night_phase(context, game)
-            await self.start_day_phase(context, game)
+        await self.process_night_phase(context, game)
+        await self.start_day_phase(context, game)
 
+    @send_priority(PRIORITY_CRITICAL)
     async def start_day_phase(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         # Проверяем условия автоматического завершения игры
         winner = game.check_game_end()
@@ -3052,11 +3105,11 @@ class ForestWolvesBot:
         game.start_day()
         
         # Сохраняем смену фазы в базу данных
-        if hasattr(game, 'db_game_id') and game.db_game_id:
-            update_game_phase(game.db_game_id, "day", game.current_round)
+        if game.db_game_id:
+            await adb.update_game_phase(game.db_game_id, "day", game.current_round)
         
         # Автосохранение состояния игры
-        self.save_game_state(game.chat_id)
+        await self.save_game_state_async(game.chat_id)
 
         # Открепляем сообщение ночи
         await self._unpin_previous_stage_message(context, game, "day")
@@ -3080,41 +3133,20 @@ class ForestWolvesBot:
         # Закрепляем сообщение дня
         await self._pin_stage_message(context, game, "day", day_message.message_id)
         
-        # Создаем и сохраняем задачу таймера дневной фазы
-        day_timer_task = asyncio.create_task(self.day_phase_timer(context, game))
-        game.set_day_timer_task(day_timer_task)
-
-    async def day_phase_timer(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
-        """Таймер дневной фазы с диагностикой"""
-        try:
-            logger.info(f"Запущен таймер дневной фазы для игры {game.chat_id}")
-            await asyncio.sleep(300)  # 5 минут
-            
-            # Проверяем, что игра все еще в дневной фазе
-            if game.phase == GamePhase.DAY:
-                logger.info(f"Таймер дневной фазы завершен, переходим к голосованию для игры {game.chat_id}")
-                await self.start_voting_phase(context, game)
-            else:
-                logger.info(f"Таймер дневной фазы завершен, но фаза изменилась на {game.phase} для игры {game.chat_id}")
-                
-        except asyncio.CancelledError:
-            logger.info(f"Таймер дневной фазы отменен для игры {game.chat_id}")
-            raise
-        except Exception as e:
-            logger.error(f"Ошибка в таймере дневной фазы для игры {game.chat_id}: {e}")
-        finally:
-            # Очищаем ссылку на задачу
-            game.day_timer_task = None
+        # Дедлайн дня в планировщике; запись отменяется через game.cancel_day_timer()
+        logger.info(f"Запущен таймер дневной фазы для игры {game.chat_id}")
+        game.set_day_timer_task(self.schedule_phase_deadline(context, game))
 
+    @send_priority(PRIORITY_CRITICAL)
     async def start_voting_phase(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         game.start_voting()
         
         # Сохраняем смену фазы в базу данных
-        if hasattr(game, 'db_game_id') and game.db_game_id:
-            update_game_phase(game.db_game_id, "voting", game.current_round)
+        if game.db_game_id:
+            await adb.update_game_phase(game.db_game_id, "voting", game.current_round)
         
         # Автосохранение состояния игры
-        self.save_game_state(game.chat_id)
+        await self.save_game_state_async(game.chat_id)
 
         alive_players = game.get_alive_players()
         if len(alive_players) < 2:
@@ -3152,78 +3184,51 @@ class ForestWolvesBot:
         if voting_message:
             await self._pin_stage_message(context, game, "voting", voting_message.message_id)
 
-        # Отправляем меню голосования каждому живому игроку в личку
-        logger.info(f"🔍 Отправляем меню голосования {len(alive_players)} игрокам")
-        for voter in alive_players:
-            logger.info(f"🔍 Отправляем меню голосования игроку {voter.user_id} (роль: {voter.role}, жив: {voter.is_alive})")
-            
-            # Исключаем самого голосующего из списка целей
-            voting_targets = [p for p in alive_players if p.user_id != voter.user_id]
-            logger.info(f"🔍 Доступные цели для голосования: {[p.user_id for p in voting_targets]}")
-            
-            keyboard = [[InlineKeyboardButton(f"🗳️ {self.get_display_name(p.user_id, p.username, None)}", callback_data=f"vote_{p.user_id}")] for p in voting_targets]
-            # Добавляем кнопку "Пропустить голосование"
-            keyboard.append([InlineKeyboardButton("⏭️ Пропустить голосование", callback_data="vote_skip")])
-            # Добавляем кнопку "Перейти в ЛС с ботом" (если это не личные сообщения)
-            # В данном случае сообщение всегда отправляется в личные сообщения, поэтому кнопка не нужна
-            # if game.chat_id != voter.user_id:
-            #     keyboard.append([InlineKeyboardButton("💬 Перейти в ЛС с ботом", url=f"https://t.me/{context.bot.username}")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            try:
-                await context.bot.send_message(
-                    chat_id=voter.user_id,
-                    text=(
-                        "🌲 Время решать судьбу леса!\n\n"
-                        "🦌 Кого из обитателей леса вы считаете опасным для остальных зверушек?\n"
-                        "⏰ У вас есть 2 минуты, чтобы сделать свой выбор:"
-                    ),
-                    reply_markup=reply_markup
-                )
-                logger.info(f"✅ Меню голосования отправлено игроку {voter.user_id} (роль: {voter.role})")
-            except Exception as e:
-                logger.error(f"❌ Не удалось отправить меню голосования игроку {voter.user_id} (роль: {voter.role}): {e}")
-
-        # Сохраняем информацию о количестве игроков для проверки досрочного завершения
+        # Сохраняем информацию о количестве игроков для досрочного завершения
+        # (до рассылки меню, чтобы учесть даже самые быстрые голоса)
         game.total_voters = len(alive_players)
         game.voting_type = "exile"  # Помечаем тип голосования
-        
-        asyncio.create_task(self.voting_timer(context, game))
 
+        # Отправляем меню голосования каждому живому игроку в личку (параллельно)
+        logger.info(f"🔍 Отправляем меню голосования {len(alive_players)} игрокам")
+        # Строки кнопок целей строятся один раз, меню игрока - без него самого
+        render = self.get_render_cache(game)
+        
+        async def send_voting_menu(voter: Player):
+            reply_markup = render.voting_markup(voter.user_id)
+
+            return await context.bot.send_message(
+                chat_id=voter.user_id,
+                text=(
+                    "🌲 Время решать судьбу леса!\n\n"
+                    "🦌 Кого из обитателей леса вы считаете опасным для остальных зверушек?\n"
+                    "⏰ У вас есть 2 минуты, чтобы сделать свой выбор:"
+                ),
+                reply_markup=reply_markup
+            )
 
+        await fan_out(alive_players, send_voting_menu, key=lambda voter: voter.user_id,
+                      label=f"Меню голосования (чат {game.chat_id})")
 
-    async def voting_timer(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
-        """Таймер для голосования с проверкой досрочного завершения"""
-        logger.info(f"Голосование начато. Игроков: {len(game.get_alive_players())}, total_voters: {getattr(game, 'total_voters', 'НЕ УСТАНОВЛЕНО')}")
+        logger.info(f"Голосование начато. Игроков: {len(game.get_alive_players())}, total_voters: {game.total_voters}")
+        self.schedule_phase_deadline(context, game)
         
-        for i in range(120):  # Проверяем каждую секунду в течение 2 минут
-            await asyncio.sleep(1)
-            
-            # Проверяем, все ли проголосовали
-            if game.phase == GamePhase.VOTING and hasattr(game, 'total_voters') and hasattr(game, 'voting_type'):
-                current_votes = len(game.votes)
-                expected_voters = game.total_voters
-                
-                logger.info(f"Голосование ({game.voting_type}): {current_votes}/{expected_voters} проголосовали")
-                
-                # Проверяем досрочное завершение только для голосования за изгнание
-                if game.voting_type == "exile" and current_votes >= expected_voters:
-                    # Проверяем, не завершается ли уже голосование
-                    if not (hasattr(game, 'exile_voting_completed') and game.exile_voting_completed):
-                        logger.info("Все игроки проголосовали! Завершаем голосование досрочно.")
-                        # Создаем задачу для досрочного завершения (она сама обработает результаты)
-                        asyncio.create_task(self.complete_exile_voting_early(context, game))
-                    return
-            
-            # Если игра завершилась или фаза изменилась - выходим
-            if game.phase != GamePhase.VOTING:
-                logger.info(f"Голосование прервано: фаза изменилась на {game.phase}")
-                return
+        # Голоса могли прийти, пока рассылались меню
+        game.check_voting_completed()
+
+    async def finish_voting_phase(self, context: ContextTypes.DEFAULT_TYPE, game: Game, completed_early: bool):
+        """Подводит итоги голосования: досрочно (проголосовали все) или по истечении времени"""
+        if completed_early:
+            # Проверяем, не завершается ли уже голосование
+            if not game.exile_voting_completed:
+                logger.info("Все игроки проголосовали! Завершаем голосование досрочно.")
+                await self.complete_exile_voting_early(context, game)
+            return
         
         # Время вышло
         if game.phase == GamePhase.VOTING:
             # Проверяем, не были ли результаты уже обработаны досрочно
-            if not (hasattr(game, 'voting_results_processed') and game.voting_results_processed):
+            if not game.voting_results_processed:
                 logger.info("Время голосования истекло. Обрабатываем результаты.")
                 await self.process_voting_results(context, game)
             else:
@@ -3235,7 +3240,7 @@ class ForestWolvesBot:
         logger.info(f"Обработка результатов голосования. Голосов: {len(game.votes)}")
         
         # Проверяем, не были ли результаты уже обработаны
-        if hasattr(game, 'voting_results_processed') and game.voting_results_processed:
+        if game.voting_results_processed:
             logger.info("Результаты голосования уже были обработаны, пропускаем")
             return
         
@@ -3247,7 +3252,7 @@ class ForestWolvesBot:
         voting_details = game.get_voting_details(self.get_display_name)
         
         # Проверяем, было ли голосование завершено досрочно
-        is_early_completion = hasattr(game, 'exile_voting_completed') and game.exile_voting_completed
+        is_early_completion = game.exile_voting_completed
         
         # Формируем сообщение с результатами
         if exiled_player:
@@ -3295,15 +3300,8 @@ class ForestWolvesBot:
         if exiled_player:
             await self.send_squirrel_message(context, exiled_player)
 
-        # Очищаем атрибуты голосования
-        if hasattr(game, 'total_voters'):
-            delattr(game, 'total_voters')
-        if hasattr(game, 'voting_type'):
-            delattr(game, 'voting_type')
-        if hasattr(game, 'voting_results_processed'):
-            delattr(game, 'voting_results_processed')
-        if hasattr(game, 'exile_voting_completed'):
-            delattr(game, 'exile_voting_completed')
+        # Очищаем состояние голосования
+        game.reset_voting_state()
 
         # Проверяем условия окончания игры
         alive_players = game.get_alive_players()
@@ -3326,6 +3324,7 @@ class ForestWolvesBot:
 
     async def _unpin_all_bot_messages(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         """Открепляет все закрепленные сообщения бота в чате"""
+        self.join_edits.discard(game.chat_id)
         try:
             # Открепляем сообщение о присоединении
             if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
@@ -3465,16 +3464,20 @@ class ForestWolvesBot:
         game.phase = GamePhase.GAME_OVER
         
         # Сохраняем завершение игры в базу данных
-        if hasattr(game, 'db_game_id') and game.db_game_id:
+        if game.db_game_id:
             winner_team = winner.value if winner else None
-            finish_game_in_db(game.db_game_id, winner_team)
+            await adb.finish_game_in_db(game.db_game_id, winner_team)
         
-        # Отменяем таймер дневной фазы при завершении игры
+        # Отменяем таймер дневной фазы и дедлайн в планировщике при завершении игры
         game.cancel_day_timer()
+        self.phase_scheduler.cancel(game.chat_id)
         
         # Открепляем все закрепленные сообщения бота при завершении игры
         await self._unpin_all_bot_messages(context, game)
         
+        # Подводим итоги: орешки и статистика одной транзакцией
+        nuts_info = await self.settle_game(game, winner) if game.players else ""
+        
         # Используем новую логику завершения игры
         try:
             from game_end_logic import GameEndLogic
@@ -3494,13 +3497,6 @@ class ForestWolvesBot:
                     "details": "Недостаточно игроков для продолжения."
                 }
             
-            # Начисляем орешки за участие в игре
-            nuts_info = ""
-            try:
-                nuts_info = await self.award_nuts_for_game(game, winner)
-            except Exception as e:
-                logger.error(f"❌ Ошибка начисления орешков: {e}")
-            
             # Получаем детальное сообщение о завершении игры
             message_text = game_end_logic.get_game_over_message(result, nuts_info)
             
@@ -3532,13 +3528,6 @@ class ForestWolvesBot:
             except Exception as e2:
                     logger.error(f"Fallback тоже не сработал: {e2}")
 
-        # Обновляем статистику игроков в базе данных
-        try:
-            if self.db and game.players:
-                await self.update_player_stats_after_game(game, winner)
-        except Exception as e:
-            logger.error(f"❌ Ошибка обновления статистики игроков: {e}")
-        
 
         for pid in list(game.players.keys()):
             if pid in self.player_games:
@@ -3614,13 +3603,7 @@ class ForestWolvesBot:
                 logger.info(f"✅ Пользователь {user_id} успешно пропустил голосование")
                 await query.edit_message_text("⏭️ Вы пропустили голосование!\n\n🕐 Ожидайте результатов голосования...")
                 
-                # Проверяем, все ли проголосовали (включая пропуски)
-                if hasattr(game, 'total_voters') and hasattr(game, 'voting_type') and game.voting_type == "exile":
-                    if len(game.votes) >= game.total_voters:
-                        # Проверяем, не завершается ли уже голосование
-                        if not (hasattr(game, 'exile_voting_completed') and game.exile_voting_completed):
-                            # Все проголосовали - завершаем досрочно
-                            asyncio.create_task(self.complete_exile_voting_early(context, game))
+                # Досрочное завершение (все проголосовали) обрабатывает voting_timer по сигналу Game.vote
             else:
                 logger.error(f"❌ Не удалось зарегистрировать пропуск голосования для пользователя {user_id}")
                 await query.edit_message_text("❌ Не удалось зарегистрировать пропуск голосования!")
@@ -3648,13 +3631,7 @@ class ForestWolvesBot:
             else:
                 await query.edit_message_text(f"✅ Ваш голос зарегистрирован!\nВы проголосовали за изгнание: {display_name}\n\n🕐 Ожидайте результатов голосования...")
             
-            # Проверяем, все ли проголосовали (только для обычного голосования)
-            if hasattr(game, 'total_voters') and hasattr(game, 'voting_type') and game.voting_type == "exile":
-                if len(game.votes) >= game.total_voters:
-                    # Проверяем, не завершается ли уже голосование
-                    if not (hasattr(game, 'exile_voting_completed') and game.exile_voting_completed):
-                        # Все проголосовали - завершаем досрочно
-                        asyncio.create_task(self.complete_exile_voting_early(context, game))
+            # Досрочное завершение (все проголосовали) обрабатывает voting_timer по сигналу Game.vote
         else:
             await query.edit_message_text("❌ Не удалось зарегистрировать голос!")
 
@@ -3874,6 +3851,7 @@ class ForestWolvesBot:
         del self.games[chat_id]
         
         # Открепляем сообщение о присоединении, если оно есть
+        self.join_edits.discard(chat_id)
         if hasattr(game, 'pinned_message_id') and game.pinned_message_id:
             try:
                 await context.bot.unpin_chat_message(chat_id, game.pinned_message_id)
@@ -4115,13 +4093,12 @@ class ForestWolvesBot:
             await update.message.reply_text("❌ Настройки доступны только в группах!")
             return
 
-        chat_member = await context.bot.get_chat_member(chat_id, user_id)
-        if chat_member.status not in ['creator', 'administrator']:
+        if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
             await update.message.reply_text("❌ Только администраторы могут изменять настройки!")
             return
 
         # Получаем настройки чата из базы данных
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         
         test_mode_text = "⚡ Быстрый режим: ВКЛ" if chat_settings['test_mode'] else "⚡ Быстрый режим: ВЫКЛ"
 
@@ -4309,7 +4286,7 @@ class ForestWolvesBot:
 
     async def show_timer_settings(self, query, context):
         chat_id = query.message.chat.id
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         
         keyboard = [
             [InlineKeyboardButton("🌙 Изменить длительность ночи", callback_data="timer_night")],
@@ -4337,7 +4314,7 @@ class ForestWolvesBot:
     async def show_player_settings(self, query, context):
         """Показывает настройки лимитов игроков"""
         chat_id = query.message.chat.id
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         
         keyboard = [
             [InlineKeyboardButton("👥 Минимум игроков", callback_data="players_min")],
@@ -4408,7 +4385,7 @@ class ForestWolvesBot:
         chat_id = query.message.chat.id
         
         # Сбрасываем настройки в базе данных
-        success = reset_chat_settings(chat_id)
+        success = await adb.reset_chat_settings(chat_id)
         
         if success:
             await query.edit_message_text(
@@ -4443,12 +4420,12 @@ class ForestWolvesBot:
             return
 
         # Получаем текущие настройки чата
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         current_mode = chat_settings['test_mode']
         new_mode = not current_mode
         
         # Обновляем настройки в базе данных
-        success = update_chat_settings(chat_id, test_mode=new_mode)
+        success = await adb.update_chat_settings(chat_id, test_mode=new_mode)
         
         if success:
             mode_text = "ВКЛ" if new_mode else "ВЫКЛ"
@@ -4489,14 +4466,14 @@ class ForestWolvesBot:
             return
 
         # Получаем текущие настройки чата
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         current_mode = chat_settings['test_mode']
         new_mode = not current_mode
         
         # Обновляем настройки в базе данных
         # Устанавливаем min_players в зависимости от режима
         min_players = 3 if new_mode else 6
-        success = update_chat_settings(chat_id, test_mode=new_mode, min_players=min_players)
+        success = await adb.update_chat_settings(chat_id, test_mode=new_mode, min_players=min_players)
         
         if success:
             mode_text = "ВКЛ" if new_mode else "ВЫКЛ"
@@ -4528,12 +4505,13 @@ class ForestWolvesBot:
         
         # Формируем список игроков с кликабельными никнеймами
         players_list = ""
+        await self.prefetch_player_tags(game.players)
         for player in game.players.values():
             player_tag = self.format_player_tag(player.username, player.user_id, make_clickable=True)
             players_list += f"• {player_tag}\n"
         
         # Получаем настройки чата для правильного отображения минимума игроков
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         min_players = self.global_settings.get_min_players()
         
         # Создаем сообщение регистрации
@@ -4577,8 +4555,9 @@ class ForestWolvesBot:
         
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        # Обновляем сообщение
-        await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='HTML')
+        # Обновляем сообщение (частые переключения объединяются в одну правку)
+        await self._edit_join_message(context, chat_id, query.message.message_id, message, reply_markup,
+                                      edit=query.edit_message_text)
 
     async def show_global_settings(self, query, context):
         """Показывает глобальные настройки бота"""
@@ -4688,7 +4667,7 @@ class ForestWolvesBot:
         user_id = query.from_user.id
 
         # Получаем настройки чата из базы данных
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         
         test_mode_text = "⚡ Быстрый режим: ВКЛ" if chat_settings['test_mode'] else "⚡ Быстрый режим: ВЫКЛ"
 
@@ -4723,7 +4702,7 @@ class ForestWolvesBot:
     async def show_night_duration_options(self, query, context):
         """Показывает опции для изменения длительности ночи"""
         chat_id = query.message.chat.id
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         current_duration = chat_settings['night_duration']
         
         options = [30, 45, 60, 90, 120]
@@ -4745,7 +4724,7 @@ class ForestWolvesBot:
     async def show_day_duration_options(self, query, context):
         """Показывает опции для изменения длительности дня"""
         chat_id = query.message.chat.id
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         current_duration = chat_settings['day_duration']
         
         options = [120, 180, 300, 420, 600]  # 2, 3, 5, 7, 10 минут
@@ -4768,7 +4747,7 @@ class ForestWolvesBot:
     async def show_vote_duration_options(self, query, context):
         """Показывает опции для изменения длительности голосования"""
         chat_id = query.message.chat.id
-        chat_settings = get_chat_settings(chat_id)
+        chat_settings = await adb.get_chat_settings(chat_id)
         current_duration = chat_settings['vote_duration']
         
         options = [60, 90, 120, 180, 300]  # 1, 1.5, 2, 3, 5 минут
@@ -4830,7 +4809,7 @@ class ForestWolvesBot:
         if query.data.startswith("set_night_"):
             seconds = int(query.data.split("_")[2])
             # Сохраняем настройку в базу данных
-            success = update_chat_settings(chat_id, night_duration=seconds)
+            success = await adb.update_chat_settings(chat_id, night_duration=seconds)
             if success:
                 await query.answer("✅ Настройка сохранена!", show_alert=True)
                 # Обновляем кнопки с галочкой
@@ -4840,7 +4819,7 @@ class ForestWolvesBot:
         elif query.data.startswith("set_day_"):
             seconds = int(query.data.split("_")[2])
             # Сохраняем настройку в базу данных
-            success = update_chat_settings(chat_id, day_duration=seconds)
+            success = await adb.update_chat_settings(chat_id, day_duration=seconds)
             if success:
                 await query.answer("✅ Настройка сохранена!", show_alert=True)
                 # Обновляем кнопки с галочкой
@@ -4850,7 +4829,7 @@ class ForestWolvesBot:
         elif query.data.startswith("set_vote_"):
             seconds = int(query.data.split("_")[2])
             # Сохраняем настройку в базу данных
-            success = update_chat_settings(chat_id, vote_duration=seconds)
+            success = await adb.update_chat_settings(chat_id, vote_duration=seconds)
             if success:
                 await query.answer("✅ Настройка сохранена!", show_alert=True)
                 # Обновляем кнопки с галочкой
@@ -4860,15 +4839,16 @@ class ForestWolvesBot:
         elif query.data.startswith("set_min_players_"):
             players = int(query.data.split("_")[3])
             # Сохраняем настройку в базу данных
-            update_chat_settings(chat_id, min_players=players)
+            await adb.update_chat_settings(chat_id, min_players=players)
             await query.edit_message_text(f"👥 Минимальное количество игроков изменено на {players}!\n\n✅ Новая настройка сохранена и будет применена для следующих игр.")
         elif query.data.startswith("set_max_players_"):
             players = int(query.data.split("_")[3])
             # Сохраняем настройку в базу данных
-            update_chat_settings(chat_id, max_players=players)
+            await adb.update_chat_settings(chat_id, max_players=players)
             await query.edit_message_text(f"👥 Максимальное количество игроков изменено на {players}!\n\n✅ Новая настройка сохранена и будет применена для следующих игр.")
 
     # ---------------- night actions processing ----------------
+    @send_priority(PRIORITY_CRITICAL)
     async def send_night_actions_to_players(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         chat_id = game.chat_id
         logger.info(f"🌙 Отправка ночных действий для игры {chat_id}")
@@ -5138,13 +5118,13 @@ class ForestWolvesBot:
     async def complete_exile_voting_early(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
         """Завершает голосование за изгнание досрочно"""
         # Проверяем, не был ли уже вызван этот метод
-        if hasattr(game, 'exile_voting_completed') and game.exile_voting_completed:
+        if game.exile_voting_completed:
             logger.info("Голосование за изгнание уже завершено, пропускаем")
             return
         
         # Дополнительная проверка состояния игры
-        if game.phase != GamePhase.VOTING or not hasattr(game, 'voting_type') or game.voting_type != "exile":
-            logger.info(f"Игра не в фазе голосования за изгнание: phase={game.phase}, voting_type={getattr(game, 'voting_type', 'None')}")
+        if game.phase != GamePhase.VOTING or game.voting_type != "exile":
+            logger.info(f"Игра не в фазе голосования за изгнание: phase={game.phase}, voting_type={game.voting_type}")
             return
             
         game.exile_voting_completed = True  # Помечаем как завершенное
@@ -5341,6 +5321,8 @@ class ForestWolvesBot:
     async def start_game_common(self, update_or_query, context: ContextTypes.DEFAULT_TYPE, game: Game):
         """Общая логика начала игры"""
         chat_id = game.chat_id
+        # Игра вышла из набора: отложенная правка сообщения о наборе не должна вернуть кнопки
+        self.join_edits.discard(chat_id)
         
         # Формируем теги участников
         player_tags = []
@@ -5373,107 +5355,27 @@ class ForestWolvesBot:
         await self.start_night_phase(context, game)
         
         # Автосохранение состояния игры
-        self.save_game_state(chat_id)
+        await self.save_game_state_async(chat_id)
 
+    @send_priority(PRIORITY_CRITICAL)
     async def send_roles_to_players(self, context: ContextTypes.DEFAULT_TYPE, game: Game):
-        """Отправляет роли всем игрокам в личные сообщения с кнопками действий"""
-        for player in game.players.values():
-            role_info = self.get_role_info(player.role)
-            team_name = "🦁 Хищники" if player.team.name == "PREDATORS" else "🌿 Травоядные"
-            
-            role_message = (
-                f"🎭 Ваша роль в игре 'Лес и Волки':\n\n"
-                f"👤 {role_info['name']}\n"
-                f"🏴 Команда: {team_name}\n\n"
-                f"📖 Описание:\n{role_info['description']}\n\n"
-                f"🌙 Выберите действие:"
+        """Отправляет роли всем игрокам в личные сообщения с кнопками действий (параллельно)"""
+        # Тексты ролей общие, строки кнопок целей строятся один раз на фазу
+        render = self.get_render_cache(game)
+        night_actions = self.night_actions.get(game.chat_id)
+        
+        async def send_role(player: Player):
+            actions = night_actions.get_player_actions(player.user_id) if night_actions else None
+            reply_markup = render.night_markup(player, actions)
+            
+            return await context.bot.send_message(
+                chat_id=player.user_id, 
+                text=role_intro(player.role, player.team),
+                reply_markup=reply_markup
             )
-            
-            # Создаем кнопки в зависимости от роли
-            keyboard = []
-            if player.role == Role.HARE:
-                # У зайца только кнопка "Спать"
-                keyboard = [[InlineKeyboardButton(
-                    "😴 Спать",
-                    callback_data=f"hare_skip_{player.user_id}"
-                )]]
-            else:
-                # У остальных ролей - прямые кнопки с целями
-                if game.chat_id in self.night_actions:
-                    night_actions = self.night_actions[game.chat_id]
-                    actions = night_actions.get_player_actions(player.user_id)
-                    logger.info(f"🔍 Действия для игрока {player.user_id} ({player.role}): {actions}")
-                    
-                    if actions and actions.get("targets"):
-                        # Создаем кнопки для каждой цели
-                        for target in actions["targets"]:
-                            # Добавляем отметку, если это текущая цель
-                            current_mark = "✅ " if actions.get("current_target") == target.user_id else ""
-                            # Используем функцию get_display_name для корректного отображения
-                            display_name = self.get_display_name(target.user_id, target.username, target.first_name)
-                            button_text = f"{current_mark}{display_name}"
-
-                            # Создаем правильный формат callback_data для каждой роли
-                            if actions['type'] == 'wolf':
-                                callback_data = f"wolf_kill_{target.user_id}"
-                            elif actions['type'] == 'fox':
-                                callback_data = f"fox_steal_{target.user_id}"
-                            elif actions['type'] == 'beaver':
-                                callback_data = f"beaver_help_{target.user_id}"
-                            elif actions['type'] == 'mole':
-                                callback_data = f"mole_check_{target.user_id}"
-                            else:
-                                callback_data = f"night_{actions['type']}_{target.user_id}"
-
-                            keyboard.append([InlineKeyboardButton(
-                                button_text,
-                                callback_data=callback_data
-                            )])
-                        
-                        # Добавляем кнопку "Пропустить ход"
-                        if actions['type'] == 'wolf':
-                            skip_callback = "wolf_skip"
-                        elif actions['type'] == 'fox':
-                            skip_callback = "fox_skip"
-                        elif actions['type'] == 'beaver':
-                            skip_callback = "beaver_skip"
-                        elif actions['type'] == 'mole':
-                            skip_callback = "mole_skip"
-                        else:
-                            skip_callback = f"night_{actions['type']}_skip"
-
-                        keyboard.append([InlineKeyboardButton(
-                            "⏭️ Пропустить ход",
-                            callback_data=skip_callback
-                        )])
-                    else:
-                        # Если нет целей, показываем только кнопку пропуска
-                        if player.role == Role.WOLF:
-                            skip_callback = "wolf_skip"
-                        elif player.role == Role.FOX:
-                            skip_callback = "fox_skip"
-                        elif player.role == Role.BEAVER:
-                            skip_callback = "beaver_skip"
-                        elif player.role == Role.MOLE:
-                            skip_callback = "mole_skip"
-                        else:
-                            skip_callback = f"night_{player.role.value}_skip"
-
-                        keyboard = [[InlineKeyboardButton(
-                            "⏭️ Пропустить ход",
-                            callback_data=skip_callback
-                        )]]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            try:
-                await context.bot.send_message(
-                    chat_id=player.user_id, 
-                    text=role_message,
-                    reply_markup=reply_markup
-                )
-            except Exception as e:
-                logger.error(f"Не удалось отправить роль игроку {player.user_id}: {e}")
+        
+        await fan_out(game.players.values(), send_role, key=lambda player: player.user_id,
+                      label=f"Роли (чат {game.chat_id})")
         
         # Отправляем раскрытие ролей игрокам с острым нюхом
         await self.send_role_reveal_to_players(context, game)
@@ -5494,17 +5396,13 @@ class ForestWolvesBot:
                     roles_reveal += f"👤 {display_name}: {role_info['name']} ({team_name})\n"
             
             # Отправляем раскрытие игрокам с острым нюхом
-            for player in game.players.values():
-                if player.is_alive and check_role_reveal_effect(player.user_id):
-                    try:
-                        await context.bot.send_message(
-                            chat_id=player.user_id,
-                            text=roles_reveal,
-                            parse_mode='HTML'
-                        )
-                        logger.info(f"✅ Раскрытие ролей отправлено игроку {player.user_id} с острым нюхом")
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка отправки раскрытия ролей игроку {player.user_id}: {e}")
+            recipients = [player.user_id for player in game.players.values()
+                          if player.is_alive and check_role_reveal_effect(player.user_id)]
+            await fan_out(
+                recipients,
+                lambda user_id: context.bot.send_message(chat_id=user_id, text=roles_reveal, parse_mode='HTML'),
+                label=f"Раскрытие ролей (чат {game.chat_id})"
+            )
                         
         except Exception as e:
             logger.error(f"❌ Ошибка отправки раскрытия ролей: {e}")
@@ -5569,29 +5467,8 @@ class ForestWolvesBot:
             )
 
     def get_role_info(self, role: Role) -> Dict[str, str]:
-        role_info = {
-            Role.WOLF: {
-                "name": "🐺 Волк",
-                "description": "Вы хищник! Вместе с другими волками вы охотитесь по ночам."
-            },
-            Role.FOX: {
-                "name": "🦊 Лиса",
-                "description": "Вы хищник! Каждую ночь вы воруете запасы еды у других зверей."
-            },
-            Role.HARE: {
-                "name": "🐰 Заяц",
-                "description": "Вы травоядный! Вы спите всю ночь и участвуете только в дневных обсуждениях."
-            },
-            Role.MOLE: {
-                "name": "🦫 Крот",
-                "description": "Вы травоядный! По ночам вы роете норки и узнаёте команды других зверей."
-            },
-            Role.BEAVER: {
-                "name": "🦦 Бобер",
-                "description": "Вы травоядный! Вы можете возвращать украденные запасы другим зверям."
-            }
-        }
-        return role_info.get(role, {"name": "Неизвестно", "description": "Роль не определена"})
+        """Название и описание роли (общий неизменяемый словарь)"""
+        return role_info(role)
 
     # ---------------- bot lifecycle: setup and run ----------------
     async def setup_bot_commands(self, application: Application):
@@ -5614,7 +5491,7 @@ class ForestWolvesBot:
             # 🎮 Новые режимы игры
             BotCommand("hare_wolf", "🐰 Режим 'Заяц-волк'"),
             BotCommand("wolf_sheep", "🐺 Режим 'Волк в овечьей шкуре'"),
-            BotCommand("hedgehogs", "🦔 Режим 'Ежики'"),
+            *([BotCommand("hedgehogs", "🦔 Режим 'Ежики'")] if self.subsystems.is_enabled('duels') else []),
             BotCommand("casino", "🎰 Казино"),
             
             # 🎯 Команды для управления игрой
@@ -5624,13 +5501,17 @@ class ForestWolvesBot:
             BotCommand("leave", "👋 Покинуть игру"),
             
             # 🌲 Система лесов
-            BotCommand("create_forest", "🌲 Создать лес"),
-            BotCommand("forests", "🌲 Список лесов"),
-            BotCommand("my_forests_profile", "🌲 Мои леса"),
-            BotCommand("forest_profile", "🌲 Профиль леса"),
-            BotCommand("forest_analytics", "📊 Аналитика леса"),
-            BotCommand("top_forests", "🏆 Топ лесов"),
-            BotCommand("help_forests", "🆘 Справка по лесам"),
+            *([
+                BotCommand("create_forest", "🌲 Создать лес"),
+                BotCommand("forests", "🌲 Список лесов"),
+                BotCommand("my_forests_profile", "🌲 Мои леса"),
+                BotCommand("forest_profile", "🌲 Профиль леса"),
+                BotCommand("help_forests", "🆘 Справка по лесам"),
+            ] if self.subsystems.is_enabled('forests') else []),
+            *([
+                BotCommand("forest_analytics", "📊 Аналитика леса"),
+                BotCommand("top_forests", "🏆 Топ лесов"),
+            ] if self.subsystems.is_enabled('analytics') else []),
             
             # ⚙️ Административные команды
             BotCommand("settings", "⚙️ Настройки игры"),
@@ -5644,8 +5525,30 @@ class ForestWolvesBot:
         except Exception as ex:
             logger.error(f"Failed to set bot commands: {ex}")
 
-    def run(self):
-        application = Application.builder().token(BOT_TOKEN).build()
+    def build_application(self, builder=None) -> Application:
+        """
+        Создает приложение бота со всеми обработчиками
+        
+        Args:
+            builder: ApplicationBuilder с уже заданными параметрами (по умолчанию - токен бота)
+            
+        Returns:
+            Application: Приложение бота
+        """
+        # Обновления разных игр обрабатываются параллельно, одной игры - по очереди
+        update_processor = ChatUpdateProcessor(
+            lambda update: game_chat_key(update, self.player_games),
+            locks=self.game_locks
+        )
+        if builder is None:
+            builder = Application.builder().token(BOT_TOKEN)
+        # Все исходящие запросы - через одну очередь с лимитами Telegram;
+        # глобальный лимит бота делится между воркерами шардов
+        shards = self.shard[1] if self.shard else 1
+        self.outbound = OutboundDispatcher(global_rate=GLOBAL_RATE / shards)
+        application = builder.concurrent_updates(update_processor).rate_limiter(self.outbound).build()
+        # Очередь не отдает обновления сверх предела обрабатываемых - прием тормозит вместо роста задач
+        limit_in_flight(application, update_processor)
 
         # зарегистрируем обработчики
         application.add_handler(CommandHandler("start", self.start_command))
@@ -5684,29 +5587,35 @@ class ForestWolvesBot:
         # Новые режимы игры
         application.add_handler(CommandHandler("hare_wolf", self.hare_wolf_command)) # Команда /hare_wolf
         application.add_handler(CommandHandler("wolf_sheep", self.wolf_sheep_command)) # Команда /wolf_sheep
-        application.add_handler(CommandHandler("hedgehogs", self.hedgehogs_command)) # Команда /hedgehogs
+        if self.subsystems.is_enabled('duels'):
+            application.add_handler(CommandHandler("hedgehogs", self.hedgehogs_command)) # Команда /hedgehogs
         application.add_handler(CommandHandler("casino", self.casino_command)) # Команда /casino
         
-        # 🌲 Команды лесов
-        logger.info("🌲 Добавляем обработчики команд лесов...")
-        application.add_handler(CommandHandler("create_forest", handle_create_forest)) # Команда /create_forest
-        application.add_handler(CommandHandler("forests", handle_forests)) # Команда /forests
-        application.add_handler(CommandHandler("my_forests_profile", handle_my_forests_profile)) # Команда /my_forests_profile
-        application.add_handler(CommandHandler("forest_profile", handle_forest_profile)) # Команда /forest_profile
-        application.add_handler(CommandHandler("forest_analytics", handle_forest_analytics)) # Команда /forest_analytics
-        application.add_handler(CommandHandler("top_forests", handle_top_forests)) # Команда /top_forests
-        application.add_handler(CommandHandler("help_forests", handle_help_forests)) # Команда /help_forests
-        logger.info("✅ Обработчики команд лесов добавлены")
+        # 🌲 Команды лесов (модуль forest_handlers загружается при первой команде)
+        lazy = self.subsystems.handler
+        if self.subsystems.is_enabled('forests'):
+            logger.info("🌲 Добавляем обработчики команд лесов...")
+            application.add_handler(CommandHandler("create_forest", lazy('forests', 'handle_create_forest'))) # Команда /create_forest
+            application.add_handler(CommandHandler("forests", lazy('forests', 'handle_forests'))) # Команда /forests
+            application.add_handler(CommandHandler("my_forests_profile", lazy('forests', 'handle_my_forests_profile'))) # Команда /my_forests_profile
+            application.add_handler(CommandHandler("forest_profile", lazy('forests', 'handle_forest_profile'))) # Команда /forest_profile
+            application.add_handler(CommandHandler("help_forests", lazy('forests', 'handle_help_forests'))) # Команда /help_forests
+            logger.info("✅ Обработчики команд лесов добавлены")
+            
+            # 🌲 Динамические команды лесов (с параметрами)
+            logger.info("🌲 Добавляем обработчики динамических команд лесов...")
+            application.add_handler(MessageHandler(filters.Regex(r'^/join_forest_\d+$'), lazy('forests', 'handle_join_forest'))) # Команда /join_forest_<id>
+            application.add_handler(MessageHandler(filters.Regex(r'^/summon_forest_\d+$'), lazy('forests', 'handle_summon_forest'))) # Команда /summon_forest_<id>
+            logger.info("✅ Обработчики динамических команд лесов добавлены")
         
-        # 🌲 Динамические команды лесов (с параметрами)
-        logger.info("🌲 Добавляем обработчики динамических команд лесов...")
-        application.add_handler(MessageHandler(filters.Regex(r'^/join_forest_\d+$'), handle_join_forest)) # Команда /join_forest_<id>
-        application.add_handler(MessageHandler(filters.Regex(r'^/summon_forest_\d+$'), handle_summon_forest)) # Команда /summon_forest_<id>
-        logger.info("✅ Обработчики динамических команд лесов добавлены")
+        # 📊 Аналитика и рейтинги лесов
+        if self.subsystems.is_enabled('analytics'):
+            application.add_handler(CommandHandler("forest_analytics", lazy('analytics', 'handle_forest_analytics'))) # Команда /forest_analytics
+            application.add_handler(CommandHandler("top_forests", lazy('analytics', 'handle_top_forests'))) # Команда /top_forests
         
 
-        # Обработчик присоединения бота к чату
-        application.add_handler(ChatMemberHandler(self.handle_bot_join, ChatMemberHandler.MY_CHAT_MEMBER))
+        # Обработчик присоединения бота к чату и изменений статусов участников
+        application.add_handler(ChatMemberHandler(self.handle_bot_join, ChatMemberHandler.ANY_CHAT_MEMBER))
         
         # Обработчик для логирования всех команд (для отладки)
         application.add_handler(MessageHandler(filters.Regex(r'^/'), self.log_command))
@@ -5736,7 +5645,8 @@ class ForestWolvesBot:
         application.add_handler(CallbackQueryHandler(self.handle_start_game_callback, pattern=r"^start_game$"))
         
         # Обработчики дуэлей
-        application.add_handler(CallbackQueryHandler(self.handle_duel_callback, pattern=r"^duel_"))
+        if self.subsystems.is_enabled('duels'):
+            application.add_handler(CallbackQueryHandler(self.handle_duel_callback, pattern=r"^duel_"))
         application.add_handler(CallbackQueryHandler(self.handle_leave_registration_callback, pattern=r"^leave_registration$"))
         application.add_handler(CallbackQueryHandler(self.handle_cancel_game_callback, pattern=r"^cancel_game$"))
         application.add_handler(CallbackQueryHandler(self.handle_end_game_callback, pattern=r"^end_game$"))
@@ -5778,54 +5688,141 @@ class ForestWolvesBot:
 
         # Установка команд после старта бота
         async def post_init(application):
-            await self.setup_bot_commands(application)
-            # Открепляем все сообщения при старте
-            await self.unpin_all_messages_on_startup()
+            # Открываем асинхронный пул соединений внутри event loop
+            if self.db:
+                try:
+                    await adb.init_async_db()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка инициализации асинхронного пула: {e}")
+            # Возобновляем таймеры игр, восстановленных из БД
+            self.rearm_phase_deadlines(application)
+            await self.phase_scheduler.start()
+            # Автосохранение пишет только изменившиеся игры
+            self.start_auto_save()
+            # Общие для всего бота действия выполняет один процесс
+            if self.shard is None or self.shard[0] == 0:
+                await self.setup_bot_commands(application)
+                # Открепляем все сообщения при старте
+                await self.unpin_all_messages_on_startup(application.bot)
+
+        async def post_shutdown(application):
+            await self.phase_scheduler.stop()
+            await self.join_edits.shutdown()
+            if self.auto_save_manager:
+                self.stop_auto_save()
+                await self.auto_save_manager.save_current_state()
+            await self.game_journal.flush_async()
+            await adb.close_async_db()
 
         application.post_init = post_init
+        application.post_shutdown = post_shutdown
+        application.add_error_handler(log_ingress_error)
+        return application
+
+    def run(self):
+        ingress = IngressConfig.from_env()
+        application = self.build_application(configure_builder(Application.builder().token(BOT_TOKEN), ingress))
 
-        # Запуск бота (blocking call)
+        # Запуск бота (blocking call): long polling или webhook по BOT_MODE
         try:
-            application.run_polling()
+            run_application(application, ingress)
         except KeyboardInterrupt:
             logger.info("⏹️ Остановка бота...")
         except Exception as e:
-            if "Conflict" in str(e):
-                logger.error("❌ Ошибка Conflict: Запущено несколько экземпляров бота!")
-                logger.error("❌ Убедитесь, что только один экземпляр бота работает одновременно")
-                logger.error(f"❌ Детали ошибки: {e}")
-                logger.info("🔄 Попытка переподключения через 10 секунд...")
-                import time
-                time.sleep(10)
-                logger.info("🔄 Перезапуск бота...")
-                application.run_polling()
-            else:
-                logger.error(f"❌ Неожиданная ошибка: {e}")
-                raise
+            logger.error(f"❌ Неожиданная ошибка: {e}")
+            raise
         finally:
             # Закрываем подключение к базе данных
             if self.db:
                 close_db()
                 logger.info("✅ Подключение к базе данных закрыто")
 
-    async def unpin_all_messages_on_startup(self):
-        """Открепляет только сообщения, закрепленные ботом при старте"""
+    def keep_shard_games(self, shard: int, shards: int) -> int:
+        """
+        Оставляет только игры, которыми владеет шард
+        
+        Каждый воркер загружает из БД все активные игры, но обслуживает
+        только чаты своего шарда.
+        
+        Args:
+            shard: Номер шарда
+            shards: Количество шардов
+            
+        Returns:
+            int: Количество оставшихся игр
+        """
+        for chat_id in [chat_id for chat_id in self.games if shard_for(chat_id, shards) != shard]:
+            del self.games[chat_id]
+            self.night_actions.pop(chat_id, None)
+            self.night_interfaces.pop(chat_id, None)
+            self.game_journal.release(chat_id)
+        for user_id in [uid for uid, chat_id in self.player_games.items() if chat_id not in self.games]:
+            del self.player_games[user_id]
+        return len(self.games)
+
+    def run_shard(self, shard: int, shards: int, inbox, events):
+        """
+        Запускает бота как воркер шарда: обновления приходят от фронт-процесса
+        
+        Args:
+            shard: Номер шарда
+            shards: Количество шардов
+            inbox: Очередь обновлений (словари Update.to_dict(), None - остановка)
+            events: Очередь событий player_games для фронт-процесса
+        """
+        self.shard = (shard, shards)
+        games_count = self.keep_shard_games(shard, shards)
+        self.player_games = PlayerGamesMap(
+            self.player_games,
+            on_change=lambda user_id, chat_id: events.put((shard, user_id, chat_id))
+        )
+        for user_id, chat_id in self.player_games.items():
+            events.put((shard, user_id, chat_id))
+        logger.info(f"🚀 Воркер {shard + 1}/{shards}: игр {games_count}")
+
+        async def serve():
+            builder = configure_builder(Application.builder().token(BOT_TOKEN), IngressConfig())
+            application = self.build_application(builder.updater(None))
+            loop = asyncio.get_running_loop()
+            async with application:
+                await application.post_init(application)
+                await application.start()
+                while True:
+                    data = await loop.run_in_executor(None, inbox.get)
+                    if data is None:
+                        break
+                    await application.update_queue.put(Update.de_json(data, application.bot))
+                await application.stop()
+                await application.post_shutdown(application)
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.db:
+                close_db()
+            logger.info(f"⏹️ Воркер {shard + 1}/{shards} остановлен")
+
+    async def unpin_all_messages_on_startup(self, bot):
+        """
+        Открепляет только сообщения, закрепленные ботом при старте
+        
+        Args:
+            bot: Бот приложения (запросы идут через очередь исходящих)
+        """
         try:
             logger.info("🔄 Начинаем открепление зависших сообщений бота...")
             
             # Получаем список всех авторизованных чатов
-            from state_persistence import StatePersistence
-            state_persistence = StatePersistence()
+            # Общий экземпляр: таблицы состояния уже проверены при запуске
+            from state_persistence import state_persistence
             authorized_chats = state_persistence.load_authorized_chats()
             
             if not authorized_chats:
                 logger.info("ℹ️ Нет авторизованных чатов для открепления сообщений")
                 return
             
-            # Создаем экземпляр бота для API вызовов
-            from telegram import Bot
-            bot = Bot(token=BOT_TOKEN)
-            
             unpinned_count = 0
             total_chats = len(authorized_chats)
             
@@ -5834,10 +5831,9 @@ class ForestWolvesBot:
                     # Получаем информацию о чате
                     chat = await bot.get_chat(chat_id)
                     
-                    # Проверяем, что бот является администратором
+                    # Проверяем, что бот является администратором (заодно загружаем список админов чата)
                     try:
-                        bot_member = await bot.get_chat_member(chat_id, bot.id)
-                        if bot_member.status not in ['administrator', 'creator']:
+                        if not await self.member_cache.is_admin(bot, chat_id, bot.id):
                             logger.warning(f"⚠️ Бот не является администратором в чате {chat_id}, пропускаем")
                             continue
                     except Exception as e:
@@ -5912,10 +5908,10 @@ class ForestWolvesBot:
         try:
             if self.db:
                 # Проверяем, есть ли уже пользователь в БД
-                existing_user = get_user_by_telegram_id(user_id)
+                existing_user = await adb.get_user_by_telegram_id(user_id)
                 if not existing_user:
                     # Создаем пользователя с балансом 100 орешков
-                    create_user(user_id, username)
+                    await adb.create_user(user_id, username)
                     logger.info(f"✅ Новый пользователь {user_id} ({username}) создан в БД с балансом 100 орешков")
                     
                     # Отправляем приветственное сообщение
@@ -5943,8 +5939,13 @@ class ForestWolvesBot:
             await update.message.reply_text("❌ Произошла ошибка. Попробуйте позже.")
 
     async def handle_bot_join(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обрабатывает присоединение бота к чату"""
+        """Обрабатывает присоединение бота к чату и изменения статусов участников (chat_member)"""
+        # Новый статус участника сразу попадает в кэш прав
+        self.member_cache.apply_update(update.chat_member or update.my_chat_member)
+        
         chat_member_updated = update.my_chat_member
+        if chat_member_updated is None:
+            return
         
         # Проверяем, что бот был добавлен в чат
         if (chat_member_updated.new_chat_member.status == 'member' and 
@@ -6022,8 +6023,7 @@ class ForestWolvesBot:
             return
 
         # Проверяем права администратора
-        chat_member = await context.bot.get_chat_member(chat_id, user_id)
-        if chat_member.status not in ['creator', 'administrator']:
+        if not await self.member_cache.is_admin(context.bot, chat_id, user_id):
             await update.message.reply_text("❌ Только администраторы могут изменять быстрый режим!")
             return
 
@@ -6126,7 +6126,7 @@ class ForestWolvesBot:
             chat_id = query.message.chat.id
             
             # Обновляем настройку в базе данных
-            success = update_chat_settings(chat_id, dead_rewards_enabled=value)
+            success = await adb.update_chat_settings(chat_id, dead_rewards_enabled=value)
             
             if success:
                 # Обновляем настройку в глобальных настройках
@@ -6168,11 +6168,11 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Получаем товары из магазина
             from database_psycopg2 import get_shop_items
-            shop_items = get_shop_items()
+            shop_items = await adb.run_sync(get_shop_items)
             
             if not shop_items:
                 await query.edit_message_text("🛍️ <b>Магазин пуст</b>\n\nТовары появятся позже!", parse_mode='HTML')
@@ -6196,6 +6196,7 @@ class ForestWolvesBot:
             # Формируем сообщение с информацией о пользователе и товарах
             shop_text = f"🌲 <b>Лесной магазин</b>\n\n"
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             shop_text += f"👤 <b>{clickable_name}:</b>\n"
             shop_text += f"🌰 Орешки: {user_balance}\n\n"
@@ -6221,7 +6222,7 @@ class ForestWolvesBot:
             
             # Получаем информацию о товаре
             from database_psycopg2 import get_shop_items
-            shop_items = get_shop_items()
+            shop_items = await adb.run_sync(get_shop_items)
             item = None
             for shop_item in shop_items:
                 if shop_item['id'] == item_id:
@@ -6233,10 +6234,9 @@ class ForestWolvesBot:
                 return
             
             # Используем новую атомарную систему покупок
-            from database_psycopg2 import buy_item
             # Конвертируем DECIMAL в int (цена может быть float из БД)
             item_price = int(float(item['price']))
-            result = buy_item(user_id, item['item_name'], item_price)
+            result = await adb.buy_item(user_id, item['item_name'], item_price)
             
             if result['success']:
                 # Формируем сообщение об успешной покупке
@@ -6295,7 +6295,7 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             keyboard = [
                 [InlineKeyboardButton("🛍️ Магазин", callback_data="show_shop")],
@@ -6305,6 +6305,7 @@ class ForestWolvesBot:
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             balance_text = f"🌲 <b>Баланс Лес и волки</b>\n\n"
@@ -6326,10 +6327,10 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Получаем товары из магазина
-            shop_items = get_shop_items()
+            shop_items = await adb.run_sync(get_shop_items)
             
             if not shop_items:
                 await query.message.reply_text("🛍️ <b>Магазин пуст</b>\n\nТовары появятся позже!", parse_mode='HTML')
@@ -6353,6 +6354,7 @@ class ForestWolvesBot:
             # Формируем сообщение с информацией о пользователе и товарах
             shop_text = f"🌲 <b>Лесной магазин</b>\n\n"
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             shop_text += f"👤 <b>{clickable_name}:</b>\n"
             shop_text += f"🌰 Орешки: {user_balance}\n\n"
@@ -6376,7 +6378,7 @@ class ForestWolvesBot:
             
             # Получаем статистику пользователя
             from database_psycopg2 import get_player_detailed_stats
-            stats = get_player_detailed_stats(user_id)
+            stats = await adb.run_sync(get_player_detailed_stats, user_id)
             
             keyboard = [
                 [InlineKeyboardButton("⬅️ Назад", callback_data="back_to_main")]
@@ -6420,9 +6422,10 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             # Создаем клавиатуру профиля
@@ -6474,7 +6477,7 @@ class ForestWolvesBot:
             
             # Получаем общую статистику пользователя
             from database_psycopg2 import get_player_detailed_stats
-            stats = get_player_detailed_stats(user_id)
+            stats = await adb.run_sync(get_player_detailed_stats, user_id)
             
             # Формируем сообщение статистики
             stats_text = f"🌍 <b>Общая статистика</b> 🌍\n\n"
@@ -6488,7 +6491,7 @@ class ForestWolvesBot:
                 
                 # Получаем баланс пользователя
                 from database_balance_manager import balance_manager
-                total_nuts = balance_manager.get_user_balance(user_id)
+                total_nuts = await adb.run_sync(balance_manager.get_user_balance, user_id)
                 
                 stats_text += f"🎮 <b>Игровая статистика:</b>\n"
                 stats_text += f"• Игр сыграно: {games_played}\n"
@@ -6538,10 +6541,10 @@ class ForestWolvesBot:
             # Получаем аргументы команды
             if not context.args:
                 # Показываем текущий никнейм и инструкции
-                from database_psycopg2 import get_user_nickname, get_display_name
+                from database_psycopg2 import get_display_name
                 
-                current_nickname = get_user_nickname(user_id)
-                display_name = get_display_name(user_id, username, update.effective_user.first_name)
+                current_nickname = await adb.get_user_nickname(user_id)
+                display_name = await adb.run_sync(get_display_name, user_id, username, update.effective_user.first_name)
                 
                 help_text = f"🎭 <b>Управление никнеймом</b>\n\n"
                 help_text += f"👤 <b>Текущее имя:</b> {display_name}\n"
@@ -6573,8 +6576,8 @@ class ForestWolvesBot:
                 # Удаляем никнейм
                 from database_psycopg2 import clear_user_nickname, get_display_name
                 
-                if clear_user_nickname(user_id):
-                    display_name = get_display_name(user_id, username, update.effective_user.first_name)
+                if await adb.run_sync(clear_user_nickname, user_id):
+                    display_name = await adb.run_sync(get_display_name, user_id, username, update.effective_user.first_name)
                     await update.message.reply_text(
                         f"✅ <b>Никнейм удален!</b>\n\n"
                         f"👤 <b>Теперь вас будут называть:</b> {display_name}",
@@ -6587,7 +6590,7 @@ class ForestWolvesBot:
                 from database_psycopg2 import set_user_nickname, is_nickname_available, get_display_name
                 
                 # Проверяем доступность никнейма
-                if not is_nickname_available(nickname_arg, user_id):
+                if not await adb.run_sync(is_nickname_available, nickname_arg, user_id):
                     await update.message.reply_text(
                         f"❌ <b>Никнейм занят!</b>\n\n"
                         f"🎭 Никнейм '{nickname_arg}' уже используется другим игроком.\n"
@@ -6597,8 +6600,8 @@ class ForestWolvesBot:
                     return
                 
                 # Устанавливаем никнейм
-                if set_user_nickname(user_id, nickname_arg):
-                    display_name = get_display_name(user_id, username, update.effective_user.first_name)
+                if await adb.run_sync(set_user_nickname, user_id, nickname_arg):
+                    display_name = await adb.run_sync(get_display_name, user_id, username, update.effective_user.first_name)
                     await update.message.reply_text(
                         f"✅ <b>Никнейм установлен!</b>\n\n"
                         f"🎭 <b>Ваш никнейм:</b> {nickname_arg}\n"
@@ -6639,9 +6642,9 @@ class ForestWolvesBot:
                 return
             
             # Проверяем, есть ли у пользователя никнейм
-            from database_psycopg2 import get_user_nickname, clear_user_nickname, get_display_name
+            from database_psycopg2 import clear_user_nickname, get_display_name
             
-            current_nickname = get_user_nickname(user_id)
+            current_nickname = await adb.get_user_nickname(user_id)
             
             if not current_nickname:
                 await update.message.reply_text(
@@ -6652,8 +6655,8 @@ class ForestWolvesBot:
                 return
             
             # Удаляем никнейм
-            if clear_user_nickname(user_id):
-                display_name = get_display_name(user_id, username, update.effective_user.first_name)
+            if await adb.run_sync(clear_user_nickname, user_id):
+                display_name = await adb.run_sync(get_display_name, user_id, username, update.effective_user.first_name)
                 await update.message.reply_text(
                     f"✅ <b>Никнейм сброшен!</b>\n\n"
                     f"🎭 <b>Удален никнейм:</b> {current_nickname}\n"
@@ -6726,6 +6729,7 @@ class ForestWolvesBot:
             target_username = username
         
         # Форматируем имена с тегами
+        await self.prefetch_player_tags([user_id, target_user_id])
         user_tag = self.format_player_tag(username, user_id, make_clickable=True)
         
         # Для целевого пользователя используем специальное форматирование
@@ -6826,6 +6830,7 @@ class ForestWolvesBot:
             target_username = username
         
         # Форматируем имена с тегами
+        await self.prefetch_player_tags([user_id, target_user_id])
         user_tag = self.format_player_tag(username, user_id, make_clickable=True)
         
         # Для целевого пользователя используем специальное форматирование
@@ -7008,8 +7013,6 @@ class ForestWolvesBot:
             # Если нет активной игры, ищем в базе данных последнюю завершенную игру
             if not last_game:
                 try:
-                    from database_psycopg2 import fetch_query
-                    
                     # Ищем последнюю игру пользователя в базе данных
                     query = """
                         SELECT g.chat_id, g.thread_id, g.finished_at, g.updated_at
@@ -7021,7 +7024,7 @@ class ForestWolvesBot:
                         LIMIT 1
                     """
                     
-                    result = fetch_query(query, (user_id,))
+                    result = await adb.fetch_query(query, (user_id,))
                     if result:
                         game_data = result[0]
                         last_game_chat_id = game_data['chat_id']
@@ -7044,7 +7047,7 @@ class ForestWolvesBot:
                             LIMIT 1
                         """
                         
-                        result_any = fetch_query(query_any, (user_id,))
+                        result_any = await adb.fetch_query(query_any, (user_id,))
                         if result_any:
                             game_data = result_any[0]
                             last_game_chat_id = game_data['chat_id']
@@ -7437,7 +7440,7 @@ class ForestWolvesBot:
             # Получаем подробную информацию об инвентаре
             from database_psycopg2 import get_user_inventory_detailed
             
-            inventory_data = get_user_inventory_detailed(user_id)
+            inventory_data = await adb.run_sync(get_user_inventory_detailed, user_id)
             
             keyboard = [
                 [InlineKeyboardButton("⬅️ Назад к профилю", callback_data="back_to_profile")]
@@ -7446,6 +7449,7 @@ class ForestWolvesBot:
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             inventory_text = f"🧺 <b>Корзинка</b> 🧺\n\n"
@@ -7482,7 +7486,7 @@ class ForestWolvesBot:
             chat_id = query.message.chat.id
             
             # Получаем статистику игрока в этом чате
-            stats = get_player_chat_stats(user_id, chat_id)
+            stats = await adb.run_sync(get_player_chat_stats, user_id, chat_id)
             
             keyboard = [
                 [InlineKeyboardButton("⬅️ Назад к профилю", callback_data="back_to_profile")]
@@ -7491,6 +7495,7 @@ class ForestWolvesBot:
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             stats_text = f"📜 <b>Свиток чести</b> 📜\n\n"
@@ -7544,7 +7549,7 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Создаем клавиатуру профиля
             keyboard = [
@@ -7558,6 +7563,7 @@ class ForestWolvesBot:
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Получаем кликабельное имя с учетом никнейма
+            await self.prefetch_player_tags([user_id])
             clickable_name = self.format_player_tag(username, user_id, make_clickable=True)
             
             # Формируем сообщение профиля
@@ -7644,7 +7650,7 @@ class ForestWolvesBot:
             
             # Получаем баланс пользователя
             from database_balance_manager import balance_manager
-            user_balance = balance_manager.get_user_balance(user_id)
+            user_balance = await adb.run_sync(balance_manager.get_user_balance, user_id)
             
             # Создаем клавиатуру профиля для ЛС
             keyboard = [
@@ -8134,6 +8140,10 @@ class ForestWolvesBot:
         """Callback для кнопки 'Ежики'"""
         await query.answer()
         
+        if not self.subsystems.is_enabled('duels'):
+            await query.edit_message_text("🦔 Режим 'Ежики' отключен в этом боте.")
+            return
+        
         chat_id = query.message.chat_id
         user_id = query.from_user.id
         username = query.from_user.username or query.from_user.first_name or "Unknown"
@@ -8207,6 +8217,7 @@ class ForestWolvesBot:
     
     async def handle_duel_accept(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик принятия дуэли"""
+        DuelPhase = self.subsystems.load('duels').DuelPhase
         await query.answer()
         
         chat_id = query.message.chat_id
@@ -8336,6 +8347,8 @@ class ForestWolvesBot:
     
     async def handle_duel_action(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик действий в дуэли"""
+        duels = self.subsystems.load('duels')
+        DuelAction, DuelPhase = duels.DuelAction, duels.DuelPhase
         await query.answer()
         
         logger.info(f"DUEL ACTION: query.data={query.data}")
@@ -8433,6 +8446,7 @@ class ForestWolvesBot:
     
     async def handle_duel_continue(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик продолжения дуэли"""
+        DuelPhase = self.subsystems.load('duels').DuelPhase
         await query.answer()
         
         chat_id = query.message.chat_id
@@ -8511,6 +8525,7 @@ class ForestWolvesBot:
     
     async def handle_duel_surrender(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик сдачи в дуэли"""
+        DuelPhase = self.subsystems.load('duels').DuelPhase
         await query.answer()
         
         chat_id = query.message.chat_id
@@ -8547,6 +8562,7 @@ class ForestWolvesBot:
 
     async def handle_duel_quiz(self, query, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик ответов на викторину в дуэли"""
+        DuelPhase = self.subsystems.load('duels').DuelPhase
         await query.answer()
         
         chat_id = query.message.chat_id
@@ -8710,6 +8726,31 @@ class ForestWolvesBot:
         )
 
 
-if __name__ == "__main__":
+def run_shard_worker(shard: int, shards: int, inbox, events):
+    """Точка входа процесса-воркера в режиме шардов"""
+    ForestWolvesBot().run_shard(shard, shards, inbox, events)
+
+
+def profile_startup() -> int:
+    """Запускает бота без приема обновлений и печатает время этапов запуска"""
     bot = ForestWolvesBot()
-    bot.run()
\ No newline at end of file
+    with bot.startup.stage("Сборка приложения"):
+        bot.build_application(configure_builder(Application.builder().token(BOT_TOKEN), IngressConfig()))
+    print(bot.startup.report())
+    print(f"🎮 Восстановлено игр: {len(bot.games)}")
+    if bot.db:
+        close_db()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бот «Лес и волки»")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Замерить этапы запуска (БД, схема, загрузка игр) и выйти")
+    if parser.parse_args().profile_startup:
+        sys.exit(profile_startup())
+    if BOT_WORKERS > 1:
+        run_sharded_bot(BOT_TOKEN, run_shard_worker, BOT_WORKERS)
+    else:
+        bot = ForestWolvesBot()
+        bot.run()
\ No newline at end of file
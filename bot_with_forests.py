@@ -23,6 +23,7 @@ from telegram.ext import (
 # Импорты существующего бота
 from config import BOT_TOKEN
 from database import init_database
+from outbound_dispatcher import OutboundDispatcher
 
 # Импорты системы лесов
 from forest_integration import init_forest_integration, get_forest_integration
@@ -49,7 +50,8 @@ class ForestWolvesBotWithForests:
             init_database()
             
             # Создаем приложение
-            self.application = Application.builder().token(self.bot_token).build()
+            # Исходящие сообщения (в т.ч. созыв лесов) - с лимитами Telegram
+            self.application = Application.builder().token(self.bot_token).rate_limiter(OutboundDispatcher()).build()
             
             # Инициализируем систему лесов
             self.forest_integration = init_forest_integration(self.application.bot)
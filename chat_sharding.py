@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Шардирование чатов по процессам-воркерам
+
+Фронт-процесс получает обновления Telegram и пересылает каждое воркеру,
+который владеет игрой: шард = hash(chat_id) % число воркеров. Обновления
+из личных чатов (голоса, ночные действия) направляются по player_games -
+воркеры сообщают фронту, какой игрок в какой игре. Каждый воркер держит
+свои игры, планировщик фаз и пул соединений с БД.
+"""
+
+import logging
+import multiprocessing
+import queue
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from game_locks import game_chat_key
+
+logger = logging.getLogger(__name__)
+
+# Событие воркера: (шард, user_id, chat_id игры или None - игрок вышел).
+# user_id None - воркер очистил все свои записи player_games.
+PlayerGameEvent = Tuple[int, Optional[int], Optional[int]]
+
+
+def shard_for(key: Hashable, shards: int) -> int:
+    """
+    Номер шарда, владеющего чатом
+
+    Args:
+        key: chat_id (hash целого числа одинаков во всех процессах)
+        shards: Количество шардов
+
+    Returns:
+        int: Номер шарда от 0 до shards - 1
+    """
+    return hash(key) % shards
+
+
+class PlayerGamesMap(dict):
+    """
+    Словарь user_id -> chat_id, сообщающий о каждом изменении
+
+    Заменяет ForestWolvesBot.player_games в воркере: фронт узнает,
+    куда направлять личные обновления игрока.
+    """
+
+    def __init__(self, *args, on_change: Callable[[Optional[int], Optional[int]], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._on_change = on_change
+
+    def __setitem__(self, user_id, chat_id):
+        super().__setitem__(user_id, chat_id)
+        self._on_change(user_id, chat_id)
+
+    def __delitem__(self, user_id):
+        super().__delitem__(user_id)
+        self._on_change(user_id, None)
+
+    def pop(self, user_id, *default):
+        had_key = user_id in self
+        value = super().pop(user_id, *default)
+        if had_key:
+            self._on_change(user_id, None)
+        return value
+
+    def popitem(self):
+        user_id, chat_id = super().popitem()
+        self._on_change(user_id, None)
+        return user_id, chat_id
+
+    def setdefault(self, user_id, chat_id=None):
+        if user_id not in self:
+            self[user_id] = chat_id
+        return self[user_id]
+
+    def update(self, *args, **kwargs):
+        for user_id, chat_id in dict(*args, **kwargs).items():
+            self[user_id] = chat_id
+
+    def clear(self):
+        super().clear()
+        self._on_change(None, None)
+
+
+class ShardRouter:
+    """Выбор шарда для обновления по chat_id игры"""
+
+    def __init__(self, shards: int):
+        if shards < 1:
+            raise ValueError("Количество шардов должно быть больше 0")
+        self.shards = shards
+        # user_id -> chat_id игры и шард, который сообщил о записи
+        self.player_games: Dict[int, int] = {}
+        self._owners: Dict[int, int] = {}
+        self.routed = [0] * shards
+
+    def route(self, update: object) -> int:
+        """
+        Шард для обновления
+
+        Обновления без чата (например, inline-запросы) идут по user_id.
+        """
+        key = game_chat_key(update, self.player_games)
+        if key is None:
+            user = getattr(update, 'effective_user', None)
+            key = user.id if user is not None else 0
+        shard = shard_for(key, self.shards)
+        self.routed[shard] += 1
+        return shard
+
+    def apply(self, event: PlayerGameEvent):
+        """Применяет событие воркера к маршрутам личных обновлений"""
+        shard, user_id, chat_id = event
+        if user_id is None:
+            for uid in [uid for uid, owner in self._owners.items() if owner == shard]:
+                del self.player_games[uid]
+                del self._owners[uid]
+        elif chat_id is None:
+            if self._owners.get(user_id) == shard:
+                del self.player_games[user_id]
+                del self._owners[user_id]
+        else:
+            self.player_games[user_id] = chat_id
+            self._owners[user_id] = shard
+
+    def apply_all(self, events: Iterable[PlayerGameEvent]):
+        for event in events:
+            self.apply(event)
+
+
+class ShardPool:
+    """
+    Процессы-воркеры с входной очередью у каждого и общей очередью событий
+
+    target(shard, shards, inbox, events) запускается в отдельном процессе
+    (spawn) и читает из inbox полезную нагрузку до None.
+    """
+
+    def __init__(self, target: Callable[..., Any], workers: int, args: Tuple = ()):
+        """
+        Args:
+            target: Функция воркера уровня модуля (должна сериализоваться pickle)
+            workers: Количество процессов
+            args: Дополнительные аргументы target
+        """
+        if workers < 1:
+            raise ValueError("Количество воркеров должно быть больше 0")
+        self.workers = workers
+        self._ctx = multiprocessing.get_context("spawn")
+        self.inboxes = [self._ctx.Queue() for _ in range(workers)]
+        self.events = self._ctx.Queue()
+        self.processes = [
+            self._ctx.Process(target=target, args=(shard, workers, inbox, self.events) + tuple(args),
+                              name=f"shard-{shard}", daemon=True)
+            for shard, inbox in enumerate(self.inboxes)
+        ]
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+        logger.info(f"✅ Запущено воркеров: {self.workers}")
+
+    def send(self, shard: int, payload: Any):
+        """Передает полезную нагрузку воркеру шарда"""
+        self.inboxes[shard].put(payload)
+
+    def poll_events(self) -> List[Any]:
+        """Забирает накопившиеся события воркеров без ожидания"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self, timeout: float = 10.0):
+        """Просит воркеры завершиться (None в очереди) и ждет их"""
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"⚠️ Воркер {process.name} не завершился, останавливаем принудительно")
+                process.terminate()
+        logger.info("✅ Воркеры остановлены")
+
+
+def run_sharded_bot(token: str, worker_target: Callable[..., Any], workers: int):
+    """
+    Запускает фронт-процесс: получает обновления (polling или webhook) и раздает их воркерам
+
+    Args:
+        token: Токен бота
+        worker_target: Функция воркера (например, bot.run_shard_worker)
+        workers: Количество воркеров
+    """
+    from telegram import Update
+    from telegram.ext import Application, TypeHandler
+    from webhook_ingress import IngressConfig, configure_builder, log_ingress_error, run_application
+
+    ingress = IngressConfig.from_env()
+    pool = ShardPool(worker_target, workers)
+    router = ShardRouter(workers)
+
+    async def forward(update: Update, context):
+        router.apply_all(pool.poll_events())
+        pool.send(router.route(update), update.to_dict())
+
+    async def post_init(application):
+        pool.start()
+
+    async def post_shutdown(application):
+        pool.stop()
+        logger.info(f"📊 Обновлений по шардам: {router.routed}")
+
+    builder = configure_builder(Application.builder().token(token), ingress)
+    application = builder.post_init(post_init).post_shutdown(post_shutdown).build()
+    application.add_handler(TypeHandler(Update, forward))
+    application.add_error_handler(log_ingress_error)
+    logger.info(f"🚀 Запуск в режиме шардов: {workers} воркеров")
+    run_application(application, ingress)
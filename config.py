@@ -7,7 +7,7 @@
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
@@ -117,6 +117,17 @@ class Config:
         """Распределение ролей"""
         return self._game.role_distribution.copy()
     
+    @property
+    def workers(self) -> int:
+        """Количество процессов-воркеров (больше 1 - режим шардов)"""
+        return max(1, int(os.environ.get('BOT_WORKERS', '1') or 1))
+    
+    @property
+    def disabled_subsystems(self) -> Tuple[str, ...]:
+        """Отключенные необязательные подсистемы (forests, analytics, duels)"""
+        value = os.environ.get('BOT_DISABLED_SUBSYSTEMS', '')
+        return tuple(name.strip() for name in value.split(',') if name.strip())
+    
     @property
     def is_test_mode(self) -> bool:
         """Включен ли тестовый режим"""
@@ -148,4 +159,6 @@ TEST_MIN_PLAYERS = config._game.min_players_test
 ROLE_DISTRIBUTION = config.role_distribution
 NIGHT_PHASE_DURATION = config.night_duration
 DAY_PHASE_DURATION = config.day_duration
-VOTING_DURATION = config.voting_duration
\ No newline at end of file
+VOTING_DURATION = config.voting_duration
+BOT_WORKERS = config.workers
+DISABLED_SUBSYSTEMS = config.disabled_subsystems
\ No newline at end of file
@@ -0,0 +1,846 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Асинхронный модуль для работы с PostgreSQL
+Нативный asyncio-пул соединений (psycopg 3) для обработчиков бота.
+Синхронный API из database_psycopg2 остается для скриптов и старых модулей.
+"""
+
+import os
+import json
+import asyncio
+import logging
+import functools
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+try:
+    import psycopg
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+    PSYCOPG_ASYNC_AVAILABLE = True
+    CONNECTION_ERRORS: Tuple = (psycopg.OperationalError, PoolTimeout)
+except ImportError:
+    psycopg = None
+    dict_row = None
+    AsyncConnectionPool = None
+    PSYCOPG_ASYNC_AVAILABLE = False
+    CONNECTION_ERRORS = ()
+
+import database_psycopg2
+from db_circuit_breaker import database_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseConnection:
+    """Асинхронный аналог DatabaseConnection на базе AsyncConnectionPool"""
+
+    def __init__(self, database_url: Optional[str] = None, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0):
+        """
+        Инициализация асинхронного подключения к базе данных
+
+        Args:
+            database_url: URL подключения к PostgreSQL (если None, читается из DATABASE_URL)
+            min_size: Минимальное количество соединений в пуле
+            max_size: Максимальное количество соединений в пуле
+            timeout: Максимальное ожидание свободного соединения в секундах
+        """
+        if not PSYCOPG_ASYNC_AVAILABLE:
+            raise RuntimeError("psycopg 3 не установлен. Установите: pip install 'psycopg[binary,pool]'")
+
+        self.database_url = database_url or os.environ.get('DATABASE_URL')
+        if not self.database_url:
+            raise RuntimeError("DATABASE_URL не установлен")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.connection_pool: Optional[AsyncConnectionPool] = None
+
+    async def open(self):
+        """Открывает пул соединений (должен вызываться внутри работающего event loop)"""
+        if self.connection_pool is not None:
+            return
+
+        try:
+            self.connection_pool = AsyncConnectionPool(
+                conninfo=self.database_url,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                kwargs={'row_factory': dict_row},
+                timeout=self.timeout,
+                open=False
+            )
+            await self.connection_pool.open(wait=True)
+            logger.info("✅ Асинхронный пул соединений создан успешно")
+        except Exception as e:
+            self.connection_pool = None
+            logger.error(f"❌ Ошибка создания асинхронного пула соединений: {e}")
+            raise
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """
+        Асинхронный контекстный менеджер для получения соединения из пула
+
+        Yields:
+            psycopg.AsyncConnection: Соединение с базой данных
+        """
+        if self.connection_pool is None:
+            raise RuntimeError("Асинхронный пул не открыт. Вызовите open() сначала.")
+
+        async with self.connection_pool.connection() as connection:
+            yield connection
+
+    @asynccontextmanager
+    async def get_cursor(self, connection=None):
+        """
+        Асинхронный контекстный менеджер для получения курсора
+
+        Args:
+            connection: Соединение (если None, получается из пула)
+
+        Yields:
+            psycopg.AsyncCursor: Курсор, возвращающий строки как словари
+        """
+        if connection is not None:
+            async with connection.cursor() as cursor:
+                yield cursor
+        else:
+            async with self.get_connection() as conn:
+                async with conn.cursor() as cursor:
+                    yield cursor
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Асинхронный контекстный менеджер транзакции
+
+        Yields:
+            psycopg.AsyncCursor: Курсор внутри транзакции (commit при выходе,
+            rollback при исключении)
+        """
+        database_breaker.before_request()
+        try:
+            async with self.get_connection() as conn:
+                async with conn.transaction():
+                    async with conn.cursor() as cursor:
+                        yield cursor
+        except CONNECTION_ERRORS as e:
+            database_breaker.record_failure(e)
+            raise
+        database_breaker.record_success()
+
+    async def test_connection(self) -> bool:
+        """
+        Тестирует подключение к базе данных
+
+        Returns:
+            bool: True если подключение успешно
+        """
+        try:
+            async with self.get_cursor() as cursor:
+                await cursor.execute("SELECT 1")
+                await cursor.fetchone()
+                logger.info("✅ Тест асинхронного подключения к базе данных успешен")
+                return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка тестирования асинхронного подключения: {e}")
+            return False
+
+    async def _run_with_retry(self, operation: Callable, max_retries: int = 3, retry_delay: float = 1):
+        """
+        Выполняет операцию с повторами при ошибках подключения.
+        Задержка между попытками не блокирует event loop, а при разомкнутом
+        выключателе запрос сразу завершается DatabaseUnavailableError.
+        """
+        database_breaker.before_request()
+
+        for attempt in range(max_retries):
+            try:
+                result = await operation()
+                database_breaker.record_success()
+                return result
+            except CONNECTION_ERRORS as e:
+                database_breaker.record_failure(e)
+                logger.warning(f"⚠️ Ошибка подключения (попытка {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1 and not database_breaker.is_open:
+                    await asyncio.sleep(retry_delay)
+                    retry_delay *= 2  # Экспоненциальная задержка
+                    continue
+                logger.error(f"❌ Не удалось выполнить запрос после {attempt + 1} попыток")
+                raise
+
+    async def execute_query(self, query: str, params: Optional[Tuple] = None) -> int:
+        """
+        Выполняет INSERT/UPDATE/DELETE запрос
+
+        Args:
+            query: SQL запрос
+            params: Параметры для запроса
+
+        Returns:
+            int: Количество затронутых строк
+        """
+        async def operation():
+            async with self.get_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    affected_rows = cursor.rowcount
+                await conn.commit()
+                logger.debug(f"✅ Запрос выполнен успешно. Затронуто строк: {affected_rows}")
+                return affected_rows
+
+        try:
+            return await self._run_with_retry(operation)
+        except Exception as e:
+            logger.error(f"❌ Ошибка выполнения запроса: {e}")
+            raise
+
+    async def fetch_query(self, query: str, params: Optional[Tuple] = None, fetch_one: bool = False):
+        """
+        Выполняет SELECT запрос и возвращает результат
+
+        Args:
+            query: SQL запрос
+            params: Параметры для запроса
+            fetch_one: Если True, возвращает только одну запись
+
+        Returns:
+            List[Dict] или Dict: Результат запроса
+        """
+        async def operation():
+            async with self.get_cursor() as cursor:
+                await cursor.execute(query, params)
+                if fetch_one:
+                    result = await cursor.fetchone()
+                    return dict(result) if result else None
+                results = await cursor.fetchall()
+                return [dict(row) for row in results]
+
+        try:
+            return await self._run_with_retry(operation)
+        except Exception as e:
+            logger.error(f"❌ Ошибка выполнения запроса: {e}")
+            raise
+
+    async def fetch_one(self, query: str, params: Optional[Tuple] = None) -> Optional[Dict[str, Any]]:
+        """
+        Выполняет SELECT запрос и возвращает одну запись
+
+        Args:
+            query: SQL запрос
+            params: Параметры для запроса
+
+        Returns:
+            Dict или None: Одна запись или None
+        """
+        return await self.fetch_query(query, params, fetch_one=True)
+
+    async def execute_many(self, query: str, params_list: List[Tuple]) -> int:
+        """
+        Выполняет запрос с множественными параметрами (batch insert/update)
+
+        Args:
+            query: SQL запрос
+            params_list: Список кортежей с параметрами
+
+        Returns:
+            int: Количество затронутых строк
+        """
+        async def operation():
+            async with self.get_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(query, params_list)
+                    affected_rows = cursor.rowcount
+                await conn.commit()
+                logger.debug(f"✅ Batch запрос выполнен успешно. Затронуто строк: {affected_rows}")
+                return affected_rows
+
+        # Как и в синхронном API, batch выполняется без повторов
+        try:
+            return await self._run_with_retry(operation, max_retries=1)
+        except Exception as e:
+            logger.error(f"❌ Ошибка выполнения batch запроса: {e}")
+            raise
+
+    async def close(self):
+        """Закрывает пул соединений"""
+        if self.connection_pool is not None:
+            await self.connection_pool.close()
+            self.connection_pool = None
+            logger.info("✅ Асинхронный пул соединений закрыт")
+
+# Глобальный экземпляр асинхронного подключения
+async_db_connection: Optional[AsyncDatabaseConnection] = None
+
+async def init_async_db(database_url: Optional[str] = None) -> Optional[AsyncDatabaseConnection]:
+    """
+    Инициализирует асинхронный пул соединений
+
+    Если psycopg 3 недоступен, возвращает None - тогда функции модуля
+    выполняют синхронный API database_psycopg2 в отдельном потоке.
+
+    Args:
+        database_url: URL подключения (если None, читается из DATABASE_URL)
+
+    Returns:
+        AsyncDatabaseConnection или None
+    """
+    global async_db_connection
+
+    if async_db_connection is not None:
+        return async_db_connection
+
+    if not PSYCOPG_ASYNC_AVAILABLE:
+        logger.warning("⚠️ psycopg 3 не установлен, используем синхронный пул через потоки")
+        return None
+
+    connection = AsyncDatabaseConnection(database_url)
+    await connection.open()
+
+    if not await connection.test_connection():
+        await connection.close()
+        raise Exception("Не удалось подключиться к базе данных")
+
+    async_db_connection = connection
+    logger.info("🚀 Асинхронная база данных инициализирована успешно")
+    return async_db_connection
+
+async def close_async_db():
+    """Закрывает асинхронный пул соединений"""
+    global async_db_connection
+    if async_db_connection is not None:
+        await async_db_connection.close()
+        async_db_connection = None
+
+# ==================== СОВМЕСТИМОСТЬ С СИНХРОННЫМ API ====================
+
+async def run_sync(func: Callable, *args, **kwargs):
+    """
+    Выполняет синхронную функцию database_psycopg2 в отдельном потоке,
+    не блокируя event loop. Используется для функций, которые еще не
+    перенесены на асинхронный пул.
+
+    Args:
+        func: Синхронная функция
+        *args, **kwargs: Аргументы функции
+
+    Returns:
+        Результат функции
+    """
+    return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+def run_blocking(coro):
+    """
+    Синхронная обертка для скриптов: выполняет корутину этого модуля
+    в фоновом event loop и возвращает результат.
+
+    Пул живет в одном фоновом loop между вызовами, поэтому скрипт может
+    сделать несколько запросов подряд. Нельзя вызывать из работающего loop.
+
+    Args:
+        coro: Корутина (например, fetch_query("SELECT 1"))
+
+    Returns:
+        Результат корутины
+    """
+    global _sync_loop
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("run_blocking нельзя вызывать внутри event loop, используйте await")
+
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="async-db-loop", daemon=True).start()
+
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+# ==================== БАЗОВЫЕ ФУНКЦИИ ====================
+
+async def execute_query(query: str, params: Optional[Tuple] = None) -> int:
+    """
+    Выполняет INSERT/UPDATE/DELETE запрос
+
+    Args:
+        query: SQL запрос
+        params: Параметры для запроса
+
+    Returns:
+        int: Количество затронутых строк
+    """
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.execute_query, query, params)
+    return await async_db_connection.execute_query(query, params)
+
+async def fetch_query(query: str, params: Optional[Tuple] = None, fetch_one: bool = False):
+    """
+    Выполняет SELECT запрос и возвращает результат
+
+    Args:
+        query: SQL запрос
+        params: Параметры для запроса
+        fetch_one: Если True, возвращает только одну запись
+
+    Returns:
+        List[Dict] или Dict: Результат запроса
+    """
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.fetch_query, query, params, fetch_one)
+    return await async_db_connection.fetch_query(query, params, fetch_one)
+
+async def fetch_one(query: str, params: Optional[Tuple] = None) -> Optional[Dict[str, Any]]:
+    """
+    Выполняет SELECT запрос и возвращает одну запись
+
+    Args:
+        query: SQL запрос
+        params: Параметры для запроса
+
+    Returns:
+        Dict или None: Одна запись или None
+    """
+    return await fetch_query(query, params, fetch_one=True)
+
+async def execute_many(query: str, params_list: List[Tuple]) -> int:
+    """
+    Выполняет запрос с множественными параметрами (batch insert/update)
+
+    Args:
+        query: SQL запрос
+        params_list: Список кортежей с параметрами
+
+    Returns:
+        int: Количество затронутых строк
+    """
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.execute_many, query, params_list)
+    return await async_db_connection.execute_many(query, params_list)
+
+# ==================== ФУНКЦИИ ИГРОВОГО ЦИКЛА ====================
+
+async def create_user(user_id: int, username: str = None, first_name: str = None, last_name: str = None) -> Optional[int]:
+    """
+    Создает пользователя (или обновляет его данные) вместе с записью статистики
+
+    Args:
+        user_id: Telegram user ID
+        username: Имя пользователя
+        first_name: Имя
+        last_name: Фамилия
+
+    Returns:
+        int или None: ID пользователя
+    """
+    database_psycopg2.invalidate_user_profile(user_id)
+
+    # Синхронный fetch_query не фиксирует транзакцию, поэтому без пула
+    # используем синхронную реализацию целиком
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.create_user, user_id, username, first_name, last_name)
+
+    try:
+        result = await fetch_one("""
+            WITH upserted AS (
+                INSERT INTO users (user_id, username, first_name, last_name, balance)
+                VALUES (%s, %s, %s, %s, 100)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    username = EXCLUDED.username,
+                    first_name = EXCLUDED.first_name,
+                    last_name = EXCLUDED.last_name,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING id, user_id
+            ), stats_row AS (
+                INSERT INTO stats (user_id, games_played, games_won, games_lost, last_played)
+                SELECT user_id, 0, 0, 0, CURRENT_TIMESTAMP FROM upserted
+                ON CONFLICT (user_id) DO NOTHING
+            )
+            SELECT id FROM upserted
+        """, (user_id, username, first_name, last_name))
+        return result['id'] if result else None
+    except Exception as e:
+        logger.error(f"❌ create_user: ошибка для пользователя {user_id}: {e}")
+        return None
+
+async def get_user_by_telegram_id(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Получает пользователя по Telegram ID
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        Dict или None: Данные пользователя
+    """
+    try:
+        return await fetch_one("SELECT * FROM users WHERE user_id = %s::BIGINT", (user_id,))
+    except Exception as e:
+        logger.error(f"❌ get_user_by_telegram_id: ошибка для пользователя {user_id}: {e}")
+        return None
+
+async def get_user_nickname(user_id: int) -> Optional[str]:
+    """
+    Получает никнейм пользователя
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        str или None: Никнейм пользователя
+    """
+    profile = database_psycopg2.user_profile_cache.get(int(user_id))
+    if profile is None:
+        profile = (await prefetch_user_profiles([user_id]))[int(user_id)]
+    return profile['nickname']
+
+async def prefetch_user_profiles(user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Загружает никнеймы и first_name всех пользователей одним запросом
+    в общий кэш профилей (см. database_psycopg2.user_profile_cache)
+
+    Args:
+        user_ids: ID пользователей (например, все игроки игры)
+
+    Returns:
+        Dict: user_id -> профиль
+    """
+    user_ids = [int(user_id) for user_id in user_ids]
+    if not user_ids:
+        return {}
+    rows = await fetch_query(database_psycopg2.USER_PROFILES_QUERY, (user_ids,))
+    return database_psycopg2.cache_user_profiles(user_ids, rows)
+
+async def update_user_stats(user_id: int, games_played: int = None, games_won: int = None,
+                            games_lost: int = None) -> bool:
+    """
+    Обновляет статистику пользователя
+
+    Args:
+        user_id: Telegram user ID
+        games_played: Количество сыгранных игр
+        games_won: Количество выигранных игр
+        games_lost: Количество проигранных игр
+
+    Returns:
+        bool: True если обновление успешно
+    """
+    updates = []
+    params = []
+
+    if games_played is not None:
+        updates.append("games_played = %s")
+        params.append(games_played)
+
+    if games_won is not None:
+        updates.append("games_won = %s")
+        params.append(games_won)
+
+    if games_lost is not None:
+        updates.append("games_lost = %s")
+        params.append(games_lost)
+
+    if not updates:
+        return False
+
+    updates.append("last_played = CURRENT_TIMESTAMP")
+    updates.append("updated_at = CURRENT_TIMESTAMP")
+    params.append(user_id)
+
+    try:
+        affected = await execute_query(f"UPDATE stats SET {', '.join(updates)} WHERE user_id = %s", tuple(params))
+        return affected > 0
+    except Exception as e:
+        logger.error(f"❌ Ошибка обновления статистики: {e}")
+        return False
+
+async def add_to_balance(user_id: int, amount: int) -> bool:
+    """
+    Атомарно начисляет орешки пользователю (без чтения баланса)
+
+    Args:
+        user_id: Telegram user ID
+        amount: Количество орешков
+
+    Returns:
+        bool: True если начисление успешно
+    """
+    if amount <= 0:
+        logger.warning(f"⚠️ Попытка добавить неположительную сумму {amount} пользователю {user_id}")
+        return False
+
+    try:
+        affected = await execute_query(
+            "UPDATE users SET balance = balance + %s, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s::BIGINT",
+            (amount, user_id)
+        )
+        return affected > 0
+    except Exception as e:
+        logger.error(f"❌ Ошибка добавления к балансу пользователя {user_id}: {e}")
+        return False
+
+async def buy_item(user_id: int, item_name: str, price: int) -> dict:
+    """
+    Покупает предмет в магазине одним запросом (см. database_psycopg2.BUY_ITEM_QUERY)
+
+    Args:
+        user_id: ID пользователя
+        item_name: Название предмета
+        price: Цена предмета
+
+    Returns:
+        dict: Результат покупки с информацией о балансе и инвентаре
+    """
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.buy_item, user_id, item_name, price)
+
+    try:
+        async with async_db_connection.transaction() as cursor:
+            await cursor.execute(database_psycopg2.BUY_ITEM_QUERY,
+                                 {'user_id': user_id, 'item_name': item_name, 'price': price})
+            result = database_psycopg2.build_buy_item_result(await cursor.fetchone(), item_name, price)
+
+        if result['success']:
+            logger.info(f"✅ Пользователь {user_id} успешно купил {item_name} за {price} орешков. Новый баланс: {result['balance']}")
+        return result
+
+    except Exception as e:
+        logger.error(f"❌ Ошибка покупки предмета {item_name}: {e}")
+        return {
+            'success': False,
+            'error': f'Ошибка покупки: {str(e)}',
+            'balance': 0
+        }
+
+async def apply_game_settlement(game_id: str, chat_id: int, winner_team: Optional[str],
+                                outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Применяет итоги игры одной транзакцией (см. database_psycopg2.apply_game_settlement)
+
+    Args:
+        game_id: ID игры (ключ идемпотентности)
+        chat_id: ID чата
+        winner_team: Победившая команда или None
+        outcomes: Итоги игроков (словари PlayerSettlement.to_dict())
+
+    Returns:
+        Dict: {'applied': bool, 'outcomes': [...], 'profiles': {user_id: {...}}}
+    """
+    if async_db_connection is None:
+        return await run_sync(database_psycopg2.apply_game_settlement, game_id, chat_id, winner_team, outcomes)
+
+    params = database_psycopg2.build_settlement_params(outcomes)
+
+    async with async_db_connection.transaction() as cursor:
+        await cursor.execute(database_psycopg2.SETTLEMENT_CLAIM_QUERY,
+                             (game_id, chat_id, winner_team, json.dumps(outcomes)))
+        if await cursor.fetchone() is None:
+            await cursor.execute(database_psycopg2.SETTLEMENT_PAYLOAD_QUERY, (game_id,))
+            row = await cursor.fetchone()
+            logger.warning(f"⚠️ Итоги игры {game_id} уже были применены, повторное начисление пропущено")
+            return {'applied': False, 'outcomes': row['payload'] if row else [], 'profiles': {}}
+
+        await cursor.execute(database_psycopg2.SETTLEMENT_USERS_QUERY, params['users'])
+        profiles = {row['user_id']: dict(row) for row in await cursor.fetchall()}
+        await cursor.execute(database_psycopg2.SETTLEMENT_BALANCE_QUERY, params['balance'])
+        await cursor.execute(database_psycopg2.SETTLEMENT_STATS_QUERY, params['stats'])
+
+    logger.info(f"✅ Итоги игры {game_id} применены: игроков {len(outcomes)}")
+    return {'applied': True, 'outcomes': outcomes, 'profiles': profiles}
+
+async def get_chat_settings(chat_id: int) -> Dict[str, Any]:
+    """
+    Получает настройки чата (создает их с дефолтными значениями при отсутствии)
+
+    Args:
+        chat_id: ID чата в Telegram
+
+    Returns:
+        Dict: Настройки чата
+    """
+    # Общий с синхронным API кэш настроек
+    cached = database_psycopg2.get_cached_chat_settings(chat_id)
+    if cached is not None:
+        return cached
+
+    # Сброс кэша во время ожидания запроса отменит кэширование прочитанной строки
+    with database_psycopg2.chat_settings_read(chat_id) as generation:
+        settings = await fetch_one("SELECT * FROM chat_settings WHERE chat_id = %s", (str(chat_id),))
+        if settings:
+            return database_psycopg2.cache_chat_settings(chat_id, settings, generation)
+
+    # Создание дефолтной записи - редкий путь, используем синхронную реализацию
+    return await run_sync(database_psycopg2.get_chat_settings, chat_id)
+
+async def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
+    """
+    Обновляет настройки чата (только переданные допустимые поля)
+
+    Args:
+        chat_id: ID чата в Telegram
+        settings: Словарь с настройками для обновления
+        **kwargs: Поля для обновления
+
+    Returns:
+        bool: True если обновление успешно
+    """
+    update = database_psycopg2.build_chat_settings_update(chat_id, settings, **kwargs)
+    if update is None:
+        return False
+    query, values, fields = update
+
+    try:
+        await execute_query(query, values)
+        database_psycopg2.invalidate_chat_settings_cache(chat_id)
+        logger.info(f"✅ Настройки чата {chat_id} обновлены: {fields}")
+        return True
+    except Exception as e:
+        # Состояние строки неизвестно - не доверяем кэшу
+        database_psycopg2.invalidate_chat_settings_cache(chat_id)
+        logger.error(f"❌ Ошибка обновления настроек чата {chat_id}: {e}")
+        return False
+
+async def reset_chat_settings(chat_id: int) -> bool:
+    """
+    Сбрасывает настройки чата к дефолтным значениям (редкий путь - в отдельном потоке)
+
+    Args:
+        chat_id: ID чата в Telegram
+
+    Returns:
+        bool: True если сброс успешен
+    """
+    return await run_sync(database_psycopg2.reset_chat_settings, chat_id)
+
+async def save_game_to_db(game_id: str, chat_id: int, thread_id: int = None,
+                          status: str = 'waiting', phase: str = None,
+                          round_number: int = 0, settings: dict = None) -> bool:
+    """
+    Сохраняет игру в базу данных
+
+    Args:
+        game_id: ID игры
+        chat_id: ID чата
+        thread_id: ID темы (опционально)
+        status: Статус игры
+        phase: Фаза игры
+        round_number: Номер раунда
+        settings: Настройки игры
+
+    Returns:
+        bool: True если успешно сохранено
+    """
+    try:
+        await execute_query("""
+            INSERT INTO games (id, chat_id, thread_id, status, phase, round_number, settings)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (id)
+            DO UPDATE SET
+                chat_id = EXCLUDED.chat_id,
+                thread_id = EXCLUDED.thread_id,
+                status = EXCLUDED.status,
+                phase = EXCLUDED.phase,
+                round_number = EXCLUDED.round_number,
+                settings = EXCLUDED.settings
+        """, (game_id, str(chat_id), str(thread_id) if thread_id else None, status, phase, round_number,
+              json.dumps(settings) if settings else '{}'))
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка сохранения игры: {e}")
+        return False
+
+async def save_player_to_db(player_id: str, game_id: str, user_id: int,
+                            username: str = None, first_name: str = None,
+                            last_name: str = None, role: str = None,
+                            team: str = None, is_alive: bool = True) -> bool:
+    """
+    Сохраняет игрока в базу данных
+
+    Args:
+        player_id: ID игрока
+        game_id: ID игры
+        user_id: ID пользователя Telegram
+        username: Имя пользователя
+        first_name: Имя
+        last_name: Фамилия
+        role: Роль в игре
+        team: Команда
+        is_alive: Жив ли игрок
+
+    Returns:
+        bool: True если успешно сохранено
+    """
+    try:
+        await execute_query("""
+            INSERT INTO players (id, game_id, user_id, username, first_name, last_name, role, team, is_alive)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (id)
+            DO UPDATE SET
+                username = EXCLUDED.username,
+                first_name = EXCLUDED.first_name,
+                last_name = EXCLUDED.last_name,
+                role = EXCLUDED.role,
+                team = EXCLUDED.team,
+                is_alive = EXCLUDED.is_alive
+        """, (player_id, game_id, user_id, username, first_name, last_name, role, team, is_alive))
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка сохранения игрока: {e}")
+        return False
+
+async def update_game_phase(game_id: str, phase: str, round_number: int = None) -> bool:
+    """
+    Обновляет фазу игры в базе данных
+
+    Args:
+        game_id: ID игры
+        phase: Новая фаза
+        round_number: Номер раунда (опционально)
+
+    Returns:
+        bool: True если успешно обновлено
+    """
+    try:
+        if round_number is not None:
+            await execute_query("UPDATE games SET phase = %s, round_number = %s WHERE id = %s",
+                                (phase, round_number, game_id))
+        else:
+            await execute_query("UPDATE games SET phase = %s WHERE id = %s", (phase, game_id))
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка обновления фазы игры: {e}")
+        return False
+
+async def finish_game_in_db(game_id: str, winner_team: str) -> bool:
+    """
+    Завершает игру в базе данных
+
+    Args:
+        game_id: ID игры
+        winner_team: Команда-победитель
+
+    Returns:
+        bool: True если успешно завершено
+    """
+    try:
+        await execute_query("""
+            UPDATE games
+            SET status = 'finished', winner_team = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """, (winner_team, game_id))
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка завершения игры: {e}")
+        return False
@@ -14,8 +14,13 @@ from psycopg2 import pool
 from typing import Optional, List, Dict, Any, Tuple
 import logging
 import time
+import asyncio
+import threading
 from contextlib import contextmanager
 
+from db_circuit_breaker import database_breaker
+from ttl_cache import TTLCache
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -150,6 +155,31 @@ class DatabaseConnection:
                 finally:
                     cursor.close()
     
+    @contextmanager
+    def transaction(self):
+        """
+        Контекстный менеджер транзакции
+        
+        Все запросы внутри блока выполняются на одном соединении. При выходе
+        из блока транзакция фиксируется, при исключении - откатывается.
+        
+        Yields:
+            psycopg2.extras.RealDictCursor: Курсор внутри транзакции
+        
+        Raises:
+            DatabaseUnavailableError: Если выключатель разомкнут
+        """
+        database_breaker.before_request()
+        try:
+            with self.get_connection() as conn:
+                with self.get_cursor(conn) as cursor:
+                    yield cursor
+                conn.commit()
+        except psycopg2.OperationalError as e:
+            database_breaker.record_failure(e)
+            raise
+        database_breaker.record_success()
+    
     def test_connection(self) -> bool:
         """
         Тестирует подключение к базе данных
@@ -177,6 +207,50 @@ class DatabaseConnection:
 # Глобальный экземпляр подключения
 db_connection: Optional[DatabaseConnection] = None
 
+def _probe_database() -> bool:
+    """Проба для выключателя: отдельное соединение с коротким таймаутом, минуя пул"""
+    if not db_connection:
+        return False
+    conn = psycopg2.connect(connect_timeout=3, **db_connection.connection_params)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    finally:
+        conn.close()
+
+database_breaker.set_probe(_probe_database)
+
+def _can_block() -> bool:
+    """
+    Можно ли ждать между повторами в текущем потоке
+    
+    Returns:
+        bool: False, если функция вызвана прямо из работающего event loop
+    """
+    try:
+        asyncio.get_running_loop()
+        return False
+    except RuntimeError:
+        return True
+
+def _handle_operational_error(e: Exception, attempt: int, max_retries: int) -> bool:
+    """
+    Учитывает ошибку подключения и решает, нужен ли повтор
+    
+    Повторы с задержкой выполняются только вне event loop (в скриптах и
+    рабочих потоках) и пока выключатель замкнут.
+    
+    Returns:
+        bool: True, если нужно повторить запрос
+    """
+    database_breaker.record_failure(e)
+    logger.warning(f"⚠️ Ошибка подключения (попытка {attempt + 1}/{max_retries}): {e}")
+    if attempt < max_retries - 1 and _can_block() and not database_breaker.is_open:
+        return True
+    logger.error(f"❌ Не удалось выполнить запрос после {attempt + 1} попыток")
+    return False
+
 def safe_get_connection():
     """Безопасно получает соединение с базой данных"""
     if not db_connection:
@@ -193,9 +267,15 @@ def init_db(database_url: Optional[str] = None) -> DatabaseConnection:
     
     Returns:
         DatabaseConnection: Экземпляр подключения к базе данных
+        (уже созданный, если база данных инициализирована)
     """
     global db_connection
     
+    # Пул создается один раз на процесс: повторные вызовы возвращают его
+    if db_connection is not None and database_url in (None, db_connection.database_url):
+        logger.debug("♻️ База данных уже инициализирована, используем существующий пул")
+        return db_connection
+    
     try:
         # Проверяем переменные окружения
         env_url = os.environ.get('DATABASE_URL')
@@ -232,6 +312,9 @@ def execute_query(query: str, params: Optional[Tuple] = None) -> int:
     if not db_connection:
         raise RuntimeError("База данных не инициализирована. Вызовите init_db() сначала.")
     
+    # Пока база данных недоступна, не ждем таймаутов
+    database_breaker.before_request()
+    
     max_retries = 3
     retry_delay = 1
     
@@ -243,20 +326,18 @@ def execute_query(query: str, params: Optional[Tuple] = None) -> int:
                     conn.commit()
                     
                     affected_rows = cursor.rowcount
-                    logger.info(f"✅ Запрос выполнен успешно. Затронуто строк: {affected_rows}")
-                    logger.info(f"📊 SQL: {query}")
-                    logger.info(f"📊 Параметры: {params}")
+                    database_breaker.record_success()
+                    logger.debug(f"✅ Запрос выполнен успешно. Затронуто строк: {affected_rows}")
+                    logger.debug(f"📊 SQL: {query}")
+                    logger.debug(f"📊 Параметры: {params}")
                     return affected_rows
                     
         except psycopg2.OperationalError as e:
-            logger.warning(f"⚠️ Ошибка подключения (попытка {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
+            if _handle_operational_error(e, attempt, max_retries):
                 time.sleep(retry_delay)
                 retry_delay *= 2  # Экспоненциальная задержка
                 continue
-            else:
-                logger.error(f"❌ Не удалось выполнить запрос после {max_retries} попыток")
-                raise
+            raise
                 
         except Exception as e:
             logger.error(f"❌ Ошибка выполнения запроса: {e}")
@@ -277,6 +358,9 @@ def fetch_query(query: str, params: Optional[Tuple] = None, fetch_one: bool = Fa
     if not db_connection:
         raise RuntimeError("База данных не инициализирована. Вызовите init_db() сначала.")
     
+    # Пока база данных недоступна, не ждем таймаутов
+    database_breaker.before_request()
+    
     max_retries = 3
     retry_delay = 1
     
@@ -288,22 +372,21 @@ def fetch_query(query: str, params: Optional[Tuple] = None, fetch_one: bool = Fa
                     
                     if fetch_one:
                         result = cursor.fetchone()
+                        database_breaker.record_success()
                         if result:
                             return dict(result)
                         return None
                     else:
                         results = cursor.fetchall()
+                        database_breaker.record_success()
                         return [dict(row) for row in results]
                         
         except psycopg2.OperationalError as e:
-            logger.warning(f"⚠️ Ошибка подключения (попытка {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
+            if _handle_operational_error(e, attempt, max_retries):
                 time.sleep(retry_delay)
                 retry_delay *= 2
                 continue
-            else:
-                logger.error(f"❌ Не удалось выполнить запрос после {max_retries} попыток")
-                raise
+            raise
                 
         except Exception as e:
             logger.error(f"❌ Ошибка выполнения запроса: {e}")
@@ -336,6 +419,8 @@ def execute_many(query: str, params_list: List[Tuple]) -> int:
     if not db_connection:
         raise RuntimeError("База данных не инициализирована. Вызовите init_db() сначала.")
     
+    database_breaker.before_request()
+    
     try:
         with db_connection.get_connection() as conn:
             with db_connection.get_cursor(conn) as cursor:
@@ -343,9 +428,14 @@ def execute_many(query: str, params_list: List[Tuple]) -> int:
                 conn.commit()
                 
                 affected_rows = cursor.rowcount
+                database_breaker.record_success()
                 logger.debug(f"✅ Batch запрос выполнен успешно. Затронуто строк: {affected_rows}")
                 return affected_rows
                 
+    except psycopg2.OperationalError as e:
+        database_breaker.record_failure(e)
+        logger.error(f"❌ Ошибка подключения при выполнении batch запроса: {e}")
+        raise
     except Exception as e:
         logger.error(f"❌ Ошибка выполнения batch запроса: {e}")
         raise
@@ -387,6 +477,7 @@ def create_user(user_id: int, username: str = None, first_name: str = None, last
                 updated_at = CURRENT_TIMESTAMP
         """
         affected = execute_query(query, (user_id, username, first_name, last_name))
+        invalidate_user_profile(user_id)
         
         if affected > 0:
             logger.info(f"✅ create_user: пользователь {user_id} создан/обновлен, затронуто строк: {affected}")
@@ -641,23 +732,123 @@ def update_user_stats(user_id: int, games_played: int = None, games_won: int = N
 
 # ==================== ФУНКЦИИ ДЛЯ НАСТРОЕК ЧАТА ====================
 
+# Кэш настроек чатов: chat_id -> строка chat_settings.
+# Изменения через update/reset/delete_chat_settings сбрасывают запись,
+# изменения в обход этих функций (миграции) видны не позже чем через TTL.
+CHAT_SETTINGS_CACHE_TTL = 300
+CHAT_SETTINGS_CACHE_SIZE = 1024
+chat_settings_cache = TTLCache(maxsize=CHAT_SETTINGS_CACHE_SIZE, ttl=CHAT_SETTINGS_CACHE_TTL,
+                               name="chat_settings")
+# Чтения настроек из БД в процессе: chat_id -> [число чтений, поколение].
+# Сброс кэша во время чтения увеличивает поколение, и прочитанная строка не
+# кэшируется (иначе старая строка осталась бы в кэше на весь TTL). Запись
+# удаляется, когда чтений чата не осталось, поэтому словарь не растет с числом чатов.
+_chat_settings_reads: Dict[int, List[int]] = {}
+_chat_settings_reads_lock = threading.Lock()
+
+@contextmanager
+def chat_settings_read(chat_id: int):
+    """
+    Отмечает чтение настроек чата из БД
+    
+    Args:
+        chat_id: ID чата в Telegram
+    
+    Yields:
+        int: Поколение для cache_chat_settings
+    """
+    chat_id = int(chat_id)
+    with _chat_settings_reads_lock:
+        read = _chat_settings_reads.setdefault(chat_id, [0, 0])
+        read[0] += 1
+        generation = read[1]
+    try:
+        yield generation
+    finally:
+        with _chat_settings_reads_lock:
+            read[0] -= 1
+            if read[0] == 0:
+                del _chat_settings_reads[chat_id]
+
+def get_cached_chat_settings(chat_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает копию настроек чата из кэша без обращения к БД
+    
+    Args:
+        chat_id: ID чата в Telegram
+    
+    Returns:
+        Dict или None: Настройки чата или None при промахе
+    """
+    settings = chat_settings_cache.get(int(chat_id))
+    return dict(settings) if settings is not None else None
+
+def cache_chat_settings(chat_id: int, settings: Dict[str, Any], generation: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Сохраняет настройки чата в кэш
+    
+    Args:
+        chat_id: ID чата в Telegram
+        settings: Настройки чата
+        generation: Поколение из chat_settings_read; если с начала чтения
+            кэш сбрасывался, настройки не кэшируются
+    
+    Returns:
+        Dict: Копия настроек
+    """
+    chat_id = int(chat_id)
+    with _chat_settings_reads_lock:
+        read = _chat_settings_reads.get(chat_id)
+        if generation is None or read is None or read[1] == generation:
+            chat_settings_cache.set(chat_id, dict(settings))
+    return dict(settings)
+
+def invalidate_chat_settings_cache(chat_id: int):
+    """Сбрасывает настройки чата в кэше (и отменяет кэширование идущих чтений)"""
+    chat_id = int(chat_id)
+    with _chat_settings_reads_lock:
+        read = _chat_settings_reads.get(chat_id)
+        if read is not None:
+            read[1] += 1
+        chat_settings_cache.invalidate(chat_id)
+
+def get_chat_settings_cache_stats() -> Dict[str, Any]:
+    """
+    Возвращает статистику кэша настроек чатов
+    
+    Returns:
+        Dict: Размер, попадания, промахи и вытеснения
+    """
+    return chat_settings_cache.get_stats()
+
 def get_chat_settings(chat_id: int) -> Dict[str, Any]:
     """
     Получает настройки чата. Если настройки не существуют, создает их с дефолтными значениями.
     
+    Результат кэшируется (см. chat_settings_cache).
+    
     Args:
         chat_id: ID чата в Telegram
     
     Returns:
         Dict: Настройки чата
     """
+    cached = get_cached_chat_settings(chat_id)
+    if cached is not None:
+        return cached
+    
+    with chat_settings_read(chat_id) as generation:
+        return _load_chat_settings(chat_id, generation)
+
+def _load_chat_settings(chat_id: int, generation: int) -> Dict[str, Any]:
+    """Читает настройки чата из БД (создает дефолтные) и кэширует их"""
     # Сначала пытаемся получить существующие настройки
     query = "SELECT * FROM chat_settings WHERE chat_id = %s"
     settings = fetch_one(query, (str(chat_id),))
     
     if settings:
         logger.info(f"✅ Настройки чата {chat_id} найдены")
-        return settings
+        return cache_chat_settings(chat_id, settings, generation)
     
     # Если настройки не найдены, создаем их с дефолтными значениями
     logger.info(f"📝 Создаем настройки чата {chat_id} с дефолтными значениями")
@@ -681,6 +872,7 @@ def get_chat_settings(chat_id: int) -> Dict[str, Any]:
         'dead_rewards_enabled': True
     }
     
+    # Вставка и чтение созданной строки одним запросом (без рекурсивного повтора)
     insert_query = """
         INSERT INTO chat_settings (
             chat_id, test_mode, min_players, max_players, night_duration, 
@@ -694,22 +886,27 @@ def get_chat_settings(chat_id: int) -> Dict[str, Any]:
             %(herbivore_survival_threshold)s, %(max_rounds)s, %(max_time)s, %(min_alive)s,
             %(loser_rewards_enabled)s, %(dead_rewards_enabled)s
         )
+        ON CONFLICT (chat_id) DO UPDATE SET chat_id = EXCLUDED.chat_id
+        RETURNING *
     """
     
     try:
-        execute_query(insert_query, default_settings)
+        with db_connection.transaction() as cursor:
+            cursor.execute(insert_query, default_settings)
+            settings = cursor.fetchone()
         logger.info(f"✅ Настройки чата {chat_id} созданы с дефолтными значениями")
         
         # Возвращаем созданные настройки
-        return get_chat_settings(chat_id)
+        return cache_chat_settings(chat_id, settings, generation)
         
     except Exception as e:
         logger.error(f"❌ Ошибка создания настроек чата {chat_id}: {e}")
         return default_settings
 
-def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
+def build_chat_settings_update(chat_id: int, settings: dict = None,
+                               **kwargs) -> Optional[Tuple[str, List[Any], List[str]]]:
     """
-    Обновляет настройки чата. Обновляет только переданные поля.
+    Строит UPDATE настроек чата из допустимых полей (общий для sync и async API)
     
     Args:
         chat_id: ID чата в Telegram
@@ -717,7 +914,7 @@ def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
         **kwargs: Поля для обновления
     
     Returns:
-        bool: True если обновление успешно
+        Optional[Tuple]: (запрос, параметры, обновляемые поля) или None, если обновлять нечего
     """
     # Объединяем settings и kwargs
     update_fields = {}
@@ -728,7 +925,7 @@ def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
     
     if not update_fields:
         logger.warning(f"⚠️ Нет полей для обновления настроек чата {chat_id}")
-        return False
+        return None
     
     # Список допустимых полей
     allowed_fields = {
@@ -743,7 +940,7 @@ def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
     
     if not valid_fields:
         logger.error(f"❌ Нет допустимых полей для обновления настроек чата {chat_id}")
-        return False
+        return None
     
     # Создаем SQL запрос для обновления
     set_clauses = []
@@ -761,12 +958,34 @@ def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
         WHERE chat_id = %s
     """
     
+    return query, values, list(valid_fields.keys())
+
+def update_chat_settings(chat_id: int, settings: dict = None, **kwargs) -> bool:
+    """
+    Обновляет настройки чата. Обновляет только переданные поля.
+    
+    Args:
+        chat_id: ID чата в Telegram
+        settings: Словарь с настройками для обновления
+        **kwargs: Поля для обновления
+    
+    Returns:
+        bool: True если обновление успешно
+    """
+    update = build_chat_settings_update(chat_id, settings, **kwargs)
+    if update is None:
+        return False
+    query, values, fields = update
+    
     try:
         execute_query(query, values)
-        logger.info(f"✅ Настройки чата {chat_id} обновлены: {list(valid_fields.keys())}")
+        invalidate_chat_settings_cache(chat_id)
+        logger.info(f"✅ Настройки чата {chat_id} обновлены: {fields}")
         return True
         
     except Exception as e:
+        # Состояние строки неизвестно - не доверяем кэшу
+        invalidate_chat_settings_cache(chat_id)
         logger.error(f"❌ Ошибка обновления настроек чата {chat_id}: {e}")
         return False
 
@@ -820,6 +1039,7 @@ def delete_chat_settings(chat_id: int) -> bool:
     
     try:
         execute_query(query, (str(chat_id),))
+        invalidate_chat_settings_cache(chat_id)
         logger.info(f"✅ Настройки чата {chat_id} удалены")
         return True
         
@@ -1129,6 +1349,102 @@ def finish_game_in_db(game_id: str, winner_team: str):
 
 # ==================== ФУНКЦИИ ДЛЯ СТАТИСТИКИ ====================
 
+# Запросы расчета итогов игры. Все выполняются в одной транзакции,
+# данные игроков передаются массивами и разворачиваются через unnest.
+SETTLEMENT_CLAIM_QUERY = """
+    INSERT INTO game_settlements (game_id, chat_id, winner_team, payload)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (game_id) DO NOTHING
+    RETURNING game_id
+"""
+
+SETTLEMENT_PAYLOAD_QUERY = "SELECT payload FROM game_settlements WHERE game_id = %s"
+
+SETTLEMENT_USERS_QUERY = """
+    INSERT INTO users (user_id, username, first_name, balance)
+    SELECT u.user_id, u.username, u.first_name, 100
+    FROM unnest(%s::bigint[], %s::varchar[], %s::varchar[]) AS u(user_id, username, first_name)
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        first_name = COALESCE(EXCLUDED.first_name, users.first_name),
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING user_id, nickname, first_name
+"""
+
+SETTLEMENT_BALANCE_QUERY = """
+    UPDATE users
+    SET balance = users.balance + v.nuts, updated_at = CURRENT_TIMESTAMP
+    FROM unnest(%s::bigint[], %s::int[]) AS v(user_id, nuts)
+    WHERE users.user_id = v.user_id AND v.nuts > 0
+"""
+
+SETTLEMENT_STATS_QUERY = """
+    INSERT INTO stats (user_id, games_played, games_won, games_lost, last_played)
+    SELECT s.user_id, 1, s.won, 1 - s.won, CURRENT_TIMESTAMP
+    FROM unnest(%s::bigint[], %s::int[]) AS s(user_id, won)
+    ON CONFLICT (user_id) DO UPDATE SET
+        games_played = stats.games_played + 1,
+        games_won = stats.games_won + EXCLUDED.games_won,
+        games_lost = stats.games_lost + EXCLUDED.games_lost,
+        last_played = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def build_settlement_params(outcomes: List[Dict[str, Any]]) -> Dict[str, Tuple]:
+    """
+    Готовит параметры запросов расчета из итогов игроков
+    
+    Args:
+        outcomes: Итоги игроков (словари PlayerSettlement.to_dict())
+    
+    Returns:
+        Dict: Параметры для SETTLEMENT_*_QUERY
+    """
+    user_ids = [o['user_id'] for o in outcomes]
+    return {
+        'users': (user_ids, [o['username'] for o in outcomes], [o['first_name'] for o in outcomes]),
+        'balance': (user_ids, [o['nuts'] for o in outcomes]),
+        'stats': (user_ids, [1 if o['won'] else 0 for o in outcomes]),
+    }
+
+def apply_game_settlement(game_id: str, chat_id: int, winner_team: Optional[str],
+                          outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Применяет итоги игры (пользователи, орешки, статистика) одной транзакцией
+    
+    Повторный вызов с тем же game_id ничего не начисляет и возвращает
+    сохраненные итоги первого расчета.
+    
+    Args:
+        game_id: ID игры (ключ идемпотентности)
+        chat_id: ID чата
+        winner_team: Победившая команда или None
+        outcomes: Итоги игроков (словари PlayerSettlement.to_dict())
+    
+    Returns:
+        Dict: {'applied': bool, 'outcomes': [...], 'profiles': {user_id: {...}}}
+    """
+    if not db_connection:
+        raise RuntimeError("База данных не инициализирована. Вызовите init_db() сначала.")
+    
+    params = build_settlement_params(outcomes)
+    
+    with db_connection.transaction() as cursor:
+        cursor.execute(SETTLEMENT_CLAIM_QUERY, (game_id, chat_id, winner_team, json.dumps(outcomes)))
+        if cursor.fetchone() is None:
+            cursor.execute(SETTLEMENT_PAYLOAD_QUERY, (game_id,))
+            row = cursor.fetchone()
+            logger.warning(f"⚠️ Итоги игры {game_id} уже были применены, повторное начисление пропущено")
+            return {'applied': False, 'outcomes': row['payload'] if row else [], 'profiles': {}}
+        
+        cursor.execute(SETTLEMENT_USERS_QUERY, params['users'])
+        profiles = {row['user_id']: dict(row) for row in cursor.fetchall()}
+        cursor.execute(SETTLEMENT_BALANCE_QUERY, params['balance'])
+        cursor.execute(SETTLEMENT_STATS_QUERY, params['stats'])
+    
+    logger.info(f"✅ Итоги игры {game_id} применены: игроков {len(outcomes)}")
+    return {'applied': True, 'outcomes': outcomes, 'profiles': profiles}
+
 def get_team_stats() -> Dict[str, Any]:
     """
     Получает статистику команд (хищники vs мирные)
@@ -1402,11 +1718,155 @@ def get_player_chat_stats(user_id: int, chat_id: int) -> Dict[str, Any]:
         logger.error(f"❌ Ошибка получения статистики чата: {e}")
         return {}
 
-def create_tables():
+# Версия схемы БД: увеличивается при каждом изменении create_tables/SCHEMA_ADDITIONS.
+# Если в БД записана текущая версия, DDL при старте не выполняется
+SCHEMA_VERSION = 4
+
+# Таблицы и миграции, добавленные после первоначальной схемы. Выполняются
+# и для новой, и для существующей БД (все операции идемпотентны)
+SCHEMA_ADDITIONS = (
+    ("game_settlements", """
+        -- Расчеты по завершенным играм (защита от повторного начисления)
+        CREATE TABLE IF NOT EXISTS game_settlements (
+            game_id VARCHAR PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            winner_team VARCHAR,
+            payload JSONB DEFAULT '[]'::jsonb,
+            settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    ("game_journal", """
+        -- Журнал игр: события по номерам и последний снимок по чату.
+        -- Отдельная таблица: game_events.game_id ссылается на games(id),
+        -- а у журнала свой идентификатор
+        CREATE TABLE IF NOT EXISTS game_journal_events (
+            journal_id VARCHAR NOT NULL,
+            seq INTEGER NOT NULL,
+            event_type VARCHAR NOT NULL,
+            data JSONB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (journal_id, seq)
+        );
+        CREATE TABLE IF NOT EXISTS game_snapshots (
+            chat_id BIGINT PRIMARY KEY,
+            game_id VARCHAR NOT NULL,
+            seq INTEGER NOT NULL,
+            state JSONB NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    ("bot_state", """
+        -- Состояние бота для восстановления после перезапуска (StatePersistence)
+        CREATE TABLE IF NOT EXISTS bot_state (
+            id SERIAL PRIMARY KEY,
+            state_type VARCHAR(50) NOT NULL,
+            state_data JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(state_type)
+        );
+        CREATE TABLE IF NOT EXISTS active_games_state (
+            id SERIAL PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            thread_id BIGINT,
+            game_data JSONB NOT NULL,
+            players_data JSONB NOT NULL,
+            night_actions_data JSONB,
+            night_interface_data JSONB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(chat_id, thread_id)
+        );
+        CREATE TABLE IF NOT EXISTS player_games_state (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            chat_id BIGINT NOT NULL,
+            thread_id BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id)
+        );
+        CREATE TABLE IF NOT EXISTS authorized_chats_state (
+            id SERIAL PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            thread_id BIGINT,
+            chat_name VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(chat_id, thread_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_active_games_chat_id ON active_games_state(chat_id);
+        -- Upsert по chat_id: убираем дубликаты, оставшиеся от прежней перезаписи таблицы
+        DELETE FROM active_games_state a USING active_games_state b
+        WHERE a.chat_id = b.chat_id AND a.id < b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_active_games_state_chat_id ON active_games_state(chat_id);
+        CREATE INDEX IF NOT EXISTS idx_player_games_user_id ON player_games_state(user_id);
+        CREATE INDEX IF NOT EXISTS idx_authorized_chats_chat_id ON authorized_chats_state(chat_id);
+    """),
+)
+
+# Схема проверена в этом процессе
+_schema_ready = False
+
+
+def get_schema_version() -> Optional[int]:
+    """
+    Читает версию схемы, записанную в БД
+    
+    Returns:
+        Optional[int]: Версия схемы или None, если она еще не записана
+    """
+    with db_connection.transaction() as cursor:
+        cursor.execute("SELECT to_regclass('public.schema_version') IS NOT NULL AS ready")
+        if not cursor.fetchone()['ready']:
+            return None
+        cursor.execute("SELECT version FROM schema_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row['version'] if row else None
+
+
+def _apply_schema_additions():
+    """Выполняет SCHEMA_ADDITIONS и записывает текущую версию схемы"""
+    global _schema_ready
+    
+    for name, sql in SCHEMA_ADDITIONS:
+        try:
+            execute_query(sql)
+            logger.info(f"✅ Схема: {name}")
+        except Exception as e:
+            logger.warning(f"⚠️ Схема {name}: {e}")
+    
+    execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO schema_version (id, version) VALUES (1, %s)
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP;
+    """, (SCHEMA_VERSION,))
+    _schema_ready = True
+
+
+def create_tables(force: bool = False):
     """
     Создает все необходимые таблицы в базе данных
+    
+    Проверка выполняется один раз на процесс. Если в БД уже записана
+    текущая SCHEMA_VERSION, DDL не выполняется.
+    
+    Args:
+        force: Выполнить DDL, даже если схема актуальна
     """
+    global _schema_ready
+    
+    if _schema_ready and not force:
+        return True
+    
     try:
+        if not force and get_schema_version() == SCHEMA_VERSION:
+            _schema_ready = True
+            logger.info(f"✅ Схема БД актуальна (версия {SCHEMA_VERSION}), DDL пропущен")
+            return True
+        
         # Проверяем, существуют ли таблицы
         check_tables_query = """
         SELECT table_name 
@@ -1451,6 +1911,7 @@ def create_tables():
             else:
                 logger.info("✅ Таблица inventory уже существует")
             
+            _apply_schema_additions()
             return True
         
         # SQL для создания всех таблиц
@@ -1743,6 +2204,8 @@ def create_tables():
             logger.warning(f"⚠️ Миграция forest_members: {e}")
         
         logger.info("✅ Миграции выполнены")
+        
+        _apply_schema_additions()
         return True
         
     except Exception as e:
@@ -1831,6 +2294,7 @@ def set_user_nickname(user_id: int, nickname: str) -> bool:
         """
         
         result = execute_query(update_query, (nickname, user_id))
+        invalidate_user_profile(user_id)
         
         if result:
             logger.info(f"✅ Никнейм установлен для пользователя {user_id}: '{nickname}'")
@@ -1843,6 +2307,84 @@ def set_user_nickname(user_id: int, nickname: str) -> bool:
         logger.error(f"❌ Ошибка установки никнейма для пользователя {user_id}: {e}")
         return False
 
+# Кэш профилей для отображаемых имен: user_id -> {'nickname', 'first_name'}.
+# Заполняется одним запросом на всех игроков при старте игры
+# (prefetch_user_profiles), сбрасывается при изменении никнейма и create_user.
+USER_PROFILE_CACHE_TTL = 3600
+USER_PROFILE_CACHE_SIZE = 10000
+user_profile_cache = TTLCache(maxsize=USER_PROFILE_CACHE_SIZE, ttl=USER_PROFILE_CACHE_TTL,
+                              name="user_profiles")
+
+USER_PROFILES_QUERY = "SELECT user_id, nickname, first_name FROM users WHERE user_id = ANY(%s)"
+
+def cache_user_profiles(user_ids: List[int], rows: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Сохраняет в кэш профили, полученные USER_PROFILES_QUERY
+    
+    Пользователи без записи в БД кэшируются с пустым профилем, чтобы
+    не запрашивать их повторно.
+    
+    Args:
+        user_ids: Запрошенные ID пользователей
+        rows: Строки результата запроса
+    
+    Returns:
+        Dict: user_id -> профиль
+    """
+    profiles = {int(user_id): {'nickname': None, 'first_name': None} for user_id in user_ids}
+    for row in rows:
+        profiles[int(row['user_id'])] = {'nickname': row['nickname'] or None, 'first_name': row['first_name']}
+    for user_id, profile in profiles.items():
+        user_profile_cache.set(user_id, profile)
+    return profiles
+
+def prefetch_user_profiles(user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Загружает профили (никнейм и first_name) всех пользователей одним запросом
+    
+    Args:
+        user_ids: ID пользователей (например, все игроки игры)
+    
+    Returns:
+        Dict: user_id -> профиль
+    """
+    user_ids = [int(user_id) for user_id in user_ids]
+    if not user_ids:
+        return {}
+    return cache_user_profiles(user_ids, fetch_query(USER_PROFILES_QUERY, (user_ids,)))
+
+def get_user_profile(user_id: int) -> Dict[str, Any]:
+    """
+    Получает профиль пользователя для отображаемого имени (из кэша или БД)
+    
+    Args:
+        user_id: Telegram user ID
+    
+    Returns:
+        Dict: {'nickname': str или None, 'first_name': str или None}
+    """
+    profile = user_profile_cache.get(int(user_id))
+    if profile is None:
+        profile = prefetch_user_profiles([user_id])[int(user_id)]
+    return profile
+
+def get_cached_user_nickname(user_id: int) -> Optional[str]:
+    """
+    Никнейм пользователя только из кэша профилей (без запроса к БД)
+    
+    Args:
+        user_id: Telegram user ID
+    
+    Returns:
+        str или None: Никнейм, если профиль в кэше и никнейм задан
+    """
+    profile = user_profile_cache.get(int(user_id))
+    return profile['nickname'] if profile else None
+
+def invalidate_user_profile(user_id: int):
+    """Сбрасывает профиль пользователя в кэше"""
+    user_profile_cache.invalidate(int(user_id))
+
 def get_user_nickname(user_id: int) -> Optional[str]:
     """
     Получает никнейм пользователя
@@ -1853,9 +2395,7 @@ def get_user_nickname(user_id: int) -> Optional[str]:
     Returns:
         str или None: Никнейм пользователя
     """
-    query = "SELECT nickname FROM users WHERE user_id = %s"
-    result = fetch_one(query, (user_id,))
-    return result['nickname'] if result and result['nickname'] else None
+    return get_user_profile(user_id)['nickname']
 
 def get_display_name(user_id: int, username: str = None, first_name: str = None) -> str:
     """
@@ -1930,6 +2470,7 @@ def clear_user_nickname(user_id: int) -> bool:
         """
         
         result = execute_query(update_query, (user_id,))
+        invalidate_user_profile(user_id)
         
         if result:
             logger.info(f"✅ Никнейм очищен для пользователя {user_id}")
@@ -2396,10 +2937,75 @@ def update_item_flags(user_id: int, item_name: str, flags: Dict[str, Any]) -> bo
         logger.error(f"❌ Ошибка обновления флагов предмета: {e}")
         return False
 
+# Покупка одним запросом: условное списание, upsert инвентаря и запись покупки.
+# Все CTE видят один снимок, поэтому current_balance - баланс до покупки.
+BUY_ITEM_QUERY = """
+    WITH charged AS (
+        UPDATE users
+        SET balance = balance - %(price)s, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = %(user_id)s AND balance >= %(price)s
+        RETURNING user_id, balance
+    ), item AS (
+        INSERT INTO inventory (user_id, item_name, count, flags, created_at, updated_at)
+        SELECT user_id, %(item_name)s, 1, '{}'::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM charged
+        ON CONFLICT (user_id, item_name)
+        DO UPDATE SET
+            count = inventory.count + 1,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING count
+    ), purchase AS (
+        INSERT INTO purchases (user_id, item_id, purchased_at)
+        SELECT user_id, (SELECT id FROM shop WHERE item_name = %(item_name)s LIMIT 1), CURRENT_TIMESTAMP
+        FROM charged
+    )
+    SELECT
+        (SELECT balance FROM users WHERE user_id = %(user_id)s) AS current_balance,
+        (SELECT balance FROM charged) AS new_balance,
+        (SELECT count FROM item) AS item_count
+"""
+
+def build_buy_item_result(row: Optional[Dict[str, Any]], item_name: str, price: int) -> dict:
+    """
+    Формирует результат покупки из строки BUY_ITEM_QUERY
+    
+    Args:
+        row: Результат запроса
+        item_name: Название предмета
+        price: Цена предмета
+    
+    Returns:
+        dict: Результат покупки в формате buy_item
+    """
+    if not row or row['current_balance'] is None:
+        return {
+            'success': False,
+            'error': 'Пользователь не найден',
+            'balance': 0
+        }
+    
+    if row['new_balance'] is None:
+        return {
+            'success': False,
+            'error': 'Недостаточно орешков!',
+            'balance': int(row['current_balance'])
+        }
+    
+    return {
+        'success': True,
+        'item_name': item_name,
+        'item_count': row['item_count'] or 1,
+        'balance': int(row['new_balance']),
+        'price': price
+    }
+
 def buy_item(user_id: int, item_name: str, price: int) -> dict:
     """
     Покупает предмет в магазине (атомарная операция)
     
+    Списание выполняется условным UPDATE, поэтому параллельные покупки
+    не могут увести баланс в минус.
+    
     Args:
         user_id: ID пользователя
         item_name: Название предмета
@@ -2409,125 +3015,30 @@ def buy_item(user_id: int, item_name: str, price: int) -> dict:
         dict: Результат покупки с информацией о балансе и инвентаре
     """
     try:
-        # Получаем соединение с базой данных
-        db = init_db()
+        if not db_connection:
+            init_db()
+        
+        with db_connection.transaction() as cursor:
+            cursor.execute(BUY_ITEM_QUERY, {'user_id': user_id, 'item_name': item_name, 'price': price})
+            result = build_buy_item_result(cursor.fetchone(), item_name, price)
+        
+        if result['success']:
+            logger.info(f"✅ Пользователь {user_id} успешно купил {item_name} за {price} орешков. Новый баланс: {result['balance']}")
+        return result
         
-        with db.get_connection() as conn:
-            with conn.cursor() as cursor:
-                # Начинаем транзакцию
-                cursor.execute("BEGIN")
-                
-                try:
-                    # 1. Проверяем баланс пользователя
-                    balance_query = "SELECT balance FROM users WHERE user_id = %s"
-                    cursor.execute(balance_query, (user_id,))
-                    balance_result = cursor.fetchone()
-                    
-                    if not balance_result:
-                        cursor.execute("ROLLBACK")
-                        return {
-                            'success': False,
-                            'error': 'Пользователь не найден',
-                            'balance': 0
-                        }
-                    
-                    # Получаем баланс из результата (кортеж или словарь)
-                    if isinstance(balance_result, dict):
-                        current_balance = int(balance_result['balance'])
-                    else:
-                        current_balance = int(balance_result[0])
-                    
-                    if current_balance < price:
-                        cursor.execute("ROLLBACK")
-                        return {
-                            'success': False,
-                            'error': 'Недостаточно орешков!',
-                            'balance': current_balance
-                        }
-                    
-                    # 2. Списываем деньги
-                    new_balance = current_balance - price
-                    update_balance_query = """
-                        UPDATE users 
-                        SET balance = %s, updated_at = CURRENT_TIMESTAMP 
-                        WHERE user_id = %s
-                    """
-                    cursor.execute(update_balance_query, (new_balance, user_id))
-                    
-                    # 3. Добавляем/обновляем предмет в инвентаре
-                    inventory_query = """
-                        INSERT INTO inventory (user_id, item_name, count, flags, created_at, updated_at)
-                        VALUES (%s, %s, 1, '{}'::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                        ON CONFLICT (user_id, item_name)
-                        DO UPDATE SET 
-                            count = inventory.count + 1,
-                            updated_at = CURRENT_TIMESTAMP
-                        RETURNING count
-                    """
-                    cursor.execute(inventory_query, (user_id, item_name))
-                    inventory_result = cursor.fetchone()
-                    
-                    # Получаем количество предметов из результата
-                    if inventory_result:
-                        if isinstance(inventory_result, dict):
-                            item_count = inventory_result['count']
-                        else:
-                            item_count = inventory_result[0]
-                    else:
-                        item_count = 1
-                    
-                    # 4. Записываем покупку
-                    purchase_query = """
-                        INSERT INTO purchases (user_id, item_id, purchased_at)
-                        VALUES (%s, (SELECT id FROM shop WHERE item_name = %s), CURRENT_TIMESTAMP)
-                    """
-                    cursor.execute(purchase_query, (user_id, item_name))
-                    
-                    # Подтверждаем транзакцию
-                    cursor.execute("COMMIT")
-                    
-                    logger.info(f"✅ Пользователь {user_id} успешно купил {item_name} за {price} орешков. Новый баланс: {new_balance}")
-                    
-                    return {
-                        'success': True,
-                        'item_name': item_name,
-                        'item_count': item_count,
-                        'balance': new_balance,
-                        'price': price
-                    }
-                    
-                except Exception as e:
-                    # Откатываем транзакцию при ошибке
-                    cursor.execute("ROLLBACK")
-                    logger.error(f"❌ Ошибка в транзакции покупки {item_name}: {e}")
-                    
-                    # Получаем текущий баланс для отчета об ошибке
-                    try:
-                        balance_query = "SELECT balance FROM users WHERE user_id = %s"
-                        cursor.execute(balance_query, (user_id,))
-                        balance_result = cursor.fetchone()
-                        if balance_result:
-                            if isinstance(balance_result, dict):
-                                current_balance = int(balance_result['balance'])
-                            else:
-                                current_balance = int(balance_result[0])
-                        else:
-                            current_balance = 0
-                    except:
-                        current_balance = 0
-                    
-                    return {
-                        'success': False,
-                        'error': f'Ошибка покупки: {str(e)}',
-                        'balance': current_balance
-                    }
-                    
     except Exception as e:
         logger.error(f"❌ Ошибка покупки предмета {item_name}: {e}")
+        
+        # Получаем текущий баланс для отчета об ошибке
+        try:
+            current_balance = int(get_user_balance(user_id) or 0)
+        except Exception:
+            current_balance = 0
+        
         return {
             'success': False,
-            'error': f'Системная ошибка: {str(e)}',
-            'balance': 0
+            'error': f'Ошибка покупки: {str(e)}',
+            'balance': current_balance
         }
 
 def get_user_inventory_detailed(user_id: int) -> dict:
@@ -2677,7 +3188,9 @@ def save_game_state(game_data: Dict[str, Any]) -> bool:
                     'day_duration': game_data.get('day_duration', 300),
                     'night_duration': game_data.get('night_duration', 60),
                     'voting_duration': game_data.get('voting_duration', 60),
-                    'discussion_duration': game_data.get('discussion_duration', 300)
+                    'discussion_duration': game_data.get('discussion_duration', 300),
+                    # Дедлайн текущей фазы - по нему планировщик восстанавливает таймер после перезапуска
+                    'phase_end_time': game_data.get('phase_end_time')
                 }
                 settings_json = json.dumps(settings)
                 
@@ -2712,7 +3225,7 @@ def save_game_state(game_data: Dict[str, Any]) -> bool:
                           round_number, started_at, finished_at, winner_team, settings_json))
                 
                 conn.commit()
-                logger.info(f"✅ Состояние игры {game_id} сохранено в БД")
+                logger.debug(f"✅ Состояние игры {game_id} сохранено в БД")
                 return True
                 
     except Exception as e:
@@ -2755,7 +3268,7 @@ def load_game_state(game_id: str) -> Optional[Dict[str, Any]]:
                     except (json.JSONDecodeError, TypeError) as e:
                         logger.warning(f"⚠️ Ошибка парсинга настроек игры {game_id}: {e}")
                 
-                logger.info(f"✅ Состояние игры {game_id} загружено из БД")
+                logger.debug(f"✅ Состояние игры {game_id} загружено из БД")
                 return game_data
                 
     except Exception as e:
@@ -2844,7 +3357,7 @@ def save_players_state(game_id: str, players: List[Dict[str, Any]]) -> bool:
                     """, (player_id, game_id, user_id, username, first_name, role, is_alive, team))
                 
                 conn.commit()
-                logger.info(f"✅ Состояние игроков игры {game_id} сохранено в БД")
+                logger.debug(f"✅ Состояние игроков игры {game_id} сохранено в БД")
                 return True
                 
     except Exception as e:
@@ -2874,7 +3387,7 @@ def load_players_state(game_id: str) -> List[Dict[str, Any]]:
                     player_data = dict(player_row)
                     players.append(player_data)
                 
-                logger.info(f"✅ Загружено {len(players)} игроков игры {game_id} из БД")
+                logger.debug(f"✅ Загружено {len(players)} игроков игры {game_id} из БД")
                 return players
                 
     except Exception as e:
@@ -2911,7 +3424,7 @@ def delete_game_state(game_id: str) -> bool:
                 cursor.execute("DELETE FROM games WHERE id = %s", (game_id,))
                 
                 conn.commit()
-                logger.info(f"✅ Состояние игры {game_id} удалено из БД")
+                logger.debug(f"✅ Состояние игры {game_id} удалено из БД")
                 return True
                 
     except Exception as e:
@@ -2919,6 +3432,145 @@ def delete_game_state(game_id: str) -> bool:
         return False
 
 
+def load_legacy_games() -> List[Dict[str, Any]]:
+    """
+    Загружает игры, сохраненные save_game_state, вместе с игроками одним запросом
+    
+    Учитываются только строки состояния игр (id = "game_<chat_id>"),
+    а не записи игр для статистики.
+    
+    Returns:
+        List[Dict]: Данные игр (как load_all_active_games) с игроками в ключе players
+    """
+    rows = fetch_query("""
+        SELECT g.*,
+               COALESCE(json_agg(row_to_json(p)) FILTER (WHERE p.id IS NOT NULL), '[]'::json) AS players
+        FROM games g
+        LEFT JOIN players p ON p.game_id = g.id
+        WHERE g.status IN ('waiting', 'playing', 'night', 'day', 'voting')
+          AND g.id = 'game_' || g.chat_id::text
+        GROUP BY g.id
+    """)
+    
+    games = []
+    for row in rows or []:
+        game_data = dict(row)
+        settings = game_data.get('settings')
+        if isinstance(settings, str):
+            settings = json.loads(settings)
+        if settings:
+            game_data.update(settings)
+        games.append(game_data)
+    return games
+
+
+def delete_games_state(game_ids: List[str]) -> bool:
+    """
+    Удаляет состояние нескольких игр одной транзакцией (как delete_game_state)
+    
+    Args:
+        game_ids: ID игр
+        
+    Returns:
+        bool: True если удаление успешно
+    """
+    with db_connection.transaction() as cursor:
+        for table, column in (('players', 'game_id'), ('game_events', 'game_id'), ('votes', 'game_id'),
+                              ('player_actions', 'game_id'), ('games', 'id')):
+            cursor.execute(f"DELETE FROM {table} WHERE {column} = ANY(%s)", (list(game_ids),))
+    logger.info(f"✅ Состояние {len(game_ids)} игр удалено из БД")
+    return True
+
+
+# ============================================================================
+# ЖУРНАЛ ИГР (СОБЫТИЯ + СНИМКИ)
+# ============================================================================
+
+# События журнала: ключ (журнал, номер), повторная запись пачки безопасна
+JOURNAL_EVENT_QUERY = """
+    INSERT INTO game_journal_events (journal_id, seq, event_type, data)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (journal_id, seq) DO NOTHING
+"""
+
+# Снимок заменяет предыдущий снимок чата, только если он новее или это новая игра
+JOURNAL_SNAPSHOT_QUERY = """
+    INSERT INTO game_snapshots (chat_id, game_id, seq, state, updated_at)
+    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (chat_id) DO UPDATE SET
+        game_id = EXCLUDED.game_id,
+        seq = EXCLUDED.seq,
+        state = EXCLUDED.state,
+        updated_at = EXCLUDED.updated_at
+    WHERE game_snapshots.game_id <> EXCLUDED.game_id OR game_snapshots.seq < EXCLUDED.seq
+"""
+
+
+def write_game_journal(events: List[Tuple], snapshots: List[Tuple], discarded: List[str]) -> bool:
+    """
+    Записывает пачку журнала игр одной транзакцией
+    
+    Снимок удаляет журнал предыдущей игры того же чата и события,
+    которые в него вошли.
+    
+    Args:
+        events: Строки (журнал, номер, тип события, данные JSON)
+        snapshots: Строки (chat_id, журнал, номер, состояние JSON)
+        discarded: Журналы завершенных игр
+        
+    Returns:
+        bool: True если запись успешна
+    """
+    with db_connection.transaction() as cursor:
+        if discarded:
+            cursor.execute("DELETE FROM game_journal_events WHERE journal_id = ANY(%s)", (list(discarded),))
+            cursor.execute("DELETE FROM game_snapshots WHERE game_id = ANY(%s)", (list(discarded),))
+        for chat_id, journal_id, seq, state in snapshots:
+            cursor.execute("""
+                DELETE FROM game_journal_events WHERE journal_id IN (
+                    SELECT game_id FROM game_snapshots WHERE chat_id = %s AND game_id <> %s
+                )
+            """, (int(chat_id), journal_id))
+            cursor.execute(JOURNAL_SNAPSHOT_QUERY, (int(chat_id), journal_id, seq, state))
+            cursor.execute("DELETE FROM game_journal_events WHERE journal_id = %s AND seq <= %s", (journal_id, seq))
+        if events:
+            psycopg2.extras.execute_batch(cursor, JOURNAL_EVENT_QUERY, events)
+    return True
+
+
+def load_game_journals() -> List[Dict[str, Any]]:
+    """
+    Загружает журналы активных игр: последний снимок и события после него
+    
+    Returns:
+        List[Dict]: chat_id, game_id, seq, state и события (seq, event_type, data) по порядку
+    """
+    rows = fetch_query("""
+        SELECT s.chat_id, s.game_id, s.seq, s.state,
+               e.seq AS event_seq, e.event_type, e.data
+        FROM game_snapshots s
+        LEFT JOIN game_journal_events e ON e.journal_id = s.game_id AND e.seq > s.seq
+        ORDER BY s.chat_id, e.seq
+    """)
+    
+    journals = {}
+    for row in rows or []:
+        journal = journals.get(row['game_id'])
+        if journal is None:
+            journal = journals[row['game_id']] = {
+                'chat_id': row['chat_id'],
+                'game_id': row['game_id'],
+                'seq': row['seq'],
+                'state': row['state'],
+                'events': [],
+            }
+        if row['event_seq'] is not None:
+            journal['events'].append({'seq': row['event_seq'], 'event_type': row['event_type'], 'data': row['data']})
+    
+    logger.info(f"✅ Загружено {len(journals)} журналов игр из БД")
+    return list(journals.values())
+
+
 def add_active_effect(user_id: int, item_name: str, effect_type: str, effect_data: dict = None, game_id: str = None, chat_id: int = None, expires_at: str = None) -> bool:
     """
     Добавляет активный эффект предмета
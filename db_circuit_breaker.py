@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Автоматический выключатель (circuit breaker) для запросов к базе данных
+
+Пока база данных недоступна, запросы не ждут таймаутов и повторов,
+а сразу завершаются ошибкой DatabaseUnavailableError. Восстановление
+базы данных проверяется фоновой пробой.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseUnavailableError(RuntimeError):
+    """База данных временно недоступна (выключатель разомкнут)"""
+
+
+class CircuitBreaker:
+    """
+    Выключатель с двумя состояниями:
+
+    - closed: запросы идут в базу данных, ошибки подключения считаются;
+    - open: после failure_threshold ошибок подряд запросы сразу отклоняются,
+      а фоновый поток раз в probe_interval секунд проверяет базу данных.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, name: str = "database", failure_threshold: int = 3,
+                 probe_interval: float = 5.0):
+        """
+        Args:
+            name: Имя выключателя для логов
+            failure_threshold: Количество ошибок подряд до размыкания
+            probe_interval: Интервал между фоновыми пробами в секундах
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._probe: Optional[Callable[[], bool]] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Счетчики для мониторинга
+        self.rejected_count = 0
+        self.open_count = 0
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние выключателя"""
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True, если запросы к базе данных сейчас отклоняются"""
+        return self._state == self.OPEN
+
+    def set_probe(self, probe: Callable[[], bool]):
+        """
+        Устанавливает функцию проверки базы данных
+
+        Args:
+            probe: Функция без аргументов, возвращающая True, если база доступна
+        """
+        self._probe = probe
+
+    def before_request(self):
+        """
+        Проверяет, можно ли выполнять запрос
+
+        Raises:
+            DatabaseUnavailableError: Если выключатель разомкнут
+        """
+        if self._state == self.OPEN:
+            with self._lock:
+                self.rejected_count += 1
+            raise DatabaseUnavailableError(
+                f"База данных недоступна ({self.name}): {self._last_error}"
+            )
+
+    def record_success(self):
+        """Отмечает успешный запрос"""
+        if self._consecutive_failures or self._state != self.CLOSED:
+            with self._lock:
+                self._consecutive_failures = 0
+                self._close_locked()
+
+    def record_failure(self, error: Exception):
+        """
+        Отмечает ошибку подключения к базе данных
+
+        Args:
+            error: Исключение, вызвавшее ошибку
+        """
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_error = str(error)
+            if self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.open_count += 1
+                logger.error(f"❌ Выключатель {self.name} разомкнут после "
+                             f"{self._consecutive_failures} ошибок подряд: {error}")
+                self._start_probe_locked()
+
+    def reset(self):
+        """Принудительно замыкает выключатель и останавливает пробу"""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._close_locked()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Возвращает состояние выключателя для мониторинга
+
+        Returns:
+            Dict: Состояние, счетчики и последняя ошибка
+        """
+        open_for = None
+        if self._state == self.OPEN and self._opened_at is not None:
+            open_for = time.monotonic() - self._opened_at
+        return {
+            'name': self.name,
+            'state': self._state,
+            'consecutive_failures': self._consecutive_failures,
+            'rejected_count': self.rejected_count,
+            'open_count': self.open_count,
+            'open_for_seconds': open_for,
+            'last_error': self._last_error,
+        }
+
+    def _close_locked(self):
+        if self._state != self.CLOSED:
+            logger.info(f"✅ Выключатель {self.name} замкнут, база данных снова доступна")
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._stop_event.set()
+
+    def _start_probe_locked(self):
+        if self._probe is None:
+            return
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._stop_event = threading.Event()
+        self._probe_thread = threading.Thread(
+            target=self._probe_loop, args=(self._stop_event,),
+            name=f"{self.name}-breaker-probe", daemon=True
+        )
+        self._probe_thread.start()
+
+    def _probe_loop(self, stop_event: threading.Event):
+        """Фоновая проба: проверяет базу данных, пока выключатель разомкнут"""
+        while not stop_event.wait(self.probe_interval):
+            try:
+                healthy = self._probe()
+            except Exception as e:
+                healthy = False
+                self._last_error = str(e)
+            if healthy:
+                self.record_success()
+                return
+            logger.warning(f"⚠️ Проба {self.name}: база данных все еще недоступна")
+
+
+# Глобальный выключатель для PostgreSQL (общий для синхронного и асинхронного слоя)
+database_breaker = CircuitBreaker("postgresql")
+
+
+def is_database_available() -> bool:
+    """
+    Быстрая проверка без обращения к базе данных
+
+    Returns:
+        bool: False, если база данных известна как недоступная
+    """
+    return not database_breaker.is_open
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Параллельная рассылка личных сообщений игрокам
+
+Роли, меню голосования, сообщения белочки и раскрытие ролей отправлялись
+по одному: каждое сообщение ждало сетевой ответ на предыдущее, и начало
+фазы на 12 игроков занимало секунды. fan_out отправляет персональные
+сообщения одновременно (не больше limit запросов сразу); лимиты Telegram
+соблюдает очередь исходящих запросов (outbound_dispatcher), а приоритет
+вызывающего кода (send_priority) наследуется всеми отправками.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Одновременных запросов в одной рассылке
+FANOUT_CONCURRENCY = 10
+
+Recipient = TypeVar('Recipient')
+
+
+@dataclass
+class FanoutResult:
+    """Итог рассылки: ответы и ошибки по получателям, время до последней доставки"""
+    sent: Dict[Hashable, Any] = field(default_factory=dict)
+    failed: Dict[Hashable, BaseException] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        """Количество получателей"""
+        return len(self.sent) + len(self.failed)
+
+
+async def fan_out(recipients: Iterable[Recipient], send: Callable[[Recipient], Awaitable[Any]],
+                  key: Callable[[Recipient], Hashable] = lambda recipient: recipient,
+                  limit: int = FANOUT_CONCURRENCY, label: str = "Рассылка") -> FanoutResult:
+    """
+    Отправляет персональные сообщения всем получателям параллельно
+
+    Ошибка одного получателя не прерывает рассылку остальным.
+
+    Args:
+        recipients: Получатели (игроки, user_id...)
+        send: Корутина отправки одному получателю
+        key: Идентификатор получателя в результате (например, user_id игрока)
+        limit: Максимум одновременных отправок
+        label: Название рассылки для логов
+
+    Returns:
+        FanoutResult: Ответы, ошибки по получателям и время до последней доставки
+    """
+    result = FanoutResult()
+    semaphore = asyncio.Semaphore(max(1, limit))
+    started = time.perf_counter()
+
+    async def deliver(recipient: Recipient):
+        recipient_key = key(recipient)
+        async with semaphore:
+            try:
+                result.sent[recipient_key] = await send(recipient)
+            except Exception as e:
+                result.failed[recipient_key] = e
+                logger.error(f"❌ {label}: не удалось отправить {recipient_key}: {e}")
+                return
+        result.elapsed = time.perf_counter() - started
+
+    await asyncio.gather(*(deliver(recipient) for recipient in recipients))
+    if result.total:
+        logger.info(f"📨 {label}: доставлено {len(result.sent)}/{result.total}, "
+                    f"последнее через {result.elapsed * 1000:.0f} мс")
+    return result
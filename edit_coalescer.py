@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Объединение частых правок одного сообщения (сообщение о наборе в игру)
+
+Каждое присоединение и выход из регистрации правили закрепленное
+сообщение о наборе: 10 присоединений за две секунды - 10 запросов
+editMessageText, расход лимита группы (~20 сообщений в минуту) и ошибки
+"message is not modified". EditCoalescer пропускает первую правку сразу,
+а все правки, пришедшие в течение окна, схлопывает в одну: в конце окна
+отправляется только последнее содержимое. Правка с тем же содержимым,
+что уже отправлено, не отправляется вовсе.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from telegram.error import BadRequest
+
+logger = logging.getLogger(__name__)
+
+# Не больше одной правки сообщения за окно (лимит группы - одно сообщение в 3 секунды)
+EDIT_WINDOW = 3.0
+
+EditKey = Tuple[int, int]  # (chat_id, message_id)
+SendEdit = Callable[[], Awaitable[Any]]
+
+
+def is_not_modified(error: Exception) -> bool:
+    """Ошибка Telegram "message is not modified" (новое содержимое совпадает со старым)"""
+    return isinstance(error, BadRequest) and "not modified" in str(error).lower()
+
+
+class EditCoalescer:
+    """Правки сообщений: не больше одной за окно, побеждает последнее содержимое"""
+
+    def __init__(self, window: float = EDIT_WINDOW):
+        """
+        Args:
+            window: Минимальный интервал между правками одного сообщения (секунды)
+        """
+        self.window = window
+        # Последнее отправленное содержимое и ожидающая правка по сообщениям
+        self._sent: Dict[EditKey, Hashable] = {}
+        self._pending: Dict[EditKey, Tuple[Hashable, SendEdit]] = {}
+        self._windows: Dict[EditKey, asyncio.Task] = {}
+        self.requested = 0
+        self.edits = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.errors = 0
+
+    async def submit(self, key: EditKey, content: Hashable, send: SendEdit) -> bool:
+        """
+        Запрашивает правку сообщения
+
+        Если окно сообщения свободно, правка отправляется сразу (ошибка
+        передается вызывающему коду). Иначе содержимое запоминается и
+        отправляется в конце окна, заменяя все предыдущие ожидающие правки.
+
+        Args:
+            key: (chat_id, message_id) сообщения
+            content: Содержимое правки для сравнения (текст и клавиатура)
+            send: Функция, выполняющая правку
+
+        Returns:
+            bool: True, если правка отправлена сейчас
+        """
+        self.requested += 1
+        if key in self._windows:
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = (content, send)
+            return False
+
+        self._windows[key] = asyncio.create_task(self._run_window(key))
+        return await self._send(key, content, send)
+
+    def discard(self, chat_id: int):
+        """Отменяет ожидающие правки и забывает сообщения чата (игра началась или отменена)"""
+        for key in [key for key in self._windows if key[0] == chat_id]:
+            self._windows.pop(key).cancel()
+        for store in (self._pending, self._sent):
+            for key in [key for key in store if key[0] == chat_id]:
+                del store[key]
+
+    async def shutdown(self):
+        """Останавливает окна; ожидающие косметические правки при остановке бота не отправляются"""
+        windows = list(self._windows.values())
+        self._windows.clear()
+        self._pending.clear()
+        for task in windows:
+            task.cancel()
+        await asyncio.gather(*windows, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики: запрошено правок, отправлено, сэкономлено (схлопнуто и без изменений)"""
+        return {
+            'requested': self.requested,
+            'edits': self.edits,
+            'coalesced': self.coalesced,
+            'unchanged': self.unchanged,
+            'saved': self.coalesced + self.unchanged,
+            'errors': self.errors,
+            'pending': len(self._pending),
+        }
+
+    async def _run_window(self, key: EditKey):
+        """Окно сообщения: в конце отправляет последнюю ожидающую правку и открывает новое окно"""
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                pending = self._pending.pop(key, None)
+                if pending is None:
+                    return
+                await self._send(key, *pending, raise_errors=False)
+        finally:
+            if self._windows.get(key) is asyncio.current_task():
+                del self._windows[key]
+
+    async def _send(self, key: EditKey, content: Hashable, send: SendEdit, raise_errors: bool = True) -> bool:
+        """Отправляет правку, если содержимое отличается от отправленного ранее"""
+        if self._sent.get(key) == content:
+            self.unchanged += 1
+            return False
+        try:
+            await send()
+        except Exception as e:
+            if is_not_modified(e):
+                self.unchanged += 1
+                self._sent[key] = content
+                return False
+            self.errors += 1
+            if raise_errors:
+                raise
+            logger.warning(f"⚠️ Не удалось отредактировать сообщение {key}: {e}")
+            return False
+        self.edits += 1
+        self._sent[key] = content
+        return True
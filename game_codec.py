@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Компактный версионированный бинарный формат состояния игры
+
+Кодирует Game, игроков, ночные цели NightActions и голоса в байты:
+целые числа - varint (отрицательные - zigzag), перечисления - номер
+в таблице кодов, даты - микросекунды от 1970-01-01, id игроков - числа.
+
+Формат:
+    b"FG" + версия формата (1 байт) + секции
+    секция = тег (1 байт) + длина (varint) + данные
+
+Эволюция схемы:
+    - незнакомые секции пропускаются, отсутствующие получают значения по умолчанию;
+    - новые поля дописываются в конец секции или записи игрока, старые
+      декодеры их не читают, новые при отсутствии берут значение по умолчанию;
+    - таблицы кодов перечислений только дополняются в конце;
+    - несовместимое изменение - новая версия формата и ветка в decode_game.
+"""
+
+import json
+import operator
+import struct
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from game_logic import Game, GamePhase, Player, Role, Team
+from night_actions import NightActions
+
+MAGIC = b"FG"
+FORMAT_VERSION = 1
+
+# Таблицы кодов перечислений (0 - None). Порядок менять нельзя, только дописывать
+PHASE_CODES = (None, GamePhase.WAITING, GamePhase.NIGHT, GamePhase.DAY, GamePhase.VOTING, GamePhase.GAME_OVER)
+ROLE_CODES = (None, Role.WOLF, Role.FOX, Role.HARE, Role.MOLE, Role.BEAVER)
+TEAM_CODES = (None, Team.PREDATORS, Team.HERBIVORES)
+
+# Теги секций
+SECTION_GAME = 1
+SECTION_PLAYERS = 2
+SECTION_VOTES = 3
+SECTION_LAST_VOTES = 4
+SECTION_NIGHT = 5
+SECTION_STATS = 6
+SECTION_EXTRA = 7
+
+# Ночные цели NightActions в порядке записи
+NIGHT_TARGETS = ('wolf_targets', 'fox_targets', 'beaver_targets', 'mole_targets')
+
+# Редкие поля произвольной структуры - компактным JSON в секции EXTRA
+EXTRA_FIELDS = ('stage_pinned_messages', 'last_wolf_victim', 'last_mole_check', 'night_actions')
+
+# Запись игрока: id и имена переменной длины, затем блоки фиксированной длины
+# (коды роли/команды и флаги, счетчики - по 2 байта, без разбора varint)
+PLAYER_COUNTERS = (
+    'supplies', 'max_supplies', 'is_fox_stolen', 'stolen_supplies',
+    'consecutive_nights_survived', 'last_action_round', 'extra_lives',
+)
+_PLAYER_CORE = struct.Struct('<BBB')
+_PLAYER_COUNTERS = struct.Struct('<' + 'H' * len(PLAYER_COUNTERS))
+_PLAYER_COUNTER_DEFAULTS = (2, 2, 0, 0, 0, 0, 0)
+_PLAYER_DECODED_FIELDS = ('user_id', 'username', 'first_name', 'last_name', 'role', 'team',
+                          'is_alive', 'is_beaver_protected') + PLAYER_COUNTERS
+_player_counters = operator.attrgetter(*PLAYER_COUNTERS)
+_new_player = object.__new__
+_set_field = object.__setattr__
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class CodecError(ValueError):
+    """Данные не являются снимком игры или повреждены"""
+
+
+class _Writer:
+    """Буфер записи: varint, строки, необязательные значения"""
+
+    __slots__ = ('buffer',)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def uint(self, value: int):
+        buffer = self.buffer
+        if value < 0x80:
+            buffer.append(value)
+            return
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def int(self, value: int):
+        self.uint(_zigzag(value))
+
+    def opt_int(self, value: Optional[int]):
+        # 0 - None, иначе zigzag(value) + 1
+        if value is None:
+            self.uint(0)
+        else:
+            self.uint(_zigzag(value) + 1)
+
+    def str(self, value: str):
+        data = value.encode('utf-8')
+        self.uint(len(data))
+        self.buffer += data
+
+    def opt_str(self, value: Optional[str]):
+        if value is None:
+            self.uint(0)
+        else:
+            data = value.encode('utf-8')
+            self.uint(len(data) + 1)
+            self.buffer += data
+
+    def datetime(self, value: Optional[datetime]):
+        self.opt_int(None if value is None else (value - _EPOCH) // _MICROSECOND)
+
+    def section(self, tag: int, body: '_Writer'):
+        self.buffer.append(tag)
+        self.uint(len(body.buffer))
+        self.buffer += body.buffer
+
+
+class _Reader:
+    """Чтение секции; после конца данных методы чтения возвращают значения по умолчанию"""
+
+    __slots__ = ('data', 'pos', 'end')
+
+    def __init__(self, data: bytes, pos: int = 0, end: Optional[int] = None):
+        self.data = data
+        self.pos = pos
+        self.end = len(data) if end is None else end
+
+    def more(self) -> bool:
+        return self.pos < self.end
+
+    def uint(self, default: int = 0) -> int:
+        pos = self.pos
+        if pos >= self.end:
+            return default
+        byte = self.data[pos]
+        if byte < 0x80:
+            # Однобайтовые значения (счетчики, коды, длины) - без цикла
+            self.pos = pos + 1
+            return byte
+        result, shift = 0, 0
+        while True:
+            if pos >= self.end:
+                raise CodecError("Обрыв varint")
+            byte = self.data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        self.pos = pos
+        return result
+
+    def int(self, default: int = 0) -> int:
+        if self.pos >= self.end:
+            return default
+        return _unzigzag(self.uint())
+
+    def opt_int(self) -> Optional[int]:
+        value = self.uint()
+        return None if value == 0 else _unzigzag(value - 1)
+
+    def _bytes(self, length: int) -> str:
+        end = self.pos + length
+        if end > self.end:
+            raise CodecError("Обрыв строки")
+        value = self.data[self.pos:end].decode('utf-8')
+        self.pos = end
+        return value
+
+    def str(self, default: str = "") -> str:
+        if self.pos >= self.end:
+            return default
+        return self._bytes(self.uint())
+
+    def opt_str(self) -> Optional[str]:
+        length = self.uint()
+        return None if length == 0 else self._bytes(length - 1)
+
+    def datetime(self) -> Optional[datetime]:
+        value = self.opt_int()
+        return None if value is None else _EPOCH + value * _MICROSECOND
+
+    def unpack(self, layout: struct.Struct) -> Optional[Tuple]:
+        """Блок фиксированной длины; None, если его нет (запись старой версии)"""
+        end = self.pos + layout.size
+        if end > self.end:
+            return None
+        values = layout.unpack_from(self.data, self.pos)
+        self.pos = end
+        return values
+
+    def sub(self) -> '_Reader':
+        """Вложенная запись с длиной: читается отдельно, остаток пропускается"""
+        length = self.uint()
+        end = self.pos + length
+        if end > self.end:
+            raise CodecError("Обрыв записи")
+        reader = _Reader(self.data, self.pos, end)
+        self.pos = end
+        return reader
+
+
+def _zigzag(value: int) -> int:
+    # Отрицательные числа (id групп Telegram) - в нечетные коды любой длины
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+_PHASE_INDEX = {value: code for code, value in enumerate(PHASE_CODES)}
+_ROLE_INDEX = {value: code for code, value in enumerate(ROLE_CODES)}
+_TEAM_INDEX = {value: code for code, value in enumerate(TEAM_CODES)}
+
+
+def _decode_enum(table: Tuple, code: int):
+    if code >= len(table):
+        raise CodecError(f"Неизвестный код перечисления: {code}")
+    return table[code]
+
+
+def _json_default(value: Any):
+    if isinstance(value, (Role, Team, GamePhase)):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется")
+
+
+# ----------------------------------------------------------------------
+# Кодирование
+# ----------------------------------------------------------------------
+
+def _encode_player(player: Player, record: _Writer):
+    record.int(player.user_id)
+    record.str(player.username or "")
+    record.opt_str(player.first_name)
+    record.opt_str(player.last_name)
+    record.buffer += _PLAYER_CORE.pack(
+        _ROLE_INDEX[player.role],
+        _TEAM_INDEX[player.team],
+        int(player.is_alive) | int(player.is_beaver_protected) << 1 | int(player.username is None) << 2,
+    )
+    record.buffer += _PLAYER_COUNTERS.pack(*_player_counters(player))
+
+
+def _encode_votes(votes: Dict[int, Optional[int]]) -> _Writer:
+    body = _Writer()
+    body.uint(len(votes))
+    for voter_id, target_id in votes.items():
+        body.int(voter_id)
+        body.opt_int(target_id)
+    return body
+
+
+def encode_game(game: Game, night_actions: Optional[NightActions] = None) -> bytes:
+    """
+    Кодирует состояние игры в бинарный снимок
+
+    Args:
+        game: Игра
+        night_actions: Ночные действия игры (если есть)
+
+    Returns:
+        bytes: Снимок игры
+    """
+    out = _Writer()
+    out.buffer += MAGIC
+    out.buffer.append(FORMAT_VERSION)
+
+    body = _Writer()
+    body.int(game.chat_id)
+    body.opt_int(game.thread_id)
+    body.opt_int(game.creator_id)
+    body.uint(int(game.is_test_mode) | int(game.game_over_sent) << 1
+              | int(game.exile_voting_completed) << 2 | int(game.voting_results_processed) << 3)
+    body.uint(_PHASE_INDEX[game.phase])
+    body.uint(game.current_round)
+    body.opt_int(game.day_number)
+    body.datetime(game.game_start_time)
+    body.datetime(game.phase_end_time)
+    body.datetime(game.day_start_time)
+    body.opt_int(game.pinned_message_id)
+    body.str(game.status)
+    body.opt_str(game.db_game_id)
+    body.uint(game.total_voters)
+    body.opt_str(game.voting_type)
+    out.section(SECTION_GAME, body)
+
+    body = _Writer()
+    body.uint(len(game.players))
+    buffer = body.buffer
+    for player in game.players.values():
+        # Запись пишется сразу в секцию; длина почти всегда занимает один байт
+        start = len(buffer)
+        buffer.append(0)
+        _encode_player(player, body)
+        length = len(buffer) - start - 1
+        if length < 0x80:
+            buffer[start] = length
+        else:
+            prefix = _Writer()
+            prefix.uint(length)
+            buffer[start:start + 1] = prefix.buffer
+    out.section(SECTION_PLAYERS, body)
+
+    if game.votes:
+        out.section(SECTION_VOTES, _encode_votes(game.votes))
+    if game.last_voting_results is not None:
+        out.section(SECTION_LAST_VOTES, _encode_votes(game.last_voting_results))
+
+    if night_actions is not None:
+        body = _Writer()
+        for attr in NIGHT_TARGETS:
+            targets = getattr(night_actions, attr)
+            body.uint(len(targets))
+            for actor_id, target_id in targets.items():
+                body.int(actor_id)
+                body.int(target_id)
+        body.uint(len(night_actions.skipped_actions))
+        for user_id in night_actions.skipped_actions:
+            body.int(user_id)
+        out.section(SECTION_NIGHT, body)
+
+    stats = game.game_stats
+    body = _Writer()
+    body.uint(stats.predator_kills)
+    body.uint(stats.herbivore_survivals)
+    body.uint(stats.fox_thefts)
+    body.uint(stats.beaver_protections)
+    body.uint(stats.total_voters)
+    body.str(stats.voting_type)
+    out.section(SECTION_STATS, body)
+
+    extra = {name: getattr(game, name) for name in EXTRA_FIELDS if getattr(game, name)}
+    if extra:
+        body = _Writer()
+        body.buffer += json.dumps(extra, separators=(',', ':'), ensure_ascii=False,
+                                  default=_json_default).encode('utf-8')
+        out.section(SECTION_EXTRA, body)
+
+    return bytes(out.buffer)
+
+
+# ----------------------------------------------------------------------
+# Декодирование
+# ----------------------------------------------------------------------
+
+def _decode_player(record: _Reader) -> Player:
+    user_id = record.int()
+    username = record.str()
+    first_name = record.opt_str()
+    last_name = record.opt_str()
+    role, team, flags = record.unpack(_PLAYER_CORE) or (0, 0, 1)
+    counters = record.unpack(_PLAYER_COUNTERS) or _PLAYER_COUNTER_DEFAULTS
+
+    # Игрок собирается без Player.__init__: поля уже проверены при кодировании,
+    # а __setattr__ с учетом индексов для нового игрока не нужен
+    player = _new_player(Player)
+    values = (
+        user_id,
+        None if flags & 4 else username,
+        first_name,
+        last_name,
+        _decode_enum(ROLE_CODES, role),
+        _decode_enum(TEAM_CODES, team),
+        bool(flags & 1),
+        bool(flags & 2),
+    ) + counters
+    for name, value in zip(_PLAYER_DECODED_FIELDS, values):
+        _set_field(player, name, value)
+    _set_field(player, '_registry', None)
+    return player
+
+
+def _decode_votes(body: _Reader) -> Dict[int, Optional[int]]:
+    votes = {}
+    for _ in range(body.uint()):
+        voter_id = body.int()
+        votes[voter_id] = body.opt_int()
+    return votes
+
+
+def _decode_sections(data: bytes) -> Dict[int, _Reader]:
+    if len(data) < 3 or data[:2] != MAGIC:
+        raise CodecError("Это не снимок игры")
+    version = data[2]
+    if version > FORMAT_VERSION:
+        raise CodecError(f"Версия формата {version} новее поддерживаемой ({FORMAT_VERSION})")
+
+    reader = _Reader(bytes(data), 3)
+    sections = {}
+    while reader.more():
+        tag = reader.data[reader.pos]
+        reader.pos += 1
+        # Незнакомые секции (из более новой версии) пропускаются
+        sections[tag] = reader.sub()
+    return sections
+
+
+def decode_game(data: bytes) -> Tuple[Game, NightActions]:
+    """
+    Восстанавливает игру и ее ночные действия из бинарного снимка
+
+    Args:
+        data: Снимок encode_game
+
+    Returns:
+        Tuple[Game, NightActions]: Игра и ночные действия
+
+    Raises:
+        CodecError: Если данные повреждены или формат не поддерживается
+    """
+    sections = _decode_sections(data)
+    if SECTION_GAME not in sections:
+        raise CodecError("В снимке нет секции игры")
+
+    body = sections[SECTION_GAME]
+    chat_id = body.int()
+    thread_id = body.opt_int()
+    creator_id = body.opt_int()
+    flags = body.uint()
+    game = Game(chat_id=chat_id, thread_id=thread_id, is_test_mode=bool(flags & 1), creator_id=creator_id)
+    game.game_over_sent = bool(flags & 2)
+    game.exile_voting_completed = bool(flags & 4)
+    game.voting_results_processed = bool(flags & 8)
+    game.phase = _decode_enum(PHASE_CODES, body.uint()) or GamePhase.WAITING
+    game.current_round = body.uint()
+    game.day_number = body.opt_int()
+    game.game_start_time = body.datetime()
+    game.phase_end_time = body.datetime()
+    game.day_start_time = body.datetime()
+    game.pinned_message_id = body.opt_int()
+    game.status = body.str("active")
+    game.db_game_id = body.opt_str()
+    game.total_voters = body.uint()
+    game.voting_type = body.opt_str()
+
+    players = {}
+    body = sections.get(SECTION_PLAYERS)
+    if body is not None:
+        for _ in range(body.uint()):
+            player = _decode_player(body.sub())
+            players[player.user_id] = player
+    game.players = players
+
+    game.votes = _decode_votes(sections[SECTION_VOTES]) if SECTION_VOTES in sections else {}
+    if SECTION_LAST_VOTES in sections:
+        game.last_voting_results = _decode_votes(sections[SECTION_LAST_VOTES])
+
+    night_actions = NightActions(game)
+    body = sections.get(SECTION_NIGHT)
+    if body is not None:
+        for attr in NIGHT_TARGETS:
+            targets = getattr(night_actions, attr)
+            for _ in range(body.uint()):
+                actor_id = body.int()
+                targets[actor_id] = body.int()
+        night_actions.skipped_actions = {body.int() for _ in range(body.uint())}
+
+    body = sections.get(SECTION_STATS)
+    if body is not None:
+        stats = game.game_stats
+        stats.predator_kills = body.uint()
+        stats.herbivore_survivals = body.uint()
+        stats.fox_thefts = body.uint()
+        stats.beaver_protections = body.uint()
+        stats.total_voters = body.uint()
+        stats.voting_type = body.str()
+
+    body = sections.get(SECTION_EXTRA)
+    if body is not None:
+        extra = json.loads(body.data[body.pos:body.end].decode('utf-8'))
+        _restore_extra(game, extra)
+
+    return game, night_actions
+
+
+def _restore_extra(game: Game, extra: Dict[str, Any]):
+    game.stage_pinned_messages = extra.get('stage_pinned_messages', {})
+    for name in ('last_wolf_victim', 'last_mole_check'):
+        value = extra.get(name)
+        if value:
+            for key in ('role', 'target_role'):
+                if value.get(key):
+                    value[key] = Role(value[key])
+        setattr(game, name, value)
+    game.night_actions = {int(key): value for key, value in extra.get('night_actions', {}).items()}
+
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Журнал игр: события только дописываются, состояние восстанавливается
+из последнего снимка и хвоста событий
+
+Игра сообщает о событиях через Game.on_event (вход и выход игроков,
+распределение ролей, ночные ходы, голоса, смерти), бот - о смене фаз
+через checkpoint(). Событие смены фазы содержит только поля, изменившиеся
+с прошлого события (припасы после ночи, статистика, сроки фазы), поэтому
+запись - это короткая вставка в game_journal_events вместо перезаписи
+игры и всех игроков. Каждые snapshot_interval событий журнал сохраняет
+компактный снимок в game_snapshots и удаляет события до него.
+
+Восстановление: снимок + события после него (load), в том числе ночные
+цели NightActions и текущие голоса, которые Game.from_dict не сохраняет.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from game_logic import Game, GamePhase, Player, Role, Team
+from night_actions import NightActions
+
+logger = logging.getLogger(__name__)
+
+# Снимок раз в столько событий игры
+SNAPSHOT_INTERVAL = 64
+
+# Задержка перед записью: события одного хода уходят в БД одной пачкой
+FLUSH_DELAY = 0.2
+
+# Поля игрока в снимке (строка игрока - список значений в этом порядке)
+PLAYER_FIELDS = (
+    'username', 'first_name', 'last_name', 'role', 'team', 'is_alive',
+    'supplies', 'max_supplies', 'is_fox_stolen', 'stolen_supplies',
+    'is_beaver_protected', 'consecutive_nights_survived', 'last_action_round',
+    'extra_lives',
+)
+_ROLE = PLAYER_FIELDS.index('role')
+_TEAM = PLAYER_FIELDS.index('team')
+_ALIVE = PLAYER_FIELDS.index('is_alive')
+
+# Поля игры в снимке (игроки, голоса и ночные цели хранятся отдельно)
+GAME_FIELDS = (
+    'thread_id', 'is_test_mode', 'creator_id', 'status', 'phase',
+    'current_round', 'day_number', 'game_start_time', 'phase_end_time',
+    'day_start_time', 'pinned_message_id', 'stage_pinned_messages',
+    'game_over_sent', 'last_wolf_victim', 'last_mole_check', 'db_game_id',
+    'total_voters', 'voting_type', 'exile_voting_completed',
+    'voting_results_processed', 'last_voting_results', 'night_actions',
+    'game_stats',
+)
+_DATETIME_FIELDS = ('game_start_time', 'phase_end_time', 'day_start_time')
+_STATS_FIELDS = ('predator_kills', 'herbivore_survivals', 'fox_thefts', 'beaver_protections',
+                 'total_voters', 'voting_type')
+
+# Ночные цели NightActions: вид хода -> атрибут
+NIGHT_TARGETS = {
+    'wolf': 'wolf_targets',
+    'fox': 'fox_targets',
+    'beaver': 'beaver_targets',
+    'mole': 'mole_targets',
+}
+
+
+def _plain(value: Any) -> Any:
+    """Приводит значение к виду, сериализуемому в JSON (Enum, datetime, ключи-числа)"""
+    if isinstance(value, (Role, Team, GamePhase)):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _int_keys(data: Optional[Dict]) -> Optional[Dict]:
+    if data is None:
+        return None
+    return {int(key): value for key, value in data.items()}
+
+
+def _empty_night() -> Dict[str, Any]:
+    night = {kind: {} for kind in NIGHT_TARGETS}
+    night['skipped'] = []
+    return night
+
+
+def capture_state(game: Game, night_actions: Optional[NightActions] = None) -> Dict[str, Any]:
+    """
+    Снимает полное состояние игры в компактный словарь для JSON
+
+    Args:
+        game: Игра
+        night_actions: Ночные действия игры (если есть)
+
+    Returns:
+        Dict: Состояние с разделами game, players, votes, night
+    """
+    game_state = {}
+    for name in GAME_FIELDS:
+        if name == 'game_stats':
+            game_state[name] = {field: getattr(game.game_stats, field) for field in _STATS_FIELDS}
+        else:
+            game_state[name] = _plain(getattr(game, name))
+
+    players = {}
+    for user_id, player in game.players.items():
+        players[str(user_id)] = [_plain(getattr(player, field)) for field in PLAYER_FIELDS]
+
+    night = _empty_night()
+    if night_actions is not None:
+        for kind, attr in NIGHT_TARGETS.items():
+            night[kind] = _plain(getattr(night_actions, attr))
+        night['skipped'] = sorted(night_actions.skipped_actions)
+
+    return {
+        'chat_id': game.chat_id,
+        'game': game_state,
+        'players': players,
+        'votes': _plain(game.votes),
+        'night': night,
+    }
+
+
+def restore_state(state: Dict[str, Any]) -> Tuple[Game, NightActions]:
+    """
+    Восстанавливает игру и ее ночные действия из состояния capture_state
+
+    Args:
+        state: Состояние игры
+
+    Returns:
+        Tuple[Game, NightActions]: Игра и ночные действия
+    """
+    fields = state['game']
+    game = Game(chat_id=state['chat_id'], thread_id=fields.get('thread_id'),
+                is_test_mode=fields.get('is_test_mode', True), creator_id=fields.get('creator_id'))
+
+    for name, value in fields.items():
+        if name in ('thread_id', 'is_test_mode', 'creator_id'):
+            continue
+        if name == 'phase':
+            value = GamePhase(value)
+        elif name in _DATETIME_FIELDS:
+            value = datetime.fromisoformat(value) if value else None
+        elif name in ('last_voting_results', 'night_actions'):
+            value = _int_keys(value)
+        elif name in ('last_wolf_victim', 'last_mole_check') and value:
+            value = dict(value)
+            for key in ('role', 'target_role'):
+                if value.get(key):
+                    value[key] = Role(value[key])
+        elif name == 'game_stats':
+            for field, stat in value.items():
+                setattr(game.game_stats, field, stat)
+            continue
+        setattr(game, name, value)
+
+    players = {}
+    for user_id, row in state['players'].items():
+        values = dict(zip(PLAYER_FIELDS, row))
+        values['role'] = Role(values['role']) if values['role'] else None
+        values['team'] = Team(values['team']) if values['team'] else None
+        players[int(user_id)] = Player(user_id=int(user_id), **values)
+    game.players = players
+    game.votes = _int_keys(state['votes'])
+
+    night_actions = NightActions(game)
+    night = state['night']
+    for kind, attr in NIGHT_TARGETS.items():
+        setattr(night_actions, attr, _int_keys(night[kind]))
+    night_actions.skipped_actions = set(night['skipped'])
+    return game, night_actions
+
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Вычисляет изменения состояния (для события смены фазы)
+
+    Args:
+        old: Состояние по журналу
+        new: Текущее состояние игры
+
+    Returns:
+        Dict: Измененные разделы; пустой словарь, если изменений нет
+    """
+    diff = {}
+    game = {name: value for name, value in new['game'].items() if old['game'].get(name) != value}
+    if game:
+        diff['game'] = game
+    players = {user_id: row for user_id, row in new['players'].items() if old['players'].get(user_id) != row}
+    if players:
+        diff['players'] = players
+    removed = [user_id for user_id in old['players'] if user_id not in new['players']]
+    if removed:
+        diff['removed'] = removed
+    for part in ('votes', 'night'):
+        if old[part] != new[part]:
+            diff[part] = new[part]
+    return diff
+
+
+def apply_event(state: Dict[str, Any], event_type: str, data: Dict[str, Any], copy_data: bool = True):
+    """
+    Применяет событие журнала к состоянию (на месте)
+
+    Args:
+        state: Состояние игры (capture_state)
+        event_type: Тип события
+        data: Данные события
+        copy_data: False - данные события больше нигде не используются, копия не нужна
+    """
+    players = state['players']
+    if event_type == 'join':
+        player = Player(user_id=data['user_id'], username=data['username'], role=Role.HARE, team=Team.HERBIVORES)
+        players[str(data['user_id'])] = [_plain(getattr(player, field)) for field in PLAYER_FIELDS]
+    elif event_type == 'leave':
+        players.pop(str(data['user_id']), None)
+    elif event_type == 'roles_assigned':
+        for user_id, (role, team) in data['roles'].items():
+            if user_id in players:
+                players[user_id][_ROLE] = role
+                players[user_id][_TEAM] = team
+    elif event_type == 'death':
+        if str(data['user_id']) in players:
+            players[str(data['user_id'])][_ALIVE] = False
+    elif event_type == 'vote':
+        state['votes'][str(data['voter_id'])] = data['target_id']
+    elif event_type == 'night_action':
+        night = state['night']
+        actor = str(data['actor_id'])
+        if data['kind'] == 'skip':
+            if data['actor_id'] not in night['skipped']:
+                night['skipped'] = sorted(night['skipped'] + [data['actor_id']])
+            for kind in NIGHT_TARGETS:
+                night[kind].pop(actor, None)
+        else:
+            night[data['kind']][actor] = data['target_id']
+    elif event_type == 'night_cleared':
+        state['night'] = _empty_night()
+    elif event_type in ('phase_change', 'sync'):
+        state['game'].update(data.get('game', {}))
+        changed = data.get('players', {})
+        players.update(copy.deepcopy(changed) if copy_data else changed)
+        for user_id in data.get('removed', []):
+            players.pop(user_id, None)
+        for part in ('votes', 'night'):
+            if part in data:
+                state[part] = copy.deepcopy(data[part]) if copy_data else data[part]
+    else:
+        logger.warning(f"⚠️ Неизвестное событие журнала: {event_type}")
+
+
+def replay(snapshot: Dict[str, Any], events: List[Tuple[str, Dict[str, Any]]],
+           in_place: bool = False) -> Dict[str, Any]:
+    """
+    Воспроизводит события поверх снимка
+
+    Args:
+        snapshot: Состояние из снимка
+        events: Пары (тип события, данные) по возрастанию номера
+        in_place: Изменять снимок и события на месте (только что прочитаны из БД)
+
+    Returns:
+        Dict: Состояние игры после всех событий
+    """
+    state = snapshot if in_place else copy.deepcopy(snapshot)
+    for event_type, data in events:
+        apply_event(state, event_type, data, copy_data=not in_place)
+    return state
+
+
+class _Track:
+    """Журнал одной игры: номер последнего события и состояние по журналу"""
+
+    __slots__ = ('game', 'journal_id', 'seq', 'snapshot_seq', 'state')
+
+    def __init__(self, game: Game, journal_id: str, seq: int, snapshot_seq: int, state: Dict[str, Any]):
+        self.game = game
+        self.journal_id = journal_id
+        self.seq = seq
+        self.snapshot_seq = snapshot_seq
+        self.state = state
+
+
+class GameJournal:
+    """
+    Журнал событий активных игр
+
+    События копятся в памяти и записываются пачками вне event loop
+    (flush_async). Записи в БД выполняет store с функциями
+    write_game_journal и load_game_journals (по умолчанию database_psycopg2).
+    """
+
+    def __init__(self, games: Dict[int, Game], store=None,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL, flush_delay: float = FLUSH_DELAY):
+        """
+        Args:
+            games: Словарь активных игр бота (chat_id -> Game)
+            store: Хранилище журнала (None - database_psycopg2)
+            snapshot_interval: Снимок раз в столько событий игры
+            flush_delay: Задержка перед записью накопившихся событий, секунды
+        """
+        self.games = games
+        self.store = store
+        self.snapshot_interval = snapshot_interval
+        self.flush_delay = flush_delay
+        self._tracks: Dict[int, _Track] = {}
+        self._events: List[Tuple] = []
+        self._snapshots: Dict[str, Tuple] = {}
+        self._discarded: List[str] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {'events': 0, 'snapshots': 0, 'flushes': 0, 'failed_flushes': 0}
+
+    def _get_store(self):
+        if self.store is None:
+            import database_psycopg2
+            self.store = database_psycopg2
+        return self.store
+
+    # ------------------------------------------------------------------
+    # Запись событий
+    # ------------------------------------------------------------------
+
+    def attach(self, game: Game, night_actions: Optional[NightActions] = None):
+        """
+        Начинает журнал игры с полного снимка
+
+        Журнал предыдущей игры в этом чате удаляется.
+
+        Args:
+            game: Игра
+            night_actions: Ночные действия игры
+        """
+        old = self._tracks.get(game.chat_id)
+        if old is not None and old.game is not game:
+            self.discard(game.chat_id)
+
+        track = _Track(game, f"journal_{game.chat_id}_{uuid.uuid4().hex[:12]}", 0, 0,
+                       capture_state(game, night_actions))
+        self._tracks[game.chat_id] = track
+        game.on_event = self._on_event
+        self._take_snapshot(track)
+
+    def checkpoint(self, game: Game, night_actions: Optional[NightActions] = None) -> bool:
+        """
+        Записывает изменения игры с прошлого события (смена фазы, итоги ночи)
+
+        Args:
+            game: Игра
+            night_actions: Ночные действия игры
+
+        Returns:
+            bool: True если в журнал добавлено событие или снимок
+        """
+        track = self._tracks.get(game.chat_id)
+        if track is None or track.game is not game:
+            self.attach(game, night_actions)
+            return True
+
+        current = capture_state(game, night_actions)
+        diff = diff_state(track.state, current)
+        if not diff:
+            return False
+
+        event_type = 'phase_change' if 'phase' in diff.get('game', {}) else 'sync'
+        self._append(track, event_type, diff)
+        if track.seq - track.snapshot_seq >= self.snapshot_interval:
+            self._take_snapshot(track)
+        return True
+
+    def discard(self, chat_id: int):
+        """Удаляет журнал игры чата (игра завершена)"""
+        track = self._tracks.pop(chat_id, None)
+        if track is None:
+            return
+        if track.game.on_event == self._on_event:
+            track.game.on_event = None
+        with self._pending_lock:
+            self._discarded.append(track.journal_id)
+            self._snapshots.pop(track.journal_id, None)
+            self._events = [event for event in self._events if event[0] != track.journal_id]
+
+    def release(self, chat_id: int):
+        """Перестает вести журнал игры, не удаляя его (игру обслуживает другой процесс)"""
+        track = self._tracks.pop(chat_id, None)
+        if track is not None and track.game.on_event == self._on_event:
+            track.game.on_event = None
+
+    def prune(self) -> int:
+        """
+        Удаляет журналы игр, которых больше нет среди активных
+
+        Returns:
+            int: Количество удаленных журналов
+        """
+        finished = [chat_id for chat_id, track in self._tracks.items() if self.games.get(chat_id) is not track.game]
+        for chat_id in finished:
+            self.discard(chat_id)
+        return len(finished)
+
+    def _on_event(self, game: Game, event_type: str, data: Dict[str, Any]):
+        track = self._tracks.get(game.chat_id)
+        if track is None or track.game is not game:
+            return
+        self._append(track, event_type, data)
+
+    def _append(self, track: _Track, event_type: str, data: Dict[str, Any]):
+        data = _plain(data)
+        apply_event(track.state, event_type, data)
+        track.seq += 1
+        with self._pending_lock:
+            self._events.append((track.journal_id, track.seq, event_type, json.dumps(data)))
+        self.stats['events'] += 1
+        self._schedule_flush()
+
+    def _take_snapshot(self, track: _Track):
+        track.snapshot_seq = track.seq
+        with self._pending_lock:
+            self._snapshots[track.journal_id] = (
+                track.game.chat_id, track.journal_id, track.seq, json.dumps(track.state)
+            )
+        self.stats['snapshots'] += 1
+        self._schedule_flush()
+
+    # ------------------------------------------------------------------
+    # Запись в БД
+    # ------------------------------------------------------------------
+
+    def _schedule_flush(self):
+        if self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        try:
+            await asyncio.sleep(self.flush_delay)
+        finally:
+            self._flush_task = None
+        await self.flush_async()
+
+    def pending(self) -> int:
+        """Количество событий и снимков, ожидающих записи"""
+        with self._pending_lock:
+            return len(self._events) + len(self._snapshots) + len(self._discarded)
+
+    def flush(self) -> bool:
+        """
+        Записывает накопившиеся события, снимки и удаления одной транзакцией
+
+        При ошибке записи данные возвращаются в очередь и уйдут со следующей пачкой.
+
+        Returns:
+            bool: True если запись успешна (или писать нечего)
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                events, snapshots, discarded = self._events, self._snapshots, self._discarded
+                self._events, self._snapshots, self._discarded = [], {}, []
+            if not (events or snapshots or discarded):
+                return True
+
+            # События, вошедшие в снимок, писать не нужно
+            covered = {journal_id: row[2] for journal_id, row in snapshots.items()}
+            events = [event for event in events if event[1] > covered.get(event[0], 0)]
+
+            try:
+                success = self._get_store().write_game_journal(events, list(snapshots.values()), discarded)
+            except Exception as e:
+                logger.error(f"❌ Ошибка записи журнала игр: {e}")
+                success = False
+
+            if not success:
+                with self._pending_lock:
+                    self._events = events + self._events
+                    for journal_id, row in snapshots.items():
+                        self._snapshots.setdefault(journal_id, row)
+                    self._discarded = discarded + self._discarded
+                self.stats['failed_flushes'] += 1
+                return False
+
+            self.stats['flushes'] += 1
+            logger.debug(f"✅ Журнал игр: событий {len(events)}, снимков {len(snapshots)}, удалено {len(discarded)}")
+            return True
+
+    async def flush_async(self) -> bool:
+        """Удаляет журналы завершенных игр и записывает журнал вне event loop"""
+        self.prune()
+        return await asyncio.to_thread(self.flush)
+
+    # ------------------------------------------------------------------
+    # Восстановление
+    # ------------------------------------------------------------------
+
+    def load(self) -> List[Tuple[Game, NightActions]]:
+        """
+        Восстанавливает игры из журнала: последний снимок + хвост событий
+
+        Returns:
+            List[Tuple[Game, NightActions]]: Восстановленные игры с ночными действиями
+        """
+        restored = []
+        for journal in self._get_store().load_game_journals():
+            try:
+                events = [(event['event_type'], event['data']) for event in journal['events']]
+                # Журнал только что прочитан из БД: копии не нужны
+                state = replay(journal['state'], events, in_place=True)
+                game, night_actions = restore_state(state)
+                seq = journal['events'][-1]['seq'] if journal['events'] else journal['seq']
+                track = _Track(game, journal['game_id'], seq, journal['seq'], state)
+                self._tracks[game.chat_id] = track
+                game.on_event = self._on_event
+                restored.append((game, night_actions))
+            except Exception as e:
+                logger.error(f"❌ Ошибка восстановления игры из журнала {journal.get('game_id')}: {e}")
+
+        logger.info(f"✅ Из журнала восстановлено {len(restored)} игр")
+        return restored
+
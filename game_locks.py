@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Последовательная обработка обновлений одной игры при параллельной обработке разных игр
+
+Обработчики бота (голосование, ночные действия, регистрация) изменяют Game
+и NightActions без блокировок. ChatUpdateProcessor включает параллельную
+обработку обновлений Telegram, но обновления одной игры выполняет строго
+по очереди: каждое обновление ждет блокировку своего чата. Личные сообщения
+и кнопки игрока (голоса, ночные действия) относятся к чату его игры.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+UpdateKeyResolver = Callable[[object], Optional[Hashable]]
+
+
+class GameLocks:
+    """
+    Блокировки игр по ключу (chat_id)
+
+    Блокировка создается при первом обращении и удаляется, когда ее
+    никто не держит и не ждет, поэтому словарь не растет с числом чатов.
+    Блокировка не реентерабельна: берите ее только на входе в обработку
+    (обновление, дедлайн фазы), но не внутри обработчиков.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._users: Dict[Hashable, int] = {}
+
+        self.acquired = 0
+        self.contended = 0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def lock(self, key: Hashable):
+        """
+        Захватывает блокировку игры на время блока async with
+
+        Args:
+            key: Ключ игры (chat_id группы)
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            if lock.locked():
+                self.contended += 1
+                started = time.perf_counter()
+                await lock.acquire()
+                self.max_wait = max(self.max_wait, time.perf_counter() - started)
+            else:
+                await lock.acquire()
+            self.acquired += 1
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    def is_locked(self, key: Hashable) -> bool:
+        lock = self._locks.get(key)
+        return bool(lock and lock.locked())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика блокировок"""
+        return {
+            'active_keys': len(self._locks),
+            'acquired': self.acquired,
+            'contended': self.contended,
+            'max_wait': self.max_wait,
+        }
+
+
+def game_chat_key(update: object, player_games: Mapping[int, int]) -> Optional[Hashable]:
+    """
+    Ключ сериализации обновления: chat_id игры, которую оно затрагивает
+
+    Обновления из личного чата игрока относятся к чату его игры
+    (player_games), остальные - к своему чату.
+
+    Args:
+        update: Обновление Telegram
+        player_games: Словарь user_id -> chat_id игры
+
+    Returns:
+        Optional[Hashable]: Ключ или None (обновление без чата обрабатывается сразу)
+    """
+    chat = getattr(update, 'effective_chat', None)
+    if chat is None:
+        return None
+    if chat.type == 'private':
+        user = getattr(update, 'effective_user', None)
+        if user is not None and user.id in player_games:
+            return player_games[user.id]
+    return chat.id
+
+
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка обновлений с сохранением порядка внутри игры
+
+    Обновления разных игр обрабатываются одновременно (до max_concurrent_updates),
+    обновления одной игры - по очереди в порядке поступления.
+    """
+
+    def __init__(self, key_resolver: UpdateKeyResolver, locks: Optional[GameLocks] = None,
+                 max_concurrent_updates: int = 256, on_done: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            key_resolver: Функция update -> ключ игры (None - без сериализации)
+            locks: Общие блокировки игр (их же берут обработчики дедлайнов фаз)
+            max_concurrent_updates: Предел одновременно обрабатываемых обновлений
+            on_done: Вызывается после обработки каждого обновления (освобождает место в очереди)
+        """
+        super().__init__(max_concurrent_updates)
+        self.key_resolver = key_resolver
+        self.locks = locks or GameLocks()
+        self.on_done = on_done
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        try:
+            await super().process_update(update, coroutine)
+        finally:
+            if self.on_done is not None:
+                self.on_done()
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        try:
+            key = self.key_resolver(update)
+        except Exception as e:
+            logger.error(f"❌ Ошибка определения игры для обновления: {e}")
+            key = None
+        if key is None:
+            await coroutine
+            return
+        async with self.locks.lock(key):
+            await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -7,9 +7,10 @@
 """
 
 import random
+import asyncio
 import logging
 from enum import Enum
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
@@ -33,7 +34,7 @@ class Role(Enum):
     MOLE = "mole"        # Крот
     BEAVER = "beaver"    # Бобёр
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     """Игрок в игре Лес и волки"""
     user_id: int
@@ -51,6 +52,17 @@ class Player:
     consecutive_nights_survived: int = 0
     last_action_round: int = 0
     extra_lives: int = 0  # Дополнительные жизни от предметов
+    # Реестр игроков игры, индексы которого обновляются при смене is_alive/role/team
+    _registry: Optional['PlayerRegistry'] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        registry = getattr(self, '_registry', None)
+        if registry is not None and name in _INDEXED_FIELDS and getattr(self, name) != value:
+            registry._reindex(self, name, value)
+        else:
+            object.__setattr__(self, name, value)
+        if registry is not None:
+            registry._touch()
     
     def __post_init__(self):
         """Валидация данных игрока после инициализации"""
@@ -116,7 +128,120 @@ class Player:
         self.consecutive_nights_survived += 1
 
 
-@dataclass
+# Поля игрока, от которых зависят индексы PlayerRegistry
+_INDEXED_FIELDS = frozenset(('is_alive', 'role', 'team'))
+
+
+class PlayerRegistry(dict):
+    """
+    Словарь игроков игры (user_id -> Player) с инкрементальными индексами
+    
+    Хранит живых игроков целиком, по ролям и по командам. Индексы обновляются
+    при добавлении/удалении игрока и при смене его is_alive, role или team
+    (Player.die, распределение ролей), поэтому выборки живых игроков
+    не перебирают всех участников игры.
+    """
+    
+    def __init__(self, players: Optional[Dict[int, Player]] = None):
+        super().__init__()
+        # Игра-владелец: изменения игроков повышают ее версию (Game.version)
+        self.owner: Optional['Game'] = None
+        self.alive: Dict[int, Player] = {}
+        self.alive_by_role: Dict[Optional[Role], Dict[int, Player]] = {}
+        self.alive_by_team: Dict[Optional[Team], Dict[int, Player]] = {}
+        # Счетчик изменений индексов живых игроков (ключ кэша клавиатур фазы)
+        self.revision = 0
+        if players:
+            self.update(players)
+    
+    def _index(self, player: Player):
+        if not player.is_alive:
+            return
+        user_id = player.user_id
+        self.alive[user_id] = player
+        self.alive_by_role.setdefault(player.role, {})[user_id] = player
+        self.alive_by_team.setdefault(player.team, {})[user_id] = player
+        self.revision += 1
+    
+    def _unindex(self, player: Player):
+        user_id = player.user_id
+        if self.alive.pop(user_id, None) is None:
+            return
+        self.alive_by_role.get(player.role, {}).pop(user_id, None)
+        self.alive_by_team.get(player.team, {}).pop(user_id, None)
+        self.revision += 1
+    
+    def _reindex(self, player: Player, name: str, value: Any):
+        """Меняет поле игрока и переносит его между индексами"""
+        if name == 'is_alive' or not player.is_alive:
+            self._unindex(player)
+            object.__setattr__(player, name, value)
+            self._index(player)
+            if name == 'is_alive' and not value and self.owner is not None:
+                self.owner.record_event('death', user_id=player.user_id)
+            return
+        # Живой игрок сменил роль или команду: порядок живых игроков сохраняется
+        buckets = self.alive_by_role if name == 'role' else self.alive_by_team
+        buckets.get(getattr(player, name), {}).pop(player.user_id, None)
+        object.__setattr__(player, name, value)
+        buckets.setdefault(value, {})[player.user_id] = player
+        self.revision += 1
+    
+    def _touch(self):
+        if self.owner is not None:
+            self.owner.touch()
+    
+    def _detach(self, player: Player):
+        self._unindex(player)
+        if player._registry is self:
+            object.__setattr__(player, '_registry', None)
+    
+    def __setitem__(self, user_id: int, player: Player):
+        old = self.get(user_id)
+        if old is not None:
+            self._detach(old)
+        dict.__setitem__(self, user_id, player)
+        object.__setattr__(player, '_registry', self)
+        self._index(player)
+        self._touch()
+    
+    def __delitem__(self, user_id: int):
+        player = self[user_id]
+        dict.__delitem__(self, user_id)
+        self._detach(player)
+        self._touch()
+    
+    def pop(self, user_id: int, *default):
+        if user_id not in self:
+            return dict.pop(self, user_id, *default)
+        player = dict.pop(self, user_id)
+        self._detach(player)
+        self._touch()
+        return player
+    
+    def popitem(self):
+        user_id, player = dict.popitem(self)
+        self._detach(player)
+        self._touch()
+        return user_id, player
+    
+    def setdefault(self, user_id: int, player: Optional[Player] = None):
+        if user_id not in self:
+            self[user_id] = player
+        return self[user_id]
+    
+    def update(self, *args, **kwargs):
+        for user_id, player in dict(*args, **kwargs).items():
+            self[user_id] = player
+    
+    def clear(self):
+        for player in list(self.values()):
+            self._detach(player)
+        dict.clear(self)
+        self._touch()
+
+
+@dataclass(slots=True)
 class GameStatistics:
     """Статистика игры"""
     predator_kills: int = 0
@@ -145,14 +270,30 @@ class GameStatistics:
 class Game:
     """Основной класс игры Лес и волки"""
     
+    # Все атрибуты игры объявлены заранее: без __dict__ у каждого экземпляра
+    __slots__ = (
+        'chat_id', 'thread_id', 'is_test_mode', 'creator_id', 'status',
+        '_players', 'phase', 'current_round', 'day_number',
+        'night_actions', 'votes', 'last_voting_results',
+        'game_start_time', 'phase_end_time', 'day_start_time',
+        'pinned_message_id', 'stage_pinned_messages', 'day_timer_task',
+        'phase_completed', 'on_phase_completed', 'on_event', 'game_stats', 'game_over_sent',
+        'last_wolf_victim', 'last_mole_check', 'db_game_id',
+        'total_voters', 'voting_type', 'exile_voting_completed', 'voting_results_processed',
+        'version', '__weakref__',
+    )
+    
     def __init__(self, chat_id: int, thread_id: Optional[int] = None, is_test_mode: bool = True, creator_id: Optional[int] = None):
+        # Счетчик изменений: автосохранение записывает только игры с новой версией
+        self.version = 0
         self.chat_id = chat_id
         self.thread_id = thread_id
         self.is_test_mode = is_test_mode
         self.creator_id = creator_id  # ID пользователя, создавшего игру
+        self.status = "active"  # Статус для снимков автосохранения
         
         # Игровое состояние
-        self.players: Dict[int, Player] = {}
+        self.players: PlayerRegistry = PlayerRegistry()
         self.phase = GamePhase.WAITING
         self.current_round = 0
         self.day_number: Optional[int] = None
@@ -160,6 +301,8 @@ class Game:
         # Действия и голосования
         self.night_actions = {}
         self.votes = {}
+        # Голоса последнего завершенного голосования (для детальных итогов)
+        self.last_voting_results: Optional[Dict[int, Optional[int]]] = None
         
         # Временные метки
         self.game_start_time: Optional[datetime] = None
@@ -171,6 +314,13 @@ class Game:
         self.stage_pinned_messages: Dict[str, int] = {}
         self.day_timer_task = None
         
+        # Сигнал досрочного завершения фазы: все игроки сделали ход
+        self.phase_completed = asyncio.Event()
+        # Обработчик сигнала (планировщик фаз переносит дедлайн на текущий момент)
+        self.on_phase_completed: Optional[Callable[[], Any]] = None
+        # Получатель игровых событий (журнал игры): on_event(game, event_type, data)
+        self.on_event: Optional[Callable[['Game', str, Dict[str, Any]], Any]] = None
+        
         # Статистика
         self.game_stats = GameStatistics()
         
@@ -182,6 +332,45 @@ class Game:
         
         # Информация о последней проверке крота (для отправки ЛС)
         self.last_mole_check: Optional[Dict] = None
+        
+        # ID записи игры в БД (назначается при старте игры)
+        self.db_game_id: Optional[str] = None
+        
+        # Состояние текущего голосования за изгнание
+        self.total_voters: int = 0
+        self.voting_type: Optional[str] = None
+        self.exile_voting_completed: bool = False
+        self.voting_results_processed: bool = False
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name != 'version':
+            self.touch()
+    
+    def touch(self):
+        """Отмечает изменение игры (поля игры, игроки, голоса) для автосохранения"""
+        object.__setattr__(self, 'version', self.version + 1)
+    
+    def record_event(self, event_type: str, **data):
+        """
+        Передает игровое событие (вход, ход, голос, смерть...) в журнал игры
+        
+        Args:
+            event_type: Тип события
+            **data: Данные события (значения, сериализуемые в JSON)
+        """
+        if self.on_event is not None:
+            self.on_event(self, event_type, data)
+    
+    @property
+    def players(self) -> PlayerRegistry:
+        """Игроки игры (словарь user_id -> Player с индексами живых игроков)"""
+        return self._players
+    
+    @players.setter
+    def players(self, players: Dict[int, Player]):
+        self._players = players if isinstance(players, PlayerRegistry) else PlayerRegistry(players)
+        self._players.owner = self
 
     def add_player(self, user_id: int, username: str) -> bool:
         """Добавляет игрока в игру"""
@@ -198,6 +387,7 @@ class Game:
             role=Role.HARE,  # Временная роль
             team=Team.HERBIVORES  # Временная команда
         )
+        self.record_event('join', user_id=user_id, username=username)
         return True
     
     def _can_add_player(self) -> bool:
@@ -209,6 +399,7 @@ class Game:
         """Удаляет игрока из игры"""
         if user_id in self.players:
             del self.players[user_id]
+            self.record_event('leave', user_id=user_id)
             return True
         return False
 
@@ -218,6 +409,7 @@ class Game:
             player = self.players[user_id]
             if player.is_alive and self.phase == GamePhase.WAITING:
                 del self.players[user_id]
+                self.record_event('leave', user_id=user_id)
                 return True
         return False
 
@@ -243,6 +435,9 @@ class Game:
         # Перемешиваем и назначаем роли
         random.shuffle(all_roles)
         self._assign_roles_to_players(player_list, all_roles)
+        self.record_event('roles_assigned', roles={
+            str(player.user_id): [player.role.value, player.team.value] for player in player_list
+        })
     
     def _create_role_list(self, role_counts: Dict[str, int]) -> List[Tuple[Role, Team]]:
         """Создает список ролей для распределения"""
@@ -390,17 +585,15 @@ class Game:
 
     def get_alive_players(self) -> List[Player]:
         """Возвращает список живых игроков"""
-        return [player for player in self.players.values() if player.is_alive]
+        return list(self.players.alive.values())
 
     def get_players_by_role(self, role: Role) -> List[Player]:
         """Возвращает список живых игроков с определенной ролью"""
-        return [player for player in self.players.values() 
-                if player.role == role and player.is_alive]
+        return list(self.players.alive_by_role.get(role, {}).values())
 
     def get_players_by_team(self, team: Team) -> List[Player]:
         """Возвращает список живых игроков определенной команды"""
-        return [player for player in self.players.values() 
-                if player.team == team and player.is_alive]
+        return list(self.players.alive_by_team.get(team, {}).values())
     
     def get_dead_players(self) -> List[Player]:
         """Возвращает список мертвых игроков"""
@@ -408,13 +601,11 @@ class Game:
     
     def get_player_count_by_team(self, team: Team) -> int:
         """Возвращает количество живых игроков в команде"""
-        return len(self.get_players_by_team(team))
+        return len(self.players.alive_by_team.get(team, ()))
 
     def check_game_end(self) -> Optional[Team]:
         """Проверяет условия окончания игры"""
-        alive_players = self.get_alive_players()
-        
-        if not alive_players:
+        if not self.players.alive:
             return Team.HERBIVORES  # По умолчанию побеждают травоядные
         
         predators_count = self.get_player_count_by_team(Team.PREDATORS)
@@ -522,17 +713,18 @@ class Game:
 
     def start_day(self):
         """Начинает дневную фазу"""
+        self.phase_completed.clear()
         self.phase = GamePhase.DAY
         self.phase_end_time = datetime.now() + timedelta(seconds=300)  # 5 минут на обсуждение
         self.day_start_time = datetime.now()
 
     def start_voting(self):
         """Начинает фазу голосования"""
+        self.phase_completed.clear()
         self.phase = GamePhase.VOTING
         self.votes = {}
         # Очищаем сохраненные результаты предыдущего голосования
-        if hasattr(self, 'last_voting_results'):
-            delattr(self, 'last_voting_results')
+        self.last_voting_results = None
         self.phase_end_time = datetime.now() + timedelta(seconds=120)  # 2 минуты на голосование
 
     def vote(self, voter_id: int, target_id: Optional[int]) -> bool:
@@ -545,8 +737,38 @@ class Game:
             return False
         
         self.votes[voter_id] = target_id
+        self.touch()
+        self.record_event('vote', voter_id=voter_id, target_id=target_id)
+        self.check_voting_completed()
+        return True
+    
+    def check_voting_completed(self) -> bool:
+        """
+        Сигнализирует о завершении голосования за изгнание, если проголосовали все
+        
+        Returns:
+            bool: True, если все ожидаемые игроки проголосовали
+        """
+        if self.voting_type != "exile" or not self.total_voters:
+            return False
+        if len(self.votes) < self.total_voters:
+            return False
+        self.mark_phase_completed()
         return True
     
+    def reset_voting_state(self):
+        """Сбрасывает состояние голосования после подведения итогов"""
+        self.total_voters = 0
+        self.voting_type = None
+        self.exile_voting_completed = False
+        self.voting_results_processed = False
+    
+    def mark_phase_completed(self):
+        """Будит ожидающих окончания текущей фазы (досрочное завершение)"""
+        self.phase_completed.set()
+        if self.on_phase_completed:
+            self.on_phase_completed()
+    
     def _is_voting_valid(self, voter_id: int, target_id: Optional[int]) -> bool:
         """Проверяет валидность голосования"""
         if self.phase != GamePhase.VOTING:
@@ -637,7 +859,7 @@ class Game:
     def get_voting_details(self, get_display_name_func=None) -> Dict[str, any]:
         """Возвращает детальную информацию о голосовании"""
         # Используем сохраненные результаты голосования, если они есть
-        votes_to_analyze = getattr(self, 'last_voting_results', self.votes)
+        votes_to_analyze = self.last_voting_results if self.last_voting_results is not None else self.votes
         
         if not votes_to_analyze:
             return {
@@ -706,6 +928,7 @@ class Game:
 
     def start_night(self):
         """Начинает ночную фазу"""
+        self.phase_completed.clear()
         self.phase = GamePhase.NIGHT
         self.current_round += 1
         self.phase_end_time = datetime.now() + timedelta(seconds=60)
@@ -793,6 +1016,7 @@ class Game:
     def set_stage_pinned_message(self, stage: str, message_id: int):
         """Сохраняет ID закрепленного сообщения для этапа"""
         self.stage_pinned_messages[stage] = message_id
+        self.touch()
     
     def get_stage_pinned_message(self, stage: str) -> Optional[int]:
         """Возвращает ID закрепленного сообщения для этапа"""
@@ -802,10 +1026,12 @@ class Game:
         """Очищает ID закрепленного сообщения для этапа"""
         if stage in self.stage_pinned_messages:
             del self.stage_pinned_messages[stage]
+            self.touch()
     
     def clear_all_stage_pinned_messages(self):
         """Очищает все ID закрепленных сообщений этапов"""
         self.stage_pinned_messages.clear()
+        self.touch()
     
     def set_day_timer_task(self, task):
         """Устанавливает задачу таймера дневной фазы"""
@@ -880,6 +1106,7 @@ class Game:
             'phase': self.phase.value,
             'round_number': self.current_round,
             'started_at': self.game_start_time.isoformat() if self.game_start_time else None,
+            'phase_end_time': self.phase_end_time.isoformat() if self.phase_end_time else None,
             'finished_at': None,  # Будет установлено при завершении игры
             'winner_team': None,  # Будет установлено при завершении игры
             'is_test_mode': self.is_test_mode,
@@ -933,6 +1160,11 @@ class Game:
                 game.game_start_time = datetime.fromisoformat(data['started_at'])
             else:
                 game.game_start_time = data['started_at']
+        if data.get('phase_end_time'):
+            if isinstance(data['phase_end_time'], str):
+                game.phase_end_time = datetime.fromisoformat(data['phase_end_time'])
+            else:
+                game.phase_end_time = data['phase_end_time']
         
         # Восстанавливаем игроков
         game.players = {}
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Расчет итогов игры (статистика и орешки) без обращений к базе данных
+
+Итоги считаются в памяти, а затем применяются одной транзакцией через
+apply_game_settlement (database_psycopg2 / database_async).
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any
+
+from game_logic import Game, Team
+
+# Награды за игру
+WINNER_NUTS = 100
+LOSER_NUTS = 50
+DEAD_NUTS = 25
+
+
+@dataclass
+class PlayerSettlement:
+    """Итог игры для одного игрока"""
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    won: bool
+    nuts: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlayerSettlement':
+        return cls(**data)
+
+
+def compute_settlement(game: Game, winner: Optional[Team],
+                       loser_rewards_enabled: bool = True,
+                       dead_rewards_enabled: bool = True) -> List[PlayerSettlement]:
+    """
+    Считает итоги игры для всех игроков
+
+    Args:
+        game: Завершенная игра
+        winner: Победившая команда (None, если победителя нет)
+        loser_rewards_enabled: Начислять ли орешки проигравшим
+        dead_rewards_enabled: Начислять ли орешки умершим
+
+    Returns:
+        List[PlayerSettlement]: Итоги по игрокам
+    """
+    outcomes = []
+    for player in game.players.values():
+        won = winner is not None and player.team == winner
+        lost = winner is not None and player.team is not None and player.team != winner
+
+        if player.is_alive:
+            nuts = WINNER_NUTS if won else LOSER_NUTS
+        else:
+            nuts = DEAD_NUTS if dead_rewards_enabled else 0
+
+        # Если награды проигравшим отключены, проигравшие не получают орешки
+        if lost and not loser_rewards_enabled:
+            nuts = 0
+
+        outcomes.append(PlayerSettlement(
+            user_id=player.user_id,
+            username=player.username or f"Player_{player.user_id}",
+            first_name=player.first_name,
+            won=won,
+            nuts=nuts
+        ))
+    return outcomes
+
+
+def format_display_name(user_id: int, username: Optional[str] = None,
+                        first_name: Optional[str] = None, nickname: Optional[str] = None) -> str:
+    """
+    Отображаемое имя из уже загруженных данных (приоритет: никнейм > username > first_name)
+
+    Returns:
+        str: Отображаемое имя пользователя
+    """
+    if nickname:
+        return nickname
+    if username and not username.isdigit():
+        return username
+    if first_name:
+        return first_name
+    return f"ID:{user_id}"
+
+
+def format_nuts_info(outcomes: List[PlayerSettlement], profiles: Dict[int, Dict[str, Any]]) -> str:
+    """
+    Формирует блок наград для сообщения о завершении игры
+
+    Args:
+        outcomes: Итоги по игрокам
+        profiles: Данные пользователей из БД (user_id -> {'nickname', 'first_name'})
+
+    Returns:
+        str: HTML-текст с наградами или пустая строка
+    """
+    lines = []
+    for outcome in outcomes:
+        if outcome.nuts <= 0:
+            continue
+        profile = profiles.get(outcome.user_id, {})
+        name = format_display_name(
+            outcome.user_id, outcome.username,
+            outcome.first_name or profile.get('first_name'), profile.get('nickname')
+        )
+        lines.append(f"🌰 {name}: +{outcome.nuts} орешков")
+
+    if not lines:
+        return ""
+    return "🌰 <b>Награды за игру:</b>\n" + "\n".join(lines)
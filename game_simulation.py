@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Безголовая симуляция игр "Лес и Волки" без Telegram и базы данных
+
+Прогоняет полные игры через Game, NightActions, голосование и GameEndLogic
+в том же порядке, что и бот: ночь -> день -> голосование -> ночь...
+Решения игроков принимает агент (случайный или заданный сценарием).
+Обращения к БД (никнеймы, эффекты предметов) подменяются на время прогона.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from game_logic import Game, GamePhase, Player, Role, Team
+from night_actions import NightActions
+from game_end_logic import GameEndLogic
+from game_settlement import compute_settlement
+
+# Фазы, по которым собирается статистика задержек
+PHASES = ("setup", "night", "day", "voting", "game_end")
+
+
+@contextmanager
+def stub_external_lookups():
+    """
+    Отключает обращения к БД из игрового ядра на время симуляции
+
+    Никнеймов нет, активных эффектов предметов нет - все проверки
+    item_effects возвращают значения "без эффекта".
+    """
+    import database_psycopg2
+    import item_effects
+
+    originals = (database_psycopg2.get_user_nickname, item_effects.get_user_active_effects)
+    database_psycopg2.get_user_nickname = lambda user_id: None
+    item_effects.get_user_active_effects = lambda user_id, game_id=None, chat_id=None: []
+    try:
+        yield
+    finally:
+        database_psycopg2.get_user_nickname, item_effects.get_user_active_effects = originals
+
+
+class Agent:
+    """
+    Стратегия игроков в симуляции: по умолчанию все пропускают ход
+
+    Для сценариев переопределите choose_night_target/choose_vote.
+    """
+
+    def choose_night_target(self, game: Game, player: Player, targets: List[Player]) -> Optional[int]:
+        """
+        Args:
+            game: Игра
+            player: Игрок с ночной ролью
+            targets: Допустимые цели (как в меню ночного действия)
+
+        Returns:
+            Optional[int]: ID цели или None (пропуск хода)
+        """
+        return None
+
+    def choose_vote(self, game: Game, player: Player, targets: List[Player]) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: ID игрока для изгнания или None (пропуск голосования)
+        """
+        return None
+
+
+class RandomAgent(Agent):
+    """Игроки выбирают цели случайно и иногда пропускают ход"""
+
+    def __init__(self, rng: Optional[random.Random] = None, skip_chance: float = 0.1):
+        self.rng = rng or random.Random()
+        self.skip_chance = skip_chance
+
+    def _pick(self, targets: List[Player]) -> Optional[int]:
+        if not targets or self.rng.random() < self.skip_chance:
+            return None
+        return self.rng.choice(targets).user_id
+
+    def choose_night_target(self, game: Game, player: Player, targets: List[Player]) -> Optional[int]:
+        return self._pick(targets)
+
+    def choose_vote(self, game: Game, player: Player, targets: List[Player]) -> Optional[int]:
+        return self._pick(targets)
+
+
+@dataclass
+class GameResult:
+    """Итог одной симулированной игры"""
+    winner: Optional[Team]
+    rounds: int
+    alive: int
+    exiled: int = 0
+    # Длительность каждого перехода фазы в секундах: фаза -> список замеров
+    phase_times: Dict[str, List[float]] = field(default_factory=dict)
+
+
+class GameSimulator:
+    """
+    Прогоняет полные игры без Telegram
+
+    Каждая игра повторяет переходы фаз бота: start_game + ночь, итоги ночи,
+    день, голосование за изгнание, проверка конца игры.
+    """
+
+    def __init__(self, players: int = 12, agent: Optional[Agent] = None,
+                 seed: Optional[int] = None, max_rounds: int = 50):
+        """
+        Args:
+            players: Количество игроков в игре
+            agent: Стратегия игроков (по умолчанию RandomAgent)
+            seed: Зерно случайности (одинаковое зерно - одинаковые игры)
+            max_rounds: Предел раундов на случай бесконечной игры
+        """
+        self.players = players
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.agent = agent or RandomAgent(self.rng)
+        self.max_rounds = max_rounds
+        self.games_played = 0
+
+    def _timed(self, times: Dict[str, List[float]], name: str, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        times.setdefault(name, []).append(time.perf_counter() - started)
+        return result
+
+    def run_game(self) -> GameResult:
+        """
+        Прогоняет одну игру до победы одной из команд
+
+        Вызывайте внутри stub_external_lookups() (как это делает run),
+        иначе ядро будет обращаться к БД за никнеймами и эффектами.
+        """
+        if self.seed is not None:
+            # Игровое ядро использует модуль random (распределение ролей, ничьи волков)
+            random.seed(self.rng.random())
+        self.games_played += 1
+        times: Dict[str, List[float]] = {}
+
+        game = self._timed(times, "setup", self._setup_game)
+        night_actions = NightActions(game)
+        exiled = 0
+        winner = None
+
+        while game.current_round <= self.max_rounds:
+            winner = self._timed(times, "night", self._play_night, game, night_actions)
+            if winner:
+                break
+            self._timed(times, "day", game.start_day)
+            exiled_player, winner = self._timed(times, "voting", self._play_voting, game)
+            exiled += exiled_player is not None
+            if winner:
+                break
+
+        self._timed(times, "game_end", self._finish_game, game, winner)
+        return GameResult(winner=winner, rounds=game.current_round, alive=len(game.get_alive_players()),
+                          exiled=exiled, phase_times=times)
+
+    def _setup_game(self) -> Game:
+        game = Game(chat_id=-(self.games_played + 1), is_test_mode=True)
+        base = self.games_played * 1000
+        for offset in range(self.players):
+            game.add_player(base + offset, f"player{offset}")
+        game.start_game()
+        return game
+
+    def _play_night(self, game: Game, night_actions: NightActions) -> Optional[Team]:
+        game.start_night()
+        for player in game.get_alive_players():
+            if player.role == Role.HARE:
+                continue
+            actions = night_actions.get_player_actions(player.user_id)
+            target_id = self.agent.choose_night_target(game, player, actions.get("targets", []))
+            setter = {
+                Role.WOLF: night_actions.set_wolf_target,
+                Role.FOX: night_actions.set_fox_target,
+                Role.BEAVER: night_actions.set_beaver_target,
+                Role.MOLE: night_actions.set_mole_target,
+            }[player.role]
+            if target_id is None or not setter(player.user_id, target_id):
+                night_actions.skip_action(player.user_id)
+
+        night_actions.process_all_actions()
+        night_actions.clear_actions()
+        game.last_wolf_victim = None
+        game.last_mole_check = None
+        return game.check_game_end()
+
+    def _play_voting(self, game: Game):
+        game.start_voting()
+        alive_players = game.get_alive_players()
+        game.total_voters = len(alive_players)
+        game.voting_type = "exile"
+        for voter in alive_players:
+            targets = [p for p in alive_players if p.user_id != voter.user_id]
+            game.vote(voter.user_id, self.agent.choose_vote(game, voter, targets))
+
+        game.voting_results_processed = True
+        exiled_player = game.process_voting()
+        game.get_voting_details()
+        game.reset_voting_state()
+        return exiled_player, game.check_game_end()
+
+    def _finish_game(self, game: Game, winner: Optional[Team]):
+        game.phase = GamePhase.GAME_OVER
+        compute_settlement(game, winner)
+        result = {
+            "winner": winner or Team.HERBIVORES,
+            "reason": "🏆 Игра завершена победой одной из команд!",
+        }
+        GameEndLogic(game).get_game_over_message(result)
+
+    def run(self, games: int) -> List[GameResult]:
+        """Прогоняет несколько игр подряд"""
+        with stub_external_lookups():
+            return [self.run_game() for _ in range(games)]
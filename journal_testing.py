@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Хранилище журнала игр в памяти для тестов и бенчмарков (test_game_journal.py,
+benchmark_startup.py); в боте не используется
+"""
+
+import copy
+import json
+
+
+class MemoryJournalStore:
+    """
+    Хранилище журнала в памяти с той же логикой, что и write_game_journal
+
+    Используется в тестах и бенчмарках вместо database_psycopg2
+    (store=MemoryJournalStore() в GameJournal).
+    """
+
+    def __init__(self):
+        self.snapshots = {}  # chat_id -> (journal, seq, state)
+        self.events = {}     # journal -> {seq: (event_type, data)}
+        self.writes = 0
+        self.fail = False
+
+    def write_game_journal(self, events, snapshots, discarded):
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.writes += 1
+        for journal_id in discarded:
+            self.events.pop(journal_id, None)
+            for chat_id, row in list(self.snapshots.items()):
+                if row[0] == journal_id:
+                    del self.snapshots[chat_id]
+        for chat_id, journal_id, seq, state in snapshots:
+            old = self.snapshots.get(chat_id)
+            if old and old[0] != journal_id:
+                self.events.pop(old[0], None)
+            if not old or old[0] != journal_id or old[1] < seq:
+                self.snapshots[chat_id] = (journal_id, seq, json.loads(state))
+            tail = self.events.get(journal_id, {})
+            self.events[journal_id] = {n: event for n, event in tail.items() if n > seq}
+        for journal_id, seq, event_type, data in events:
+            self.events.setdefault(journal_id, {})[seq] = (event_type, json.loads(data))
+        return True
+
+    def load_game_journals(self):
+        journals = []
+        for chat_id, (journal_id, seq, state) in sorted(self.snapshots.items()):
+            tail = self.events.get(journal_id, {})
+            journals.append({
+                'chat_id': chat_id, 'game_id': journal_id, 'seq': seq, 'state': state,
+                'events': [{'seq': n, 'event_type': tail[n][0], 'data': tail[n][1]}
+                           for n in sorted(tail) if n > seq],
+            })
+        # Как и строки из БД, результат принадлежит вызывающему
+        return copy.deepcopy(journals)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Кэш статусов участников чатов для проверок прав
+
+check_user_permissions, is_user_admin, can_cancel_game и проверка прав
+бота вызывали get_chat_member на каждый голос, нажатие настроек и
+присоединение - полный запрос к Telegram до начала игровой логики.
+Теперь статусы хранятся в кэше (chat_id, user_id) -> ChatMember с TTL:
+    - список администраторов чата загружается одним запросом
+      get_chat_administrators и сразу заполняет статусы всех админов;
+      проверка «админ ли пользователь» по нему не требует запросов;
+    - обновления chat_member / my_chat_member (ChatMemberHandler)
+      записывают новый статус участника и правят список админов;
+    - TTL ограничивает устаревание, если бот не получает обновления
+      об участниках (например, не является администратором).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, FrozenSet, Optional
+
+from telegram import Bot, ChatMember, ChatMemberUpdated
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MEMBER_CACHE_TTL = 120
+MEMBER_CACHE_SIZE = 10000
+ADMIN_LIST_TTL = 600
+ADMIN_LIST_CACHE_SIZE = 2048
+
+ADMIN_STATUSES = frozenset({ChatMember.ADMINISTRATOR, ChatMember.OWNER})
+
+
+class ChatMemberCache:
+    """Статусы участников и списки администраторов чатов с TTL"""
+
+    def __init__(self, member_ttl: float = MEMBER_CACHE_TTL, admin_ttl: float = ADMIN_LIST_TTL,
+                 maxsize: int = MEMBER_CACHE_SIZE, admin_maxsize: int = ADMIN_LIST_CACHE_SIZE):
+        """
+        Args:
+            member_ttl: Время жизни статуса участника (секунды)
+            admin_ttl: Время жизни списка администраторов чата (секунды)
+            maxsize: Максимум статусов участников
+            admin_maxsize: Максимум списков администраторов
+        """
+        self.members = TTLCache(maxsize=maxsize, ttl=member_ttl, name="chat_members")
+        self.admins = TTLCache(maxsize=admin_maxsize, ttl=admin_ttl, name="chat_admins")
+        # Загрузки списка админов в процессе (одновременные проверки ждут один запрос)
+        self._warming: Dict[int, asyncio.Future] = {}
+        self.member_requests = 0
+        self.admin_requests = 0
+        self.updates_applied = 0
+
+    async def get_member(self, bot: Bot, chat_id: int, user_id: int) -> ChatMember:
+        """
+        Статус участника чата (замена bot.get_chat_member)
+
+        Args:
+            bot: Бот
+            chat_id: ID чата
+            user_id: ID пользователя
+
+        Returns:
+            ChatMember: Статус участника
+        """
+        member = self.members.get((chat_id, user_id))
+        if member is not None:
+            return member
+        # Список админов заполняет статусы всех админов одним запросом
+        if await self.get_admins(bot, chat_id) is not None:
+            member = self.members.get((chat_id, user_id))
+            if member is not None:
+                return member
+
+        self.member_requests += 1
+        member = await bot.get_chat_member(chat_id, user_id)
+        self.members.set((chat_id, user_id), member)
+        return member
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        """Является ли пользователь администратором или создателем чата"""
+        admins = await self.get_admins(bot, chat_id)
+        if admins is not None:
+            return user_id in admins
+        member = await self.get_member(bot, chat_id, user_id)
+        return member.status in ADMIN_STATUSES
+
+    async def get_admins(self, bot: Bot, chat_id: int) -> Optional[FrozenSet[int]]:
+        """
+        ID администраторов чата (один запрос get_chat_administrators на TTL)
+
+        Returns:
+            Optional[FrozenSet[int]]: ID администраторов или None, если список недоступен
+        """
+        if chat_id > 0:
+            return None  # личный чат: администраторов нет
+        admins = self.admins.get(chat_id)
+        if admins is not None:
+            return admins
+        warming = self._warming.get(chat_id)
+        if warming is not None:
+            return await asyncio.shield(warming)
+
+        future = self._warming[chat_id] = asyncio.get_running_loop().create_future()
+        admins = None
+        try:
+            self.admin_requests += 1
+            administrators = await bot.get_chat_administrators(chat_id)
+            for member in administrators:
+                self.members.set((chat_id, member.user.id), member)
+            admins = frozenset(member.user.id for member in administrators)
+            self.admins.set(chat_id, admins)
+        except Exception as e:
+            # Чаты без доступа к списку: проверяем участников по одному
+            logger.warning(f"⚠️ Не удалось получить администраторов чата {chat_id}: {e}")
+        finally:
+            del self._warming[chat_id]
+            future.set_result(admins)
+        return admins
+
+    def apply_update(self, update: Optional[ChatMemberUpdated]):
+        """
+        Учитывает обновление chat_member / my_chat_member
+
+        Args:
+            update: Изменение статуса участника из Update.chat_member или Update.my_chat_member
+        """
+        if update is None:
+            return
+        self.updates_applied += 1
+        chat_id = update.chat.id
+        new_member = update.new_chat_member
+        user_id = new_member.user.id
+        self.members.set((chat_id, user_id), new_member)
+
+        admins = self.admins.get(chat_id)
+        if admins is None:
+            return
+        if new_member.status in ADMIN_STATUSES:
+            self.admins.set(chat_id, admins | {user_id})
+        elif user_id in admins:
+            self.admins.set(chat_id, admins - {user_id})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика: попадания кэшей, запросы к Telegram, учтенные обновления"""
+        return {
+            'members': self.members.get_stats(),
+            'admins': self.admins.get_stats(),
+            'member_requests': self.member_requests,
+            'admin_requests': self.admin_requests,
+            'updates_applied': self.updates_applied,
+        }
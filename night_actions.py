@@ -1,7 +1,7 @@
 import random
 import logging
 from typing import Dict, List, Optional
-from game_logic import Game, Player, Role, Team
+from game_logic import Game, GamePhase, Player, Role, Team
 from mole_logic import Mole
 from fox_logic import Fox
 from beaver_logic import Beaver
@@ -61,6 +61,8 @@ class NightActions:
         #     return False
         
         self.wolf_targets[wolf_id] = target_id
+        self.game.record_event('night_action', kind='wolf', actor_id=wolf_id, target_id=target_id)
+        self.notify_if_completed()
         return True
     
     def set_fox_target(self, fox_id: int, target_id: int) -> bool:
@@ -90,6 +92,8 @@ class NightActions:
             return False
         
         self.fox_targets[fox_id] = target_id
+        self.game.record_event('night_action', kind='fox', actor_id=fox_id, target_id=target_id)
+        self.notify_if_completed()
         return True
     
     def set_beaver_target(self, beaver_id: int, target_id: int) -> bool:
@@ -111,6 +115,8 @@ class NightActions:
             return False
         
         self.beaver_targets[beaver_id] = target_id
+        self.game.record_event('night_action', kind='beaver', actor_id=beaver_id, target_id=target_id)
+        self.notify_if_completed()
         return True
     
     def set_mole_target(self, mole_id: int, target_id: int) -> bool:
@@ -132,6 +138,8 @@ class NightActions:
             return False
         
         self.mole_targets[mole_id] = target_id
+        self.game.record_event('night_action', kind='mole', actor_id=mole_id, target_id=target_id)
+        self.notify_if_completed()
         return True
     
     def skip_action(self, player_id: int) -> bool:
@@ -148,9 +156,16 @@ class NightActions:
         self.fox_targets.pop(player_id, None)
         self.beaver_targets.pop(player_id, None)
         self.mole_targets.pop(player_id, None)
+        self.game.record_event('night_action', kind='skip', actor_id=player_id, target_id=None)
         
+        self.notify_if_completed()
         return True
     
+    def notify_if_completed(self):
+        """Сигнализирует игре о досрочном завершении ночи, если походили все"""
+        if self.game.phase == GamePhase.NIGHT and self.are_all_actions_completed():
+            self.game.mark_phase_completed()
+    
     def process_all_actions(self) -> Dict[str, List[str]]:
         """Обрабатывает все ночные действия и возвращает результаты"""
         results = {
@@ -448,31 +463,17 @@ class NightActions:
         self.beaver_targets.clear()
         self.mole_targets.clear()
         self.skipped_actions.clear()
+        self.game.record_event('night_cleared')
     
     def are_all_actions_completed(self) -> bool:
         """Проверяет, все ли игроки выполнили ночные действия"""
-        alive_players = [p for p in self.game.players.values() if p.is_alive]
-        
-        for player in alive_players:
-            if player.role == Role.WOLF:
-                # Волк должен выбрать цель или пропустить
-                if player.user_id not in self.wolf_targets and player.user_id not in self.skipped_actions:
-                    return False
-            elif player.role == Role.FOX:
-                # Лиса должна выбрать цель или пропустить
-                if player.user_id not in self.fox_targets and player.user_id not in self.skipped_actions:
-                    return False
-            elif player.role == Role.BEAVER:
-                # Бобер должен выбрать цель или пропустить
-                if player.user_id not in self.beaver_targets and player.user_id not in self.skipped_actions:
-                    return False
-            elif player.role == Role.MOLE:
-                # Крот должен выбрать цель или пропустить
-                if player.user_id not in self.mole_targets and player.user_id not in self.skipped_actions:
+        # Зайцы автоматически пропускают ход (не требуют действий) - проверяем только активные роли
+        for role, targets in ((Role.WOLF, self.wolf_targets), (Role.FOX, self.fox_targets),
+                              (Role.BEAVER, self.beaver_targets), (Role.MOLE, self.mole_targets)):
+            for player in self.game.get_players_by_role(role):
+                # Игрок должен выбрать цель или пропустить
+                if player.user_id not in targets and player.user_id not in self.skipped_actions:
                     return False
-            elif player.role == Role.HARE:
-                # Зайцы автоматически пропускают ход (не требуют действий)
-                pass
         
         return True
     
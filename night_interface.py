@@ -3,6 +3,7 @@ from telegram.ext import ContextTypes
 from typing import Dict, List
 from game_logic import Game, Role
 from night_actions import NightActions
+from dm_fanout import fan_out
 
 class NightInterface:
     def __init__(self, game: Game, night_actions: NightActions, get_display_name_func=None):
@@ -392,9 +393,9 @@ class NightInterface:
                                     dead_players.append(player)
                                 break
             
-            # Отправляем сообщения белочки каждому умершему игроку
-            for player in dead_players:
-                await self._send_squirrel_message_to_player(context, player)
+            # Отправляем сообщения белочки всем умершим игрокам параллельно
+            await fan_out(dead_players, lambda player: self._send_squirrel_message_to_player(context, player),
+                          key=lambda player: player.user_id, label=f"Белочка (чат {self.game.chat_id})")
                 
         except Exception as e:
             print(f"Ошибка при отправке сообщений белочки: {e}")
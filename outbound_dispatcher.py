@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Единый диспетчер исходящих запросов к Telegram с лимитами и приоритетами
+
+Подключается к приложению как rate limiter python-telegram-bot
+(ApplicationBuilder.rate_limiter), поэтому через него проходят все
+вызовы context.bot / application.bot: send_message, edit_message_text,
+pin_chat_message и т.д. - в bot.py, night_interface.py и summon_system.py.
+
+Лимиты Telegram - корзины токенов:
+    - глобальная: ~30 сообщений в секунду на бота;
+    - на группу: ~20 сообщений в минуту;
+    - на личный чат: ~1 сообщение в секунду с небольшим запасом.
+
+Запросы ждут в одной очереди с приоритетами: сообщения смены фаз
+(начало ночи, меню голосования, роли) уходят раньше косметических
+(закрепления, правка сообщения о наборе). Приоритет задается
+декоратором send_priority или контекстом outbound_priority и
+наследуется всеми вызовами Bot API внутри.
+
+RetryAfter (429) блокирует корзину чата на retry_after секунд, после
+чего запрос повторяется.
+"""
+
+import asyncio
+import collections
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета (меньше - важнее)
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_CRITICAL: 'critical', PRIORITY_NORMAL: 'normal', PRIORITY_LOW: 'low'}
+
+# Лимиты Telegram
+GLOBAL_RATE = 30.0          # сообщений в секунду на бота
+GROUP_RATE = 20 / 60        # сообщений в секунду на группу
+GROUP_BURST = 20
+PRIVATE_RATE = 1.0          # сообщений в секунду на личный чат
+PRIVATE_BURST = 3
+MAX_RETRIES = 2
+MAX_CHAT_BUCKETS = 10000
+
+# Методы, которые создают или меняют сообщения и подпадают под лимиты;
+# остальные (answerCallbackQuery, getChat, getChatMember...) идут сразу
+THROTTLED_ENDPOINTS = frozenset({
+    'sendMessage', 'sendPhoto', 'sendAnimation', 'sendAudio', 'sendDocument', 'sendVideo',
+    'sendVoice', 'sendSticker', 'sendMediaGroup', 'sendDice', 'sendPoll', 'sendLocation',
+    'sendContact', 'forwardMessage', 'copyMessage',
+    'editMessageText', 'editMessageCaption', 'editMessageReplyMarkup', 'editMessageMedia',
+    'pinChatMessage', 'unpinChatMessage', 'unpinAllChatMessages', 'deleteMessage',
+})
+# Косметические методы по умолчанию имеют низкий приоритет
+LOW_PRIORITY_ENDPOINTS = frozenset({
+    'pinChatMessage', 'unpinChatMessage', 'unpinAllChatMessages', 'deleteMessage',
+})
+
+_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('outbound_priority', default=None)
+
+
+@contextmanager
+def outbound_priority(priority: int):
+    """
+    Задает приоритет всех запросов к Telegram внутри блока
+
+    Args:
+        priority: PRIORITY_CRITICAL, PRIORITY_NORMAL или PRIORITY_LOW
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def send_priority(priority: int) -> Callable:
+    """
+    Декоратор корутины: все запросы к Telegram внутри идут с приоритетом priority
+
+    Args:
+        priority: PRIORITY_CRITICAL, PRIORITY_NORMAL или PRIORITY_LOW
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with outbound_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    """retry_after в секундах (int или timedelta в зависимости от версии библиотеки)"""
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """Момент, когда в корзине будет токен (now - если уже есть)"""
+        self._refill(now)
+        ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(ready, self.blocked_until)
+
+    def take(self, now: float):
+        """Забирает токен (вызывать, только если ready_at(now) <= now)"""
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        """Корзина полна и не заблокирована - ее можно удалить без потери состояния"""
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class _Waiter:
+    """Запрос в очереди на отправку"""
+
+    __slots__ = ('priority', 'seq', 'chat_id', 'future', 'enqueued')
+
+    def __init__(self, priority: int, seq: int, chat_id: Any, future: asyncio.Future, enqueued: float):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.future = future
+        self.enqueued = enqueued
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class OutboundDispatcher(BaseRateLimiter[int]):
+    """
+    Очередь исходящих запросов с корзинами токенов и приоритетами
+
+    rate_limit_args (если передан в метод бота) - приоритет запроса; иначе
+    берется приоритет из outbound_priority/send_priority или по методу.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, group_rate: float = GROUP_RATE,
+                 group_burst: int = GROUP_BURST, private_rate: float = PRIVATE_RATE,
+                 private_burst: int = PRIVATE_BURST, max_retries: int = MAX_RETRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            global_rate: Сообщений в секунду на бота (в режиме шардов - на процесс)
+            group_rate: Сообщений в секунду на группу
+            group_burst: Сообщений в группу подряд без ожидания
+            private_rate: Сообщений в секунду на личный чат
+            private_burst: Сообщений в личный чат подряд без ожидания
+            max_retries: Повторов после RetryAfter
+            clock: Источник времени (для тестов)
+        """
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.max_retries = max_retries
+        self._clock = clock
+        self._global = TokenBucket(global_rate, max(1.0, global_rate), clock())
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.max_queue_depth = 0
+        self.retries = 0
+        self.sent: Dict[int, int] = collections.Counter()
+        self._waits: Dict[int, collections.deque] = {
+            priority: collections.deque(maxlen=1000) for priority in PRIORITY_NAMES
+        }
+
+    # ------------------------------------------------------------------
+    # BaseRateLimiter
+    # ------------------------------------------------------------------
+
+    async def initialize(self) -> None:
+        """Очередь создается при первом запросе в event loop приложения"""
+
+    async def shutdown(self) -> None:
+        """Останавливает планировщик, ожидающие запросы получают CancelledError"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for waiter in self._queue:
+            waiter.future.cancel()
+        self._queue.clear()
+        stats = self.get_stats()
+        logger.info(f"📊 Исходящие: отправлено {stats['sent']}, повторов после 429 {stats['retries']}, "
+                    f"макс. очередь {stats['max_queue_depth']}")
+
+    async def process_request(self, callback, args, kwargs, endpoint: str, data: Dict[str, Any],
+                              rate_limit_args: Optional[int]):
+        if endpoint not in THROTTLED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+
+        priority = self.resolve_priority(endpoint, rate_limit_args)
+        chat_id = data.get('chat_id')
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(priority, chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = _retry_seconds(e)
+                self.block(chat_id, delay)
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"⚠️ Лимит Telegram ({endpoint}, чат {chat_id}): повтор через {delay:.0f} с")
+
+    # ------------------------------------------------------------------
+    # Очередь
+    # ------------------------------------------------------------------
+
+    def resolve_priority(self, endpoint: str, rate_limit_args: Optional[int] = None) -> int:
+        """Приоритет запроса: явный аргумент > контекст > метод"""
+        if rate_limit_args is not None:
+            return rate_limit_args
+        priority = _priority.get()
+        if priority is not None:
+            return priority
+        return PRIORITY_LOW if endpoint in LOW_PRIORITY_ENDPOINTS else PRIORITY_NORMAL
+
+    def _bucket(self, chat_id: Any, now: float) -> Optional[TokenBucket]:
+        """Корзина чата (None - запрос без чата, например правка inline-сообщения)"""
+        if chat_id is None:
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                for key in [key for key, old in self._chats.items() if old.is_idle(now)]:
+                    del self._chats[key]
+            # Отрицательный id (или @username канала) - группа, положительный - личный чат
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            if is_private:
+                bucket = TokenBucket(self.private_rate, self.private_burst, now)
+            else:
+                bucket = TokenBucket(self.group_rate, self.group_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _ready_at(self, chat_id: Any, now: float) -> float:
+        bucket = self._bucket(chat_id, now)
+        ready = self._global.ready_at(now)
+        return ready if bucket is None else max(ready, bucket.ready_at(now))
+
+    def _take(self, chat_id: Any, now: float):
+        self._global.take(now)
+        bucket = self._bucket(chat_id, now)
+        if bucket is not None:
+            bucket.take(now)
+
+    def _record(self, priority: int, waited: float):
+        self.sent[priority] += 1
+        self._waits[priority].append(waited)
+
+    async def acquire(self, priority: int, chat_id: Any):
+        """
+        Ждет разрешения на отправку запроса в чат
+
+        Args:
+            priority: Класс приоритета
+            chat_id: Чат запроса (None - только глобальный лимит)
+        """
+        now = self._clock()
+        # Быстрый путь: очередь пуста и токены есть
+        if not self._queue and self._ready_at(chat_id, now) <= now:
+            self._take(chat_id, now)
+            self._record(priority, 0.0)
+            return
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), chat_id, loop.create_future(), now)
+        heapq.heappush(self._queue, waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        await waiter.future
+
+    def block(self, chat_id: Any, delay: float):
+        """
+        Блокирует отправку в чат на delay секунд (после RetryAfter)
+
+        Args:
+            chat_id: Чат (None - блокируется весь бот)
+            delay: Пауза в секундах
+        """
+        now = self._clock()
+        bucket = self._bucket(chat_id, now) or self._global
+        bucket.blocked_until = max(bucket.blocked_until, now + delay)
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """
+        Разрешает отправку всем запросам, для которых есть токены, по приоритету
+
+        Returns:
+            Optional[float]: Когда проверить очередь снова (None - очередь пуста)
+        """
+        earliest = None
+        waiting = []
+        for waiter in sorted(self._queue):
+            if waiter.future.done():
+                continue
+            global_ready = self._global.ready_at(now)
+            if global_ready > now:
+                # Глобальный лимит исчерпан: дальше не отправит никто
+                waiting.append(waiter)
+                earliest = global_ready if earliest is None else min(earliest, global_ready)
+                continue
+            ready = self._ready_at(waiter.chat_id, now)
+            if ready <= now:
+                self._take(waiter.chat_id, now)
+                self._record(waiter.priority, now - waiter.enqueued)
+                waiter.future.set_result(None)
+            else:
+                # Чат ждет свой лимит, запросы в другие чаты идут дальше
+                waiting.append(waiter)
+                earliest = ready if earliest is None else min(earliest, ready)
+        self._queue = waiting
+        heapq.heapify(self._queue)
+        return earliest
+
+    async def _run(self):
+        """Фоновая задача: выдает разрешения по мере пополнения корзин"""
+        while True:
+            self._wakeup.clear()
+            wake_at = self._dispatch(self._clock())
+            if wake_at is None and not self._queue:
+                await self._wakeup.wait()
+                continue
+            timeout = max(0.0, (wake_at or self._clock()) - self._clock())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Метрики
+    # ------------------------------------------------------------------
+
+    def queue_depth(self) -> int:
+        """Запросов в очереди сейчас"""
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Union[int, Dict[str, Any]]]:
+        """
+        Метрики: глубина очереди, отправлено и задержка по приоритетам, повторы
+
+        Returns:
+            Dict: queue_depth, max_queue_depth, sent, retries, latency
+                  (по приоритету: среднее и p95 ожидания в мс по последним 1000 запросам)
+        """
+        latency = {}
+        for priority, waits in self._waits.items():
+            if not waits:
+                continue
+            ordered = sorted(waits)
+            latency[PRIORITY_NAMES[priority]] = {
+                'avg_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+            }
+        return {
+            'queue_depth': len(self._queue),
+            'max_queue_depth': self.max_queue_depth,
+            'sent': sum(self.sent.values()),
+            'retries': self.retries,
+            'latency': latency,
+        }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Централизованный планировщик дедлайнов фаз игры
+
+Все таймеры фаз (ночь, день, голосование) хранятся в одной min-куче
+и обслуживаются одной фоновой задачей: планирование и отмена - O(log n),
+сколько бы игр ни шло одновременно. Дедлайны задаются в абсолютном
+времени (datetime или Unix timestamp), поэтому сохраненный phase_end_time
+можно заново поставить в очередь после перезапуска бота.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+Deadline = Union[datetime, float, int]
+PhaseCallback = Callable[[], Awaitable[Any]]
+
+
+def to_timestamp(deadline: Deadline) -> float:
+    """
+    Приводит дедлайн к Unix timestamp
+
+    Args:
+        deadline: datetime (наивный - локальное время) или число секунд
+
+    Returns:
+        float: Unix timestamp
+    """
+    if isinstance(deadline, datetime):
+        return deadline.timestamp()
+    return float(deadline)
+
+
+class ScheduledPhase:
+    """
+    Запись планировщика - дедлайн одной фазы одной игры
+
+    Повторяет интерфейс asyncio.Task (cancel/done), поэтому ее можно
+    хранить в Game.day_timer_task вместо задачи таймера.
+    """
+
+    __slots__ = ('deadline', 'seq', 'key', 'callback', 'tag', 'cancelled', 'fired', '_scheduler')
+
+    def __init__(self, scheduler: 'PhaseScheduler', key: Hashable, deadline: float,
+                 seq: int, callback: PhaseCallback, tag: Any = None):
+        self._scheduler = scheduler
+        self.key = key
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.tag = tag
+        self.cancelled = False
+        self.fired = False
+
+    def __lt__(self, other: 'ScheduledPhase') -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def cancel(self) -> bool:
+        """Отменяет запись (если она еще не сработала)"""
+        return self._scheduler.cancel(self.key, handle=self)
+
+    def done(self) -> bool:
+        return self.cancelled or self.fired
+
+    def remaining(self) -> float:
+        """Секунд до дедлайна (0, если дедлайн прошел)"""
+        return max(0.0, self.deadline - self._scheduler.clock())
+
+
+class PhaseScheduler:
+    """
+    Планировщик дедлайнов на min-куче с ленивой отменой
+
+    На каждый ключ (обычно chat_id) приходится не больше одной активной записи:
+    новое планирование заменяет старое. Отмененные записи остаются в куче
+    до извлечения и периодически вычищаются.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            clock: Источник абсолютного времени (для тестов)
+        """
+        self.clock = clock
+        self._heap: List[ScheduledPhase] = []
+        self._entries: Dict[Hashable, ScheduledPhase] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._running_callbacks: Set[asyncio.Task] = set()
+
+        self.fired_count = 0
+        self.cancelled_count = 0
+        self.failed_count = 0
+
+    # ---------------- планирование ----------------
+
+    def schedule(self, key: Hashable, deadline: Deadline, callback: PhaseCallback,
+                 tag: Any = None) -> ScheduledPhase:
+        """
+        Планирует вызов callback в момент deadline, заменяя прежнюю запись ключа
+
+        Args:
+            key: Ключ записи (chat_id игры)
+            deadline: Абсолютное время срабатывания
+            callback: Корутинная функция без аргументов
+            tag: Произвольная метка (например, фаза игры)
+
+        Returns:
+            ScheduledPhase: Запись планировщика
+        """
+        self._discard(key)
+        handle = ScheduledPhase(self, key, to_timestamp(deadline), next(self._counter), callback, tag)
+        self._entries[key] = handle
+        is_earliest = not self._heap or handle < self._heap[0]
+        heapq.heappush(self._heap, handle)
+
+        self._ensure_runner()
+        if is_earliest and self._wakeup is not None:
+            self._wakeup.set()
+        return handle
+
+    def expedite(self, key: Hashable, tag: Any = None) -> bool:
+        """
+        Переносит дедлайн ключа на текущий момент (досрочное завершение фазы)
+
+        Args:
+            key: Ключ записи
+            tag: Если задан, запись переносится только при совпадении метки
+
+        Returns:
+            bool: True, если запись перенесена
+        """
+        handle = self._entries.get(key)
+        if handle is None or (tag is not None and handle.tag != tag):
+            return False
+        if handle.deadline <= self.clock():
+            return True
+        self.schedule(key, self.clock(), handle.callback, handle.tag)
+        return True
+
+    def cancel(self, key: Hashable, handle: Optional[ScheduledPhase] = None) -> bool:
+        """
+        Отменяет запись ключа
+
+        Args:
+            key: Ключ записи
+            handle: Если задан, отменяется только эта запись (а не более новая)
+
+        Returns:
+            bool: True, если запись была отменена
+        """
+        current = self._entries.get(key)
+        if current is None or (handle is not None and current is not handle):
+            return False
+        self._discard(key)
+        return True
+
+    def get(self, key: Hashable) -> Optional[ScheduledPhase]:
+        """Возвращает активную запись ключа"""
+        return self._entries.get(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: Hashable):
+        handle = self._entries.pop(key, None)
+        if handle is None:
+            return
+        handle.cancelled = True
+        self.cancelled_count += 1
+        # Отмененные записи удаляются лениво; чистим кучу, когда их больше половины
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [entry for entry in self._heap if not entry.cancelled]
+            heapq.heapify(self._heap)
+
+    # ---------------- обработка дедлайнов ----------------
+
+    def pop_due(self, now: Optional[float] = None) -> List[ScheduledPhase]:
+        """
+        Извлекает из кучи все записи с наступившим дедлайном
+
+        Args:
+            now: Текущее время (по умолчанию clock())
+
+        Returns:
+            List[ScheduledPhase]: Сработавшие записи в порядке дедлайнов
+        """
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0].deadline <= now:
+            handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                continue
+            handle.fired = True
+            del self._entries[handle.key]
+            due.append(handle)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """Ближайший активный дедлайн или None"""
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+        return self._heap[0].deadline if self._heap else None
+
+    def _ensure_runner(self):
+        """Запускает фоновую задачу, если есть работающий event loop"""
+        if self._runner is not None and not self._runner.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._runner = loop.create_task(self._run())
+
+    async def start(self):
+        """Запускает обработку дедлайнов (записи, добавленные до старта, тоже сработают)"""
+        self._ensure_runner()
+        logger.info(f"✅ Планировщик фаз запущен ({len(self._entries)} дедлайнов)")
+
+    async def stop(self):
+        """Останавливает фоновую задачу; записи остаются в куче"""
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        logger.info("✅ Планировщик фаз остановлен")
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            for handle in self.pop_due():
+                self._dispatch(handle)
+
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self.clock())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, handle: ScheduledPhase):
+        """Запускает callback отдельной задачей, чтобы долгий переход фазы не задерживал остальные"""
+        self.fired_count += 1
+        task = asyncio.create_task(handle.callback())
+        self._running_callbacks.add(task)
+        task.add_done_callback(lambda t, key=handle.key: self._on_callback_done(t, key))
+
+    def _on_callback_done(self, task: asyncio.Task, key: Hashable):
+        self._running_callbacks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed_count += 1
+            logger.error(f"❌ Ошибка обработки дедлайна фазы {key}: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Возвращает статистику планировщика
+
+        Returns:
+            Dict: Активные дедлайны, размер кучи, счетчики срабатываний и отмен
+        """
+        deadline = self.next_deadline()
+        return {
+            'scheduled': len(self._entries),
+            'heap_size': len(self._heap),
+            'running_callbacks': len(self._running_callbacks),
+            'fired': self.fired_count,
+            'cancelled': self.cancelled_count,
+            'failed': self.failed_count,
+            'next_in': None if deadline is None else max(0.0, deadline - self.clock()),
+        }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Кэш клавиатур и текстов для личных сообщений фазы
+
+Раньше в начале каждой фазы клавиатура собиралась для каждого игрока
+заново: имена целей (запрос профиля), callback_data, цепочки if/elif по
+роли. Теперь строки кнопок целей строятся один раз на фазу из индекса
+живых игроков (PlayerRegistry.alive), а клавиатура игрока получается
+исключением его самого (голосование) или выборкой его целей (ночь).
+Кэш сбрасывается при смене фазы, раунда или состава живых игроков.
+
+Тексты ролей и советы неизменны и собраны в константы модуля.
+"""
+
+import functools
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from game_logic import Game, Player, Role, Team
+
+ROLE_INFO: Dict[Role, Dict[str, str]] = {
+    Role.WOLF: {
+        "name": "🐺 Волк",
+        "description": "Вы хищник! Вместе с другими волками вы охотитесь по ночам."
+    },
+    Role.FOX: {
+        "name": "🦊 Лиса",
+        "description": "Вы хищник! Каждую ночь вы воруете запасы еды у других зверей."
+    },
+    Role.HARE: {
+        "name": "🐰 Заяц",
+        "description": "Вы травоядный! Вы спите всю ночь и участвуете только в дневных обсуждениях."
+    },
+    Role.MOLE: {
+        "name": "🦫 Крот",
+        "description": "Вы травоядный! По ночам вы роете норки и узнаёте команды других зверей."
+    },
+    Role.BEAVER: {
+        "name": "🦦 Бобер",
+        "description": "Вы травоядный! Вы можете возвращать украденные запасы другим зверям."
+    },
+}
+UNKNOWN_ROLE_INFO = {"name": "Неизвестно", "description": "Роль не определена"}
+
+ROLE_TIPS: Dict[Role, str] = {
+    Role.WOLF: "Скрывайте свою роль! Работайте с другими хищниками.",
+    Role.FOX: "Воруйте у разных игроков, чтобы не привлекать внимание.",
+    Role.HARE: "Будьте осторожны в общении, не раскрывайте важную информацию.",
+    Role.MOLE: "Делитесь информацией с командой, но осторожно.",
+    Role.BEAVER: "Защищайте тех, у кого украли запасы. Вы ключ к победе!",
+}
+DEFAULT_ROLE_TIP = "Играйте по роли и помогайте команде!"
+
+# Тип ночного действия -> (префикс callback_data цели, callback_data пропуска)
+NIGHT_CALLBACKS: Dict[str, Tuple[str, str]] = {
+    'wolf': ("wolf_kill_", "wolf_skip"),
+    'fox': ("fox_steal_", "fox_skip"),
+    'beaver': ("beaver_help_", "beaver_skip"),
+    'mole': ("mole_check_", "mole_skip"),
+}
+ROLE_ACTION_TYPES: Dict[Role, str] = {Role.WOLF: 'wolf', Role.FOX: 'fox', Role.BEAVER: 'beaver', Role.MOLE: 'mole'}
+
+VOTE_SKIP_ROW = [InlineKeyboardButton("⏭️ Пропустить голосование", callback_data="vote_skip")]
+
+
+def role_info(role: Role) -> Dict[str, str]:
+    """Название и описание роли"""
+    return ROLE_INFO.get(role, UNKNOWN_ROLE_INFO)
+
+
+def role_tip(role: Role) -> str:
+    """Совет для роли"""
+    return ROLE_TIPS.get(role, DEFAULT_ROLE_TIP)
+
+
+def team_name(team: Optional[Team]) -> str:
+    """Название команды для сообщений игроку"""
+    return "🦁 Хищники" if team == Team.PREDATORS else "🌿 Травоядные"
+
+
+@functools.lru_cache(maxsize=None)
+def role_intro(role: Role, team: Team) -> str:
+    """Текст личного сообщения с ролью (одинаков для всех игроков с этой ролью и командой)"""
+    info = role_info(role)
+    return (
+        f"🎭 Ваша роль в игре 'Лес и Волки':\n\n"
+        f"👤 {info['name']}\n"
+        f"🏴 Команда: {team_name(team)}\n\n"
+        f"📖 Описание:\n{info['description']}\n\n"
+        f"🌙 Выберите действие:"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _skip_row(callback_data: str) -> List[InlineKeyboardButton]:
+    return [InlineKeyboardButton("⏭️ Пропустить ход", callback_data=callback_data)]
+
+
+def _night_callbacks(action_type: str) -> Tuple[str, str]:
+    return NIGHT_CALLBACKS.get(action_type, (f"night_{action_type}_", f"night_{action_type}_skip"))
+
+
+class GameRenderCache:
+    """Кнопки целей одной игры, построенные один раз на фазу"""
+
+    __slots__ = ('_game', 'display_name', '_key', '_names', '_rows', 'builds')
+
+    def __init__(self, game: Game, display_name: Callable[[Player], str]):
+        """
+        Args:
+            game: Игра
+            display_name: Отображаемое имя игрока на кнопке
+        """
+        # Слабая ссылка: кэш хранится в WeakKeyDictionary по игре и не должен ее удерживать
+        self._game = weakref.ref(game)
+        self.display_name = display_name
+        self._key: Optional[Tuple[Any, int, int]] = None
+        self._names: Dict[int, str] = {}
+        self._rows: Dict[str, Dict[int, List[InlineKeyboardButton]]] = {}
+        self.builds = 0
+
+    @property
+    def game(self) -> Game:
+        """Игра кэша"""
+        return self._game()
+
+    def _sync(self):
+        """Сбрасывает кэш при смене фазы, раунда или состава живых игроков"""
+        key = (self.game.phase, self.game.current_round, self.game.players.revision)
+        if key != self._key:
+            self._key = key
+            self._names.clear()
+            self._rows.clear()
+
+    def name(self, player: Player) -> str:
+        """Отображаемое имя игрока (один запрос профиля на фазу)"""
+        self._sync()
+        name = self._names.get(player.user_id)
+        if name is None:
+            name = self._names[player.user_id] = self.display_name(player)
+        return name
+
+    def target_rows(self, kind: str) -> Dict[int, List[InlineKeyboardButton]]:
+        """
+        Строки кнопок целей для всех живых игроков
+
+        Args:
+            kind: 'vote' или тип ночного действия ('wolf', 'fox', 'beaver', 'mole')
+
+        Returns:
+            Dict[int, List[InlineKeyboardButton]]: user_id цели -> строка клавиатуры
+        """
+        self._sync()
+        rows = self._rows.get(kind)
+        if rows is None:
+            self.builds += 1
+            if kind == 'vote':
+                rows = {user_id: [InlineKeyboardButton(f"🗳️ {self.name(player)}", callback_data=f"vote_{user_id}")]
+                        for user_id, player in self.game.players.alive.items()}
+            else:
+                prefix = _night_callbacks(kind)[0]
+                rows = {user_id: [InlineKeyboardButton(self.name(player), callback_data=f"{prefix}{user_id}")]
+                        for user_id, player in self.game.players.alive.items()}
+            self._rows[kind] = rows
+        return rows
+
+    def voting_markup(self, voter_id: int) -> InlineKeyboardMarkup:
+        """Меню голосования: все живые игроки, кроме голосующего, и кнопка пропуска"""
+        keyboard = [row for user_id, row in self.target_rows('vote').items() if user_id != voter_id]
+        keyboard.append(VOTE_SKIP_ROW)
+        return InlineKeyboardMarkup(keyboard)
+
+    def night_markup(self, player: Player, actions: Optional[Dict[str, Any]]) -> InlineKeyboardMarkup:
+        """
+        Ночное меню игрока из его доступных действий (NightActions.get_player_actions)
+
+        Args:
+            player: Игрок
+            actions: Доступные действия (None - ночные действия игры не созданы)
+        """
+        if player.role == Role.HARE:
+            return InlineKeyboardMarkup([[InlineKeyboardButton("😴 Спать", callback_data=f"hare_skip_{player.user_id}")]])
+        if actions is None:
+            return InlineKeyboardMarkup([])
+
+        if actions and actions.get("targets"):
+            action_type = actions['type']
+            prefix, skip_callback = _night_callbacks(action_type)
+            rows = self.target_rows(action_type)
+            current = actions.get("current_target")
+            keyboard = []
+            for target in actions["targets"]:
+                row = rows.get(target.user_id)
+                if row is None or target.user_id == current:
+                    # Текущая цель отмечена галочкой - эта строка своя у каждого игрока
+                    mark = "✅ " if target.user_id == current else ""
+                    row = [InlineKeyboardButton(f"{mark}{self.name(target)}", callback_data=f"{prefix}{target.user_id}")]
+                keyboard.append(row)
+            keyboard.append(_skip_row(skip_callback))
+            return InlineKeyboardMarkup(keyboard)
+
+        # Целей нет - только пропуск хода
+        action_type = ROLE_ACTION_TYPES.get(player.role, player.role.value if player.role else None)
+        return InlineKeyboardMarkup([_skip_row(_night_callbacks(action_type)[1])])
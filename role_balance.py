@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Анализ баланса ролей методом Монте-Карло
+
+Симулирует сотни тысяч игр пакетами: состояние игроков хранится в массивах
+NumPy (пакет игр x игроки), решения случайных агентов принимаются сразу
+для всего пакета. Правила повторяют игровое ядро (NightActions, Fox, Beaver,
+Game.process_voting, Game.check_game_end), агенты ведут себя как
+game_simulation.RandomAgent: выбирают цель случайно и иногда пропускают ход.
+
+Запуск (нужен NumPy: pip install -r requirements_analysis.txt):
+    python role_balance.py --players 6 8 10 12 --games 200000
+    python role_balance.py --distribution settings   # проценты role_distribution из bot_settings.json
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Коды ролей в массивах
+HARE, WOLF, FOX, MOLE, BEAVER = range(5)
+ROLE_NAMES = {HARE: "hare", WOLF: "wolf", FOX: "fox", MOLE: "mole", BEAVER: "beaver"}
+PREDATOR_ROLES = (WOLF, FOX)
+
+# Исходы игры
+HERBIVORES_WIN, PREDATORS_WIN, UNFINISHED = 0, 1, 2
+
+MAX_SUPPLIES = 2  # Player.supplies по умолчанию
+FOX_DEATH_THRESHOLD = 2  # Смерть от кражи лисы (NightActions._check_fox_deaths)
+
+
+def game_role_counts(players: int) -> Dict[str, int]:
+    """Распределение ролей, которое использует Game при старте игры"""
+    from game_logic import Game
+    return Game(chat_id=0)._calculate_role_distribution(players)
+
+
+def percentage_role_counts(players: int, distribution: Dict[str, float]) -> Dict[str, int]:
+    """
+    Распределение ролей по процентам role_distribution из GlobalSettings
+
+    Args:
+        players: Количество игроков
+        distribution: Доли ролей (wolves, fox, mole, beaver, hares)
+
+    Returns:
+        Dict[str, int]: Количество игроков каждой роли (минимум один волк)
+    """
+    counts = {
+        'wolves': max(1, round(players * distribution.get('wolves', 0))),
+        'fox': round(players * distribution.get('fox', 0)),
+        'mole': round(players * distribution.get('mole', 0)),
+        'beaver': round(players * distribution.get('beaver', 0)),
+    }
+    # Лишние активные роли срезаются с конца, оставшиеся игроки - зайцы
+    for role in ('beaver', 'mole', 'fox'):
+        while sum(counts.values()) > players and counts[role] > 0:
+            counts[role] -= 1
+    counts['hare'] = max(0, players - sum(counts.values()))
+    return counts
+
+
+def role_layout(counts: Dict[str, int]) -> "np.ndarray":
+    """Коды ролей по местам игроков (при случайных агентах порядок мест не важен)"""
+    layout = ([WOLF] * counts.get('wolves', 0) + [FOX] * counts.get('fox', 0) +
+              [MOLE] * counts.get('mole', 0) + [BEAVER] * counts.get('beaver', 0) +
+              [HARE] * counts.get('hare', 0))
+    return np.array(layout, dtype=np.int8)
+
+
+def _pick(rng, mask: "np.ndarray"):
+    """
+    Случайный равновероятный выбор по последней оси среди разрешенных mask
+
+    Returns:
+        tuple: (индексы выбранных элементов, есть ли вообще из чего выбирать)
+    """
+    keys = rng.random(mask.shape, dtype=np.float32)
+    keys[~mask] = -1.0
+    return keys.argmax(axis=-1), mask.any(axis=-1)
+
+
+@dataclass
+class BalanceReport:
+    """Итоги анализа для одного размера игры и распределения ролей"""
+    players: int
+    role_counts: Dict[str, int]
+    games: int
+    outcomes: "np.ndarray"  # Исход каждой игры
+    nights: "np.ndarray"  # Сыграно ночей
+    survivors: Dict[str, float] = field(default_factory=dict)  # Доля выживших по ролям
+    elapsed: float = 0.0
+
+    def win_rate(self, outcome: int) -> float:
+        return float((self.outcomes == outcome).mean())
+
+    def role_win_rates(self) -> Dict[str, float]:
+        """Доля побед игрока каждой роли (роль выигрывает вместе с командой)"""
+        predators, herbivores = self.win_rate(PREDATORS_WIN), self.win_rate(HERBIVORES_WIN)
+        return {name: (predators if name in ('wolves', 'fox') else herbivores)
+                for name, count in self.role_counts.items() if count}
+
+    def length_percentiles(self, qs=(10, 50, 90)) -> List[float]:
+        return [float(v) for v in np.percentile(self.nights, qs)]
+
+
+class RoleBalanceSimulator:
+    """
+    Пакетная симуляция игр одного размера на массивах NumPy
+
+    Состояние: alive, supplies, stolen (украдено и не возвращено), fox_hits
+    (счетчик краж Player.is_fox_stolen), protected (защита бобра этой ночью).
+    """
+
+    def __init__(self, role_counts: Dict[str, int], skip_chance: float = 0.1,
+                 max_nights: int = 25, seed: Optional[int] = None):
+        """
+        Args:
+            role_counts: Количество игроков каждой роли
+            skip_chance: Вероятность пропуска хода агентом
+            max_nights: Предел ночей (auto_end_conditions.max_rounds)
+            seed: Зерно генератора
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Для анализа баланса нужен NumPy: pip install numpy")
+        self.role_counts = role_counts
+        self.roles = role_layout(role_counts)
+        self.players = len(self.roles)
+        self.skip_chance = skip_chance
+        self.max_nights = max_nights
+        self.rng = np.random.default_rng(seed)
+
+        self.is_predator = np.isin(self.roles, PREDATOR_ROLES)
+        self.wolf_cols = np.flatnonzero(self.roles == WOLF)
+        self.fox_cols = np.flatnonzero(self.roles == FOX)
+        self.beaver_cols = np.flatnonzero(self.roles == BEAVER)
+        # Кого можно съесть волкам и обокрасть лисе
+        self.wolf_prey = ~self.is_predator
+        self.fox_prey = ~self.is_predator & (self.roles != BEAVER)
+        self.not_self = ~np.eye(self.players, dtype=bool)
+
+    def _acts(self, shape) -> "np.ndarray":
+        return self.rng.random(shape) >= self.skip_chance
+
+    def _check_end(self, alive: "np.ndarray") -> "np.ndarray":
+        """Game.check_game_end для пакета: -1 - игра продолжается"""
+        predators = (alive & self.is_predator).sum(axis=1)
+        herbivores = (alive & ~self.is_predator).sum(axis=1)
+        result = np.full(len(alive), -1, dtype=np.int8)
+        result[predators == 0] = HERBIVORES_WIN
+        result[predators >= herbivores] = PREDATORS_WIN
+        result[(predators + herbivores) == 0] = HERBIVORES_WIN
+        return result
+
+    def _night(self, alive, supplies, stolen, fox_hits):
+        batch = np.arange(len(alive))
+        protected = np.zeros_like(alive)  # Game.start_night сбрасывает защиту бобра
+
+        # Решения принимаются до обработки ночи
+        wolves_act = (alive[:, self.wolf_cols] & self._acts((len(alive), len(self.wolf_cols)))).any(axis=1)
+        wolf_target, has_prey = _pick(self.rng, alive & self.wolf_prey)
+        fox_moves = []
+        for col in self.fox_cols:
+            target, has_target = _pick(self.rng, alive & self.fox_prey)
+            fox_moves.append((alive[:, col] & has_target & self._acts(len(alive)), target))
+        beaver_moves = []
+        for col in self.beaver_cols:
+            target, has_target = _pick(self.rng, alive & (stolen > 0))
+            beaver_moves.append((alive[:, col] & has_target & self._acts(len(alive)), target))
+
+        # 1. Волки: голосование волков со случайными голосами дает равновероятную жертву
+        eaten = wolves_act & has_prey
+        alive[batch[eaten], wolf_target[eaten]] = False
+
+        # 2. Лиса ворует припасы; без припасов игрок погибает сразу
+        for acting, target in fox_moves:
+            hit = acting & alive[batch, target]
+            rows, cols = batch[hit], target[hit]
+            supplies[rows, cols] -= 1
+            stolen[rows, cols] += 1
+            fox_hits[rows, cols] += 1
+            alive[rows[supplies[rows, cols] <= 0], cols[supplies[rows, cols] <= 0]] = False
+
+        # 3. Бобёр защищает и возвращает украденное
+        for acting, target in beaver_moves:
+            helped = acting & alive[batch, target]
+            rows, cols = batch[helped], target[helped]
+            protected[rows, cols] = True
+            restored = np.minimum(stolen[rows, cols], MAX_SUPPLIES - supplies[rows, cols])
+            supplies[rows, cols] += restored
+            stolen[rows, cols] -= restored
+
+        # 4. Смерть от повторных краж без защиты бобра
+        alive &= ~((fox_hits >= FOX_DEATH_THRESHOLD) & ~protected)
+
+    def _voting(self, alive):
+        games, players = alive.shape
+        batch = np.arange(games)
+        votes_mask = alive[:, None, :] & self.not_self & alive[:, :, None]
+        targets, has_target = _pick(self.rng, votes_mask)
+        voted = has_target & self._acts((games, players))
+
+        total_votes = alive.sum(axis=1)
+        counts = np.zeros((games, players), dtype=np.int16)
+        rows, voters = np.nonzero(voted)
+        np.add.at(counts, (rows, targets[rows, voters]), 1)
+
+        # Правила Game._should_exile_player и _find_exiled_player
+        votes_for_exile = counts.sum(axis=1)
+        skip_votes = total_votes - votes_for_exile
+        top = counts.max(axis=1)
+        unique_top = (counts == top[:, None]).sum(axis=1) == 1
+        exile = (votes_for_exile > skip_votes) & (votes_for_exile >= total_votes / 2) & (top > 0) & unique_top
+        alive[batch[exile], counts.argmax(axis=1)[exile]] = False
+
+    def run_batch(self, games: int):
+        """
+        Прогоняет пакет игр
+
+        Returns:
+            tuple: (исходы, число ночей, живые игроки в конце)
+        """
+        shape = (games, self.players)
+        alive = np.ones(shape, dtype=bool)
+        supplies = np.full(shape, MAX_SUPPLIES, dtype=np.int8)
+        stolen = np.zeros(shape, dtype=np.int8)
+        fox_hits = np.zeros(shape, dtype=np.int8)
+
+        outcomes = np.full(games, UNFINISHED, dtype=np.int8)
+        nights = np.zeros(games, dtype=np.int16)
+        final_alive = np.zeros(shape, dtype=bool)
+        # Номера незавершенных игр; массивы состояния хранят только их строки
+        active = np.arange(games)
+
+        for night in range(1, self.max_nights + 1):
+            if not len(active):
+                break
+            self._night(alive, supplies, stolen, fox_hits)
+            nights[active] = night
+            ended = self._check_end(alive)
+
+            running = np.flatnonzero(ended < 0)
+            voting_alive = alive[running]
+            self._voting(voting_alive)
+            alive[running] = voting_alive
+            ended[running] = self._check_end(voting_alive)
+
+            done = ended >= 0
+            outcomes[active[done]] = ended[done]
+            final_alive[active[done]] = alive[done]
+            keep = ~done
+            active = active[keep]
+            alive, supplies, stolen, fox_hits = alive[keep], supplies[keep], stolen[keep], fox_hits[keep]
+
+        final_alive[active] = alive
+        return outcomes, nights, final_alive
+
+    def run(self, games: int, batch_size: int = 20000) -> BalanceReport:
+        """Прогоняет games игр пакетами по batch_size"""
+        started = time.perf_counter()
+        outcomes, nights, survived = [], [], np.zeros(len(ROLE_NAMES))
+        for offset in range(0, games, batch_size):
+            batch_outcomes, batch_nights, final_alive = self.run_batch(min(batch_size, games - offset))
+            outcomes.append(batch_outcomes)
+            nights.append(batch_nights)
+            for code in ROLE_NAMES:
+                survived[code] += final_alive[:, self.roles == code].sum()
+
+        survivors = {}
+        for code, name in ROLE_NAMES.items():
+            seats = int((self.roles == code).sum())
+            if seats:
+                survivors[name] = float(survived[code] / (seats * games))
+        return BalanceReport(players=self.players, role_counts=self.role_counts, games=games,
+                             outcomes=np.concatenate(outcomes), nights=np.concatenate(nights),
+                             survivors=survivors, elapsed=time.perf_counter() - started)
+
+
+def print_report(report: BalanceReport):
+    """Печатает итоги анализа для одного размера игры"""
+    counts = ", ".join(f"{name}={count}" for name, count in report.role_counts.items() if count)
+    p10, p50, p90 = report.length_percentiles()
+    print(f"🎮 {report.players} игроков ({counts}): {report.games:,} игр за {report.elapsed:.2f}с "
+          f"({report.games / report.elapsed:,.0f} игр/с)")
+    print(f"  🐺 Хищники: {report.win_rate(PREDATORS_WIN):6.1%}   "
+          f"🌿 Травоядные: {report.win_rate(HERBIVORES_WIN):6.1%}   "
+          f"⏳ Не завершено: {report.win_rate(UNFINISHED):6.1%}")
+    print("  Выживаемость: " + ", ".join(f"{name} {rate:.0%}" for name, rate in report.survivors.items()))
+    print(f"  Длительность (ночей): среднее {report.nights.mean():.2f}, p10 {p10:.0f}, p50 {p50:.0f}, p90 {p90:.0f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Анализ баланса ролей методом Монте-Карло")
+    parser.add_argument("--players", type=int, nargs="+", default=list(range(4, 13)))
+    parser.add_argument("--games", type=int, default=100000, help="Игр на каждый размер")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--skip-chance", type=float, default=0.1, help="Вероятность пропуска хода")
+    parser.add_argument("--distribution", choices=["game", "settings"], default="game",
+                        help="game - правила Game, settings - проценты role_distribution")
+    parser.add_argument("--settings-file", default="bot_settings.json")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        print("❌ Для анализа баланса нужен NumPy: pip install numpy")
+        return 1
+
+    distribution = None
+    if args.distribution == "settings":
+        from global_settings import GlobalSettings
+        distribution = GlobalSettings(args.settings_file).get("role_distribution", {})
+
+    print(f"🚀 Анализ баланса ролей ({args.distribution})\n")
+    for players in args.players:
+        counts = (percentage_role_counts(players, distribution) if distribution
+                  else game_role_counts(players))
+        simulator = RoleBalanceSimulator(counts, skip_chance=args.skip_chance, seed=args.seed)
+        print_report(simulator.run(args.games, args.batch_size))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
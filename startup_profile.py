@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер этапов запуска бота (python bot.py --profile-startup)
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Длительность этапов запуска в порядке выполнения"""
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Args:
+            started: Момент начала запуска (time.perf_counter), по умолчанию - сейчас
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замеряет этап запуска"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages.append((name, elapsed))
+            logger.debug(f"⏱️ {name}: {elapsed * 1000:.1f} мс")
+
+    def add(self, name: str, elapsed: float):
+        """Добавляет этап, замеренный отдельно (например, импорт модулей)"""
+        self.stages.append((name, elapsed))
+
+    @property
+    def total(self) -> float:
+        """Время от начала запуска до текущего момента, секунды"""
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        """Отчет: время и доля каждого этапа, неучтенное время и общий итог"""
+        total = self.total
+        lines = ["📊 Этапы запуска:"]
+        for name, elapsed in self.stages:
+            lines.append(f"  {name:<32} {elapsed * 1000:>9.1f} мс {elapsed / total * 100:>5.1f}%")
+        other = total - sum(elapsed for _, elapsed in self.stages)
+        lines.append(f"  {'Прочее':<32} {other * 1000:>9.1f} мс {other / total * 100:>5.1f}%")
+        lines.append(f"  {'Итого':<32} {total * 1000:>9.1f} мс")
+        return "\n".join(lines)
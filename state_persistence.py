@@ -8,9 +8,13 @@
 
 import logging
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import asdict
 from datetime import datetime
 
+import psycopg2.extras
+
+import database_psycopg2
 from database_psycopg2 import (
     execute_query, fetch_one, fetch_query,
     init_db, close_db
@@ -18,6 +22,28 @@ from database_psycopg2 import (
 
 logger = logging.getLogger(__name__)
 
+# Одна игра на чат: строка игры обновляется на месте
+UPSERT_GAME_QUERY = """
+    INSERT INTO active_games_state
+    (chat_id, thread_id, game_data, players_data, night_actions_data, night_interface_data, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (chat_id) DO UPDATE SET
+        thread_id = EXCLUDED.thread_id,
+        game_data = EXCLUDED.game_data,
+        players_data = EXCLUDED.players_data,
+        night_actions_data = EXCLUDED.night_actions_data,
+        night_interface_data = EXCLUDED.night_interface_data,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+UPSERT_PLAYER_GAME_QUERY = """
+    INSERT INTO player_games_state (user_id, chat_id, thread_id)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (user_id) DO UPDATE SET
+        chat_id = EXCLUDED.chat_id,
+        thread_id = EXCLUDED.thread_id
+"""
+
 
 class StatePersistence:
     """Класс для сохранения состояния бота"""
@@ -38,71 +64,14 @@ class StatePersistence:
             self.db = None
     
     def _create_state_tables(self):
-        """Создает таблицы для сохранения состояния"""
+        """
+        Создает таблицы для сохранения состояния
+        
+        Таблицы состояния входят в общую схему (database_psycopg2.SCHEMA_ADDITIONS),
+        поэтому проверка схемы выполняется один раз на процесс.
+        """
         try:
-            # Таблица для сохранения состояния бота
-            create_bot_state_table = """
-                CREATE TABLE IF NOT EXISTS bot_state (
-                    id SERIAL PRIMARY KEY,
-                    state_type VARCHAR(50) NOT NULL,
-                    state_data JSONB NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(state_type)
-                )
-            """
-            
-            # Таблица для сохранения активных игр
-            create_active_games_table = """
-                CREATE TABLE IF NOT EXISTS active_games_state (
-                    id SERIAL PRIMARY KEY,
-                    chat_id BIGINT NOT NULL,
-                    thread_id BIGINT,
-                    game_data JSONB NOT NULL,
-                    players_data JSONB NOT NULL,
-                    night_actions_data JSONB,
-                    night_interface_data JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(chat_id, thread_id)
-                )
-            """
-            
-            # Таблица для сохранения маппинга игроков
-            create_player_games_table = """
-                CREATE TABLE IF NOT EXISTS player_games_state (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    chat_id BIGINT NOT NULL,
-                    thread_id BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id)
-                )
-            """
-            
-            # Таблица для сохранения авторизованных чатов
-            create_authorized_chats_table = """
-                CREATE TABLE IF NOT EXISTS authorized_chats_state (
-                    id SERIAL PRIMARY KEY,
-                    chat_id BIGINT NOT NULL,
-                    thread_id BIGINT,
-                    chat_name VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(chat_id, thread_id)
-                )
-            """
-            
-            # Создаем таблицы
-            execute_query(create_bot_state_table)
-            execute_query(create_active_games_table)
-            execute_query(create_player_games_table)
-            execute_query(create_authorized_chats_table)
-            
-            # Создаем индексы
-            execute_query("CREATE INDEX IF NOT EXISTS idx_active_games_chat_id ON active_games_state(chat_id)")
-            execute_query("CREATE INDEX IF NOT EXISTS idx_player_games_user_id ON player_games_state(user_id)")
-            execute_query("CREATE INDEX IF NOT EXISTS idx_authorized_chats_chat_id ON authorized_chats_state(chat_id)")
-            
+            database_psycopg2.create_tables()
             self.logger.info("✅ StatePersistence: Таблицы состояния созданы")
             
         except Exception as e:
@@ -180,10 +149,135 @@ class StatePersistence:
             self.logger.error(f"❌ StatePersistence: Ошибка загрузки состояния {state_type}: {e}")
             return None
     
+    def build_game_row(self, game: Any, night_actions: Dict[int, Any],
+                       night_interfaces: Dict[int, Any]) -> Tuple:
+        """
+        Снимок игры - строка active_games_state
+        
+        Вызывайте в цикле событий бота: снимок фиксирует состояние игры,
+        а запись в БД можно выполнять в отдельном потоке.
+        
+        Args:
+            game: Игра
+            night_actions: Ночные действия по chat_id
+            night_interfaces: Ночные интерфейсы по chat_id
+            
+        Returns:
+            Tuple: (chat_id, thread_id, game_data, players_data, night_actions_data, night_interface_data)
+        """
+        chat_id = game.chat_id
+        thread_id = getattr(game, 'thread_id', None)
+        
+        # Подготавливаем данные игры
+        game_data = {
+            'chat_id': game.chat_id,
+            'thread_id': thread_id,
+            'phase': game.phase.value if hasattr(game, 'phase') else 'waiting',
+            'current_round': game.current_round if hasattr(game, 'current_round') else 1,
+            'status': getattr(game, 'status', 'active'),
+            'db_game_id': getattr(game, 'db_game_id', None),
+            'phase_end_time': game.phase_end_time.isoformat() if hasattr(game, 'phase_end_time') and game.phase_end_time else None,
+            'game_stats': asdict(game.game_stats) if hasattr(game, 'game_stats') else {}
+        }
+        
+        # Подготавливаем данные игроков
+        players_data = {}
+        for user_id, player in game.players.items():
+            players_data[user_id] = {
+                'user_id': player.user_id,
+                'username': player.username,
+                'first_name': player.first_name,
+                'last_name': player.last_name,
+                'role': player.role.value if player.role else None,
+                'team': player.team.value if player.team else None,
+                'is_alive': player.is_alive,
+                'supplies': player.supplies,
+                'max_supplies': player.max_supplies,
+                'is_fox_stolen': getattr(player, 'is_fox_stolen', False),
+                'is_beaver_protected': getattr(player, 'is_beaver_protected', False),
+                'consecutive_nights_survived': getattr(player, 'consecutive_nights_survived', 0),
+                'last_action_round': getattr(player, 'last_action_round', 0)
+            }
+        
+        return (
+            str(chat_id), str(thread_id) if thread_id else None,
+            json.dumps(game_data, default=str),
+            json.dumps(players_data, default=str),
+            json.dumps(night_actions.get(chat_id, {}), default=str),
+            json.dumps(night_interfaces.get(chat_id, {}), default=str)
+        )
+    
+    def build_player_game_row(self, user_id: int, chat_id: int, games: Dict[int, Any]) -> Tuple:
+        """Строка player_games_state: (user_id, chat_id, thread_id)"""
+        thread_id = getattr(games[chat_id], 'thread_id', None) if chat_id in games else None
+        return (user_id, str(chat_id), str(thread_id) if thread_id else None)
+    
+    def save_games_delta(self, game_rows: List[Tuple], removed_chat_ids: List[int],
+                         player_rows: List[Tuple] = (), removed_user_ids: List[int] = ()) -> bool:
+        """
+        Записывает изменения активных игр одной транзакцией
+        
+        Измененные игры и записи игроков обновляются (upsert), завершенные
+        удаляются. Остальные строки не затрагиваются, поэтому стоимость
+        сохранения зависит от числа изменений, а не от числа игр.
+        
+        Args:
+            game_rows: Строки build_game_row измененных игр
+            removed_chat_ids: chat_id игр, которых больше нет
+            player_rows: Строки build_player_game_row измененных записей игроков
+            removed_user_ids: user_id игроков, вышедших из игр
+            
+        Returns:
+            bool: True если сохранение успешно
+        """
+        try:
+            if not self.db:
+                return False
+            
+            with database_psycopg2.db_connection.transaction() as cursor:
+                if game_rows:
+                    psycopg2.extras.execute_batch(cursor, UPSERT_GAME_QUERY, game_rows)
+                if removed_chat_ids:
+                    cursor.execute(
+                        "DELETE FROM active_games_state WHERE chat_id = ANY(%s)",
+                        ([int(chat_id) for chat_id in removed_chat_ids],)
+                    )
+                if player_rows:
+                    psycopg2.extras.execute_batch(cursor, UPSERT_PLAYER_GAME_QUERY, player_rows)
+                if removed_user_ids:
+                    cursor.execute(
+                        "DELETE FROM player_games_state WHERE user_id = ANY(%s)",
+                        (list(removed_user_ids),)
+                    )
+            
+            self.logger.debug(
+                f"✅ StatePersistence: Игр сохранено {len(game_rows)}, удалено {len(removed_chat_ids)}; "
+                f"записей игроков сохранено {len(player_rows)}, удалено {len(removed_user_ids)}"
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"❌ StatePersistence: Ошибка сохранения изменений игр: {e}")
+            return False
+    
+    def load_saved_keys(self) -> Tuple[List[int], Dict[int, int]]:
+        """
+        Ключи сохраненного состояния игр
+        
+        Returns:
+            Tuple: (chat_id сохраненных игр, словарь user_id -> chat_id)
+        """
+        if not self.db:
+            return [], {}
+        games = fetch_query("SELECT chat_id FROM active_games_state")
+        players = fetch_query("SELECT user_id, chat_id FROM player_games_state")
+        return ([int(row['chat_id']) for row in games],
+                {int(row['user_id']): int(row['chat_id']) for row in players})
+    
     def save_active_games(self, games: Dict[int, Any], player_games: Dict[int, int], 
                          night_actions: Dict[int, Any], night_interfaces: Dict[int, Any]) -> bool:
         """
-        Сохраняет активные игры
+        Сохраняет все активные игры, заменяя сохраненное состояние
         
         Args:
             games: Словарь игр
@@ -198,82 +292,16 @@ class StatePersistence:
             if not self.db:
                 return False
             
-            # Очищаем старые данные
-            execute_query("DELETE FROM active_games_state")
-            execute_query("DELETE FROM player_games_state")
-            
-            # Сохраняем каждую игру
-            for chat_id, game in games.items():
-                if hasattr(game, 'thread_id'):
-                    thread_id = game.thread_id
-                else:
-                    thread_id = None
-                
-                # Подготавливаем данные игры
-                game_data = {
-                    'chat_id': game.chat_id,
-                    'thread_id': thread_id,
-                    'phase': game.phase.value if hasattr(game, 'phase') else 'waiting',
-                    'current_round': game.current_round if hasattr(game, 'current_round') else 1,
-                    'status': getattr(game, 'status', 'active'),
-                    'db_game_id': getattr(game, 'db_game_id', None),
-                    'phase_end_time': game.phase_end_time.isoformat() if hasattr(game, 'phase_end_time') and game.phase_end_time else None,
-                    'game_stats': getattr(game, 'game_stats', {}).__dict__ if hasattr(game, 'game_stats') else {}
-                }
-                
-                # Подготавливаем данные игроков
-                players_data = {}
-                for user_id, player in game.players.items():
-                    players_data[user_id] = {
-                        'user_id': player.user_id,
-                        'username': player.username,
-                        'first_name': player.first_name,
-                        'last_name': player.last_name,
-                        'role': player.role.value if hasattr(player, 'role') else None,
-                        'team': player.team.value if hasattr(player, 'team') else None,
-                        'is_alive': player.is_alive,
-                        'supplies': player.supplies,
-                        'max_supplies': player.max_supplies,
-                        'is_fox_stolen': getattr(player, 'is_fox_stolen', False),
-                        'is_beaver_protected': getattr(player, 'is_beaver_protected', False),
-                        'consecutive_nights_survived': getattr(player, 'consecutive_nights_survived', 0),
-                        'last_action_round': getattr(player, 'last_action_round', 0)
-                    }
-                
-                # Сохраняем игру
-                query = """
-                    INSERT INTO active_games_state 
-                    (chat_id, thread_id, game_data, players_data, night_actions_data, night_interface_data)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                
-                night_actions_data = json.dumps(night_actions.get(chat_id, {}), default=str)
-                night_interface_data = json.dumps(night_interfaces.get(chat_id, {}), default=str)
-                
-                execute_query(query, (
-                    str(chat_id), str(thread_id) if thread_id else None,
-                    json.dumps(game_data, default=str),
-                    json.dumps(players_data, default=str),
-                    night_actions_data,
-                    night_interface_data
-                ))
-            
-            # Сохраняем маппинг игроков
-            for user_id, game_chat_id in player_games.items():
-                query = """
-                    INSERT INTO player_games_state (user_id, chat_id, thread_id)
-                    VALUES (%s, %s, %s)
-                """
-                
-                # Получаем thread_id из игры
-                thread_id = None
-                if game_chat_id in games:
-                    thread_id = getattr(games[game_chat_id], 'thread_id', None)
-                
-                execute_query(query, (user_id, str(game_chat_id), str(thread_id) if thread_id else None))
-            
-            self.logger.info(f"✅ StatePersistence: Сохранено {len(games)} активных игр")
-            return True
+            saved_chats, saved_players = self.load_saved_keys()
+            success = self.save_games_delta(
+                [self.build_game_row(game, night_actions, night_interfaces) for game in games.values()],
+                [chat_id for chat_id in saved_chats if chat_id not in games],
+                [self.build_player_game_row(user_id, chat_id, games) for user_id, chat_id in player_games.items()],
+                [user_id for user_id in saved_players if user_id not in player_games]
+            )
+            if success:
+                self.logger.info(f"✅ StatePersistence: Сохранено {len(games)} активных игр")
+            return success
             
         except Exception as e:
             self.logger.error(f"❌ StatePersistence: Ошибка сохранения активных игр: {e}")
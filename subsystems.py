@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Реестр необязательных подсистем бота (леса, аналитика, дуэли)
+
+Модуль подсистемы импортируется при первом обращении, а не при запуске:
+леса тянут за собой SQLAlchemy и модели database.py (~0.4 с и ~20 МБ),
+а развертываниям без лесов или дуэлей они не нужны вовсе.
+Отключенные подсистемы (BOT_DISABLED_SUBSYSTEMS=forests,duels) не
+загружаются никогда, а их команды не регистрируются.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Подсистема -> (модуль, описание)
+DEFAULT_SUBSYSTEMS = {
+    'forests': ('forest_handlers', "Леса: создание, участники, созыв"),
+    'analytics': ('forest_handlers', "Аналитика и рейтинги лесов"),
+    'duels': ('duel_system', "Дуэли 1v1 (режим «Ежики»)"),
+}
+
+
+class SubsystemDisabled(RuntimeError):
+    """Обращение к подсистеме, отключенной в настройках"""
+
+
+class SubsystemRegistry:
+    """Ленивая загрузка необязательных подсистем"""
+
+    def __init__(self, disabled: Iterable[str] = (), subsystems: Optional[Dict[str, tuple]] = None):
+        """
+        Args:
+            disabled: Имена отключенных подсистем
+            subsystems: Подсистема -> (модуль, описание), по умолчанию DEFAULT_SUBSYSTEMS
+        """
+        self._subsystems: Dict[str, tuple] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.disabled = {name.strip() for name in disabled if name.strip()}
+        for name, (module, description) in (subsystems or DEFAULT_SUBSYSTEMS).items():
+            self.register(name, module, description)
+
+        unknown = self.disabled - set(self._subsystems)
+        if unknown:
+            logger.warning(f"⚠️ Неизвестные подсистемы в списке отключенных: {', '.join(sorted(unknown))}")
+
+    def register(self, name: str, module: str, description: str = ""):
+        """
+        Регистрирует подсистему
+
+        Args:
+            name: Имя подсистемы
+            module: Модуль, импортируемый при первом обращении
+            description: Описание для логов и отчетов
+        """
+        self._subsystems[name] = (module, description)
+
+    def is_enabled(self, name: str) -> bool:
+        """Подсистема зарегистрирована и не отключена"""
+        return name in self._subsystems and name not in self.disabled
+
+    def is_loaded(self, name: str) -> bool:
+        """Модуль подсистемы уже импортирован"""
+        return name in self._loaded
+
+    def load(self, name: str) -> Any:
+        """
+        Возвращает модуль подсистемы, импортируя его при первом обращении
+
+        Args:
+            name: Имя подсистемы
+
+        Returns:
+            module: Модуль подсистемы
+
+        Raises:
+            SubsystemDisabled: Подсистема отключена или не зарегистрирована
+        """
+        module = self._loaded.get(name)
+        if module is not None:
+            return module
+        if not self.is_enabled(name):
+            raise SubsystemDisabled(f"Подсистема {name} отключена")
+
+        with self._lock:
+            if name not in self._loaded:
+                module_name, description = self._subsystems[name]
+                started = time.perf_counter()
+                self._loaded[name] = importlib.import_module(module_name)
+                self._load_times[name] = time.perf_counter() - started
+                logger.info(f"📦 Подсистема {name} ({description}) загружена за "
+                            f"{self._load_times[name] * 1000:.0f} мс")
+        return self._loaded[name]
+
+    def handler(self, name: str, attr: str) -> Callable:
+        """
+        Обработчик Telegram, который загружает подсистему при первом вызове
+
+        Args:
+            name: Имя подсистемы
+            attr: Имя обработчика в модуле подсистемы
+
+        Returns:
+            Callable: Асинхронный обработчик (update, context)
+        """
+        async def lazy_handler(update, context):
+            module = self._loaded.get(name)
+            if module is None:
+                # Импорт (SQLAlchemy, модели) - в отдельном потоке, чтобы не останавливать остальные чаты
+                module = await asyncio.to_thread(self.load, name)
+            return await getattr(module, attr)(update, context)
+
+        lazy_handler.__name__ = attr
+        lazy_handler.__qualname__ = f"{name}.{attr}"
+        return lazy_handler
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика: включенные, отключенные и загруженные подсистемы со временем загрузки"""
+        return {
+            'enabled': sorted(name for name in self._subsystems if self.is_enabled(name)),
+            'disabled': sorted(self.disabled & set(self._subsystems)),
+            'loaded': {name: round(elapsed * 1000, 1) for name, elapsed in self._load_times.items()},
+        }
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты транзакций и атомарной покупки (без реального PostgreSQL)
+"""
+
+from database_psycopg2 import DatabaseConnection, build_buy_item_result
+
+
+class FakeConnection:
+    """Соединение, запоминающее commit/rollback"""
+
+    def __init__(self):
+        self.events = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.events.append('commit')
+
+    def rollback(self):
+        self.events.append('rollback')
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.events.append('execute')
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.connection = FakeConnection()
+
+    def getconn(self):
+        return self.connection
+
+    def putconn(self, connection):
+        self.connection.events.append('putconn')
+
+
+def make_db():
+    """Создает DatabaseConnection с фиктивным пулом"""
+    db = DatabaseConnection.__new__(DatabaseConnection)
+    db.connection_pool = FakePool()
+    return db
+
+
+def test_transaction_commits():
+    """Успешный блок фиксирует транзакцию и возвращает соединение в пул"""
+    print("🧪 Тестирование фиксации транзакции...")
+    db = make_db()
+    with db.transaction() as cursor:
+        cursor.execute("SELECT 1")
+    assert db.connection_pool.connection.events == ['execute', 'commit', 'putconn']
+    print("✅ Транзакция фиксируется")
+
+
+def test_transaction_rolls_back():
+    """Исключение внутри блока откатывает транзакцию"""
+    print("🧪 Тестирование отката транзакции...")
+    db = make_db()
+    try:
+        with db.transaction() as cursor:
+            cursor.execute("SELECT 1")
+            raise ValueError("ошибка")
+    except ValueError:
+        pass
+    assert db.connection_pool.connection.events == ['execute', 'rollback', 'putconn']
+    print("✅ Транзакция откатывается")
+
+
+def test_buy_item_result():
+    """Результат покупки строится из одной строки запроса"""
+    print("🧪 Тестирование результата покупки...")
+
+    ok = build_buy_item_result({'current_balance': 100, 'new_balance': 70, 'item_count': 2}, "🛡️ Щит", 30)
+    assert ok == {'success': True, 'item_name': "🛡️ Щит", 'item_count': 2, 'balance': 70, 'price': 30}
+
+    poor = build_buy_item_result({'current_balance': 20, 'new_balance': None, 'item_count': None}, "🛡️ Щит", 30)
+    assert poor['success'] is False and poor['balance'] == 20
+
+    missing = build_buy_item_result({'current_balance': None, 'new_balance': None, 'item_count': None}, "🛡️ Щит", 30)
+    assert missing['error'] == 'Пользователь не найден'
+    print("✅ Результат покупки корректен")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование атомарных покупок\n")
+    test_transaction_commits()
+    test_transaction_rolls_back()
+    test_buy_item_result()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
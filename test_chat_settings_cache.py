@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты кэша настроек чатов (без реального PostgreSQL)
+"""
+
+import asyncio
+
+import database_async
+import database_psycopg2
+from ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache():
+    """TTL и ограничение размера кэша"""
+    print("🧪 Тестирование TTLCache...")
+
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # Вытесняет "b" - давно не использованную запись
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (3, 2, 1)
+    print("✅ TTLCache работает")
+
+
+def test_get_chat_settings_cached():
+    """Повторное чтение настроек не обращается к БД, обновление сбрасывает кэш"""
+    print("🧪 Тестирование кэша настроек чата...")
+
+    queries = []
+    original_fetch = database_psycopg2.fetch_one
+    original_execute = database_psycopg2.execute_query
+
+    def fake_fetch_one(query, params=None):
+        queries.append(query)
+        return {'chat_id': -100, 'min_players': len(queries)}
+
+    def fake_execute_query(query, params=None):
+        queries.append(query)
+        return 1
+
+    database_psycopg2.fetch_one = fake_fetch_one
+    database_psycopg2.execute_query = fake_execute_query
+    database_psycopg2.chat_settings_cache.clear()
+    try:
+        first = database_psycopg2.get_chat_settings(-100)
+        first['min_players'] = 99  # Изменение копии не портит кэш
+        second = database_psycopg2.get_chat_settings(-100)
+        assert len(queries) == 1
+        assert second['min_players'] == 1
+
+        assert database_psycopg2.update_chat_settings(-100, min_players=5)
+        third = database_psycopg2.get_chat_settings(-100)
+        assert len(queries) == 3 and third['min_players'] == 3
+
+        assert database_psycopg2.delete_chat_settings(-100)
+        assert database_psycopg2.get_cached_chat_settings(-100) is None
+    finally:
+        database_psycopg2.fetch_one = original_fetch
+        database_psycopg2.execute_query = original_execute
+        database_psycopg2.chat_settings_cache.clear()
+
+    stats = database_psycopg2.get_chat_settings_cache_stats()
+    assert stats['hits'] >= 1 and stats['misses'] >= 2
+    print("✅ Кэш настроек чата работает")
+
+
+def test_invalidation_during_read():
+    """Сброс кэша между SELECT и записью в кэш не оставляет в нем старую строку"""
+    print("🧪 Тестирование гонки чтения и обновления настроек...")
+
+    original_sync = database_psycopg2.fetch_one
+    original_async = database_async.fetch_one
+
+    def fetch_during_update(query, params=None):
+        # update_chat_settings завершился, пока строка шла из БД
+        database_psycopg2.invalidate_chat_settings_cache(-200)
+        return {'chat_id': -200, 'min_players': 3}
+
+    async def async_fetch_during_update(query, params=None):
+        return fetch_during_update(query, params)
+
+    database_psycopg2.fetch_one = fetch_during_update
+    database_async.fetch_one = async_fetch_during_update
+    database_psycopg2.chat_settings_cache.clear()
+    try:
+        assert database_psycopg2.get_chat_settings(-200)['min_players'] == 3
+        assert database_psycopg2.get_cached_chat_settings(-200) is None
+        assert asyncio.run(database_async.get_chat_settings(-200))['min_players'] == 3
+        assert database_psycopg2.get_cached_chat_settings(-200) is None
+
+        # Без сброса во время чтения строка кэшируется как обычно
+        database_psycopg2.fetch_one = lambda query, params=None: {'chat_id': -200, 'min_players': 4}
+        database_psycopg2.get_chat_settings(-200)
+        assert database_psycopg2.get_cached_chat_settings(-200)['min_players'] == 4
+
+        # Учет чтений не растет с числом сброшенных чатов
+        for chat_id in range(-1000, -900):
+            database_psycopg2.invalidate_chat_settings_cache(chat_id)
+        assert database_psycopg2._chat_settings_reads == {}
+    finally:
+        database_psycopg2.fetch_one = original_sync
+        database_async.fetch_one = original_async
+        database_psycopg2.chat_settings_cache.clear()
+    print("✅ Устаревшие настройки не кэшируются")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование кэша настроек\n")
+    test_ttl_cache()
+    test_get_chat_settings_cached()
+    test_invalidation_during_read()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
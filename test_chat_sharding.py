@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты маршрутизации обновлений в режиме шардов
+"""
+
+from types import SimpleNamespace
+
+from chat_sharding import PlayerGamesMap, ShardRouter, shard_for
+
+
+def make_update(chat_id, user_id, chat_type="group"):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id, type=chat_type),
+                           effective_user=SimpleNamespace(id=user_id))
+
+
+def test_group_updates_follow_chat():
+    """Все обновления группы идут одному шарду, шарды покрывают разные чаты"""
+    print("🧪 Тестирование маршрутизации групп...")
+
+    router = ShardRouter(4)
+    for chat_id in range(-1000, -1100, -1):
+        shards = {router.route(make_update(chat_id, user_id)) for user_id in range(5)}
+        assert shards == {shard_for(chat_id, 4)}
+    assert all(router.routed), router.routed
+    assert shard_for(-1001, 4) == shard_for(-1001, 4) and 0 <= shard_for(-1001, 4) < 4
+    print("✅ Группы закреплены за шардами")
+
+
+def test_private_updates_follow_player_games():
+    """Личные обновления игрока идут шарду его игры, пока он в игре"""
+    print("🧪 Тестирование маршрутизации личных обновлений...")
+
+    router = ShardRouter(3)
+    events = []
+    player_games = PlayerGamesMap(on_change=lambda user_id, chat_id: events.append((1, user_id, chat_id)))
+    chat_id = next(c for c in range(-100, -200, -1) if shard_for(c, 3) != shard_for(42, 3))
+
+    player_games[42] = chat_id
+    router.apply_all(events)
+    assert router.route(make_update(42, 42, "private")) == shard_for(chat_id, 3)
+
+    # Запись от другого шарда не удаляет чужой маршрут
+    router.apply((2, 42, None))
+    assert router.player_games[42] == chat_id
+
+    events.clear()
+    del player_games[42]
+    router.apply_all(events)
+    assert router.route(make_update(42, 42, "private")) == shard_for(42, 3)
+
+    player_games.update({7: chat_id, 8: chat_id})
+    player_games.clear()
+    events.append((1, None, None))
+    router.apply_all(events)
+    assert not router.player_games
+    print("✅ Личные обновления направляются по player_games")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование режима шардов\n")
+    test_group_updates_follow_chat()
+    test_private_updates_follow_player_games()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
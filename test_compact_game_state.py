@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты компактного представления игры: слоты и объявленные поля голосования
+"""
+
+from dataclasses import asdict
+
+from game_logic import Game, Player, Role, Team
+
+
+def test_classes_are_slotted():
+    """У Player, GameStatistics и Game нет __dict__, опечатка в имени атрибута сразу видна"""
+    print("🧪 Тестирование слотов...")
+
+    game = Game(chat_id=-100)
+    player = Player(user_id=1, username="wolf", role=Role.WOLF, team=Team.PREDATORS)
+    for obj in (game, player, game.game_stats):
+        assert not hasattr(obj, '__dict__'), type(obj).__name__
+        try:
+            obj.unknown_attribute = 1
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError(f"{type(obj).__name__} принимает произвольные атрибуты")
+
+    # Снимок статистики для автосохранения
+    game.game_stats.record_fox_theft()
+    assert asdict(game.game_stats)['fox_thefts'] == 1
+    assert player == Player(user_id=1, username="wolf", role=Role.WOLF, team=Team.PREDATORS)
+    print("✅ Классы игры используют слоты")
+
+
+def test_voting_state_fields():
+    """Состояние голосования объявлено заранее и сбрасывается одним вызовом"""
+    print("🧪 Тестирование полей голосования...")
+
+    game = Game(chat_id=-100)
+    assert game.db_game_id is None and game.total_voters == 0 and game.voting_type is None
+    assert not game.exile_voting_completed and not game.voting_results_processed
+    assert not game.check_voting_completed()
+
+    game.players[1] = Player(user_id=1, username="hare", role=Role.HARE, team=Team.HERBIVORES)
+    game.players[2] = Player(user_id=2, username="wolf", role=Role.WOLF, team=Team.PREDATORS)
+    game.start_voting()
+    game.total_voters, game.voting_type = 2, "exile"
+    game.vote(1, 2)
+    game.vote(2, 1)
+    game.exile_voting_completed = True
+    game.process_voting()
+    assert game.get_voting_details()['total_votes'] == 2
+
+    game.reset_voting_state()
+    assert (game.total_voters, game.voting_type, game.exile_voting_completed) == (0, None, False)
+    game.start_voting()
+    assert game.last_voting_results is None
+    print("✅ Поля голосования объявлены")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование компактного состояния игры\n")
+    test_classes_are_slotted()
+    test_voting_state_fields()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
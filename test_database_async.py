@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты асинхронного слоя базы данных (без реального PostgreSQL)
+"""
+
+import asyncio
+import threading
+
+import database_async as adb
+import database_psycopg2
+
+
+def test_fallback_to_sync_api():
+    """Без асинхронного пула запросы выполняются синхронным API в отдельном потоке"""
+    print("🧪 Тестирование отката на синхронный API...")
+
+    calls = []
+    original = database_psycopg2.fetch_query
+
+    def fake_fetch_query(query, params=None, fetch_one=False):
+        calls.append((query, params, fetch_one, threading.current_thread()))
+        return {'id': 1} if fetch_one else [{'id': 1}]
+
+    database_psycopg2.fetch_query = fake_fetch_query
+    try:
+        assert adb.async_db_connection is None
+        result = asyncio.run(adb.fetch_one("SELECT 1 WHERE id = %s", (1,)))
+    finally:
+        database_psycopg2.fetch_query = original
+
+    assert result == {'id': 1}
+    assert calls[0][:3] == ("SELECT 1 WHERE id = %s", (1,), True)
+    assert calls[0][3] is not threading.main_thread(), "Запрос должен выполняться вне event loop"
+    print("✅ Откат на синхронный API работает")
+
+
+def test_update_chat_settings():
+    """Обновление настроек через асинхронный слой фильтрует поля и сбрасывает кэш"""
+    print("🧪 Тестирование update_chat_settings...")
+
+    calls = []
+    original = database_psycopg2.execute_query
+
+    def fake_execute_query(query, params=None):
+        calls.append((" ".join(query.split()), params, threading.current_thread()))
+        return 1
+
+    database_psycopg2.execute_query = fake_execute_query
+    database_psycopg2.cache_chat_settings(-300, {'chat_id': -300, 'night_duration': 60})
+    try:
+        assert asyncio.run(adb.update_chat_settings(-300, night_duration=90, unknown=1))
+        assert not asyncio.run(adb.update_chat_settings(-300, unknown=1))
+    finally:
+        database_psycopg2.execute_query = original
+        database_psycopg2.chat_settings_cache.clear()
+
+    assert len(calls) == 1
+    assert calls[0][:2] == ("UPDATE chat_settings SET night_duration = %s WHERE chat_id = %s", [90, "-300"])
+    assert calls[0][2] is not threading.main_thread()
+    assert database_psycopg2.get_cached_chat_settings(-300) is None
+    print("✅ update_chat_settings работает")
+
+
+def test_run_blocking():
+    """run_blocking выполняет корутины из синхронного кода"""
+    print("🧪 Тестирование run_blocking...")
+
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert adb.run_blocking(answer()) == 42
+    assert adb.run_blocking(answer()) == 42
+    print("✅ run_blocking работает")
+
+
+def test_run_blocking_inside_loop():
+    """run_blocking запрещено вызывать внутри работающего event loop"""
+    print("🧪 Тестирование защиты run_blocking...")
+
+    async def inner():
+        return 1
+
+    async def outer():
+        try:
+            adb.run_blocking(inner())
+        except RuntimeError:
+            return True
+        return False
+
+    assert asyncio.run(outer())
+    print("✅ run_blocking внутри event loop вызывает RuntimeError")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование асинхронного слоя БД\n")
+    test_fallback_to_sync_api()
+    test_update_chat_settings()
+    test_run_blocking()
+    test_run_blocking_inside_loop()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
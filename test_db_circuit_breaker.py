@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты выключателя (circuit breaker) для запросов к базе данных
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+import database_psycopg2
+from db_circuit_breaker import CircuitBreaker, DatabaseUnavailableError, database_breaker
+
+
+class FailingConnection:
+    """Подключение, которое всегда падает с ошибкой подключения"""
+
+    connection_params = {}
+
+    def __init__(self):
+        self.attempts = 0
+
+    @contextmanager
+    def get_connection(self):
+        self.attempts += 1
+        raise psycopg2.OperationalError("connection refused")
+        yield
+
+
+def test_breaker_opens_and_rejects():
+    """После порога ошибок выключатель размыкается и отклоняет запросы"""
+    print("🧪 Тестирование размыкания выключателя...")
+
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.before_request()
+    breaker.record_failure(Exception("down"))
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(Exception("down"))
+    assert breaker.is_open
+
+    try:
+        breaker.before_request()
+        assert False, "Ожидалась DatabaseUnavailableError"
+    except DatabaseUnavailableError:
+        pass
+
+    assert breaker.get_stats()['rejected_count'] == 1
+    breaker.reset()
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("✅ Выключатель размыкается и отклоняет запросы")
+
+
+def test_background_probe_closes_breaker():
+    """Фоновая проба замыкает выключатель, когда база данных восстановилась"""
+    print("🧪 Тестирование фоновой пробы...")
+
+    probes = []
+
+    def probe():
+        probes.append(time.monotonic())
+        return len(probes) >= 2
+
+    breaker = CircuitBreaker("test", failure_threshold=1, probe_interval=0.01)
+    breaker.set_probe(probe)
+    breaker.record_failure(Exception("down"))
+    assert breaker.is_open
+
+    deadline = time.monotonic() + 2
+    while breaker.is_open and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not breaker.is_open
+    assert len(probes) == 2
+    print("✅ Фоновая проба замыкает выключатель")
+
+
+def test_sync_query_fails_fast_when_open():
+    """execute_query не ждет повторов, если выключатель разомкнут"""
+    print("🧪 Тестирование быстрого отказа синхронного API...")
+
+    fake = FailingConnection()
+    original_connection = database_psycopg2.db_connection
+    original_probe = database_breaker._probe
+    database_psycopg2.db_connection = fake
+    database_breaker.set_probe(lambda: False)
+    database_breaker.probe_interval = 60
+    try:
+        # Из event loop каждый запрос делает одну попытку без time.sleep
+        for _ in range(database_breaker.failure_threshold):
+            try:
+                asyncio.run(_call_on_loop(database_psycopg2.execute_query, "SELECT 1"))
+            except psycopg2.OperationalError:
+                pass
+        assert database_breaker.is_open
+        assert fake.attempts == database_breaker.failure_threshold, "Внутри event loop повторов быть не должно"
+
+        started = time.monotonic()
+        try:
+            database_psycopg2.fetch_query("SELECT 1")
+            assert False, "Ожидалась DatabaseUnavailableError"
+        except DatabaseUnavailableError:
+            pass
+        assert time.monotonic() - started < 0.1
+        assert fake.attempts == database_breaker.failure_threshold
+    finally:
+        database_psycopg2.db_connection = original_connection
+        database_breaker.reset()
+        database_breaker.set_probe(original_probe)
+        database_breaker.probe_interval = 5.0
+    print("✅ Синхронный API отказывает сразу при разомкнутом выключателе")
+
+
+async def _call_on_loop(func, *args):
+    """Вызывает синхронную функцию прямо из event loop, как это делают старые обработчики"""
+    return func(*args)
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование выключателя базы данных\n")
+    test_breaker_opens_and_rejects()
+    test_background_probe_closes_breaker()
+    test_sync_query_fails_fast_when_open()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
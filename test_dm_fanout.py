@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты параллельной рассылки личных сообщений
+"""
+
+import asyncio
+import time
+
+from dm_fanout import fan_out
+from outbound_dispatcher import PRIORITY_CRITICAL, OutboundDispatcher, _priority, send_priority
+
+ROUND_TRIP = 0.05  # имитация сетевого ответа Telegram
+
+
+def test_parallel_delivery():
+    """12 сообщений уходят за время порядка одного ответа сервера, а не двенадцати"""
+    print("🧪 Тестирование параллельной рассылки...")
+
+    async def scenario():
+        dispatcher = OutboundDispatcher()
+        in_flight, peak = 0, 0
+
+        async def request(endpoint, data, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(ROUND_TRIP)
+            in_flight -= 1
+            return {'chat_id': data['chat_id']}
+
+        async def send(user_id):
+            data = {'chat_id': user_id, 'text': "🎭 Ваша роль"}
+            return await dispatcher.process_request(request, ('sendMessage', data), {}, 'sendMessage', data, None)
+
+        started = time.perf_counter()
+        result = await fan_out(range(1, 13), send, limit=6, label="Роли")
+        elapsed = time.perf_counter() - started
+        await dispatcher.shutdown()
+        return result, elapsed, peak
+
+    result, elapsed, peak = asyncio.run(scenario())
+    assert len(result.sent) == 12 and not result.failed
+    assert result.sent[5] == {'chat_id': 5}
+    assert peak == 6, "не больше limit одновременных запросов"
+    assert elapsed < 12 * ROUND_TRIP / 2, elapsed
+    assert 0 < result.elapsed <= elapsed
+    print(f"✅ 12 сообщений за {elapsed * 1000:.0f} мс (по одному - ~{12 * ROUND_TRIP * 1000:.0f} мс)")
+
+
+def test_failures_are_collected():
+    """Ошибка одного получателя не мешает остальным и попадает в результат"""
+    print("🧪 Тестирование ошибок доставки...")
+
+    class Player:
+        def __init__(self, user_id):
+            self.user_id = user_id
+
+    async def send(player):
+        if player.user_id == 3:
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+        return player.user_id
+
+    result = asyncio.run(fan_out([Player(n) for n in range(1, 6)], send, key=lambda player: player.user_id))
+    assert sorted(result.sent) == [1, 2, 4, 5]
+    assert list(result.failed) == [3] and "blocked" in str(result.failed[3])
+    assert result.total == 5
+    assert asyncio.run(fan_out([], send)).total == 0
+    print("✅ Ошибки собраны по получателям")
+
+
+def test_priority_is_inherited():
+    """Отправки внутри рассылки получают приоритет вызывающей фазы"""
+    print("🧪 Тестирование наследования приоритета...")
+
+    seen = []
+
+    async def send(user_id):
+        seen.append(_priority.get())
+
+    @send_priority(PRIORITY_CRITICAL)
+    async def start_voting_phase():
+        await fan_out([1, 2, 3], send)
+
+    asyncio.run(start_voting_phase())
+    assert seen == [PRIORITY_CRITICAL] * 3
+    print("✅ Приоритет унаследован")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование параллельной рассылки личных сообщений\n")
+    test_parallel_delivery()
+    test_failures_are_collected()
+    test_priority_is_inherited()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты объединения правок сообщения о наборе
+"""
+
+import asyncio
+
+from telegram.error import BadRequest
+
+from edit_coalescer import EditCoalescer
+
+WINDOW = 0.05
+
+
+def make_editor(log: list):
+    """Правка сообщения: записывает отправленное содержимое"""
+    def edit(text):
+        async def send():
+            log.append(text)
+        return send
+    return edit
+
+
+def test_burst_is_coalesced():
+    """10 присоединений подряд - одна правка сразу и одна с последним содержимым"""
+    print("🧪 Тестирование серии правок...")
+
+    async def scenario():
+        log = []
+        edit = make_editor(log)
+        coalescer = EditCoalescer(window=WINDOW)
+        sent_now = [await coalescer.submit((-1, 10), f"Игроков: {n}", edit(f"Игроков: {n}")) for n in range(1, 11)]
+        # Другое сообщение не ждет окна первого
+        assert await coalescer.submit((-2, 20), "Игроков: 1", edit("other"))
+        await asyncio.sleep(WINDOW * 3)
+        return log, sent_now, coalescer.get_stats()
+
+    log, sent_now, stats = asyncio.run(scenario())
+    assert sent_now == [True] + [False] * 9
+    assert log == ["Игроков: 1", "other", "Игроков: 10"], log
+    assert stats['requested'] == 11 and stats['edits'] == 3
+    assert stats['coalesced'] == 8 and stats['saved'] == 8 and stats['pending'] == 0
+    print(f"✅ 10 правок → 2 запроса: {stats}")
+
+
+def test_unchanged_content_is_skipped():
+    """Правка без изменений и ответ "message is not modified" не считаются ошибкой"""
+    print("🧪 Тестирование правок без изменений...")
+
+    async def scenario():
+        log = []
+        coalescer = EditCoalescer(window=WINDOW)
+        assert await coalescer.submit((-1, 10), "A", make_editor(log)("A"))
+        # Игрок вошел и вышел в одном окне - итог совпадает с отправленным
+        await coalescer.submit((-1, 10), "B", make_editor(log)("B"))
+        await coalescer.submit((-1, 10), "A", make_editor(log)("A"))
+        await asyncio.sleep(WINDOW * 3)
+
+        async def not_modified():
+            raise BadRequest("Message is not modified: specified new message content is the same")
+
+        assert not await coalescer.submit((-3, 30), "C", not_modified)
+        return log, coalescer.get_stats()
+
+    log, stats = asyncio.run(scenario())
+    assert log == ["A"], log
+    assert stats['unchanged'] == 2 and stats['coalesced'] == 1 and stats['errors'] == 0
+    print("✅ Правки без изменений не отправляются")
+
+
+def test_errors_and_discard():
+    """Ошибка первой правки передается вызывающему коду, discard отменяет ожидающие правки"""
+    print("🧪 Тестирование ошибок и отмены...")
+
+    async def scenario():
+        log = []
+        coalescer = EditCoalescer(window=WINDOW)
+
+        async def deleted():
+            raise BadRequest("Message to edit not found")
+
+        try:
+            await coalescer.submit((-1, 10), "A", deleted)
+            raised = False
+        except BadRequest:
+            raised = True
+
+        await coalescer.submit((-2, 20), "A", make_editor(log)("A"))
+        await coalescer.submit((-2, 20), "B", make_editor(log)("B"))
+        coalescer.discard(-2)  # игра началась - правка о наборе больше не нужна
+        await asyncio.sleep(WINDOW * 3)
+        await coalescer.shutdown()
+        return raised, log, coalescer.get_stats()
+
+    raised, log, stats = asyncio.run(scenario())
+    assert raised and stats['errors'] == 1
+    assert log == ["A"] and stats['pending'] == 0
+    print("✅ Ошибки и отмена обработаны")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование объединения правок сообщений\n")
+    test_burst_is_coalesced()
+    test_unchanged_content_is_skipped()
+    test_errors_and_discard()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты бинарного формата снимков игры: точность, версии и эволюция схемы
+"""
+
+from datetime import datetime
+
+import game_codec
+from game_codec import CodecError, FORMAT_VERSION, MAGIC, decode_game, encode_game
+from game_journal import capture_state
+from game_logic import Game, GamePhase, Player, Role, Team
+from night_actions import NightActions
+
+
+def make_midgame(players: int = 12):
+    """Игра в фазе голосования: роли, смерти, кражи, ночные цели и голоса"""
+    game = Game(chat_id=-1001234567890, thread_id=77, is_test_mode=False, creator_id=501)
+    for user_id in range(501, 501 + players):
+        game.add_player(user_id, f"игрок_{user_id}")
+    game.players[501].first_name = "Алиса"
+    game.players[502].last_name = "Фокс"
+    game.players[503].username = None
+    game.players[504].first_name = "Очень длинное имя " * 10  # запись длиннее 127 байт
+    game.assign_roles()
+    game.phase = GamePhase.VOTING
+    game.current_round = 3
+    game.day_number = 3
+    game.game_start_time = datetime(2025, 1, 2, 20, 15, 30, 123456)
+    game.phase_end_time = datetime(2025, 1, 2, 20, 40, 0, 1)
+    game.day_start_time = datetime(2025, 1, 2, 20, 35)
+    game.pinned_message_id = 4242
+    game.stage_pinned_messages = {"night": 10, "day": 11}
+    game.db_game_id = "game_abc"
+    game.total_voters = 9
+    game.voting_type = "exile"
+    game.exile_voting_completed = True
+
+    ids = list(game.players)
+    game.players[ids[0]].die("wolf")
+    game.players[ids[1]].supplies = 0
+    game.players[ids[1]].stolen_supplies = 2
+    game.players[ids[1]].is_fox_stolen = 2
+    game.players[ids[2]].is_beaver_protected = True
+    game.players[ids[3]].extra_lives = 1
+    game.players[ids[4]].consecutive_nights_survived = 2
+    game.players[ids[4]].last_action_round = 3
+    game.votes = {ids[5]: ids[6], ids[6]: None}
+    game.last_voting_results = {ids[5]: ids[7]}
+    game.game_stats.predator_kills = 1
+    game.game_stats.fox_thefts = 2
+    game.last_wolf_victim = {'user_id': ids[0], 'username': 'x', 'role': Role.HARE, 'role_name': 'Заяц'}
+
+    night_actions = NightActions(game)
+    night_actions.wolf_targets = {ids[8]: ids[9]}
+    night_actions.mole_targets = {ids[9]: ids[8]}
+    night_actions.skipped_actions = {ids[10]}
+    return game, night_actions
+
+
+def assert_same(game, night_actions, restored):
+    assert capture_state(restored[0], restored[1]) == capture_state(game, night_actions)
+
+
+def test_round_trip():
+    """Кодирование и декодирование сохраняют все состояние игры"""
+    print("🧪 Тестирование кодирования и декодирования...")
+
+    game, night_actions = make_midgame()
+    data = encode_game(game, night_actions)
+    assert data[:2] == MAGIC and data[2] == FORMAT_VERSION
+    restored = decode_game(data)
+    assert_same(game, night_actions, restored)
+    assert restored[0].last_wolf_victim['role'] is Role.HARE
+    assert restored[0].players[503].username is None
+    assert [p.user_id for p in restored[0].get_alive_players()] == [p.user_id for p in game.get_alive_players()]
+
+    # Пустая игра и игра без ночных действий
+    empty = Game(chat_id=5)
+    assert_same(empty, None, decode_game(encode_game(empty)))
+    restored, restored_actions = decode_game(encode_game(game))
+    assert restored.votes == game.votes and not restored_actions.wolf_targets
+    print(f"✅ Снимок игры на 12 игроков: {len(data)} байт")
+
+
+def test_unknown_data_is_skipped():
+    """Старый декодер пропускает новые секции и новые поля в конце записи"""
+    print("🧪 Тестирование совместимости с новыми версиями схемы...")
+
+    game, night_actions = make_midgame()
+    data = bytearray(encode_game(game, night_actions))
+    data += bytes([99, 3, 1, 2, 3])  # секция из будущей версии
+    assert_same(game, night_actions, decode_game(bytes(data)))
+
+    # Новое поле в записи игрока
+    original = game_codec._encode_player
+
+    def encode_player_v2(player, record):
+        original(player, record)
+        record.uint(12345)
+        record.str("новое поле")
+
+    game_codec._encode_player = encode_player_v2
+    try:
+        data = encode_game(game, night_actions)
+    finally:
+        game_codec._encode_player = original
+    assert_same(game, night_actions, decode_game(data))
+    print("✅ Незнакомые данные пропущены")
+
+
+def test_missing_fields_get_defaults():
+    """Снимок старой версии без новых полей получает значения по умолчанию"""
+    print("🧪 Тестирование совместимости со старыми снимками...")
+
+    player = Player(user_id=7, username="old", role=Role.FOX, team=Team.PREDATORS, extra_lives=3)
+    original = game_codec._encode_player
+
+    def encode_player_v0(player, record):
+        # Запись до появления припасов и счетчиков
+        record.int(player.user_id)
+        record.str(player.username)
+        record.opt_str(None)
+        record.opt_str(None)
+        record.buffer += game_codec._PLAYER_CORE.pack(
+            game_codec.ROLE_CODES.index(player.role), game_codec.TEAM_CODES.index(player.team), 1)
+
+    game = Game(chat_id=-9)
+    game.players[7] = player
+    game_codec._encode_player = encode_player_v0
+    try:
+        data = encode_game(game)
+    finally:
+        game_codec._encode_player = original
+
+    restored = decode_game(data)[0].players[7]
+    assert (restored.role, restored.team, restored.is_alive) == (Role.FOX, Team.PREDATORS, True)
+    assert (restored.supplies, restored.max_supplies, restored.extra_lives) == (2, 2, 0)
+    print("✅ Старые снимки читаются")
+
+
+def test_invalid_data_is_rejected():
+    """Чужие, обрезанные и слишком новые данные вызывают CodecError"""
+    print("🧪 Тестирование проверки данных...")
+
+    data = encode_game(*make_midgame())
+    newer = MAGIC + bytes([FORMAT_VERSION + 1]) + data[3:]
+    for bad in (b"", b"{}", newer, data[:len(data) // 2], MAGIC + bytes([FORMAT_VERSION])):
+        try:
+            decode_game(bad)
+        except CodecError:
+            continue
+        raise AssertionError(f"Данные приняты: {bad[:10]!r}")
+    print("✅ Некорректные данные отклонены")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование бинарного формата снимков игры\n")
+    test_round_trip()
+    test_unknown_data_is_skipped()
+    test_missing_fields_get_defaults()
+    test_invalid_data_is_rejected()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты индексов живых игроков в Game (роли, команды, смерти)
+"""
+
+from game_logic import Game, GamePhase, Player, Role, Team
+from night_actions import NightActions
+
+
+def scan(game, role=None, team=None):
+    """Эталонная выборка перебором всех игроков"""
+    return [p.user_id for p in game.players.values()
+            if p.is_alive and (role is None or p.role == role) and (team is None or p.team == team)]
+
+
+def assert_consistent(game):
+    assert [p.user_id for p in game.get_alive_players()] == scan(game)
+    for role in Role:
+        assert sorted(p.user_id for p in game.get_players_by_role(role)) == sorted(scan(game, role=role))
+    for team in Team:
+        assert sorted(p.user_id for p in game.get_players_by_team(team)) == sorted(scan(game, team=team))
+        assert game.get_player_count_by_team(team) == len(scan(game, team=team))
+
+
+def test_indexes_follow_game_flow():
+    """Индексы обновляются при входе, выходе, распределении ролей и смерти"""
+    print("🧪 Тестирование индексов игры...")
+
+    game = Game(chat_id=-100, is_test_mode=False)
+    for user_id in range(1, 13):
+        assert game.add_player(user_id, f"user{user_id}")
+    assert game.remove_player(12)
+    assert game.leave_game(11)
+    assert_consistent(game)
+
+    assert game.start_game()
+    assert_consistent(game)
+    assert game.check_game_end() is None
+
+    wolf = game.get_players_by_role(Role.WOLF)[0]
+    wolf.die("test")
+    assert wolf not in game.get_alive_players()
+    assert_consistent(game)
+
+    # Прямые изменения (как в night_actions и fox_logic) тоже учитываются
+    for predator in game.get_players_by_team(Team.PREDATORS):
+        predator.is_alive = False
+    assert_consistent(game)
+    assert game.check_game_end() == Team.HERBIVORES
+    print("✅ Индексы согласованы с игроками")
+
+
+def test_direct_assignment_and_restore():
+    """Игроки, записанные в словарь напрямую или восстановленные из словаря, индексируются"""
+    print("🧪 Тестирование прямого заполнения игроков...")
+
+    game = Game(chat_id=-100)
+    game.players[1] = Player(user_id=1, username="wolf", role=Role.WOLF, team=Team.PREDATORS)
+    game.players[2] = Player(user_id=2, username="hare", role=Role.HARE, team=Team.HERBIVORES, is_alive=False)
+    game.players[3] = Player(user_id=3, username="mole", role=Role.MOLE, team=Team.HERBIVORES)
+    assert game.check_game_end() == Team.PREDATORS
+
+    replaced = game.players[3]
+    game.players[3] = Player(user_id=3, username="hare", role=Role.HARE, team=Team.HERBIVORES)
+    replaced.die()  # Замененный игрок больше не влияет на индексы
+    assert_consistent(game)
+
+    restored = Game.from_dict(game.to_dict())
+    assert_consistent(restored)
+    assert [p.user_id for p in restored.get_alive_players()] == [1, 3]
+
+    del restored.players[1]
+    assert restored.check_game_end() == Team.HERBIVORES
+    print("✅ Прямое заполнение индексируется")
+
+
+def test_night_completion_uses_roles():
+    """Проверка завершения ночи учитывает только живые активные роли"""
+    print("🧪 Тестирование проверки ночных действий...")
+
+    game = Game(chat_id=-100)
+    for user_id, role, team in [(1, Role.WOLF, Team.PREDATORS), (2, Role.MOLE, Team.HERBIVORES),
+                                (3, Role.HARE, Team.HERBIVORES), (4, Role.HARE, Team.HERBIVORES)]:
+        game.players[user_id] = Player(user_id=user_id, username=f"user{user_id}", role=role, team=team)
+    game.phase = GamePhase.NIGHT
+    night_actions = NightActions(game)
+
+    assert night_actions.set_wolf_target(1, 3)
+    assert not night_actions.are_all_actions_completed()
+    game.players[2].die()
+    assert night_actions.are_all_actions_completed()
+    print("✅ Ночь проверяется по индексам ролей")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование индексов игры\n")
+    test_indexes_follow_game_flow()
+    test_direct_assignment_and_restore()
+    test_night_completion_uses_roles()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
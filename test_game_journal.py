@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты журнала игр: события, снимки и восстановление после перезапуска
+"""
+
+import asyncio
+
+from game_journal import GameJournal, capture_state
+from journal_testing import MemoryJournalStore
+from game_logic import Game, GamePhase, Role
+from night_actions import NightActions
+
+
+def play_until_voting(journal: GameJournal, games: dict, chat_id: int = -100):
+    """Партия до середины голосования: вход, роли, ночь с ходами, день, голоса"""
+    game = Game(chat_id=chat_id, creator_id=1)
+    games[chat_id] = game
+    night_actions = NightActions(game)
+    game.add_player(1, "first")
+    journal.checkpoint(game, night_actions)
+    for user_id in range(2, 9):
+        game.add_player(user_id, f"user{user_id}")
+    game.leave_game(8)
+
+    game.assign_roles()
+    game.start_night()
+    game.current_round = 2
+    journal.checkpoint(game, night_actions)
+
+    roles = {}
+    for user_id, player in game.players.items():
+        roles.setdefault(player.role, []).append(user_id)
+    wolf = roles[Role.WOLF][0]
+    victim = next(uid for uid in game.players if uid != wolf and game.players[uid].role != Role.WOLF)
+    night_actions.set_wolf_target(wolf, victim)
+    if Role.FOX in roles:
+        night_actions.skip_action(roles[Role.FOX][0])
+
+    # Итоги ночи: смерть по событию, припасы - через событие смены фазы
+    night_actions.process_all_actions()
+    game.players[victim].die("wolf")
+    survivor = next(uid for uid, player in game.players.items() if player.is_alive)
+    game.players[survivor].supplies = 1
+    game.players[survivor].extra_lives = 2
+    game.start_day()
+    journal.checkpoint(game, night_actions)
+
+    game.start_voting()
+    journal.checkpoint(game, night_actions)
+    alive = [uid for uid, player in game.players.items() if player.is_alive]
+    game.vote(alive[0], alive[1])
+    game.vote(alive[1], None)
+    return game, night_actions
+
+
+def test_recovery_restores_full_state():
+    """После перезапуска игра, голоса и ночные цели совпадают с исходными"""
+    print("🧪 Тестирование восстановления из журнала...")
+
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store)
+    game, night_actions = play_until_voting(journal, games)
+    # Ночные цели текущей ночи: хранятся только в NightActions
+    night_actions.wolf_targets[1] = 2
+    journal.checkpoint(game, night_actions)
+    assert journal.flush()
+    expected = capture_state(game, night_actions)
+
+    restored = GameJournal({}, store=store).load()
+    assert len(restored) == 1
+    game2, night_actions2 = restored[0]
+    assert capture_state(game2, night_actions2) == expected
+    assert game2.phase == GamePhase.VOTING and game2.votes == game.votes
+    assert night_actions2.wolf_targets == night_actions.wolf_targets
+    assert night_actions2.skipped_actions == night_actions.skipped_actions
+    assert [p.user_id for p in game2.get_alive_players()] == [p.user_id for p in game.get_alive_players()]
+    print("✅ Состояние восстановлено полностью")
+
+
+def test_events_are_small_appends():
+    """Ходы и голоса дописываются событиями, снимок пишется раз в snapshot_interval событий"""
+    print("🧪 Тестирование событий и снимков...")
+
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store, snapshot_interval=1000)
+    game, night_actions = play_until_voting(journal, games)
+    journal.flush()
+
+    journal_id, snapshot_seq, _ = store.snapshots[game.chat_id]
+    types = [event[0] for _, event in sorted(store.events[journal_id].items())]
+    assert snapshot_seq == 0, "снимок только при начале журнала"
+    for event_type in ('join', 'leave', 'roles_assigned', 'night_action', 'death', 'phase_change', 'vote'):
+        assert event_type in types, f"нет события {event_type}"
+
+    # Событие голоса - только голос, без состояния игроков
+    vote = next(data for _, (event_type, data) in store.events[journal_id].items() if event_type == 'vote')
+    assert set(vote) == {'voter_id', 'target_id'}
+
+    # Ничего не изменилось - нечего писать
+    assert not journal.checkpoint(game, night_actions)
+
+    # Частые снимки сжимают хвост событий, результат восстановления тот же
+    store2, games2 = MemoryJournalStore(), {}
+    journal2 = GameJournal(games2, store=store2, snapshot_interval=3)
+    game2, night_actions2 = play_until_voting(journal2, games2)
+    journal2.checkpoint(game2, night_actions2)
+    journal2.flush()
+    journal_id2, snapshot_seq2, _ = store2.snapshots[game2.chat_id]
+    assert snapshot_seq2 > 0
+    assert all(seq > snapshot_seq2 for seq in store2.events[journal_id2])
+    assert len(store2.events[journal_id2]) < len(store.events[journal_id])
+    restored, restored_actions = GameJournal({}, store=store2).load()[0]
+    assert capture_state(restored, restored_actions) == capture_state(game2, night_actions2)
+    print("✅ События короткие, снимки сжимают журнал")
+
+
+def test_finished_games_are_discarded():
+    """Журнал завершенной игры удаляется, новая игра в чате начинает новый журнал"""
+    print("🧪 Тестирование удаления журналов...")
+
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store)
+    play_until_voting(journal, games, chat_id=-1)
+    play_until_voting(journal, games, chat_id=-2)
+    journal.flush()
+    old_journal = store.snapshots[-2][0]
+
+    async def scenario():
+        del games[-1]
+        # Новая игра в чате -2 заменяет старую
+        games[-2] = Game(chat_id=-2)
+        games[-2].add_player(5, "new")
+        journal.checkpoint(games[-2])
+        await journal.flush_async()
+
+    asyncio.run(scenario())
+    assert -1 not in store.snapshots
+    assert store.snapshots[-2][0] != old_journal and old_journal not in store.events
+    restored = GameJournal({}, store=store).load()
+    assert [(g.chat_id, list(g.players)) for g, _ in restored] == [(-2, [5])]
+    print("✅ Журналы завершенных игр удалены")
+
+
+def test_failed_flush_is_retried():
+    """При недоступной БД события остаются в очереди и записываются позже"""
+    print("🧪 Тестирование повторной записи...")
+
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store)
+    store.fail = True
+    game, night_actions = play_until_voting(journal, games)
+    assert not journal.flush()
+    assert journal.pending() > 0
+
+    store.fail = False
+    assert journal.flush() and journal.pending() == 0
+    restored, restored_actions = GameJournal({}, store=store).load()[0]
+    assert capture_state(restored, restored_actions) == capture_state(game, night_actions)
+    print("✅ Запись повторена без потерь")
+
+
+def test_events_flush_in_background():
+    """Ходы в event loop записываются пачкой в фоне, без явного flush"""
+    print("🧪 Тестирование фоновой записи...")
+
+    store, games = MemoryJournalStore(), {}
+    journal = GameJournal(games, store=store, flush_delay=0.01)
+
+    async def scenario():
+        game, _ = play_until_voting(journal, games)
+        await asyncio.sleep(0.1)
+        return game
+
+    game = asyncio.run(scenario())
+    assert journal.pending() == 0
+    assert store.writes == 1, "все события одного хода уходят одной записью"
+    assert GameJournal({}, store=store).load()[0][0].votes == game.votes
+    print("✅ Фоновая запись работает")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование журнала игр\n")
+    test_recovery_restores_full_state()
+    test_events_are_small_appends()
+    test_finished_games_are_discarded()
+    test_failed_flush_is_retried()
+    test_events_flush_in_background()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
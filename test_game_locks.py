@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Стресс-тест последовательной обработки обновлений одной игры
+
+Голоса и входы в игру нескольких чатов приходят вперемешку и обрабатываются
+параллельно: обновления одной игры не должны теряться и менять порядок,
+а разные игры должны обрабатываться одновременно.
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+from game_locks import ChatUpdateProcessor, GameLocks, game_chat_key
+from game_logic import Game, GamePhase
+
+CHATS = [-101, -102, -103, -104]
+PLAYERS_PER_CHAT = 12
+
+
+def make_update(chat_id: int, user_id: int, chat_type: str = "group"):
+    """Обновление Telegram с нужными effective_chat/effective_user"""
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id, type=chat_type),
+        effective_user=SimpleNamespace(id=user_id),
+    )
+
+
+class FakeBot:
+    """Обработчики с точками переключения между чтением и записью состояния игры"""
+
+    def __init__(self):
+        self.games = {chat_id: Game(chat_id=chat_id) for chat_id in CHATS}
+        self.player_games = {}
+        self.handled = {chat_id: [] for chat_id in CHATS}
+        self.counters = {chat_id: 0 for chat_id in CHATS}
+        self.running = 0
+        self.max_running = 0
+
+    async def _enter(self):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0)
+
+    async def join(self, chat_id: int, user_id: int, seq: int):
+        await self._enter()
+        game = self.games[chat_id]
+        counter = self.counters[chat_id]
+        await asyncio.sleep(random.random() / 1000)
+        game.add_player(user_id, f"user{user_id}")
+        self.player_games[user_id] = chat_id
+        self.counters[chat_id] = counter + 1
+        self.handled[chat_id].append(seq)
+        self.running -= 1
+
+    async def vote(self, user_id: int, target_id: int, seq: int):
+        await self._enter()
+        chat_id = self.player_games[user_id]
+        game = self.games[chat_id]
+        counter = self.counters[chat_id]
+        await asyncio.sleep(random.random() / 1000)
+        assert game.vote(user_id, target_id)
+        self.counters[chat_id] = counter + 1
+        self.handled[chat_id].append(seq)
+        self.running -= 1
+
+
+def build_traffic(bot: FakeBot):
+    """Перемешанные по чатам входы, затем голоса из личных чатов игроков"""
+    rng = random.Random(13)
+    joins = [(chat_id, chat_id * -1000 + n) for chat_id in CHATS for n in range(PLAYERS_PER_CHAT)]
+    rng.shuffle(joins)
+    votes = [(user_id, chat_id) for chat_id, user_id in joins]
+    rng.shuffle(votes)
+    return joins, votes
+
+
+async def run_traffic(bot: FakeBot, processor: ChatUpdateProcessor):
+    joins, votes = build_traffic(bot)
+    expected = {chat_id: [] for chat_id in CHATS}
+    seq = 0
+
+    tasks = []
+    for chat_id, user_id in joins:
+        expected[chat_id].append(seq)
+        update = make_update(chat_id, user_id)
+        tasks.append(asyncio.create_task(processor.process_update(update, bot.join(chat_id, user_id, seq))))
+        seq += 1
+    await asyncio.gather(*tasks)
+
+    for game in bot.games.values():
+        game.phase = GamePhase.VOTING
+    tasks = []
+    for user_id, chat_id in votes:
+        expected[chat_id].append(seq)
+        # Голос приходит из личного чата, игра определяется по player_games
+        update = make_update(user_id, user_id, chat_type="private")
+        target_id = chat_id * -1000 + (user_id + 1) % PLAYERS_PER_CHAT
+        tasks.append(asyncio.create_task(processor.process_update(update, bot.vote(user_id, target_id, seq))))
+        seq += 1
+    await asyncio.gather(*tasks)
+    return expected
+
+
+def test_game_chat_key():
+    """Личные обновления игрока относятся к чату его игры"""
+    print("🧪 Тестирование ключей обновлений...")
+
+    player_games = {7: -100}
+    assert game_chat_key(make_update(-100, 7), player_games) == -100
+    assert game_chat_key(make_update(7, 7, chat_type="private"), player_games) == -100
+    assert game_chat_key(make_update(8, 8, chat_type="private"), player_games) == 8
+    assert game_chat_key(SimpleNamespace(effective_chat=None), player_games) is None
+    print("✅ Ключи определяются верно")
+
+
+def test_interleaved_votes_and_joins():
+    """Вперемешку идущие входы и голоса: ничего не потеряно, порядок внутри игры сохранен"""
+    print("🧪 Стресс-тест голосов и входов...")
+
+    bot = FakeBot()
+    locks = GameLocks()
+    processor = ChatUpdateProcessor(lambda update: game_chat_key(update, bot.player_games), locks=locks)
+    expected = asyncio.run(run_traffic(bot, processor))
+
+    for chat_id, game in bot.games.items():
+        assert len(game.players) == PLAYERS_PER_CHAT
+        assert len(game.votes) == PLAYERS_PER_CHAT
+        assert bot.counters[chat_id] == 2 * PLAYERS_PER_CHAT, "потеряно обновление"
+        assert bot.handled[chat_id] == expected[chat_id], "нарушен порядок обновлений игры"
+
+    assert bot.max_running > 1, "разные игры должны обрабатываться параллельно"
+    stats = locks.get_stats()
+    assert stats['active_keys'] == 0 and stats['contended'] > 0
+    print(f"✅ Обработано {stats['acquired']} обновлений, одновременно до {bot.max_running}")
+
+
+def test_without_locks_updates_are_lost():
+    """Контроль: без блокировок те же обработчики теряют обновления"""
+    print("🧪 Контрольный прогон без блокировок...")
+
+    bot = FakeBot()
+    processor = ChatUpdateProcessor(lambda update: None)
+    asyncio.run(run_traffic(bot, processor))
+    assert any(counter < 2 * PLAYERS_PER_CHAT for counter in bot.counters.values())
+    print("✅ Без блокировок гонка воспроизводится")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование блокировок игр\n")
+    test_game_chat_key()
+    test_interleaved_votes_and_joins()
+    test_without_locks_updates_are_lost()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты расчета итогов игры (без реального PostgreSQL)
+"""
+
+from contextlib import contextmanager
+
+import database_psycopg2
+from game_logic import Game, Player, Role, Team
+from game_settlement import compute_settlement, format_nuts_info
+
+
+def make_game():
+    """Создает завершенную игру: живой волк, мертвый заяц, живой крот"""
+    game = Game(chat_id=-100)
+    for user_id, username, role, team, alive in [
+        (1, "wolf", Role.WOLF, Team.PREDATORS, True),
+        (2, "hare", Role.HARE, Team.HERBIVORES, False),
+        (3, "mole", Role.MOLE, Team.HERBIVORES, True),
+    ]:
+        game.players[user_id] = Player(user_id=user_id, username=username, role=role, team=team, is_alive=alive)
+    return game
+
+
+def test_compute_settlement():
+    """Награды и победы считаются по правилам чата"""
+    print("🧪 Тестирование расчета итогов...")
+
+    outcomes = {o.user_id: o for o in compute_settlement(make_game(), Team.HERBIVORES)}
+    assert (outcomes[1].won, outcomes[1].nuts) == (False, 50)
+    assert (outcomes[2].won, outcomes[2].nuts) == (True, 25)
+    assert (outcomes[3].won, outcomes[3].nuts) == (True, 100)
+
+    strict = {o.user_id: o.nuts for o in compute_settlement(make_game(), Team.HERBIVORES,
+                                                            loser_rewards_enabled=False,
+                                                            dead_rewards_enabled=False)}
+    assert strict == {1: 0, 2: 0, 3: 100}
+
+    no_winner = {o.user_id: (o.won, o.nuts) for o in compute_settlement(make_game(), None)}
+    assert no_winner == {1: (False, 50), 2: (False, 25), 3: (False, 50)}
+    print("✅ Итоги считаются корректно")
+
+
+def test_format_nuts_info():
+    """Никнейм из БД имеет приоритет над username"""
+    print("🧪 Тестирование блока наград...")
+    outcomes = compute_settlement(make_game(), Team.PREDATORS, loser_rewards_enabled=False)
+    text = format_nuts_info(outcomes, {1: {'nickname': 'Серый', 'first_name': None}})
+    assert "🌰 Серый: +100 орешков" in text
+    assert "hare" not in text and "mole" not in text
+    assert format_nuts_info([], {}) == ""
+    print("✅ Блок наград формируется")
+
+
+class FakeSettlementCursor:
+    """Курсор, имитирующий таблицы game_settlements и users"""
+
+    def __init__(self, store):
+        self.store = store
+        self.result = None
+
+    def execute(self, query, params=None):
+        self.store['queries'].append(query)
+        if query is database_psycopg2.SETTLEMENT_CLAIM_QUERY:
+            game_id = params[0]
+            if game_id in self.store['settled']:
+                self.result = [None]
+            else:
+                self.store['settled'][game_id] = params[3]
+                self.result = [{'game_id': game_id}]
+        elif query is database_psycopg2.SETTLEMENT_PAYLOAD_QUERY:
+            import json
+            self.result = [{'payload': json.loads(self.store['settled'][params[0]])}]
+        elif query is database_psycopg2.SETTLEMENT_USERS_QUERY:
+            self.result = [{'user_id': user_id, 'nickname': None, 'first_name': None} for user_id in params[0]]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.store = {'settled': {}, 'queries': []}
+
+    @contextmanager
+    def transaction(self):
+        yield FakeSettlementCursor(self.store)
+
+
+def test_settlement_is_idempotent():
+    """Повторный расчет той же игры не начисляет орешки второй раз"""
+    print("🧪 Тестирование идемпотентности расчета...")
+
+    fake = FakeDatabase()
+    original = database_psycopg2.db_connection
+    database_psycopg2.db_connection = fake
+    try:
+        outcomes = [o.to_dict() for o in compute_settlement(make_game(), Team.HERBIVORES)]
+        first = database_psycopg2.apply_game_settlement("game-1", -100, "herbivores", outcomes)
+        writes = len(fake.store['queries'])
+        second = database_psycopg2.apply_game_settlement("game-1", -100, "herbivores", outcomes)
+    finally:
+        database_psycopg2.db_connection = original
+
+    assert first['applied'] and not second['applied']
+    assert writes == 4, "Расчет должен занимать 4 запроса независимо от числа игроков"
+    assert database_psycopg2.SETTLEMENT_BALANCE_QUERY not in fake.store['queries'][writes:]
+    assert second['outcomes'] == outcomes
+    print("✅ Повторный расчет не начисляет орешки")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование итогов игры\n")
+    test_compute_settlement()
+    test_format_nuts_info()
+    test_settlement_is_idempotent()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты безголовой симуляции игр
+"""
+
+import database_psycopg2
+import item_effects
+from game_logic import Team
+from game_simulation import Agent, GameSimulator, PHASES
+
+
+class HuntPredatorsAgent(Agent):
+    """Сценарий: ночью все пропускают ход, днем все голосуют против первого живого хищника"""
+
+    def choose_vote(self, game, player, targets):
+        predators = [p for p in targets if p.team == Team.PREDATORS]
+        return predators[0].user_id if predators else None
+
+
+def test_random_games_are_reproducible():
+    """Одинаковое зерно дает одинаковые игры, все игры доходят до победителя"""
+    print("🧪 Тестирование воспроизводимости симуляции...")
+
+    first = GameSimulator(players=12, seed=7).run(30)
+    second = GameSimulator(players=12, seed=7).run(30)
+    assert [(r.winner, r.rounds, r.alive) for r in first] == [(r.winner, r.rounds, r.alive) for r in second]
+    assert all(r.winner is not None for r in first)
+    assert set(first[0].phase_times) <= set(PHASES)
+    print("✅ Симуляция воспроизводима")
+
+
+def test_scripted_agent_and_stubs():
+    """Сценарий изгнания хищников приводит к победе травоядных, подмены БД снимаются"""
+    print("🧪 Тестирование сценарного агента...")
+
+    originals = (database_psycopg2.get_user_nickname, item_effects.get_user_active_effects)
+    result = GameSimulator(players=6, agent=HuntPredatorsAgent(), seed=1).run(1)[0]
+    assert result.winner == Team.HERBIVORES
+    assert result.exiled == 2 and result.alive == 4
+    assert (database_psycopg2.get_user_nickname, item_effects.get_user_active_effects) == originals
+    print("✅ Сценарий отыгран без обращений к БД")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование симуляции игр\n")
+    test_random_games_are_reproducible()
+    test_scripted_agent_and_stubs()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
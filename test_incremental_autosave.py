@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты инкрементального автосохранения: версии игр и запись только изменений
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from types import SimpleNamespace
+
+import auto_save_manager
+from auto_save_manager import AutoSaveManager
+from game_logic import Game, GamePhase
+from state_persistence import StatePersistence
+
+
+class RecordingPersistence(StatePersistence):
+    """StatePersistence без БД: запоминает, что и из какого потока записывалось"""
+
+    def __init__(self, saved_chats=(), saved_players=None):
+        self.logger = logging.getLogger(__name__)
+        self.db = object()
+        self.saved_chats = list(saved_chats)
+        self.saved_players = dict(saved_players or {})
+        self.deltas = []
+        self.other_saves = []
+        self.threads = set()
+
+    def load_saved_keys(self):
+        return self.saved_chats, self.saved_players
+
+    def save_games_delta(self, game_rows, removed_chat_ids, player_rows=(), removed_user_ids=()):
+        self.threads.add(threading.get_ident())
+        self.deltas.append((game_rows, list(removed_chat_ids), list(player_rows), list(removed_user_ids)))
+        return True
+
+    def save_authorized_chats(self, authorized_chats):
+        self.other_saves.append('authorized_chats')
+        return True
+
+    def save_bot_state(self, state_type, state_data):
+        self.other_saves.append(state_type)
+        return True
+
+
+def make_bot(chats):
+    bot = SimpleNamespace(games={}, player_games={}, night_actions={}, night_interfaces={},
+                          authorized_chats={(chats[0], None)}, bot_token="token", shard=None)
+    for chat_id in chats:
+        game = Game(chat_id=chat_id)
+        for n in range(3):
+            user_id = -chat_id * 10 + n
+            game.add_player(user_id, f"user{user_id}")
+            bot.player_games[user_id] = chat_id
+        bot.games[chat_id] = game
+    return bot
+
+
+def test_game_version_tracks_mutations():
+    """Версия игры растет при изменении полей, игроков и голосов"""
+    print("🧪 Тестирование версии игры...")
+
+    game = Game(chat_id=-1)
+    version = game.version
+    game.add_player(1, "a")
+    game.add_player(2, "b")
+    assert game.version > version
+
+    version = game.version
+    game.players[1].supplies -= 1
+    assert game.version > version
+
+    version = game.version
+    game.phase = GamePhase.VOTING
+    game.vote(1, 2)
+    assert game.version > version
+
+    version = game.version
+    game.get_alive_players()
+    game.to_dict()
+    assert game.version == version, "чтение не должно менять версию"
+
+    # Удаленный игрок больше не влияет на игру
+    player = game.players.pop(2)
+    version = game.version
+    player.supplies = 0
+    assert game.version == version
+    print("✅ Версия игры отслеживает изменения")
+
+
+def test_only_changed_games_are_saved():
+    """Каждый цикл пишет только изменившиеся игры, одной пачкой и вне цикла событий"""
+    print("🧪 Тестирование инкрементального сохранения...")
+
+    persistence = RecordingPersistence(saved_chats=[-999], saved_players={9990: -999})
+    original = auto_save_manager.state_persistence
+    auto_save_manager.state_persistence = persistence
+    try:
+        bot = make_bot([-1, -2, -3])
+        manager = AutoSaveManager(bot)
+
+        async def scenario():
+            await manager.save_current_state()
+            first = persistence.deltas[-1]
+            assert len(first[0]) == 3 and first[1] == [-999]
+            assert len(first[2]) == 9 and first[3] == [9990]
+
+            # Ничего не изменилось - ничего не пишем
+            deltas = len(persistence.deltas)
+            other_saves = len(persistence.other_saves)
+            await manager.save_current_state()
+            assert len(persistence.deltas) == deltas
+            assert len(persistence.other_saves) == other_saves
+
+            # Изменилась одна игра
+            bot.games[-2].players[20].supplies -= 1
+            await manager.save_current_state()
+            rows = persistence.deltas[-1][0]
+            assert [row[0] for row in rows] == ["-2"]
+            players = json.loads(rows[0][3])
+            assert players["20"]["supplies"] == 1
+
+            # Игра закончилась, игроки вышли
+            del bot.games[-3]
+            for user_id in (30, 31, 32):
+                del bot.player_games[user_id]
+            await manager.save_current_state()
+            assert persistence.deltas[-1] == ([], [-3], [], [30, 31, 32])
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(scenario())
+        assert loop_thread not in persistence.threads, "запись должна идти вне цикла событий"
+        assert manager.get_save_status()['tracked_games'] == 2
+    finally:
+        auto_save_manager.state_persistence = original
+    print("✅ Сохраняются только изменения")
+
+
+def test_shard_keeps_other_games():
+    """Воркер шарда не удаляет сохраненные игры других шардов"""
+    print("🧪 Тестирование автосохранения в режиме шардов...")
+
+    from chat_sharding import shard_for
+    own = next(c for c in range(-10, -100, -1) if shard_for(c, 2) == 0)
+    foreign = next(c for c in range(-10, -100, -1) if shard_for(c, 2) == 1)
+    persistence = RecordingPersistence(saved_chats=[own, foreign])
+    original = auto_save_manager.state_persistence
+    auto_save_manager.state_persistence = persistence
+    try:
+        bot = make_bot([-200 if shard_for(-200, 2) == 0 else -201])
+        bot.shard = (0, 2)
+        asyncio.run(AutoSaveManager(bot).save_current_state())
+        assert persistence.deltas[-1][1] == [own]
+    finally:
+        auto_save_manager.state_persistence = original
+    print("✅ Чужие игры не затронуты")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование инкрементального автосохранения\n")
+    test_game_version_tracks_mutations()
+    test_only_changed_games_are_saved()
+    test_shard_keeps_other_games()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
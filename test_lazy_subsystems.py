@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты ленивой загрузки подсистем (леса, аналитика, дуэли)
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+from subsystems import SubsystemDisabled, SubsystemRegistry
+
+
+def test_bot_import_skips_optional_subsystems():
+    """import bot не загружает леса, SQLAlchemy и дуэли"""
+    print("🧪 Тестирование импорта bot.py...")
+
+    code = ("import sys, bot; "
+            "print(sorted(m for m in ('forest_handlers', 'database', 'sqlalchemy', 'duel_system') "
+            "if m in sys.modules))")
+    env = dict(os.environ)
+    env.setdefault('BOT_TOKEN', '123:abc')
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                            text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]", output
+    print("✅ Необязательные подсистемы не загружены при импорте")
+
+
+def test_handler_loads_on_first_call():
+    """Обработчик загружает модуль подсистемы при первом вызове и только один раз"""
+    print("🧪 Тестирование загрузки при первом обращении...")
+
+    calls = []
+    module = types.ModuleType('fake_forests')
+
+    async def handle_forests(update, context):
+        calls.append((update, context))
+        return "ok"
+
+    module.handle_forests = handle_forests
+    sys.modules['fake_forests'] = module
+    try:
+        registry = SubsystemRegistry(subsystems={'forests': ('fake_forests', "Леса")})
+        handler = registry.handler('forests', 'handle_forests')
+        assert not registry.is_loaded('forests')
+
+        assert asyncio.run(handler("update", "context")) == "ok"
+        assert asyncio.run(handler("update2", "context")) == "ok"
+        assert registry.is_loaded('forests') and len(calls) == 2
+        assert list(registry.get_stats()['loaded']) == ['forests']
+    finally:
+        del sys.modules['fake_forests']
+    print("✅ Подсистема загружена при первом вызове")
+
+
+def test_first_load_does_not_block_event_loop():
+    """Импорт подсистемы при первом вызове идет в отдельном потоке, остальные чаты не ждут"""
+    print("🧪 Тестирование загрузки вне event loop...")
+
+    module = types.ModuleType('fake_duels')
+
+    async def handle_duel(update, context):
+        return "ok"
+
+    module.handle_duel = handle_duel
+    sys.modules['fake_duels'] = module
+    registry = SubsystemRegistry(subsystems={'duels': ('fake_duels', "Дуэли")})
+    load, threads = registry.load, []
+
+    def slow_load(name):
+        threads.append(threading.current_thread())
+        time.sleep(0.2)  # импорт SQLAlchemy и моделей
+        return load(name)
+
+    registry.load = slow_load
+
+    async def scenario():
+        ticks = 0
+
+        async def other_chat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(other_chat())
+        result = await registry.handler('duels', 'handle_duel')("update", "context")
+        ticker.cancel()
+        return result, ticks
+
+    try:
+        result, ticks = asyncio.run(scenario())
+    finally:
+        del sys.modules['fake_duels']
+    assert result == "ok"
+    assert threads and threads[0] is not threading.main_thread()
+    assert ticks >= 5, ticks
+    print(f"✅ Пока загружалась подсистема, другой чат обработал {ticks} событий")
+
+
+def test_disabled_subsystem_is_never_loaded():
+    """Отключенная подсистема не загружается, обращение к ней - SubsystemDisabled"""
+    print("🧪 Тестирование отключенных подсистем...")
+
+    registry = SubsystemRegistry(disabled=['duels', ' forests', 'unknown'])
+    assert not registry.is_enabled('duels') and not registry.is_enabled('forests')
+    assert registry.is_enabled('analytics')
+    for name in ('duels', 'forests', 'missing'):
+        try:
+            registry.load(name)
+        except SubsystemDisabled:
+            continue
+        raise AssertionError(f"Подсистема {name} загружена")
+    assert registry.get_stats() == {'enabled': ['analytics'], 'disabled': ['duels', 'forests'], 'loaded': {}}
+    print("✅ Отключенные подсистемы не загружаются")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование ленивой загрузки подсистем\n")
+    test_bot_import_skips_optional_subsystems()
+    test_handler_loads_on_first_call()
+    test_first_load_does_not_block_event_loop()
+    test_disabled_subsystem_is_never_loaded()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты кэша статусов участников чатов
+"""
+
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, ChatMemberLeft, ChatMemberMember, ChatMemberOwner, ChatMemberUpdated, User
+
+from member_cache import ChatMemberCache
+
+CHAT_ID = -100
+OWNER, PLAYER, BOT = 1, 2, 99
+
+
+def user(user_id: int) -> User:
+    return User(user_id, f"user{user_id}", is_bot=user_id == BOT)
+
+
+class FakeBot:
+    """Бот с подсчетом запросов get_chat_member / get_chat_administrators"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_chat_administrators(self, chat_id):
+        self.calls.append(('admins', chat_id))
+        await asyncio.sleep(0.01)
+        return (ChatMemberOwner(user(OWNER), is_anonymous=False),)
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls.append(('member', chat_id, user_id))
+        return ChatMemberMember(user(user_id))
+
+
+def member_update(user_id: int, old, new) -> ChatMemberUpdated:
+    return ChatMemberUpdated(Chat(CHAT_ID, Chat.SUPERGROUP), user(OWNER), datetime.now(), old, new)
+
+
+def test_admin_list_warms_cache():
+    """Один запрос списка админов отвечает на все проверки «админ ли»"""
+    print("🧪 Тестирование списка администраторов...")
+
+    async def scenario():
+        bot, cache = FakeBot(), ChatMemberCache()
+        # Одновременные проверки при первом обращении ждут один запрос
+        results = await asyncio.gather(*(cache.is_admin(bot, CHAT_ID, uid) for uid in (OWNER, PLAYER, OWNER)))
+        owner = await cache.get_member(bot, CHAT_ID, OWNER)
+        return bot.calls, results, owner
+
+    calls, results, owner = asyncio.run(scenario())
+    assert results == [True, False, True]
+    assert calls == [('admins', CHAT_ID)], calls
+    assert owner.status == "creator"
+    print("✅ Список админов загружен одним запросом")
+
+
+def test_members_cached():
+    """Статус обычного участника запрашивается один раз"""
+    print("🧪 Тестирование статусов участников...")
+
+    async def scenario():
+        bot, cache = FakeBot(), ChatMemberCache()
+        statuses = [(await cache.get_member(bot, CHAT_ID, PLAYER)).status for _ in range(5)]
+        # Личный чат: списка админов нет, запрос участника один
+        private = [(await cache.get_member(bot, PLAYER, PLAYER)).status for _ in range(3)]
+        return bot.calls, statuses, private, cache.get_stats()
+
+    calls, statuses, private, stats = asyncio.run(scenario())
+    assert statuses == ["member"] * 5 and private == ["member"] * 3
+    assert calls == [('admins', CHAT_ID), ('member', CHAT_ID, PLAYER), ('member', PLAYER, PLAYER)], calls
+    assert stats['member_requests'] == 2 and stats['admin_requests'] == 1
+    print("✅ Статусы участников кэшируются")
+
+
+def test_updates_invalidate():
+    """Обновления chat_member меняют статус и список админов без запросов"""
+    print("🧪 Тестирование обновлений chat_member...")
+
+    async def scenario():
+        bot, cache = FakeBot(), ChatMemberCache()
+        assert not await cache.is_admin(bot, CHAT_ID, PLAYER)
+        assert (await cache.get_member(bot, CHAT_ID, PLAYER)).status == "member"
+
+        # Игрок вышел из чата, затем владелец лишился прав
+        cache.apply_update(member_update(PLAYER, ChatMemberMember(user(PLAYER)), ChatMemberLeft(user(PLAYER))))
+        left = (await cache.get_member(bot, CHAT_ID, PLAYER)).status
+        cache.apply_update(member_update(OWNER, ChatMemberOwner(user(OWNER), False), ChatMemberMember(user(OWNER))))
+        owner_is_admin = await cache.is_admin(bot, CHAT_ID, OWNER)
+        cache.apply_update(None)
+        return bot.calls, left, owner_is_admin, cache.updates_applied
+
+    calls, left, owner_is_admin, applied = asyncio.run(scenario())
+    assert left == "left" and not owner_is_admin
+    assert len(calls) == 2 and applied == 2, calls
+    print("✅ Обновления учтены без запросов к Telegram")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование кэша статусов участников\n")
+    test_admin_list_warms_cache()
+    test_members_cached()
+    test_updates_invalidate()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты очереди исходящих запросов: лимиты, приоритеты, RetryAfter и метрики
+"""
+
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from outbound_dispatcher import (
+    PRIORITY_CRITICAL, PRIORITY_LOW, PRIORITY_NORMAL, OutboundDispatcher, outbound_priority, send_priority
+)
+
+
+def make_sender(log: list):
+    """Запрос к Telegram: записывает (endpoint, chat_id, text) в порядке отправки"""
+    async def callback(endpoint, data, **kwargs):
+        log.append((endpoint, data.get('chat_id'), data.get('text')))
+        return {'ok': True}
+    return callback
+
+
+async def send(dispatcher, callback, chat_id, text, endpoint='sendMessage', priority=None):
+    data = {'chat_id': chat_id, 'text': text}
+    return await dispatcher.process_request(callback, (endpoint, data), {}, endpoint, data, priority)
+
+
+def test_critical_messages_go_first():
+    """При исчерпанном глобальном лимите важные сообщения уходят раньше косметических"""
+    print("🧪 Тестирование приоритетов...")
+
+    async def scenario():
+        log = []
+        callback = make_sender(log)
+        dispatcher = OutboundDispatcher(global_rate=50.0)
+        dispatcher._global.tokens = 0  # лимит только что исчерпан
+
+        tasks = [asyncio.create_task(send(dispatcher, callback, -1, "pin", 'pinChatMessage'))]
+        tasks.append(asyncio.create_task(send(dispatcher, callback, -2, "join")))
+        with outbound_priority(PRIORITY_LOW):
+            tasks.append(asyncio.create_task(send(dispatcher, callback, -3, "join edit")))
+
+        @send_priority(PRIORITY_CRITICAL)
+        async def start_night():
+            await send(dispatcher, callback, -4, "night")
+
+        tasks.append(asyncio.create_task(start_night()))
+        await asyncio.gather(*tasks)
+        await dispatcher.shutdown()
+        return [text for _, _, text in log], dispatcher.get_stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order[0] == "night" and order[1] == "join", order
+    assert set(order[2:]) == {"pin", "join edit"}
+    assert stats['sent'] == 4 and stats['max_queue_depth'] == 4 and stats['queue_depth'] == 0
+    assert set(stats['latency']) == {'critical', 'normal', 'low'}
+    print(f"✅ Порядок отправки: {order}")
+
+
+def test_chat_limits():
+    """Лимит группы задерживает только эту группу, другие чаты не ждут"""
+    print("🧪 Тестирование лимитов чатов...")
+
+    async def scenario():
+        log = []
+        callback = make_sender(log)
+        dispatcher = OutboundDispatcher(group_rate=10.0, group_burst=2, private_rate=10.0, private_burst=1)
+        started = time.monotonic()
+        await asyncio.gather(*(send(dispatcher, callback, -100, f"group {n}") for n in range(4)),
+                             send(dispatcher, callback, 7, "private 0"),
+                             send(dispatcher, callback, 7, "private 1"),
+                             send(dispatcher, callback, -200, "other group"))
+        elapsed = time.monotonic() - started
+        await dispatcher.shutdown()
+        return [text for _, _, text in log], elapsed
+
+    order, elapsed = asyncio.run(scenario())
+    # Два сообщения в группу -100 сразу, еще два - по 0.1 с; остальные чаты не ждут группу
+    assert order.index("other group") < order.index("group 2"), order
+    assert order.index("private 0") < order.index("group 2"), order
+    assert 0.15 <= elapsed < 1.0, elapsed
+    print(f"✅ Лимиты соблюдены за {elapsed:.2f} с")
+
+
+def test_retry_after_is_honoured():
+    """После RetryAfter чат ждет указанное время и запрос повторяется"""
+    print("🧪 Тестирование RetryAfter...")
+
+    async def scenario():
+        calls = []
+
+        async def callback(endpoint, data, **kwargs):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RetryAfter(0.2)
+            return {'ok': True}
+
+        dispatcher = OutboundDispatcher()
+        result = await send(dispatcher, callback, -5, "vote menu", priority=PRIORITY_CRITICAL)
+        stats = dispatcher.get_stats()
+        await dispatcher.shutdown()
+        return result, calls, stats
+
+    result, calls, stats = asyncio.run(scenario())
+    assert result == {'ok': True} and len(calls) == 2
+    assert calls[1] - calls[0] >= 0.19
+    assert stats['retries'] == 1
+
+    async def always_limited():
+        async def callback(endpoint, data, **kwargs):
+            raise RetryAfter(0.01)
+
+        dispatcher = OutboundDispatcher(max_retries=1)
+        try:
+            await send(dispatcher, callback, -5, "x")
+        except RetryAfter:
+            return True
+        finally:
+            await dispatcher.shutdown()
+        return False
+
+    assert asyncio.run(always_limited()), "после исчерпания повторов RetryAfter передается дальше"
+    print("✅ RetryAfter учтен")
+
+
+def test_unthrottled_endpoints_pass_through():
+    """Ответы на кнопки и запросы чтения не ждут лимитов"""
+    print("🧪 Тестирование запросов без лимитов...")
+
+    async def scenario():
+        log = []
+        dispatcher = OutboundDispatcher(global_rate=1.0)
+        dispatcher._global.tokens = 0
+        started = time.monotonic()
+        for endpoint in ('answerCallbackQuery', 'getChatMember', 'getChat'):
+            await send(dispatcher, make_sender(log), -1, None, endpoint)
+        elapsed = time.monotonic() - started
+        await dispatcher.shutdown()
+        return len(log), elapsed, dispatcher.get_stats()['sent']
+
+    count, elapsed, sent = asyncio.run(scenario())
+    assert count == 3 and elapsed < 0.1 and sent == 0
+    assert OutboundDispatcher().resolve_priority('unpinChatMessage') == PRIORITY_LOW
+    assert OutboundDispatcher().resolve_priority('sendMessage') == PRIORITY_NORMAL
+    print("✅ Запросы без лимитов не задерживаются")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование очереди исходящих запросов\n")
+    test_critical_messages_go_first()
+    test_chat_limits()
+    test_retry_after_is_honoured()
+    test_unthrottled_endpoints_pass_through()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты сигналов досрочного завершения фаз (ночь и голосование)
+"""
+
+import asyncio
+
+from game_logic import Game, Player, Role, Team
+from night_actions import NightActions
+
+
+def make_game():
+    """Игра с волком, лисой, кротом и двумя зайцами"""
+    game = Game(chat_id=-100)
+    for user_id, role, team in [
+        (1, Role.WOLF, Team.PREDATORS),
+        (2, Role.FOX, Team.PREDATORS),
+        (3, Role.MOLE, Team.HERBIVORES),
+        (4, Role.HARE, Team.HERBIVORES),
+        (5, Role.HARE, Team.HERBIVORES),
+    ]:
+        game.players[user_id] = Player(user_id=user_id, username=f"user{user_id}", role=role, team=team)
+    return game
+
+
+def test_night_signals_after_last_actor():
+    """Ночь сигнализирует о завершении только после хода последнего активного игрока"""
+    print("🧪 Тестирование сигнала ночных действий...")
+
+    game = make_game()
+    game.start_night()
+    night_actions = NightActions(game)
+
+    assert night_actions.set_wolf_target(1, 4)
+    assert not game.phase_completed.is_set()
+    assert night_actions.skip_action(2)
+    assert not game.phase_completed.is_set()
+    assert night_actions.set_mole_target(3, 1)
+    assert game.phase_completed.is_set()
+
+    # Новая фаза сбрасывает сигнал
+    game.start_day()
+    assert not game.phase_completed.is_set()
+    print("✅ Ночь завершается по сигналу")
+
+
+def test_voting_signals_when_everyone_voted():
+    """Голосование сигнализирует о завершении, когда проголосовали все"""
+    print("🧪 Тестирование сигнала голосования...")
+
+    game = make_game()
+    game.start_voting()
+    game.total_voters = len(game.get_alive_players())
+    game.voting_type = "exile"
+
+    for voter_id in (1, 2, 3, 4):
+        assert game.vote(voter_id, 5 if voter_id != 5 else 1)
+        assert not game.phase_completed.is_set()
+    assert game.vote(5, None)
+    assert game.phase_completed.is_set()
+    print("✅ Голосование завершается по сигналу")
+
+
+def test_waiter_wakes_without_polling():
+    """Ожидающий просыпается сразу по сигналу, а не по таймеру"""
+    print("🧪 Тестирование пробуждения ожидающего...")
+
+    async def scenario():
+        game = make_game()
+        game.start_voting()
+        game.total_voters = 1
+        game.voting_type = "exile"
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, game.vote, 1, 4)
+        started = loop.time()
+        await asyncio.wait_for(game.phase_completed.wait(), 5)
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) < 1
+    print("✅ Ожидающий просыпается по сигналу")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование досрочного завершения фаз\n")
+    test_night_signals_after_last_actor()
+    test_voting_signals_when_everyone_voted()
+    test_waiter_wakes_without_polling()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
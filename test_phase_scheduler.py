@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты планировщика дедлайнов фаз
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from game_logic import Game, GamePhase, Player, Role, Team
+from phase_scheduler import PhaseScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def noop():
+    pass
+
+
+def test_heap_order_and_replace():
+    """Дедлайны извлекаются по порядку, повторное планирование ключа заменяет запись"""
+    print("🧪 Тестирование порядка дедлайнов...")
+
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    for key, offset in [("a", 30), ("b", 10), ("c", 20)]:
+        scheduler.schedule(key, clock.now + offset, noop)
+    scheduler.schedule("a", clock.now + 5, noop)  # Заменяет прежний дедлайн "a"
+    assert scheduler.cancel("c")
+    assert len(scheduler) == 2
+
+    clock.now += 60
+    assert [handle.key for handle in scheduler.pop_due()] == ["a", "b"]
+    assert len(scheduler) == 0 and scheduler.next_deadline() is None
+    print("✅ Дедлайны извлекаются по порядку")
+
+
+def test_handle_acts_like_task():
+    """Запись отменяется как asyncio.Task и не трогает более новую запись ключа"""
+    print("🧪 Тестирование записи планировщика...")
+
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    old = scheduler.schedule(1, clock.now + 300, noop)
+    new = scheduler.schedule(1, clock.now + 120, noop)
+    assert old.done() and not new.done()
+    assert not old.cancel(), "Старая запись не должна отменять новую"
+    assert new.remaining() == 120
+    assert new.cancel() and new.done() and 1 not in scheduler
+    print("✅ Запись ведет себя как задача")
+
+
+def test_completion_fires_early():
+    """Сигнал завершения фазы срабатывает сразу, остальные игры ждут своих дедлайнов"""
+    print("🧪 Тестирование досрочного срабатывания...")
+
+    async def scenario():
+        scheduler = PhaseScheduler()
+        fired = []
+
+        async def on_deadline(key):
+            fired.append(key)
+
+        game = Game(chat_id=-100)
+        game.players[1] = Player(user_id=1, username="wolf", role=Role.WOLF, team=Team.PREDATORS)
+        game.start_voting()
+        game.total_voters = 1
+        game.voting_type = "exile"
+
+        scheduler.schedule(game.chat_id, game.phase_end_time, lambda: on_deadline(game.chat_id), tag=game.phase)
+        scheduler.schedule(-200, datetime.now() + timedelta(seconds=120), lambda: on_deadline(-200))
+        game.on_phase_completed = lambda: scheduler.expedite(game.chat_id, tag=game.phase)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        game.vote(1, None)
+        while not fired:
+            await asyncio.sleep(0.01)
+        elapsed = loop.time() - started
+        await scheduler.stop()
+        return fired, elapsed
+
+    fired, elapsed = asyncio.run(scenario())
+    assert fired == [-100] and elapsed < 1
+    print("✅ Фаза завершается сразу после сигнала")
+
+
+def test_deadline_survives_restart():
+    """phase_end_time сохраняется в состоянии игры, просроченный дедлайн срабатывает при старте"""
+    print("🧪 Тестирование восстановления дедлайна...")
+
+    game = Game(chat_id=-100)
+    game.start_day()
+    restored = Game.from_dict(game.to_dict())
+    assert restored.phase == GamePhase.DAY
+    assert restored.phase_end_time == game.phase_end_time
+
+    async def scenario():
+        scheduler = PhaseScheduler()
+        fired = asyncio.Event()
+
+        async def on_deadline():
+            fired.set()
+
+        # Бот был выключен дольше, чем длилась фаза
+        scheduler.schedule(restored.chat_id, restored.phase_end_time - timedelta(seconds=600), on_deadline)
+        await scheduler.start()
+        await asyncio.wait_for(fired.wait(), 1)
+        await scheduler.stop()
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['fired'] == 1 and stats['scheduled'] == 0
+    print("✅ Дедлайн восстанавливается после перезапуска")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование планировщика фаз\n")
+    test_heap_order_and_replace()
+    test_handle_acts_like_task()
+    test_completion_fires_early()
+    test_deadline_survives_restart()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
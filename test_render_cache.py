@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты кэша клавиатур фазы: меню голосования, ночные меню и тексты ролей
+"""
+
+import gc
+import weakref
+
+from game_logic import Game, Role, Team
+from night_actions import NightActions
+from render_cache import GameRenderCache, role_info, role_intro
+
+
+def make_game(players: int = 8):
+    """Игра в начале ночи с распределенными ролями"""
+    game = Game(chat_id=-42, creator_id=1)
+    for user_id in range(1, players + 1):
+        game.add_player(user_id, f"user{user_id}")
+    game.assign_roles()
+    game.start_night()
+    return game
+
+
+def buttons(markup):
+    return [[(button.text, button.callback_data) for button in row] for row in markup.inline_keyboard]
+
+
+def test_voting_menu_built_once():
+    """Строки меню голосования строятся один раз, меню игрока - без него самого"""
+    print("🧪 Тестирование меню голосования...")
+
+    game = make_game()
+    game.start_voting()
+    lookups = []
+    render = GameRenderCache(game, lambda player: lookups.append(player.user_id) or f"@{player.username}")
+
+    menus = {user_id: buttons(render.voting_markup(user_id)) for user_id in game.players.alive}
+    assert menus[3][0] == [("🗳️ @user1", "vote_1")]
+    assert ("🗳️ @user3", "vote_3") not in [row[0] for row in menus[3]]
+    assert menus[3][-1] == [("⏭️ Пропустить голосование", "vote_skip")]
+    assert len(menus[3]) == len(game.players.alive)
+    assert render.builds == 1 and sorted(lookups) == sorted(game.players.alive), "одно имя на игрока за фазу"
+
+    # Смерть игрока меняет состав живых: строки строятся заново
+    game.players[2].die("exile")
+    assert ("🗳️ @user2", "vote_2") not in [row[0] for row in buttons(render.voting_markup(3))]
+    assert render.builds == 2
+    print("✅ Меню голосования собирается из общих строк")
+
+
+def test_night_menu_matches_actions():
+    """Ночное меню: цели роли, отметка текущей цели, пропуск хода, сон зайца"""
+    print("🧪 Тестирование ночных меню...")
+
+    game = make_game(10)
+    night_actions = NightActions(game)
+    render = GameRenderCache(game, lambda player: player.username)
+    wolf = game.get_players_by_role(Role.WOLF)[0]
+    victim = next(p for p in game.get_alive_players() if p.role not in (Role.WOLF, Role.FOX))
+    night_actions.set_wolf_target(wolf.user_id, victim.user_id)
+
+    menu = buttons(render.night_markup(wolf, night_actions.get_player_actions(wolf.user_id)))
+    expected = [[(("✅ " if p.user_id == victim.user_id else "") + p.username, f"wolf_kill_{p.user_id}")]
+                for p in night_actions.get_player_actions(wolf.user_id)["targets"]]
+    assert menu == expected + [[("⏭️ Пропустить ход", "wolf_skip")]]
+
+    hare = game.get_players_by_role(Role.HARE)[0]
+    assert buttons(render.night_markup(hare, {})) == [[("😴 Спать", f"hare_skip_{hare.user_id}")]]
+
+    # Целей нет (бобру некого защищать) или ночных действий нет вовсе
+    beaver = next(iter(game.get_players_by_role(Role.BEAVER)), None)
+    if beaver:
+        assert buttons(render.night_markup(beaver, night_actions.get_player_actions(beaver.user_id))) == \
+            [[("⏭️ Пропустить ход", "beaver_skip")]]
+    assert buttons(render.night_markup(wolf, None)) == []
+    print("✅ Ночные меню совпадают с доступными действиями")
+
+
+def test_static_texts_and_lifetime():
+    """Тексты ролей собраны заранее, кэш не удерживает завершенную игру"""
+    print("🧪 Тестирование текстов ролей...")
+
+    assert role_info(Role.FOX)["name"] == "🦊 Лиса"
+    assert role_info(None)["name"] == "Неизвестно"
+    intro = role_intro(Role.WOLF, Team.PREDATORS)
+    assert "👤 🐺 Волк" in intro and "🦁 Хищники" in intro
+    assert role_intro(Role.WOLF, Team.PREDATORS) is intro
+
+    caches = weakref.WeakKeyDictionary()
+    game = make_game()
+    caches[game] = GameRenderCache(game, lambda player: player.username)
+    del game
+    gc.collect()
+    assert len(caches) == 0
+    print("✅ Тексты ролей общие, кэш освобождается вместе с игрой")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование кэша клавиатур фазы\n")
+    test_voting_menu_built_once()
+    test_night_menu_matches_actions()
+    test_static_texts_and_lifetime()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты анализа баланса ролей методом Монте-Карло
+"""
+
+import logging
+
+import pytest
+
+from game_logic import Team
+from game_simulation import GameSimulator
+from role_balance import (
+    PREDATORS_WIN, UNFINISHED, RoleBalanceSimulator, game_role_counts, percentage_role_counts
+)
+
+# Анализ баланса требует NumPy (requirements_analysis.txt), боту он не нужен
+np = pytest.importorskip("numpy")
+
+
+def test_role_counts():
+    """Распределения ролей покрывают всех игроков"""
+    print("🧪 Тестирование распределений ролей...")
+
+    distribution = {'wolves': 0.25, 'fox': 0.15, 'hares': 0.35, 'mole': 0.15, 'beaver': 0.10}
+    for players in range(3, 21):
+        counts = percentage_role_counts(players, distribution)
+        assert sum(counts.values()) == players and counts['wolves'] >= 1, (players, counts)
+        assert sum(game_role_counts(players).values()) == players
+    print("✅ Распределения корректны")
+
+
+def test_simulation_is_reproducible_and_batched():
+    """Одинаковое зерно дает одинаковые итоги, пакеты не теряют игры"""
+    print("🧪 Тестирование воспроизводимости...")
+
+    counts = game_role_counts(8)
+    first = RoleBalanceSimulator(counts, seed=5).run(5000, batch_size=1500)
+    second = RoleBalanceSimulator(counts, seed=5).run(5000, batch_size=1500)
+    assert len(first.outcomes) == len(first.nights) == 5000
+    assert (first.outcomes == second.outcomes).all() and (first.nights == second.nights).all()
+    assert first.nights.min() >= 1 and first.win_rate(UNFINISHED) == 0.0
+    assert all(0.0 <= rate <= 1.0 for rate in first.survivors.values())
+    print("✅ Симуляция воспроизводима")
+
+
+def test_matches_game_core():
+    """Доля побед хищников совпадает с полной симуляцией игрового ядра"""
+    print("🧪 Сравнение с игровым ядром...")
+
+    logging.disable(logging.CRITICAL)
+    try:
+        core = GameSimulator(players=6, seed=11).run(400)
+    finally:
+        logging.disable(logging.NOTSET)
+    core_rate = sum(result.winner == Team.PREDATORS for result in core) / len(core)
+    report = RoleBalanceSimulator(game_role_counts(6), seed=11).run(50000)
+    assert abs(report.win_rate(PREDATORS_WIN) - core_rate) < 0.06, (report.win_rate(PREDATORS_WIN), core_rate)
+    print(f"✅ Хищники: {report.win_rate(PREDATORS_WIN):.1%} (ядро {core_rate:.1%})")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование анализа баланса ролей\n")
+    test_role_counts()
+    test_simulation_is_reproducible_and_batched()
+    test_matches_game_core()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты кэша профилей пользователей для отображаемых имен (без реального PostgreSQL)
+"""
+
+import database_psycopg2
+from game_logic import Game, Player
+from night_actions import NightActions
+
+
+class FakeUsersTable:
+    """Подменяет fetch_query/fetch_one/execute_query таблицей users в памяти"""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = []
+
+    def fetch_query(self, query, params=None, fetch_one=False):
+        self.queries.append(query)
+        user_ids = params[0]
+        return [dict(self.users[user_id], user_id=user_id) for user_id in user_ids if user_id in self.users]
+
+    def fetch_one(self, query, params=None):
+        # Проверка занятости никнейма
+        self.queries.append(query)
+        return None
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+        nickname, user_id = params
+        self.users[user_id]['nickname'] = nickname
+        return 1
+
+    def __enter__(self):
+        self.originals = (database_psycopg2.fetch_query, database_psycopg2.fetch_one,
+                          database_psycopg2.execute_query)
+        database_psycopg2.fetch_query = self.fetch_query
+        database_psycopg2.fetch_one = self.fetch_one
+        database_psycopg2.execute_query = self.execute_query
+        database_psycopg2.user_profile_cache.clear()
+        return self
+
+    def __exit__(self, *exc):
+        (database_psycopg2.fetch_query, database_psycopg2.fetch_one,
+         database_psycopg2.execute_query) = self.originals
+        database_psycopg2.user_profile_cache.clear()
+
+
+def test_prefetch_serves_names_from_memory():
+    """После загрузки профилей игры имена не требуют запросов к БД"""
+    print("🧪 Тестирование загрузки профилей игры...")
+
+    users = {i: {'nickname': f"Ник{i}" if i % 2 else None, 'first_name': f"Имя{i}"} for i in range(1, 13)}
+    game = Game(chat_id=-100)
+    for user_id in users:
+        game.players[user_id] = Player(user_id=user_id, username=f"user{user_id}")
+    night_actions = NightActions(game)
+
+    with FakeUsersTable(users) as table:
+        database_psycopg2.prefetch_user_profiles(list(game.players.keys()) + [999])
+        assert len(table.queries) == 1
+
+        # Меню голосования: каждый игрок видит всех остальных
+        names = [night_actions.get_display_name(target.user_id, target.username)
+                 for _ in game.players.values() for target in game.players.values()]
+        assert len(table.queries) == 1, "Имена должны браться из кэша"
+        assert "Ник1" in names and "@user2" in names
+
+        # Пользователь без записи в БД тоже кэшируется
+        assert database_psycopg2.get_user_nickname(999) is None
+        assert len(table.queries) == 1
+    print("✅ Имена игроков берутся из памяти")
+
+
+def test_nickname_change_invalidates():
+    """set_user_nickname сбрасывает профиль в кэше"""
+    print("🧪 Тестирование сброса профиля при смене никнейма...")
+
+    with FakeUsersTable({1: {'nickname': None, 'first_name': "Имя"}}) as table:
+        assert database_psycopg2.get_user_nickname(1) is None
+        assert database_psycopg2.set_user_nickname(1, "Лис")
+        assert table.users[1]['nickname'] == "Лис"
+        # Профиль сброшен: никнейм перечитывается из БД одним запросом
+        queries = len(table.queries)
+        assert database_psycopg2.get_user_nickname(1) == "Лис"
+        assert len(table.queries) == queries + 1
+    print("✅ Смена никнейма видна сразу")
+
+
+def test_cached_nickname_never_queries():
+    """get_cached_user_nickname (теги игроков в обработчиках) не обращается к БД"""
+    print("🧪 Тестирование никнейма из кэша...")
+
+    with FakeUsersTable({1: {'nickname': "Лис", 'first_name': "Имя"}}) as table:
+        assert database_psycopg2.get_cached_user_nickname(1) is None
+        assert table.queries == []
+        database_psycopg2.prefetch_user_profiles([1])
+        assert database_psycopg2.get_cached_user_nickname(1) == "Лис"
+        assert len(table.queries) == 1
+    print("✅ Никнейм берется только из кэша")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование кэша профилей\n")
+    test_prefetch_serves_names_from_memory()
+    test_nickname_change_invalidates()
+    test_cached_nickname_never_queries()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тесты настроек приема обновлений (polling / webhook)
+"""
+
+import asyncio
+import os
+from unittest import mock
+
+from telegram.ext import Application, ExtBot, TypeHandler
+
+from game_locks import ChatUpdateProcessor
+from webhook_ingress import POLLING, WEBHOOK, IngressConfig, configure_builder, limit_in_flight
+
+
+def test_config_from_env():
+    """Режим и параметры webhook читаются из окружения"""
+    print("🧪 Тестирование настроек из окружения...")
+
+    with mock.patch.dict(os.environ, {}, clear=True):
+        config = IngressConfig.from_env()
+        assert config.mode == POLLING
+        config.validate()
+
+    env = {"BOT_MODE": "Webhook", "WEBHOOK_URL": "https://bot.example.com/", "PORT": "8080",
+           "WEBHOOK_PATH": "/tg/", "WEBHOOK_SECRET": "s3cret", "UPDATE_QUEUE_SIZE": "64"}
+    with mock.patch.dict(os.environ, env, clear=True):
+        config = IngressConfig.from_env()
+    assert (config.mode, config.port, config.queue_size) == (WEBHOOK, 8080, 64)
+    assert config.max_in_flight == 512
+    assert config.public_url == "https://bot.example.com/tg"
+    config.validate()
+    print("✅ Настройки прочитаны")
+
+
+def test_webhook_requires_secret():
+    """Webhook без секретного токена не запускается"""
+    print("🧪 Тестирование обязательного секрета...")
+
+    for config in (IngressConfig(mode=WEBHOOK, webhook_url="https://bot.example.com"),
+                   IngressConfig(mode=WEBHOOK, secret_token="s3cret")):
+        try:
+            config.validate()
+        except ValueError:
+            continue
+        raise AssertionError(f"Конфигурация принята: {config}")
+
+    with mock.patch.dict(os.environ, {"BOT_MODE": "longpoll"}, clear=True):
+        try:
+            IngressConfig.from_env()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Неизвестный режим принят")
+    print("✅ Небезопасные настройки отклонены")
+
+
+def test_update_queue_is_bounded():
+    """Очередь обновлений приложения ограничена"""
+    print("🧪 Тестирование ограниченной очереди...")
+
+    config = IngressConfig(queue_size=32)
+    application = configure_builder(Application.builder().token("123:abc"), config).build()
+    assert application.update_queue.maxsize == 32
+    print("✅ Очередь ограничена")
+
+
+def test_in_flight_updates_are_bounded():
+    """Приложение не забирает обновления сверх предела обрабатываемых, очередь тормозит прием"""
+    print("🧪 Тестирование предела обновлений в обработке...")
+
+    async def scenario():
+        release = asyncio.Event()
+        running = []
+
+        async def handle(update, context):
+            running.append(update)
+            await release.wait()
+
+        config = IngressConfig(queue_size=2, max_in_flight=3)
+        processor = ChatUpdateProcessor(lambda update: None)
+        builder = configure_builder(Application.builder().token("123:abc"), config)
+        application = builder.concurrent_updates(processor).build()
+        assert limit_in_flight(application, processor)
+        application.add_handler(TypeHandler(object, handle))
+
+        queue = application.update_queue
+        # Без обращения к Telegram (getMe) при запуске приложения
+        with mock.patch.object(ExtBot, "initialize", mock.AsyncMock()), \
+                mock.patch.object(ExtBot, "shutdown", mock.AsyncMock()), \
+                mock.patch.object(ExtBot, "id", new_callable=mock.PropertyMock, return_value=123):
+            async with application:
+                await application.start()
+                for update in range(5):
+                    await asyncio.wait_for(queue.put(update), timeout=1)
+                await asyncio.sleep(0.05)
+                # 3 в обработке, 2 ждут в очереди; следующее обновление не принимается
+                assert len(running) == 3 and queue.in_flight == 3 and queue.full()
+                blocked = asyncio.create_task(queue.put(5))
+                await asyncio.sleep(0.05)
+                assert not blocked.done()
+
+                release.set()
+                await asyncio.wait_for(blocked, timeout=1)
+                while len(running) < 6:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.01)
+                assert queue.in_flight == 0 and queue.peak_in_flight == 3
+                await application.stop()
+
+    asyncio.run(scenario())
+    print("✅ Обновлений в обработке не больше предела")
+
+
+def main():
+    """Главная функция тестирования"""
+    print("🚀 Тестирование приема обновлений\n")
+    test_config_from_env()
+    test_webhook_requires_secret()
+    test_update_queue_is_bounded()
+    test_in_flight_updates_are_bounded()
+    print("\n🎉 Все тесты пройдены!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Прием обновлений Telegram: webhook или long polling
+
+Режим выбирается переменной окружения BOT_MODE (polling по умолчанию).
+В режиме webhook встроенный сервер python-telegram-bot проверяет секретный
+токен (заголовок X-Telegram-Bot-Api-Secret-Token), кладет обновление в
+очередь и сразу отвечает 200.
+
+При параллельной обработке python-telegram-bot забирает обновление из
+очереди сразу и запускает для него задачу, поэтому одна ограниченная
+очередь не тормозит прием: задач в обработке становится сколько угодно.
+UpdateQueue отдает обновление только при свободном месте среди
+обрабатываемых (max_in_flight), место освобождает ChatUpdateProcessor по
+окончании обработки. Когда обработчики не успевают, очередь заполняется,
+ответ webhook (и следующий запрос getUpdates) задерживается до
+освобождения места, и Telegram сам притормаживает доставку.
+
+Переменные окружения:
+    BOT_MODE            polling | webhook
+    WEBHOOK_URL         Публичный адрес, например https://bot.example.com
+    WEBHOOK_LISTEN      Адрес для прослушивания (0.0.0.0)
+    WEBHOOK_PORT        Порт (по умолчанию PORT или 8443)
+    WEBHOOK_PATH        Путь webhook (по умолчанию webhook)
+    WEBHOOK_SECRET      Секретный токен (обязателен в режиме webhook)
+    WEBHOOK_MAX_CONNECTIONS  Одновременных соединений от Telegram (1-100)
+    UPDATE_QUEUE_SIZE   Размер очереди обновлений
+    MAX_IN_FLIGHT_UPDATES  Обновлений в обработке одновременно (включая ждущие блокировку игры)
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from telegram import Update
+from telegram.error import Conflict
+from telegram.ext import Application, ApplicationBuilder, ContextTypes
+
+from game_locks import ChatUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+POLLING, WEBHOOK = "polling", "webhook"
+
+# chat_member Telegram по умолчанию не присылает, а по нему обновляется кэш прав участников
+ALLOWED_UPDATES = Update.ALL_TYPES
+
+
+@dataclass(frozen=True)
+class IngressConfig:
+    """Настройки приема обновлений"""
+    mode: str = POLLING
+    webhook_url: Optional[str] = None
+    listen: str = "0.0.0.0"
+    port: int = 8443
+    path: str = "webhook"
+    secret_token: Optional[str] = None
+    max_connections: int = 40
+    queue_size: int = 1000
+    max_in_flight: int = 512
+
+    @classmethod
+    def from_env(cls) -> 'IngressConfig':
+        """Читает настройки из переменных окружения"""
+        mode = os.environ.get('BOT_MODE', POLLING).strip().lower()
+        if mode not in (POLLING, WEBHOOK):
+            raise ValueError(f"Неизвестный BOT_MODE: {mode} (ожидается {POLLING} или {WEBHOOK})")
+        return cls(
+            mode=mode,
+            webhook_url=os.environ.get('WEBHOOK_URL') or None,
+            listen=os.environ.get('WEBHOOK_LISTEN', '0.0.0.0'),
+            port=int(os.environ.get('WEBHOOK_PORT') or os.environ.get('PORT') or 8443),
+            path=os.environ.get('WEBHOOK_PATH', 'webhook').strip('/'),
+            secret_token=os.environ.get('WEBHOOK_SECRET') or None,
+            max_connections=int(os.environ.get('WEBHOOK_MAX_CONNECTIONS', 40)),
+            queue_size=int(os.environ.get('UPDATE_QUEUE_SIZE', 1000)),
+            max_in_flight=int(os.environ.get('MAX_IN_FLIGHT_UPDATES', 512)),
+        )
+
+    def validate(self):
+        """Проверяет, что для режима webhook заданы адрес и секрет"""
+        if self.mode != WEBHOOK:
+            return
+        if not self.webhook_url:
+            raise ValueError("WEBHOOK_URL не установлен для режима webhook")
+        if not self.secret_token:
+            raise ValueError("WEBHOOK_SECRET не установлен: без него webhook примет запрос от кого угодно")
+
+    @property
+    def public_url(self) -> Optional[str]:
+        if not self.webhook_url:
+            return None
+        return f"{self.webhook_url.rstrip('/')}/{self.path}"
+
+
+class UpdateQueue(asyncio.Queue):
+    """
+    Очередь обновлений, которая не отдает обновление без свободного места в обработке
+
+    Пока ограничение не включено (limit_in_flight), ведет себя как asyncio.Queue.
+    """
+
+    def __init__(self, maxsize: int, max_in_flight: int):
+        """
+        Args:
+            maxsize: Размер очереди
+            max_in_flight: Обновлений в обработке одновременно
+        """
+        super().__init__(maxsize)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def limit_in_flight(self) -> Callable[[], None]:
+        """
+        Включает ограничение обрабатываемых обновлений
+
+        Returns:
+            Callable[[], None]: Освобождение места; вызывается по окончании обработки каждого обновления
+        """
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self.release
+
+    def release(self):
+        """Обработка обновления завершена"""
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def get(self) -> Any:
+        if self._slots is None:
+            return await super().get()
+        # Место занимается до извлечения: при полной обработке обновления копятся в очереди
+        await self._slots.acquire()
+        try:
+            item = await super().get()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return item
+
+
+def configure_builder(builder: ApplicationBuilder, config: IngressConfig) -> ApplicationBuilder:
+    """
+    Ограничивает очередь обновлений приложения
+
+    Args:
+        builder: ApplicationBuilder бота
+        config: Настройки приема
+
+    Returns:
+        ApplicationBuilder: Тот же builder
+    """
+    return builder.update_queue(UpdateQueue(config.queue_size, config.max_in_flight))
+
+
+def limit_in_flight(application: Application, processor: ChatUpdateProcessor) -> bool:
+    """
+    Связывает очередь приложения с обработчиком обновлений
+
+    Args:
+        application: Приложение, собранное с configure_builder и processor
+        processor: Обработчик обновлений приложения (освобождает место по окончании обработки)
+
+    Returns:
+        bool: True, если очередь поддерживает ограничение
+    """
+    queue = application.update_queue
+    if not isinstance(queue, UpdateQueue):
+        return False
+    processor.on_done = queue.limit_in_flight()
+    return True
+
+
+async def log_ingress_error(update: object, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик ошибок приложения
+
+    Conflict означает второй экземпляр бота с тем же токеном: python-telegram-bot
+    сам повторяет запрос с нарастающей задержкой, не блокируя цикл событий.
+    """
+    if isinstance(context.error, Conflict):
+        logger.error("❌ Ошибка Conflict: запущено несколько экземпляров бота! "
+                     "Остановите лишний экземпляр или включите BOT_MODE=webhook")
+        return
+    logger.error(f"❌ Ошибка при обработке обновления: {context.error}", exc_info=context.error)
+
+
+def run_application(application: Application, config: IngressConfig):
+    """
+    Запускает приложение в выбранном режиме (блокирующий вызов)
+
+    Args:
+        application: Приложение бота
+        config: Настройки приема
+    """
+    config.validate()
+    if config.mode == WEBHOOK:
+        logger.info(f"🚀 Режим webhook: {config.listen}:{config.port}/{config.path}, "
+                    f"очередь {config.queue_size}, в обработке до {config.max_in_flight}")
+        application.run_webhook(
+            listen=config.listen,
+            port=config.port,
+            url_path=config.path,
+            webhook_url=config.public_url,
+            secret_token=config.secret_token,
+            max_connections=config.max_connections,
+            bootstrap_retries=-1,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+    else:
+        logger.info("🚀 Режим long polling")
+        application.run_polling(bootstrap_retries=-1, allowed_updates=ALLOWED_UPDATES)